@@ -0,0 +1,86 @@
+import json
+import sqlite3
+
+from lumier_pdf.batch import ResultadoTrabajo, ResumenLote, generar_lote, main, normalizar
+from lumier_pdf.calculos import EJEMPLO_COMPLETO
+from lumier_pdf.carga import ESQUEMA_SQLITE, ESQUEMA_SQLITE_ESTADOS
+
+
+def test_lote_aisla_fallos_y_escribe_un_pdf_por_proyecto(tmp_path):
+    proyectos = [
+        dict(EJEMPLO_COMPLETO, id="calle-mayor-15", nombre="Calle Mayor 15"),
+        {"id": "incompleto", "precio_compra": 1.0},
+        dict(EJEMPLO_COMPLETO, salida=str(tmp_path / "a_medida.pdf")),
+    ]
+
+    resumen = generar_lote(iter(proyectos), tmp_path / "dossiers", workers=2)
+
+    assert resumen.total == 3
+    assert [r.id for r in resumen.fallidos] == ["incompleto"]
+    assert (tmp_path / "dossiers" / "calle-mayor-15.pdf").read_bytes().startswith(b"%PDF")
+    assert (tmp_path / "a_medida.pdf").exists()
+    assert resumen.pdfs_por_segundo > 0
+
+
+def test_salidas_duplicadas_no_se_sobrescriben(tmp_path):
+    data = {"precioCompra": 1065000, "m2Construidos": 158, "calidad": 3, "precioVenta": 1600000}
+    filas = [
+        {"slug": "calle-mayor-15", "version_number": 1, "data": data},
+        {"slug": "calle-mayor-15", "version_number": 2, "data": dict(data, precioVenta=1700000)},
+        {"slug": "calle-mayor-15", "version_number": 2, "data": data},
+    ]
+
+    resumen = generar_lote((normalizar(f) for f in filas), tmp_path, workers=1)
+
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["calle-mayor-15-v1.pdf", "calle-mayor-15-v2.pdf"]
+    assert [r.id for r in resumen.fallidos] == ["calle-mayor-15-v2"]
+    assert "Salida duplicada" in resumen.fallidos[0].error
+
+
+def test_percentiles_de_latencia():
+    resultados = [ResultadoTrabajo(str(i), "", segundos=i / 100) for i in range(1, 101)]
+    resultados.append(ResultadoTrabajo("roto", "", error="ValueError", segundos=99))
+
+    resumen = ResumenLote(resultados, segundos=1.0)
+
+    assert resumen.percentil(50) == 0.50
+    assert resumen.percentil(95) == 0.95
+    assert "1 fallidos" in str(resumen)
+
+
+def test_normaliza_filas_de_project_versions():
+    fila = {
+        "slug": "calle-mayor-15", "name": "Calle Mayor 15", "status": "oportunidad",
+        "data": {"precioCompra": 1065000, "m2Construidos": 158, "calidad": 3, "precioVenta": 1600000},
+    }
+
+    proyecto = normalizar(fila)
+
+    assert proyecto["id"] == "calle-mayor-15"
+    assert proyecto["precio_compra"] == 1065000
+    assert proyecto["status"] == "oportunidad"
+
+
+def test_lote_por_estado_desde_la_base_de_datos(tmp_path, capsys):
+    data = {"precioCompra": 1065000, "m2Construidos": 158, "calidad": 3, "precioVenta": 1600000}
+    conexion = sqlite3.connect(tmp_path / "lumier.db")
+    conexion.executescript(ESQUEMA_SQLITE)
+    for i, nombre in enumerate(("Calle Mayor 15", "Serrano 40")):
+        conexion.execute("INSERT INTO projects (id, slug, name) VALUES (?, ?, ?)", (str(i), f"p{i}", nombre))
+        conexion.execute("INSERT INTO project_versions (id, project_id, version_number, version_name, data, "
+                         "is_active) VALUES (?, ?, 1, 'Inicial', ?, 1)", (f"{i}-1", str(i), json.dumps(data)))
+    conexion.commit()
+
+    # Sin projects_v2 no hay estados: es un error, no un lote vacío
+    assert main([str(tmp_path / "lumier.db"), str(tmp_path / "dossiers"), "--estado", "oportunidad"]) == 2
+    assert "projects_v2" in capsys.readouterr().err
+
+    conexion.executescript(ESQUEMA_SQLITE_ESTADOS)
+    conexion.executemany("INSERT INTO projects_v2 (project_id, status, property_address) VALUES (?, ?, ?)",
+                         [("a", "oportunidad", "Calle Mayor 15"), ("b", "en_venta", "Serrano 40")])
+    conexion.commit()
+    conexion.close()
+
+    assert main([str(tmp_path / "lumier.db"), str(tmp_path / "dossiers"), "--estado", "oportunidad",
+                 "--workers", "1"]) == 0
+    assert sorted(p.name for p in (tmp_path / "dossiers").iterdir()) == ["p0-v1.pdf"]
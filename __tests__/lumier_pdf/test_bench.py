@@ -0,0 +1,45 @@
+import json
+
+from lumier_pdf.bench import comparar, main, medir_carga, medir_memoria, medir_suite
+
+
+def test_suite_mide_tiempo_paginas_bytes_y_memoria():
+    informe = medir_suite("cartera.10", repeticiones=1)
+    medicion = informe["casos"]["cartera.10"]
+    assert medicion["paginas"] == 20
+    assert medicion["bytes"] > 0 and medicion["pico_memoria"] > 0
+    assert medicion["paginas_por_segundo"] == medicion["paginas"] / medicion["segundos"]
+
+    # Los PDF se generan en modo invariante: los bytes se repiten
+    assert medir_suite("cartera.10", repeticiones=1)["casos"]["cartera.10"]["bytes"] == medicion["bytes"]
+
+
+def test_regresiones_frente_a_la_linea_base(tmp_path, capsys):
+    base = tmp_path / "base.json"
+    assert main(["suite", "--casos", "flowable.ColoredBox", "--repeticiones", "1", "--guardar", str(base)]) == 0
+    datos = json.loads(base.read_text())
+    assert set(datos["casos"]) == {"flowable.ColoredBox"}
+
+    # Una línea base 10 veces más rápida y con la mitad de memoria: regresión
+    caso = datos["casos"]["flowable.ColoredBox"]
+    lenta = {"casos": {"flowable.ColoredBox": dict(caso, segundos=caso["segundos"] / 10,
+                                                   pico_memoria=caso["pico_memoria"] / 2)}}
+    assert [r[:2] for r in comparar(datos, lenta)] == [("flowable.ColoredBox", "segundos"),
+                                                        ("flowable.ColoredBox", "pico_memoria")]
+    assert comparar(datos, lenta, umbral=20) == []
+
+    base.write_text(json.dumps(dict(datos, **lenta)))
+    assert main(["suite", "--casos", "flowable.ColoredBox", "--repeticiones", "1", "--comparar", str(base)]) == 1
+    assert "regresiones" in capsys.readouterr().out
+
+
+def test_memoria_mide_el_rss_en_un_proceso_nuevo():
+    medicion = medir_memoria(5)
+    assert medicion["paginas"] == 10 and medicion["bytes"] > 0
+    assert medicion["rss_pico"] >= medicion["rss_base"] > 0
+
+
+def test_carga_mide_una_base_sqlite_en_un_proceso_nuevo():
+    medicion = medir_carga(100)
+    assert medicion["filas"] == 100 and medicion["segundos"] > 0
+    assert medicion["rss_pico"] >= medicion["rss_base"] > 0
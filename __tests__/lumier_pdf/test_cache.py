@@ -0,0 +1,90 @@
+import io
+import re
+import zlib
+
+import pytest
+from reportlab import rl_config
+
+from lumier_pdf import manual as gm
+from lumier_pdf.bench import cartera_ejemplo
+from lumier_pdf.cache import CacheSecciones, huella
+from lumier_pdf.calculos import EJEMPLO_COMPLETO
+
+
+@pytest.fixture
+def invariante(monkeypatch):
+    monkeypatch.setattr(rl_config, "invariant", 1)
+
+
+def _textos(pdf):
+    """Cadenas dibujadas en cada stream del PDF"""
+    streams = re.findall(rb"stream\r?\n(.*?)endstream", pdf, re.S)
+    textos = []
+    for stream in streams:
+        try:
+            stream = zlib.decompress(stream)
+        except zlib.error:
+            pass
+        textos.append(re.findall(rb"\((.*?)\) Tj", stream))
+    return textos
+
+
+def test_reconstruccion_cose_las_secciones_de_la_cache(tmp_path, invariante):
+    template = gm.ManualTemplate()
+    sin_cache, primera, segunda = io.BytesIO(), io.BytesIO(), io.BytesIO()
+    cache = CacheSecciones(tmp_path)
+
+    template.render(sin_cache)
+    template.render(primera, cache=cache)
+    assert (cache.aciertos, cache.ratio) == (0, 0.0)
+    # Maquetar con captura no cambia el documento
+    assert primera.getvalue() == sin_cache.getvalue()
+
+    cache = CacheSecciones(tmp_path)
+    doc = gm.ManualTemplate().render(segunda, cache=cache)
+    assert cache.ratio == 1.0
+    assert doc.page == 14
+    assert sorted(sum(_textos(segunda.getvalue()), [])) == sorted(sum(_textos(sin_cache.getvalue()), []))
+    # Las páginas cosidas vuelven a registrar sus encabezados en el índice
+    titulos = [re.findall(rb"/Title \((.*?)\)", pdf.getvalue()) for pdf in (segunda, sin_cache)]
+    assert titulos[0] == titulos[1]
+
+
+def test_solo_se_maquetan_las_secciones_que_cambian(tmp_path):
+    cache = CacheSecciones(tmp_path)
+    template = gm.ManualTemplate()
+    template.render(io.BytesIO(), cache=cache)
+
+    cache = CacheSecciones(tmp_path)
+    template.render(io.BytesIO(), dict(EJEMPLO_COMPLETO, precio_venta=1.7e6), cache=cache)
+
+    # Solo cambian las secciones con datos del proyecto; la portada y el índice no se guardan
+    dinamicas = sum(any(not isinstance(i, gm.Flowable) for i in s) for s in template.sections)
+    assert cache.fallos == dinamicas
+    assert cache.aciertos == len(template.sections) - 2 - dinamicas
+
+
+def test_cartera_con_un_proyecto_cambiado(tmp_path):
+    proyectos = cartera_ejemplo(6)
+    gm.build_portfolio(proyectos, io.BytesIO(), cache=CacheSecciones(tmp_path))
+
+    proyectos[3] = dict(proyectos[3], precio_compra=900000)
+    cache = CacheSecciones(tmp_path)
+    doc = gm.build_portfolio(proyectos, io.BytesIO(), cache=cache)
+
+    assert (cache.aciertos, cache.fallos) == (5, 1)
+    assert str(cache) == "Caché de secciones: 5/6 aciertos (83,3%)"
+    assert doc.page == gm.build_portfolio(proyectos, io.BytesIO()).page
+
+
+def test_huella_estable_y_sensible_al_contenido():
+    styles = gm.build_styles()
+    a = gm.Paragraph("ITP 2%", styles['LumierBody'])
+    b = gm.Paragraph("ITP 2%", styles['LumierBody'])
+    c = gm.Paragraph("ITP 6%", styles['LumierBody'])
+
+    assert huella(a) == huella(b) != huella(c)
+
+    # Los flowables con __slots__ también cuentan su contenido
+    caja = gm.ColoredBox("ITP", gm.LUMIER_BLACK)
+    assert huella(caja) == huella(gm.ColoredBox("ITP", gm.LUMIER_BLACK)) != huella(gm.ColoredBox("IVA", gm.LUMIER_BLACK))
@@ -0,0 +1,94 @@
+import numpy as np
+import pytest
+
+from lumier_pdf.calculos import (
+    AJUSTADO, EJEMPLO_COMPLETO, NO_HACER, OPORTUNIDAD,
+    calcular, calcular_proyecto, columnas, desde_calculator_data
+)
+from lumier_pdf.formato import formatear_euros, formatear_porcentaje
+
+
+def test_ejemplo_completo_coincide_con_el_manual():
+    r = calcular_proyecto(EJEMPLO_COMPLETO)
+
+    assert r["total_adquisicion"] == pytest.approx(1087830.00)
+    assert r["hard_costs"] == pytest.approx(194855.40)
+    assert r["soft_costs"] == pytest.approx(19065.00)
+    assert r["intereses"] == pytest.approx(15625.00)
+    assert r["inversion_total"] == pytest.approx(1317375.40)
+    assert r["honorarios_venta"] == pytest.approx(58080.00)
+    assert r["venta_neta"] == pytest.approx(1541920.00)
+    assert r["beneficio_neto"] == pytest.approx(224544.60)
+    assert r["equity"] == pytest.approx(801750.40)
+    assert round(r["roi"], 2) == 17.04
+    assert round(r["margen"], 2) == 14.03
+    assert r["clasificacion"] == AJUSTADO
+
+
+def test_tir_usa_meses_del_proyecto():
+    r = calcular_proyecto(EJEMPLO_COMPLETO)
+    esperado = ((1541920 / 1317375.40) ** (12 / EJEMPLO_COMPLETO["meses"]) - 1) * 100
+    assert r["tir"] == pytest.approx(esperado)
+
+
+def test_cartera_vectorizada_igual_a_proyecto_a_proyecto():
+    rng = np.random.default_rng(7)
+    proyectos = [
+        dict(EJEMPLO_COMPLETO,
+             precio_compra=float(rng.uniform(3e5, 2e6)),
+             calidad=int(rng.integers(1, 6)),
+             intermediacion_compra=float(rng.choice([0, 3])),
+             toldo_pergola=bool(rng.integers(0, 2)))
+        for _ in range(50)
+    ]
+
+    cartera = calcular(columnas(proyectos))
+
+    for i, proyecto in enumerate(proyectos):
+        individual = calcular_proyecto(proyecto)
+        for campo, valor in individual.items():
+            assert cartera[campo][i] == pytest.approx(valor)
+
+
+def test_clasificacion_por_umbrales_de_margen():
+    # Sin m² ni intermediación, el margen depende solo del precio de compra
+    base = dict(m2_construidos=0.0, calidad=1, precio_venta=1e6)
+    inversion_fija = 1530 + 800 + 2490 + 1e6 * 0.0027
+    compras = [(1e6 * (1 - m / 100) - inversion_fija) / 1.02 for m in (20, 16.001, 15.999, 13.001, 12.999)]
+
+    r = calcular(dict(base, precio_compra=np.array(compras)))
+
+    assert list(r["clasificacion"]) == [OPORTUNIDAD, OPORTUNIDAD, AJUSTADO, AJUSTADO, NO_HACER]
+
+
+def test_sin_inversion_ni_plazo_no_divide_por_cero():
+    r = calcular(dict(precio_compra=0.0, m2_construidos=0.0, calidad=3, precio_venta=0.0))
+    assert r["margen"] == 0 and r["tir"] == 0
+
+
+def test_faltan_columnas_obligatorias():
+    with pytest.raises(ValueError, match="precio_venta"):
+        calcular(dict(precio_compra=1.0, m2_construidos=1.0, calidad=3))
+
+
+def test_desde_calculator_data():
+    data = {
+        "precioCompra": 1065000, "m2Construidos": 158, "m2ZZCC": 11, "terrazaM2": 2,
+        "calidad": 3, "esClasico": False, "toldoPergola": False, "extras": 0,
+        "intermediacionCompra": False, "porcentajeIntermediacionCompra": 3,
+        "intermediacionVenta": True, "porcentajeIntermediacionVenta": 3,
+        "precioVenta": 1600000, "deuda": 500000, "interesFinanciero": 6.25,
+        "fechaCompra": "2026-01-15", "fechaVenta": "2026-08-15",
+    }
+
+    entradas = desde_calculator_data(data)
+
+    assert entradas["intermediacion_compra"] == 0.0
+    assert entradas["meses"] == pytest.approx(EJEMPLO_COMPLETO["meses"])
+    assert calcular_proyecto(entradas)["beneficio_neto"] == pytest.approx(224544.60)
+
+
+def test_formato_espanol():
+    assert formatear_euros(1087830) == "1.087.830,00 €"
+    assert formatear_euros(1530, 0) == "1.530 €"
+    assert formatear_porcentaje(14.034) == "14,03%"
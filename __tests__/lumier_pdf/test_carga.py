@@ -0,0 +1,162 @@
+import csv
+import io
+import json
+import sqlite3
+import threading
+import tracemalloc
+
+import numpy as np
+import pytest
+
+from lumier_pdf.calculos import columnas, desde_calculator_data
+from lumier_pdf.carga import (
+    ESQUEMA_SQLITE, ESQUEMA_SQLITE_ESTADOS, PoolConexiones, _array_json, bloques, cargar, leer, leer_sql,
+)
+
+CALCULATOR_DATA = {
+    "precioCompra": 1065000, "m2Construidos": 158, "m2ZZCC": 11, "terrazaM2": 2, "calidad": 3,
+    "precioVenta": 1600000, "fechaCompra": "2026-01-15", "fechaVenta": "2026-08-15",
+}
+
+
+def _versiones(n):
+    for i in range(n):
+        yield {
+            "slug": f"proyecto-{i}", "name": f"Proyecto {i}",
+            "data": dict(CALCULATOR_DATA, precioCompra=900000 + i, precioVenta=1500000 + 7 * i),
+        }
+
+
+def _base_sqlite(ruta, n, inactivas=0):
+    conexion = sqlite3.connect(ruta)
+    conexion.executescript(ESQUEMA_SQLITE)
+    for i, version in enumerate(_versiones(n)):
+        conexion.execute("INSERT INTO projects (id, slug, name) VALUES (?, ?, ?)",
+                         (f"{i:08d}", version["slug"], version["name"]))
+        filas = [(f"{i:08d}-1", f"{i:08d}", 1, "Inicial", json.dumps(version["data"]), i >= inactivas)]
+        if i < inactivas:
+            filas.append((f"{i:08d}-0", f"{i:08d}", 0, "Borrador", json.dumps(CALCULATOR_DATA), False))
+        conexion.executemany("INSERT INTO project_versions (id, project_id, version_number, version_name, "
+                             "data, is_active) VALUES (?, ?, ?, ?, ?, ?)", filas)
+    conexion.commit()
+    conexion.close()
+
+
+def _estados(ruta, estados):
+    """projects_v2 con el status de cada proyecto de _base_sqlite, enlazado por la dirección"""
+    conexion = sqlite3.connect(ruta)
+    conexion.executescript(ESQUEMA_SQLITE_ESTADOS)
+    conexion.executemany("INSERT INTO projects_v2 (project_id, status, property_address) VALUES (?, ?, ?)",
+                         [(f"v2-{i}", estado, f"Proyecto {i}") for i, estado in enumerate(estados)])
+    conexion.commit()
+    conexion.close()
+
+
+def _esperado(n):
+    return columnas(desde_calculator_data(v["data"]) for v in _versiones(n))
+
+
+def test_json_jsonl_csv_y_sqlite_dan_las_mismas_columnas(tmp_path):
+    n = 50
+    (tmp_path / "v.json").write_text(json.dumps(list(_versiones(n))))
+    (tmp_path / "v.jsonl").write_text("\n".join(json.dumps(v) for v in _versiones(n)) + "\n")
+    with open(tmp_path / "v.csv", "w", newline="") as fichero:
+        escritor = csv.DictWriter(fichero, ["slug", "name", "data"])
+        escritor.writeheader()
+        escritor.writerows(dict(v, data=json.dumps(v["data"])) for v in _versiones(n))
+    _base_sqlite(tmp_path / "v.sqlite", n)
+
+    esperado = _esperado(n)
+    for nombre in ("v.json", "v.jsonl", "v.csv", "v.sqlite"):
+        ids, cols = cargar(str(tmp_path / nombre), tamano=16)
+        assert ids.tolist() == [f"proyecto-{i}" for i in range(n)], nombre
+        for campo, valores in esperado.items():
+            np.testing.assert_array_equal(cols[campo], valores, err_msg=f"{nombre}: {campo}")
+
+
+def test_csv_de_calculator_data_en_columnas(tmp_path):
+    ruta = tmp_path / "calculadora.csv"
+    ruta.write_text("nombre,precioCompra,m2Construidos,calidad,esClasico,precioVenta,fechaCompra\n"
+                    "Calle Mayor 15,1065000,158,3,true,1600000,\n")
+
+    registro, = leer(str(ruta))
+
+    assert registro["esClasico"] is True and registro["fechaCompra"] is None
+    bloque, = bloques([registro])
+    assert bloque.ids == ["Calle Mayor 15"]
+    assert bloque.columnas["precio_compra"][0] == 1065000
+
+
+def test_array_json_con_objetos_partidos_entre_lecturas():
+    registros = [{"id": i, "texto": "x" * (i % 7), "lista": [i, {"a": "]"}]} for i in range(200)]
+
+    leidos = list(_array_json(io.StringIO(" \n" + json.dumps(registros, indent=1)), tamano=13))
+
+    assert leidos == registros
+    assert list(_array_json(io.StringIO("[]"))) == []
+
+
+def test_sql_lee_por_lotes_solo_las_versiones_activas(tmp_path):
+    _base_sqlite(tmp_path / "v.db", 30, inactivas=5)
+    conexion = sqlite3.connect(tmp_path / "v.db")
+
+    activas = list(leer_sql(conexion, tamano_lote=7))
+    todas = list(leer_sql(conexion, solo_activas=False))
+
+    assert len(activas) == 25 and len(todas) == 35
+    assert activas[0]["slug"] == "proyecto-5" and isinstance(activas[0]["data"], str)
+
+
+def test_filtrar_por_estado(tmp_path):
+    _base_sqlite(tmp_path / "sin_estados.db", 4)
+    _base_sqlite(tmp_path / "v.db", 4)
+    _estados(tmp_path / "v.db", ["oportunidad", "en_venta", "oportunidad"])
+
+    filas = list(leer(str(tmp_path / "v.db"), estado="oportunidad"))
+
+    assert [(f["slug"], f["status"]) for f in filas] == [("proyecto-0", "oportunidad"), ("proyecto-2", "oportunidad")]
+    assert [p["status"] for p in next(bloques(filas)).proyectos] == ["oportunidad", "oportunidad"]
+    assert list(leer(str(tmp_path / "v.db"), estado="vendido")) == []
+    # Sin projects_v2 (solo lib/database.sql) o en un export sin status, no hay estados por los que filtrar
+    with pytest.raises(ValueError, match="projects_v2"):
+        list(leer(str(tmp_path / "sin_estados.db"), estado="oportunidad"))
+    (tmp_path / "v.jsonl").write_text("\n".join(json.dumps(v) for v in _versiones(3)))
+    with pytest.raises(ValueError, match="status"):
+        list(leer(str(tmp_path / "v.jsonl"), estado="oportunidad"))
+
+
+def test_el_pool_reutiliza_conexiones(tmp_path):
+    _base_sqlite(tmp_path / "v.db", 10)
+    abiertas = []
+
+    def conectar():
+        abiertas.append(sqlite3.connect(tmp_path / "v.db", check_same_thread=False))
+        return abiertas[-1]
+
+    with PoolConexiones(conectar, tamano=2) as pool:
+        for _ in range(3):
+            assert len(cargar(pool)[0]) == 10
+        assert pool.abiertas == 1
+
+        hilos = [threading.Thread(target=lambda: list(leer(pool))) for _ in range(6)]
+        for hilo in hilos:
+            hilo.start()
+        for hilo in hilos:
+            hilo.join()
+        assert 1 <= pool.abiertas <= 2
+    assert pool.abiertas == 0
+
+
+def test_la_memoria_no_crece_con_el_numero_de_filas(tmp_path):
+    picos = {}
+    for n in (2000, 20000):
+        ruta = tmp_path / f"v{n}.sqlite"
+        _base_sqlite(ruta, n)
+        tracemalloc.start()
+        filas = sum(len(bloque) for bloque in bloques(leer(str(ruta)), tamano=1000))
+        picos[n] = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        assert filas == n
+
+    # Diez veces más filas, mismo bloque en memoria
+    assert picos[20000] < 1.5 * picos[2000]
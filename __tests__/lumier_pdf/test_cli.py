@@ -0,0 +1,89 @@
+import json
+import os
+import re
+import shutil
+import subprocess
+import sys
+
+from lumier_pdf import manual as gm
+from lumier_pdf.calculos import EJEMPLO_COMPLETO
+from lumier_pdf.cli import PRESUPUESTO_IMPORTACION_MS, main
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(gm.__file__)))
+
+
+def _python(*args, stdin=None):
+    return subprocess.run([sys.executable, *args], cwd=RAIZ, input=stdin, capture_output=True, text=True,
+                          env=dict(os.environ, PYTHONPATH=RAIZ), check=True)
+
+
+def _proyectos(tmp_path):
+    ruta = tmp_path / "proyectos.jsonl"
+    ruta.write_text("\n".join(json.dumps(dict(EJEMPLO_COMPLETO, nombre=f"P{i}", precio_venta=1.5e6 + i * 1e5))
+                              for i in range(3)))
+    return str(ruta)
+
+
+def test_importar_la_cli_no_carga_numpy_ni_reportlab():
+    codigo = "import sys, lumier_pdf.cli; print(sorted({m.split('.')[0] for m in sys.modules}))"
+    cargados = _python("-c", codigo).stdout
+    assert "numpy" not in cargados and "reportlab" not in cargados
+
+    # Mejor de tres arranques, como `python -X importtime`
+    mejor = min(
+        int(re.search(r"\|\s*(\d+) \| lumier_pdf\.cli$", _python("-X", "importtime", "-c", "import lumier_pdf.cli")
+                      .stderr, re.M).group(1))
+        for _ in range(3)
+    )
+    assert mejor / 1000 < PRESUPUESTO_IMPORTACION_MS
+
+
+def test_calc_no_importa_reportlab(tmp_path):
+    resultado = _python("-m", "lumier_pdf", "--profile-startup", "calc", _proyectos(tmp_path), "--json")
+    filas = [json.loads(linea) for linea in resultado.stdout.splitlines()]
+    assert [f["id"] for f in filas] == ["P0", "P1", "P2"]
+    assert filas[1]["clasificacion"] in ("OPORTUNIDAD", "AJUSTADO", "NO HACER")
+
+    informe = resultado.stderr
+    assert informe.startswith("Arranque:")
+    assert "numpy" in informe
+
+    # El informe solo lista las importaciones más lentas: lo cargado se mira en sys.modules
+    codigo = ("import sys; from lumier_pdf.cli import main; main(['calc', sys.argv[1], '--json']); "
+              "print(sorted({m.split('.')[0] for m in sys.modules}), file=sys.stderr)")
+    cargados = _python("-c", codigo, _proyectos(tmp_path)).stderr
+    assert "numpy" in cargados and "reportlab" not in cargados
+
+
+def test_importar_el_generador_no_carga_los_modulos_de_cada_construccion():
+    codigo = ("import sys, generate_manual_pdf, lumier_pdf.manual; print(generate_manual_pdf is lumier_pdf.manual); "
+              "print(sorted(m for m in sys.modules if m.startswith('lumier_pdf')))")
+    mismo, cargados = _python("-c", codigo).stdout.splitlines()
+    # El script es el mismo módulo que lumier_pdf.manual
+    assert mismo == "True"
+    for modulo in ("fuentes", "indice", "markdown", "memoria", "objetivo", "optimizar", "paralelo"):
+        assert f"lumier_pdf.{modulo}'" not in cargados
+
+
+def test_el_paquete_funciona_sin_el_script(tmp_path):
+    # Solo el paquete y el Markdown del manual, fuera del repositorio
+    shutil.copytree(os.path.join(RAIZ, "lumier_pdf"), tmp_path / "lumier_pdf",
+                    ignore=shutil.ignore_patterns("__pycache__"))
+    shutil.copy(gm.MARKDOWN_SOURCE, tmp_path)
+    trabajo = tmp_path / "trabajo"
+    trabajo.mkdir()
+
+    subprocess.run([sys.executable, "-m", "lumier_pdf", "generate", "-o", "manual.pdf"], cwd=trabajo,
+                   env=dict(os.environ, PYTHONPATH=str(tmp_path)), capture_output=True, check=True)
+
+    assert (trabajo / "manual.pdf").read_bytes().startswith(b"%PDF")
+
+
+def test_preview_y_generate(tmp_path, capsys):
+    assert main(["preview", _proyectos(tmp_path), "-o", str(tmp_path / "p.pdf")]) == 0
+    assert (tmp_path / "p.pdf").read_bytes().startswith(b"%PDF")
+
+    salida = tmp_path / "manual.pdf"
+    assert main(["generate", "--markdown", "--source", gm.MARKDOWN_SOURCE, "-o", str(salida)]) == 0
+    assert salida.read_bytes().startswith(b"%PDF")
+    assert "manual.pdf" in capsys.readouterr().out
@@ -0,0 +1,121 @@
+import base64
+import io
+import re
+import zlib
+
+from lumier_pdf import manual as gm
+from lumier_pdf.bench import cartera_ejemplo, listado_ejemplo
+from lumier_pdf.calculos import EJEMPLO_COMPLETO
+from lumier_pdf.traza import Traza
+
+
+def test_cabecera_y_pie_se_graban_una_vez_como_form_xobject():
+    proyectos = cartera_ejemplo(20)
+    con_formularios, sin_formularios = io.BytesIO(), io.BytesIO()
+
+    doc = gm.build_portfolio(proyectos, con_formularios, use_forms=True)
+    doc_sin = gm.build_portfolio(proyectos, sin_formularios, use_forms=False)
+
+    pdf = con_formularios.getvalue()
+    assert doc.page == doc_sin.page
+    assert pdf.count(b"/Subtype /Form") == 1
+    assert len(pdf) < len(sin_formularios.getvalue())
+
+
+def test_plantilla_compilada_reutiliza_el_esqueleto_entre_documentos():
+    template = gm.ManualTemplate()
+    esqueleto = list(template.skeleton)
+
+    primero, segundo = io.BytesIO(), io.BytesIO()
+    doc = template.render(primero)
+    doc_otro = template.render(segundo, dict(cartera_ejemplo(1)[0], precio_compra=900000))
+
+    assert template.skeleton == esqueleto
+    assert doc.page == doc_otro.page == 14
+    assert primero.getvalue() != segundo.getvalue()
+
+
+def test_build_pdf_compila_la_plantilla_una_vez(monkeypatch):
+    esqueletos = []
+    manual_skeleton = gm.manual_skeleton
+    monkeypatch.setattr(gm, "manual_skeleton", lambda *args: esqueletos.append(args) or manual_skeleton(*args))
+    gm.compiled_template.cache_clear()
+    styles = gm.build_styles()
+
+    paginas = [gm.build_pdf(io.BytesIO(), styles=styles).page for _ in range(2)]
+
+    assert len(esqueletos) == 1 and paginas == [14, 14]
+    gm.compiled_template.cache_clear()
+
+
+def test_tablas_y_cabeceras_compartidas():
+    styles = gm.build_styles()
+    proyectos = cartera_ejemplo(2)
+    primera, segunda = (gm.project_section(p, gm.calcular_proyecto(p), styles) for p in proyectos)
+    tablas = [(a, b) for a, b in zip(primera, segunda) if isinstance(a, gm.Table)]
+    assert len(tablas) == 3
+    assert all(a._cellStyles is b._cellStyles for a, b in tablas)
+
+    cabecera = gm.shared(gm.ColoredBox, "FLUJO DE CAJA MENSUAL", gm.LUMIER_BLACK, gm.LUMIER_GOLD, height=35)
+    # Los valores por defecto de Flowable son de la clase: la instancia solo guarda los suyos
+    assert set(vars(cabecera)) == {"text", "bg_color", "text_color", "box_width", "box_height", "font_size"}
+    assert gm.shared(gm.ColoredBox, "FLUJO DE CAJA MENSUAL", gm.LUMIER_BLACK, gm.LUMIER_GOLD, height=35) is cabecera
+
+    # La misma cabecera no cabe al final de dos páginas: se aplaza dos veces sin LayoutError
+    relleno = gm.A4[1] - 60 * gm.mm - 20
+    story = [gm.Spacer(1, relleno), cabecera, gm.PageBreak(), gm.Spacer(1, relleno), cabecera]
+    doc = gm.new_document(io.BytesIO(), "Prueba")
+    doc.build(story)
+    assert doc.page == 4
+
+
+def test_tabla_de_cartera_lee_las_filas_pagina_a_pagina():
+    n = 1000
+    leidas = []
+
+    def filas():
+        for i in range(n):
+            leidas.append(i)
+            yield ((f"Calle {i}", "1.000.000 €", "1.500.000 €", "15,00%", "20,00%", "30,00%", "AJUSTADO"), 1)
+
+    # Filas leídas del generador al empezar cada página
+    por_pagina = []
+    doc = gm.new_document(io.BytesIO(), "Cartera")
+    doc.build([gm.PortfolioTable(filas())], onFirstPage=lambda c, d: por_pagina.append(len(leidas)),
+              onLaterPages=lambda c, d: por_pagina.append(len(leidas)))
+
+    capacidad = int((doc.frame._aH - gm.PORTFOLIO_HEADER_HEIGHT) // gm.PORTFOLIO_ROW_HEIGHT)
+    assert len(leidas) == n
+    assert doc.page == len(por_pagina) == -(-n // capacidad)
+    # Solo se lee una página de filas (más la que indica si hay que partir) cada vez
+    assert all(b - a <= capacidad + 1 for a, b in zip(por_pagina, por_pagina[1:]))
+
+
+def test_listado_repite_la_cabecera_y_dibuja_todas_las_filas():
+    salida = io.BytesIO()
+    doc = gm.build_portfolio_listing(listado_ejemplo(300), salida, use_forms=False)
+    streams = re.findall(rb"/ASCII85Decode /FlateDecode \] /Length \d+\s*>>\s*stream\r?\n(.*?)endstream",
+                         salida.getvalue(), re.S)
+    texto = b"".join(zlib.decompress(base64.a85decode(b"<~" + s.strip(), adobe=True)) for s in streams)
+    assert texto.count(b"(Direcci\\363n) Tj") == doc.page
+    assert all(b"(Calle de Serrano %d, Madrid) Tj" % i in texto for i in (1, 150, 300))
+
+
+def test_graficos_con_datos_se_construyen_y_graban_una_vez():
+    # Un factor de reforma que no usa ningún otro test: la caché de gráficos es del proceso
+    proyectos = [dict(EJEMPLO_COMPLETO, nombre=f"P{i}", precio_compra=900000.0 + 100000 * i,
+                      factor_coste_reforma=1.37) for i in range(3)]
+    assert gm.quality_cost_curves(1.37)[0] == ("Obra", (479.5, 575.4, 767.2, 959.0, 1233.0))
+
+    salida = io.BytesIO()
+    with Traza() as traza:
+        doc = gm.build_portfolio(proyectos, salida, charts=True)
+        gm.build_portfolio(proyectos, io.BytesIO(), charts=True)
+    totales = traza.totales()
+
+    # Una tarta por proyecto y un solo gráfico de costes, también al repetir el documento
+    assert totales["grafico", "create_investment_pie"][0] == 3
+    assert totales["grafico", "create_cost_bar_chart"][0] == 1
+    assert doc.page == 9
+    # En el PDF: cabecera/pie, tres tartas y un gráfico de costes
+    assert salida.getvalue().count(b"/Subtype /Form") == 5
@@ -0,0 +1,56 @@
+import numpy as np
+import pytest
+
+from lumier_pdf.calculos import EJEMPLO_COMPLETO, calcular_proyecto, columnas
+from lumier_pdf.flujos import flujo_caja, flujo_caja_proyecto, tir_anual
+
+
+def test_calendario_cuadra_con_las_partidas_del_motor():
+    r = calcular_proyecto(EJEMPLO_COMPLETO)
+    f = flujo_caja_proyecto(EJEMPLO_COMPLETO)
+
+    assert f["costes"].sum() == pytest.approx(r["total_adquisicion"] + r["total_gastos"])
+    assert f["disposiciones"].sum() == pytest.approx(EJEMPLO_COMPLETO["deuda"])
+    assert f["saldo_deuda"][-1] == 0
+    assert f["inversion_total"] == pytest.approx(r["inversion_total"] - r["intereses"] + f["intereses"])
+    assert f["equity_pico"] == pytest.approx(r["equity"] + f["intereses"])
+    # La TIR anula el valor actual de los flujos del equity
+    van = (f["flujo_equity"] * (1 + f["tir_equity"] / 100) ** -(f["tiempo"] / 12)).sum()
+    assert van == pytest.approx(0, abs=1e-4)
+
+
+def test_sin_deuda_ni_plazo_partido():
+    p = dict(EJEMPLO_COMPLETO, deuda=0.0, meses=12.0, comision_apertura=1.0)
+    r = calcular_proyecto(p)
+    f = flujo_caja_proyecto(p)
+
+    assert f["intereses"] == 0 and f["comisiones"] == 0
+    assert f["flujo_equity"].shape == (13,)
+    assert f["equity_pico"] == pytest.approx(r["inversion_total"])
+
+
+def test_cartera_vectorizada_igual_a_proyecto_a_proyecto():
+    rng = np.random.default_rng(5)
+    proyectos = [
+        dict(EJEMPLO_COMPLETO, meses=float(rng.uniform(2, 30)), deuda=float(rng.uniform(0, 9e5)),
+             comision_apertura=1.0, comision_cancelacion=0.5)
+        for _ in range(30)
+    ]
+    entradas = columnas(proyectos)
+    for campo in ("comision_apertura", "comision_cancelacion"):
+        entradas[campo] = np.array([p[campo] for p in proyectos])
+
+    cartera = flujo_caja(entradas)
+
+    for i, p in enumerate(proyectos):
+        individual = flujo_caja_proyecto(p)
+        for campo in ("intereses", "comisiones", "tir", "tir_equity", "equity_pico"):
+            assert cartera[campo][i] == pytest.approx(individual[campo])
+
+
+def test_tir_anual():
+    # -100 hoy y +121 a los dos años: 10% anual
+    flujos = np.array([[-100.0, 0.0, 121.0], [-100.0, 0.0, -5.0]])
+    tir = tir_anual(flujos, np.array([0.0, 1.0, 2.0]))
+    assert tir[0] == pytest.approx(0.10)
+    assert tir[1] == 0
@@ -0,0 +1,85 @@
+import io
+import threading
+
+import pytest
+from reportlab.pdfbase import pdfmetrics
+from reportlab.pdfgen import canvas
+
+from lumier_pdf import manual as gm
+from lumier_pdf.fuentes import FICHERO_SIMBOLOS, buscar_fuente, simbolos
+
+pytestmark = pytest.mark.skipif(buscar_fuente(FICHERO_SIMBOLOS) is None, reason="Sin DejaVu Sans")
+
+
+def _pdf(fuente, texto):
+    buffer = io.BytesIO()
+    lienzo = canvas.Canvas(buffer, invariant=1)
+    lienzo.setFont(fuente, 12)
+    lienzo.drawString(72, 720, texto)
+    lienzo.save()
+    return buffer.getvalue()
+
+
+def _sustitucion():
+    return [f.fontName for f in pdfmetrics.standardT1SubstitutionFonts]
+
+
+def test_los_simbolos_salen_de_la_fuente_incrustada():
+    with simbolos() as fuente:
+        helvetica = pdfmetrics.getFont("Helvetica")
+
+        tramos = pdfmetrics.unicode2T1("Revisar ⚠️ ✓ 📋 ★ 15.000€ ─", [helvetica] + helvetica.substitutionFonts)
+
+        assert [f.fontName for f, _ in tramos] == ["Helvetica", "LumierSimbolos"] * 5
+        texto = "".join(t.decode(f.encName) for f, t in tramos if f is fuente)
+        # El selector de variación se omite y el emoji sin glifo pasa a ▤
+        assert texto == "⚠✓▤★─"
+        assert "€" in "".join(t.decode(f.encName) for f, t in tramos if f is helvetica)
+        assert pdfmetrics.stringWidth("✓", "Helvetica", 10) == fuente.widths[fuente.codigos["✓"][0]] / 100
+
+        pdf = _pdf("Helvetica", "Revisar ⚠️ ✓ ★")
+    assert b"/BaseFont /LUMIER+DejaVuSans" in pdf and b"/FontFile2" in pdf
+    # Lo incrustado es el subconjunto guardado, no el TTF completo
+    assert len(pdf) < 20000
+
+
+def test_fuera_de_simbolos_vuelve_a_zapfdingbats():
+    helvetica = pdfmetrics.getFont("Helvetica")
+    tramos = pdfmetrics.unicode2T1("⚠", [helvetica] + helvetica.substitutionFonts)
+
+    assert [f.fontName for f, _ in tramos] == ["ZapfDingbats"]
+    assert b"LUMIER+DejaVuSans" not in _pdf("Helvetica", "⚠")
+
+
+def test_la_fuente_de_simbolos_solo_sustituye_durante_cada_documento():
+    antes = _sustitucion()
+    gm.build_styles()
+    assert _sustitucion() == antes == ["Symbol", "ZapfDingbats"]
+
+    salida = io.BytesIO()
+    gm.build_dossier(dict(gm.EJEMPLO_COMPLETO, nombre="Revisar ⚠"), salida, charts=False)
+
+    # El dossier sale con la fuente de símbolos, y después la lista es la de reportlab
+    assert b"LUMIER+DejaVuSans" in salida.getvalue()
+    assert _sustitucion() == antes
+
+
+def test_simbolos_anidados_y_en_varios_hilos():
+    en_curso, salir = threading.Event(), threading.Event()
+
+    def otro_hilo():
+        with simbolos():
+            en_curso.set()
+            salir.wait()
+
+    hilo = threading.Thread(target=otro_hilo)
+    hilo.start()
+    en_curso.wait()
+    with simbolos():
+        with simbolos():
+            pass
+        # El otro hilo sigue dentro: la fuente sigue en la lista
+        salir.set()
+        hilo.join()
+        assert _sustitucion()[0] == "LumierSimbolos"
+    assert _sustitucion() == ["Symbol", "ZapfDingbats"]
@@ -0,0 +1,79 @@
+import base64
+import io
+import re
+import zlib
+
+from reportlab.platypus import BaseDocTemplate
+
+from lumier_pdf import manual as gm
+from lumier_pdf.indice import texto_plano
+from lumier_pdf.vista_previa import VistaPrevia
+
+
+def _streams(pdf):
+    """Contenido de los streams comprimidos del PDF: páginas y formularios"""
+    streams = re.findall(rb"/ASCII85Decode /FlateDecode \].*?stream\r?\n(.*?)endstream", pdf, re.S)
+    return [zlib.decompress(base64.a85decode(b"<~" + s.strip(), adobe=True)) for s in streams]
+
+
+def _literal(texto):
+    """Texto como lo escribe reportlab en una cadena del PDF"""
+    texto = texto.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+    return b"".join(b"\\%03o" % c if c > 127 else bytes([c]) for c in texto.encode("cp1252"))
+
+
+def _tabla(pdf):
+    """Cadenas del formulario con la tabla de contenidos"""
+    return next(re.findall(rb"\((.*?)\) Tj", s) for s in _streams(pdf) if b"(RESUMEN EJECUTIVO) Tj" in s)
+
+
+def test_indice_con_la_pagina_de_cada_encabezado(monkeypatch):
+    builds = []
+    build = BaseDocTemplate.build
+    monkeypatch.setattr(BaseDocTemplate, "build", lambda doc, *args, **kwargs: builds.append(doc) or build(
+        doc, *args, **kwargs))
+    salida = io.BytesIO()
+
+    doc = gm.build_pdf(salida)
+
+    # Una sola maquetación del documento, sin multiBuild
+    assert len(builds) == 1 and doc.page == 14
+    pdf = salida.getvalue()
+    paginas = {int(n): s for s in _streams(pdf) for n in re.findall(rb"\(P\\341gina (\d+)\) Tj", s)}
+    tabla = _tabla(pdf)
+    assert len(doc.indice.entradas) == 32
+    for entrada in doc.indice.entradas:
+        # El encabezado (con marcas, en trozos) está en la página con ese número en el pie...
+        assert all(_literal(palabra) in paginas[entrada.pagina] for palabra in entrada.texto.split())
+        # ...que es la que dice el índice, al lado de su título
+        titulo = _literal(re.sub(r"^\d+\.\s+", "", entrada.texto))
+        assert tabla[tabla.index(titulo) + 1] == b"%d" % entrada.pagina
+    assert b"/Title (" + _literal("1. RESUMEN EJECUTIVO") + b")" in pdf
+
+
+def test_las_paginas_siguen_a_las_secciones():
+    referencia = gm.ManualTemplate().render(io.BytesIO())
+    template = gm.ManualTemplate()
+    # Una página más antes de la sección 2
+    template.sections.insert(2, [gm.Spacer(1, 0)])
+
+    doc = template.render(io.BytesIO())
+
+    assert doc.page == referencia.page + 1
+    assert [e.pagina for e in doc.indice.entradas] == [e.pagina + 1 for e in referencia.indice.entradas]
+
+
+def test_vista_previa_del_indice():
+    manual = io.BytesIO()
+    gm.build_pdf(manual)
+
+    vista = VistaPrevia().render(secciones="índice")
+
+    assert vista.paginas == [2]
+    assert _tabla(vista.contenido[0]) == _tabla(manual.getvalue())
+
+
+def test_texto_plano():
+    assert texto_plano('Prioridad Alta <font color="0xef4444">●</font>') == "Prioridad Alta"
+    assert texto_plano("📋 Ejemplo Práctico") == "Ejemplo Práctico"
+    assert texto_plano("Coste &amp; €/m²") == "Coste & €/m²"
@@ -0,0 +1,99 @@
+import io
+
+from lumier_pdf import manual as gm
+from lumier_pdf.cache import CacheSecciones
+from lumier_pdf.markdown import ParserMarkdown, analizar_bloque, bloques
+
+EJEMPLO = """# 1. Resumen
+
+La calculadora usa `precioCompra * 0.02` y **redondea**:
+```
+M2 Totales = m2Construidos + m2ZZCC
+```
+
+| Variable | Valor |
+|----------|------:|
+| **ITP** | < 2% |
+
+> ⚠️ **ÁREA DE MEJORA:** Debería variar por CCAA:
+> - Madrid: 6%
+
+- Uno
+  - Dos
+---
+"""
+
+
+def test_bloques_y_nodos():
+    nodos = [analizar_bloque(b) for b in bloques(EJEMPLO)]
+    assert [n["tipo"] for n in nodos] == ["titulo", "parrafo", "codigo", "tabla", "cita", "lista", "separador"]
+    titulo, parrafo, codigo, tabla, cita, lista, _ = nodos
+
+    assert titulo == {"tipo": "titulo", "nivel": 1, "texto": "1. Resumen"}
+    assert parrafo["texto"] == ('La calculadora usa <font face="Courier">precioCompra * 0.02</font> '
+                                'y <b>redondea</b>:')
+    assert codigo["lineas"] == ["M2 Totales = m2Construidos + m2ZZCC"]
+    assert tabla["cabecera"] == ["Variable", "Valor"]
+    assert tabla["filas"] == [["<b>ITP</b>", "&lt; 2%"]]
+    assert tabla["alineaciones"] == ["LEFT", "RIGHT"]
+    assert cita["lineas"] == ["⚠️ <b>ÁREA DE MEJORA:</b> Debería variar por CCAA:", "• Madrid: 6%"]
+    assert [(e["nivel"], e["texto"]) for e in lista["elementos"]] == [(0, "Uno"), (1, "Dos")]
+
+
+def test_solo_se_analizan_los_bloques_que_cambian(tmp_path):
+    fuente = tmp_path / "manual.md"
+    texto = open(gm.MARKDOWN_SOURCE, encoding="utf-8").read()
+    fuente.write_text(texto, encoding="utf-8")
+
+    parser = ParserMarkdown(tmp_path / "cache")
+    nodos = parser.analizar(fuente)
+    assert parser.analizados > 100
+
+    # Mismo fichero en otro proceso: el AST sale entero de disco
+    parser = ParserMarkdown(tmp_path / "cache")
+    assert parser.analizar(fuente) == nodos
+    assert parser.analizados == 0
+
+    # Al editar un bloque solo se vuelve a analizar ese bloque
+    fuente.write_text(texto.replace("ITP | 2% |", "ITP | 6% |"), encoding="utf-8")
+    parser = ParserMarkdown(tmp_path / "cache")
+    editados = parser.analizar(fuente)
+    assert parser.analizados == 1
+    assert sum(a != b for a, b in zip(nodos, editados)) == 1
+
+
+def test_manual_desde_markdown(tmp_path):
+    nodos = ParserMarkdown().analizar(gm.MARKDOWN_SOURCE)
+    story = gm.markdown_flowables(nodos, gm.build_styles())
+    titulos = [n for n in nodos if n["tipo"] == "titulo" and n["nivel"] == 1]
+    assert sum(isinstance(f, gm.ColoredBox) for f in story) == len(titulos)
+    assert sum(isinstance(f, gm.FormulaBox) for f in story) == sum(n["tipo"] == "codigo" for n in nodos)
+    assert sum(isinstance(f, gm.Table) for f in story) == sum(n["tipo"] == "tabla" for n in nodos)
+
+    # Con caché de secciones, la segunda construcción no maqueta nada
+    doc = gm.build_markdown_manual(output=io.BytesIO(), cache=CacheSecciones(tmp_path))
+    assert doc.page > len(titulos)
+    cache = CacheSecciones(tmp_path)
+    assert gm.build_markdown_manual(output=io.BytesIO(), cache=cache).page == doc.page
+    assert cache.ratio == 1.0
+
+
+def test_el_manual_visual_sale_del_markdown_y_de_las_constantes(tmp_path, monkeypatch):
+    fuente = tmp_path / "manual.md"
+    texto = open(gm.MARKDOWN_SOURCE, encoding="utf-8").read()
+    fuente.write_text(texto.replace("ITP = Precio Compra × 0,02 (2%)", "ITP = Precio Compra × 0,06 (6%)")
+                      .replace("### 1. ITP por Comunidad Autónoma", "### 1. ITP por CCAA"), encoding="utf-8")
+    monkeypatch.setattr(gm, "COSTE_OBRA", gm.COSTE_OBRA + 100)
+
+    esqueleto = gm.ManualTemplate(source=fuente).skeleton
+
+    formulas = [f.formula for f in esqueleto if isinstance(f, gm.FormulaBox)]
+    assert "ITP = Precio Compra × 0,06 (6%)" in formulas
+    assert formulas[0].startswith("BENEFICIO NETO = Venta Neta - Inversión Total\n")
+    celdas = [[getattr(c, "text", c) for c in fila] for t in esqueleto if isinstance(t, gm.Table)
+              for fila in t._cellvalues]
+    assert ["Obra", "450", "520", "660", "800", "1.000"] in celdas
+    assert ["TOTAL €/m²", "875", "1.082", "1.371", "1.703", "2.175"] in celdas
+    assert ["1", "ITP por CCAA", "Se usa un 2% fijo cuando el ITP real varía significativamente.",
+            "Tabla de tipos por comunidad autónoma (Madrid 6%, Cataluña 10%...)"] in celdas
+    assert ["Inscripción Escritura", "1.530 €", "Valor fijo"] in celdas
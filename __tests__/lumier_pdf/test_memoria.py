@@ -0,0 +1,80 @@
+import gc
+import io
+import tracemalloc
+
+import pytest
+from reportlab import rl_config
+
+from lumier_pdf import manual as gm
+from lumier_pdf.bench import cartera_ejemplo
+from lumier_pdf.memoria import construir_acotado, por_capitulos
+
+
+@pytest.fixture
+def invariante(monkeypatch):
+    monkeypatch.setattr(rl_config, "invariant", 1)
+
+
+@pytest.fixture(scope="module")
+def styles():
+    return gm.build_styles()
+
+
+@gm.with_symbols
+def _en_lista(proyectos, output, styles, charts=False):
+    """La cartera con doc.build y la story entera en una lista, como build_portfolio con la fuente de símbolos"""
+    doc = gm.new_document(output, "Cartera de Proyectos")
+    story = list(por_capitulos(gm.portfolio_section(proyecto, styles, charts) for proyecto in proyectos))
+    doc.build(story, onFirstPage=gm.header_footer_form, onLaterPages=gm.header_footer_form)
+    return doc
+
+
+def _pico(construir):
+    gc.collect()
+    tracemalloc.start()
+    try:
+        construir()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def test_mismo_pdf_que_con_la_story_en_una_lista(invariante, styles):
+    proyectos = cartera_ejemplo(6)
+    referencia, acotado = io.BytesIO(), io.BytesIO()
+
+    _en_lista(proyectos, referencia, styles, charts=True)
+    doc = gm.build_portfolio(iter(proyectos), acotado, styles=styles, charts=True)
+
+    assert doc.page == 18
+    assert acotado.getvalue() == referencia.getvalue()
+
+
+def test_cada_capitulo_se_crea_justo_antes_de_maquetarlo(styles):
+    doc = gm.new_document(io.BytesIO(), "Cartera de Proyectos")
+    creados = []
+
+    def capitulos():
+        for proyecto in cartera_ejemplo(5):
+            # doc.page no existe hasta que empieza la primera página
+            creados.append(getattr(doc, "page", 0))
+            yield gm.portfolio_section(proyecto, styles)
+
+    construir_acotado(doc, por_capitulos(capitulos()), gm.header_footer_form, gm.header_footer_form)
+
+    # Cada proyecto ocupa dos páginas: el siguiente se lee al terminar la segunda
+    assert creados == [0, 2, 4, 6, 8]
+
+
+def test_el_pico_de_memoria_crece_menos_por_proyecto_que_en_lista(tmp_path, styles):
+    salida = str(tmp_path / "cartera.pdf")
+    gm.build_portfolio(cartera_ejemplo(2), salida, styles=styles)
+
+    acotado = [_pico(lambda: gm.build_portfolio(cartera_ejemplo(n), salida, styles=styles)) for n in (10, 40)]
+    en_lista = [_pico(lambda: _en_lista(cartera_ejemplo(n), salida, styles)) for n in (10, 40)]
+
+    # El pico no es plano: crecen los objetos que reportlab guarda de cada página
+    # (cota: menos de 4 KB por proyecto), pero con menos de un cuarto de la
+    # pendiente que tiene la story en una lista
+    assert (acotado[1] - acotado[0]) / 30 < 4096
+    assert acotado[1] - acotado[0] < (en_lista[1] - en_lista[0]) / 4
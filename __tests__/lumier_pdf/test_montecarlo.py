@@ -0,0 +1,32 @@
+import numpy as np
+import pytest
+
+from lumier_pdf.calculos import EJEMPLO_COMPLETO, calcular_proyecto
+from lumier_pdf.montecarlo import Fija, coste_m2_reforma, simular
+
+
+def test_distribuciones_fijas_reproducen_el_calculo_determinista():
+    p = EJEMPLO_COMPLETO
+    fijas = {
+        "precio_venta": Fija(p["precio_venta"]),
+        "coste_m2": Fija(coste_m2_reforma(p)),
+        "meses": Fija(p["meses"]),
+        "interes_financiero": Fija(p["interes_financiero"]),
+    }
+
+    s = simular(p, 1000, distribuciones=fijas, semilla=1)
+    r = calcular_proyecto(p)
+
+    assert np.allclose(s.margen, r["margen"])
+    assert np.allclose(s.tir, r["tir"])
+
+
+def test_probabilidades_suman_uno_y_semilla_reproducible():
+    a = simular(EJEMPLO_COMPLETO, 300_000, semilla=42)
+    b = simular(EJEMPLO_COMPLETO, 300_000, semilla=42)
+
+    assert a.muestras == 300_000
+    assert sum(a.probabilidades) == pytest.approx(1.0)
+    assert np.array_equal(a.margen, b.margen)
+    p5, p50, p95 = a.percentiles("margen")
+    assert p5 < p50 < p95
@@ -0,0 +1,48 @@
+import numpy as np
+import pytest
+
+from lumier_pdf.calculos import EJEMPLO_COMPLETO, calcular, calcular_proyecto, columnas
+from lumier_pdf.objetivo import resolver, resolver_proyecto
+
+
+def test_precio_venta_para_margen_objetivo_del_manual():
+    # MANUAL_CALCULOS.md 9.1: Inversión Base / (1 - Comisión Venta con IVA - Tasa Plusvalía - Margen)
+    r = calcular_proyecto(EJEMPLO_COMPLETO)
+    inversion_base = r["inversion_total"] - r["plusvalia"]
+    esperado = inversion_base / (1 - 0.03 * 1.21 - 0.0027 - 0.20)
+
+    assert resolver_proyecto(EJEMPLO_COMPLETO, "precio_venta", "margen", 20.0) == pytest.approx(esperado, abs=0.01)
+
+
+@pytest.mark.parametrize("variable", ["precio_compra", "precio_venta", "hard_costs"])
+@pytest.mark.parametrize("metrica", ["margen", "roi", "tir"])
+def test_cartera_alcanza_el_objetivo_por_el_lado_correcto(variable, metrica):
+    rng = np.random.default_rng(3)
+    proyectos = [
+        dict(EJEMPLO_COMPLETO,
+             precio_compra=float(rng.uniform(3e5, 2e6)),
+             calidad=int(rng.integers(1, 6)))
+        for _ in range(500)
+    ]
+    for p in proyectos:
+        p["precio_venta"] = p["precio_compra"] * float(rng.uniform(1.3, 1.8))
+    entradas = columnas(proyectos)
+
+    solucion = resolver(entradas, variable, metrica, 16.0)
+
+    # Con hard costs nulos algunos proyectos siguen sin llegar al objetivo
+    alcanzable = ~np.isnan(solucion)
+    assert alcanzable.mean() > 0.5
+    if variable == "hard_costs":
+        base = calcular(entradas)
+        entradas["extras"] = solucion - (base["hard_costs"] - base["extras"])
+    else:
+        entradas[variable] = solucion
+    valores = calcular(entradas)[metrica][alcanzable]
+    assert (valores >= 16.0 - 1e-9).all()
+    assert valores == pytest.approx(16.0, abs=1e-4)
+
+
+def test_objetivo_no_alcanzable():
+    # Ni comprando gratis se llega a un 90% de margen con estos costes
+    assert resolver_proyecto(EJEMPLO_COMPLETO, "precio_compra", "margen", 90.0) is None
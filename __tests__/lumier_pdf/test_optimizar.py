@@ -0,0 +1,115 @@
+import io
+import os
+import re
+import zlib
+
+import reportlab
+from reportlab import rl_config
+from reportlab.pdfgen import canvas
+
+from lumier_pdf import manual as gm
+from lumier_pdf.optimizar import leer_pdf, optimizar, recortar_truetype
+from lumier_pdf.salida import iter_pdf, write_pdf
+
+def _linealizacion(datos):
+    valores = re.search(rb"<</Linearized 1/L (\d+)/H\[(\d+) (\d+)\]/O (\d+)/E (\d+)/N (\d+)/T (\d+)>>", datos[:1024])
+    return dict(zip("L H0 H1 O E N T".split(), map(int, valores.groups())))
+
+
+def _posicion(datos, numero):
+    return re.search(rb"(?<!\d)%d 0 obj" % numero, datos).start()
+
+
+def test_el_manual_optimizado_pesa_menos_que_el_normal():
+    normal, optimizado = io.BytesIO(), io.BytesIO()
+    gm.build_pdf(normal)
+    doc = gm.build_pdf(optimizado, optimize=9)
+    datos = optimizado.getvalue()
+
+    assert len(datos) < 0.8 * len(normal.getvalue())
+    informe = doc.size_report
+    assert informe.despues == len(datos) and informe.antes == len(normal.getvalue())
+    assert informe.categorias["contenido"][3] < informe.categorias["contenido"][1]
+    # El subconjunto de la fuente de símbolos se incrusta sin su tabla `name`
+    assert informe.categorias["ficheros de fuente"][3] < informe.categorias["ficheros de fuente"][1] / 1.5
+    assert b"ASCII85Decode" not in datos and b"/ProcSet" not in datos
+    assert len(leer_pdf(datos).paginas()) == doc.page == 14
+
+
+def test_manual_optimizado_en_streaming(monkeypatch):
+    monkeypatch.setattr(rl_config, "invariant", 1)
+    directo, escrito = io.BytesIO(), io.BytesIO()
+    gm.build_pdf(directo, optimize=6)
+
+    write_pdf(lambda out: gm.build_pdf(out, optimize=6), escrito, tamano_bloque=4096)
+    bloques = list(iter_pdf(lambda out: gm.build_pdf(out, optimize=6), tamano_bloque=4096))
+
+    # Solo sale el PDF optimizado, no el intermedio que se optimiza
+    assert escrito.getvalue() == b"".join(bloques) == directo.getvalue()
+    assert len(bloques) > 1 and _linealizacion(escrito.getvalue())["L"] == len(escrito.getvalue())
+
+
+def test_linealizado_con_referencias_y_pistas_coherentes():
+    manual = io.BytesIO()
+    gm.build_pdf(manual)
+    datos, _ = optimizar(manual.getvalue())
+    lin = _linealizacion(datos)
+
+    assert lin["L"] == len(datos)
+    # La primera tabla de referencias va detrás del diccionario y la última apunta a ella
+    primera = datos.index(b"xref")
+    assert datos.endswith(b"startxref\n%d\n%%%%EOF\n" % primera)
+    assert datos[lin["T"]:lin["T"] + 21] == b"\n0000000000 65535 f \n"
+    for tabla in re.finditer(rb"xref\n(\d+) (\d+)\n", datos):
+        inicio, entradas = int(tabla.group(1)), int(tabla.group(2))
+        for i in range(entradas):
+            entrada = datos[tabla.end() + 20 * i:tabla.end() + 20 * (i + 1)]
+            if entrada.endswith(b"n \n"):
+                assert datos[int(entrada[:10]):].startswith(b"%d 0 obj" % (inicio + i))
+
+    # Objetos de la primera página antes de /E y del resto después
+    pdf = leer_pdf(datos)
+    assert pdf.paginas()[0] == lin["O"] and len(pdf.paginas()) == lin["N"]
+    assert _posicion(datos, lin["O"]) < lin["E"] == _posicion(datos, pdf.paginas()[1])
+
+    pistas = datos[lin["H0"]:lin["H0"] + lin["H1"]]
+    tabla = zlib.decompress(pistas[pistas.index(b"stream\n") + 7:pistas.rindex(b"\nendstream")])
+    # Cabecera de la tabla de páginas: objetos mínimos por página y posición de la primera
+    # (sin contar el propio stream de pistas, que va delante)
+    assert int.from_bytes(tabla[4:8], "big") == _posicion(datos, lin["O"]) - lin["H1"]
+
+    # Optimizar lo ya optimizado no cambia el tamaño
+    assert len(optimizar(datos)[0]) == len(datos)
+
+
+def test_objetos_repetidos_y_sin_usar():
+    buffer = io.BytesIO()
+    lienzo = canvas.Canvas(buffer, invariant=1)
+    for nombre in ("fondo", "fondo_copia"):
+        lienzo.beginForm(nombre)
+        lienzo.setFillColorRGB(0.83, 0.69, 0.22)
+        lienzo.rect(0, 0, 200, 50, fill=1, stroke=0)
+        lienzo.endForm()
+    for i in range(3):
+        lienzo.doForm("fondo")
+        lienzo.doForm("fondo_copia")
+        lienzo.drawString(72, 720, f"Página {i + 1}")
+        lienzo.showPage()
+    lienzo.save()
+
+    datos, informe = optimizar(buffer.getvalue(), nivel=6, linealizar=False)
+
+    assert informe.duplicados == 1 and informe.categorias["formularios"][2] == 1
+    assert datos.count(b"/Subtype/Form") == 1 and len(leer_pdf(datos).paginas()) == 3
+    assert b"/Linearized" not in datos and datos.endswith(b"%%EOF\n")
+
+
+def test_recortar_truetype_quita_tablas():
+    with open(os.path.join(os.path.dirname(reportlab.__file__), "fonts", "Vera.ttf"), "rb") as fichero:
+        fuente = fichero.read()
+
+    recortada = recortar_truetype(fuente, tablas=(b"name", b"post"))
+
+    etiquetas = [recortada[12 + 16 * i:16 + 16 * i] for i in range(int.from_bytes(recortada[4:6], "big"))]
+    assert b"name" not in etiquetas and b"post" not in etiquetas and b"glyf" in etiquetas
+    assert len(recortada) < len(fuente)
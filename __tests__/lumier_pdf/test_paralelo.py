@@ -0,0 +1,87 @@
+import base64
+import io
+import re
+import zlib
+from functools import partial
+
+import pytest
+
+from lumier_pdf import manual as gm
+from lumier_pdf.bench import cartera_ejemplo
+from lumier_pdf.cache import CacheSecciones
+from lumier_pdf.paralelo import _en_workers, construir_en_paralelo
+
+
+def _textos(pdf):
+    """Cadenas dibujadas en los streams comprimidos del PDF"""
+    streams = re.findall(rb"/ASCII85Decode /FlateDecode \] /Length \d+\s*>>\s*stream\r?\n(.*?)endstream", pdf, re.S)
+    texto = b"".join(zlib.decompress(base64.a85decode(b"<~" + s.strip(), adobe=True)) for s in streams)
+    return sorted(re.findall(rb"\((.*?)\) Tj", texto))
+
+
+def _indice(pdf):
+    return re.findall(rb"/Title \((.*?)\)", pdf)
+
+
+def test_cartera_en_paralelo_igual_que_en_secuencia():
+    proyectos = cartera_ejemplo(12)
+    secuencial, paralelo = io.BytesIO(), io.BytesIO()
+
+    doc_secuencial = gm.build_portfolio(proyectos, secuencial)
+    doc = gm.build_portfolio(proyectos, paralelo, workers=2)
+
+    assert doc.page == doc_secuencial.page == 24
+    assert doc.parallel_sections == 12
+    # Mismo contenido, con la numeración global en el pie de cada página
+    assert _textos(paralelo.getvalue()) == _textos(secuencial.getvalue())
+    assert b"P\\341gina 24" in _textos(paralelo.getvalue())
+    assert _indice(paralelo.getvalue())[-12:] == [b"PROYECTO %d" % i for i in range(1, 13)]
+
+
+def test_manual_en_paralelo_con_portada_e_indice():
+    secuencial, paralelo = io.BytesIO(), io.BytesIO()
+    gm.build_pdf(secuencial)
+    doc = gm.build_pdf(paralelo, workers=2)
+
+    assert doc.page == 14
+    # Todas las secciones menos la portada, que dibuja first_page, y el índice, que depende de las demás
+    assert doc.parallel_sections == len(gm.ManualTemplate().sections) - 2
+    assert _textos(paralelo.getvalue()) == _textos(secuencial.getvalue())
+    # El outline sale de los encabezados que guardan las páginas cosidas
+    indice = _indice(paralelo.getvalue())
+    assert indice == _indice(secuencial.getvalue())
+    assert b"1. RESUMEN EJECUTIVO" in indice and b"EJEMPLO COMPLETO DE C\\301LCULO" in indice
+
+
+def test_con_otros_estilos_se_maqueta_en_el_proceso_principal():
+    styles = gm.build_styles()
+    styles["LumierBody"].fontSize += 1
+
+    doc = gm.build_portfolio(cartera_ejemplo(2), io.BytesIO(), styles=styles, workers=1)
+
+    assert doc.parallel_sections == 0 and doc.page == 4
+    with pytest.raises(ValueError):
+        gm.build_portfolio(cartera_ejemplo(2), io.BytesIO(), cache=CacheSecciones("no-se-usa"), workers=2)
+
+
+def test_cada_seccion_se_cose_segun_llega_del_worker(monkeypatch):
+    eventos = []
+
+    def en_orden(*args):
+        for numero, resultado in enumerate(_en_workers(*args)):
+            eventos.append(f"worker {numero}")
+            yield resultado
+
+    monkeypatch.setattr("lumier_pdf.paralelo._en_workers", en_orden)
+    styles = gm.build_styles()
+    proyectos = cartera_ejemplo(4)
+    sections = [(partial(gm.portfolio_section, proyecto) if i % 2 else None,
+                 lambda proyecto=proyecto: eventos.append("local") or gm.portfolio_section(proyecto, styles))
+                for i, proyecto in enumerate(proyectos)]
+
+    doc = construir_en_paralelo(gm.new_document(io.BytesIO(), "Cartera de Proyectos"), sections,
+                                gm.header_footer_form, gm.header_footer_form, styles, workers=2)
+
+    # Los resultados no se guardan hasta el final: se intercalan con las secciones locales
+    assert eventos == ["local", "worker 0", "local", "worker 1"]
+    assert doc.parallel_sections == 2 and doc.page == 8
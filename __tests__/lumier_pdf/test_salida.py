@@ -0,0 +1,71 @@
+import io
+
+import pytest
+from reportlab import rl_config
+from reportlab.pdfbase import pdfdoc
+
+from lumier_pdf import manual as gm
+from lumier_pdf.bench import cartera_ejemplo
+from lumier_pdf.salida import iter_pdf, write_pdf
+
+
+@pytest.fixture
+def invariante(monkeypatch):
+    # Sin fechas ni IDs aleatorios, dos construcciones producen los mismos bytes
+    monkeypatch.setattr(rl_config, "invariant", 1)
+
+
+def _cartera(output):
+    return gm.build_portfolio(cartera_ejemplo(5), output)
+
+
+def test_write_pdf_produce_los_mismos_bytes_por_bloques(invariante):
+    referencia, destino = io.BytesIO(), io.BytesIO()
+    escrituras = []
+    destino_write = destino.write
+    destino.write = lambda datos: escrituras.append(len(datos)) or destino_write(datos)
+
+    _cartera(referencia)
+    write_pdf(_cartera, destino, tamano_bloque=4096)
+
+    assert destino.getvalue() == referencia.getvalue()
+    assert len([n for n in escrituras if n]) > 1
+
+
+def test_pdffile_solo_se_sustituye_durante_el_streaming():
+    original = pdfdoc.PDFFile
+    durante = []
+
+    write_pdf(lambda output: durante.append(pdfdoc.PDFFile) or _cartera(output), io.BytesIO())
+    assert durante[0] is not original
+    assert pdfdoc.PDFFile is original
+
+    # Con varias salidas a la vez, el original vuelve al terminar la última
+    bloques = iter_pdf(_cartera, tamano_bloque=1024, max_bloques=1)
+    next(bloques)
+    write_pdf(_cartera, io.BytesIO())
+    assert pdfdoc.PDFFile is not original
+    bloques.close()
+    assert pdfdoc.PDFFile is original
+
+
+def test_iter_pdf_genera_el_documento_por_bloques(invariante):
+    referencia = io.BytesIO()
+    _cartera(referencia)
+
+    bloques = list(iter_pdf(_cartera, tamano_bloque=4096))
+
+    assert len(bloques) > 1
+    assert b"".join(bloques) == referencia.getvalue()
+
+
+def test_iter_pdf_se_puede_abandonar_y_propaga_errores():
+    bloques = iter_pdf(_cartera, tamano_bloque=1024, max_bloques=1)
+    assert next(bloques).startswith(b"%PDF")
+    bloques.close()
+
+    def falla(output):
+        raise ValueError("sin datos")
+
+    with pytest.raises(ValueError, match="sin datos"):
+        list(iter_pdf(falla))
@@ -0,0 +1,32 @@
+import pytest
+
+from lumier_pdf.calculos import EJEMPLO_COMPLETO, calcular_proyecto
+from lumier_pdf.sensibilidad import sensibilidad, variacion
+
+
+def test_rejilla_coincide_con_el_calculo_por_celda():
+    p = EJEMPLO_COMPLETO
+    x = variacion(p, "precio_compra", n=200)
+    y = variacion(p, "precio_venta", n=150)
+
+    rejilla = sensibilidad(p, "precio_compra", x, "precio_venta", y)
+
+    assert rejilla.forma == (150, 200)
+    for i, j in [(0, 0), (75, 120), (149, 199)]:
+        r = calcular_proyecto(dict(p, precio_compra=x[j], precio_venta=y[i]))
+        assert rejilla.margen[i, j] == pytest.approx(r["margen"])
+        assert rejilla["tir"][i, j] == pytest.approx(r["tir"])
+
+
+def test_eje_coste_m2_escala_la_reforma():
+    p = EJEMPLO_COMPLETO
+    rejilla = sensibilidad(p, "coste_m2", variacion(p, "coste_m2", n=3), "meses", variacion(p, "meses", n=3))
+
+    assert rejilla.margen[1, 1] == pytest.approx(calcular_proyecto(p)["margen"])
+    r = calcular_proyecto(dict(p, factor_coste_reforma=1.1, meses=p["meses"] * 0.9))
+    assert rejilla["tir"][0, 2] == pytest.approx(r["tir"])
+
+
+def test_eje_desconocido():
+    with pytest.raises(ValueError, match="Eje desconocido"):
+        sensibilidad(EJEMPLO_COMPLETO, "precio_compra", [1.0], "superficie", [1.0])
@@ -0,0 +1,140 @@
+import asyncio
+import json
+import time
+import urllib.error
+import urllib.request
+
+import pytest
+
+from lumier_pdf.calculos import EJEMPLO_COMPLETO
+from lumier_pdf.servicio import CachePDF, ErrorHTTP, ServicioDossiers, servir
+
+
+def _lento(proyecto, opciones):
+    # Sustituye al render en los workers (el pool hace fork, así que se encuentra por nombre)
+    time.sleep(proyecto["segundos"])
+    return b"%PDF-" + proyecto["id"].encode()
+
+
+def _peticion(url, cuerpo=None, cabeceras=None):
+    peticion = urllib.request.Request(url, data=cuerpo, headers=cabeceras or {})
+    try:
+        with urllib.request.urlopen(peticion, timeout=60) as respuesta:
+            return respuesta.status, dict(respuesta.headers), respuesta.read()
+    except urllib.error.HTTPError as error:
+        return error.code, dict(error.headers), error.read()
+
+
+def test_servicio_http(tmp_path):
+    async def probar():
+        listo = asyncio.get_running_loop().create_future()
+        tarea = asyncio.create_task(servir("127.0.0.1", 0, listo=listo, workers=1,
+                                            cache=CachePDF(directorio=str(tmp_path))))
+        servidor, servicio = await listo
+        url = f"http://127.0.0.1:{servidor.sockets[0].getsockname()[1]}"
+        cuerpo = json.dumps(dict(EJEMPLO_COMPLETO, nombre="Calle Mayor 15")).encode()
+
+        def pedir(ruta, *args, **kwargs):
+            return asyncio.to_thread(_peticion, url + ruta, *args, **kwargs)
+
+        try:
+            estado, cabeceras, pdf = await pedir("/dossier", cuerpo)
+            assert estado == 200 and pdf.startswith(b"%PDF") and cabeceras["X-Cache"] == "miss"
+
+            inicio = time.perf_counter()
+            estado, repetida, copia = await pedir("/dossier", cuerpo)
+            assert estado == 200 and copia == pdf and repetida["X-Cache"] == "hit"
+            assert time.perf_counter() - inicio < 0.5
+
+            estado, _, _ = await pedir("/dossier", cuerpo, {"If-None-Match": cabeceras["ETag"]})
+            assert estado == 304
+
+            assert (await pedir("/dossier", b"{no es json"))[0] == 400
+            assert (await pedir("/dossier", json.dumps({"precio_compra": 1}).encode()))[0] == 422
+            assert (await pedir("/dossier?paginas=3", cuerpo))[0] == 400
+            assert (await pedir("/dossier"))[0] == 405
+            assert (await pedir("/nada"))[0] == 404
+
+            estado, _, salud = await pedir("/health")
+            assert estado == 200 and json.loads(salud)["estado"] == "ok"
+            metricas = json.loads((await pedir("/metrics"))[2])
+            assert metricas["generados"] == 1 and metricas["aciertos"] == 2
+            assert metricas["cache_pdfs"] == 1 and metricas["latencia_p95"] > 0
+            assert [p.read_bytes() for p in tmp_path.glob("*.pdf")] == [pdf]
+        finally:
+            tarea.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await tarea
+
+    asyncio.run(probar())
+
+
+def test_cabeceras_no_validas_y_errores_inesperados(monkeypatch):
+    def falla(servicio):
+        raise RuntimeError("sin estado")
+
+    monkeypatch.setattr(ServicioDossiers, "salud", falla)
+
+    async def enviar(puerto, peticion):
+        lector, escritor = await asyncio.open_connection("127.0.0.1", puerto)
+        escritor.write(peticion)
+        await escritor.drain()
+        respuesta = await lector.read()
+        escritor.close()
+        return int(respuesta.split()[1]), respuesta
+
+    async def probar():
+        listo = asyncio.get_running_loop().create_future()
+        tarea = asyncio.create_task(servir("127.0.0.1", 0, listo=listo, workers=1))
+        servidor, servicio = await listo
+        puerto = servidor.sockets[0].getsockname()[1]
+        try:
+            for longitud in (b"abc", b"-5", b"1e3"):
+                estado, respuesta = await enviar(puerto, b"POST /dossier HTTP/1.1\r\nContent-Length: %s\r\n\r\n{}"
+                                                 % longitud)
+                assert estado == 400 and b"Content-Length" in respuesta
+
+            # La conexión recibe un 500 y se cierra (read() termina) en lugar de cortarse sin respuesta
+            estado, respuesta = await enviar(puerto, b"GET /health HTTP/1.1\r\n\r\n")
+            assert estado == 500 and b"RuntimeError: sin estado" in respuesta
+            assert servicio.contadores["errores"] == 1
+        finally:
+            tarea.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await tarea
+
+    asyncio.run(probar())
+
+
+def test_peticiones_iguales_comparten_render_y_la_cola_limita():
+    async def probar():
+        async with ServicioDossiers(workers=1, cola=1, generar=_lento) as servicio:
+            a = {"id": "a", "segundos": 0.3}
+            peticiones = [servicio.dossier(a), servicio.dossier(dict(a)), servicio.dossier(a),
+                          servicio.dossier({"id": "b", "segundos": 0.1}),
+                          servicio.dossier({"id": "c", "segundos": 0.1})]
+            resultados = await asyncio.gather(*peticiones, return_exceptions=True)
+
+            assert resultados[:4] == [(b"%PDF-a", False)] * 3 + [(b"%PDF-b", False)]
+            assert isinstance(resultados[4], ErrorHTTP) and resultados[4].estado == 503
+            assert servicio.contadores["generados"] == 2
+            assert servicio.contadores["compartidas"] == 2
+            assert servicio.contadores["rechazadas"] == 1
+            assert await servicio.dossier(a) == (b"%PDF-a", True)
+
+    asyncio.run(probar())
+
+
+def test_el_timeout_no_pierde_el_render():
+    async def probar():
+        async with ServicioDossiers(workers=1, timeout=0.1, generar=_lento) as servicio:
+            proyecto = {"id": "lento", "segundos": 0.5}
+            with pytest.raises(ErrorHTTP) as error:
+                await servicio.dossier(proyecto)
+            assert error.value.estado == 504 and servicio.contadores["timeouts"] == 1
+
+            # El render siguió y quedó en la caché
+            await asyncio.sleep(0.8)
+            assert await servicio.dossier(proyecto) == (b"%PDF-lento", True)
+
+    asyncio.run(probar())
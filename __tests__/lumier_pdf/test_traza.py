@@ -0,0 +1,54 @@
+import io
+import json
+
+import pytest
+from reportlab.platypus.flowables import Flowable
+
+from lumier_pdf import manual as gm
+from lumier_pdf.calculos import EJEMPLO_COMPLETO
+from lumier_pdf.cli import main
+from lumier_pdf.traza import Traza
+
+
+def test_traza_del_dossier():
+    draw_on = Flowable.drawOn
+    with Traza() as traza:
+        doc = gm.build_dossier(EJEMPLO_COMPLETO, io.BytesIO())
+
+    # Fuera de la traza no queda ningún parche
+    assert Flowable.drawOn is draw_on
+
+    totales = traza.totales()
+    categorias = {categoria for categoria, _ in totales}
+    assert {"documento", "fase", "seccion", "flowable", "pagina"} <= categorias
+    assert totales["documento", "build_dossier"][0] == 1
+    assert totales["pagina", "fin de página (showPage)"][0] == doc.page
+    assert [numero for numero, _, _ in traza.paginas] == list(range(1, doc.page + 1))
+    assert any(nombre.endswith(".wrap") for _, nombre in totales)
+
+    # El tiempo propio nunca supera al total
+    assert all(0 <= propio <= total for _, total, propio in totales.values())
+    assert traza.resumen().startswith("Traza: ")
+
+    eventos = traza.chrome()["traceEvents"]
+    completos = [e for e in eventos if e["ph"] == "X"]
+    assert len(completos) == len(traza.eventos) + len(traza.paginas)
+    assert all(e["ts"] >= 0 and e["dur"] >= 0 for e in completos)
+    json.dumps(eventos)
+
+
+def test_no_se_pueden_anidar_trazas():
+    with Traza():
+        with pytest.raises(RuntimeError):
+            Traza().__enter__()
+
+
+def test_cli_trace(tmp_path, capsys):
+    proyecto = tmp_path / "proyecto.json"
+    proyecto.write_text(json.dumps([EJEMPLO_COMPLETO]))
+    ruta = tmp_path / "preview.trace.json"
+    assert main(["--trace", str(ruta), "preview", str(proyecto), "-o", str(tmp_path / "p.pdf")]) == 0
+
+    nombres = {e["name"] for e in json.loads(ruta.read_text(encoding="utf-8"))["traceEvents"]}
+    assert {"build_dossier", "doc.build", "Página 1"} <= nombres
+    assert "Traza:" in capsys.readouterr().err
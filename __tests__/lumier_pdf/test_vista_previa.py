@@ -0,0 +1,85 @@
+import base64
+import io
+import re
+import time
+import zlib
+
+import pytest
+
+from lumier_pdf import manual as gm
+from lumier_pdf.calculos import EJEMPLO_COMPLETO
+from lumier_pdf.vista_previa import VistaPrevia
+
+
+@pytest.fixture(scope="module")
+def vista():
+    return VistaPrevia()
+
+
+def _texto(pdf):
+    streams = re.findall(rb"/ASCII85Decode /FlateDecode \] /Length \d+\s*>>\s*stream\r?\n(.*?)endstream", pdf, re.S)
+    return b"".join(zlib.decompress(base64.a85decode(b"<~" + s.strip(), adobe=True)) for s in streams)
+
+
+def _numeros(pdf):
+    return [int(n) for n in re.findall(rb"\(P\\341gina (\d+)\) Tj", _texto(pdf))]
+
+
+def test_seccion_del_manual_con_su_numeracion(vista):
+    completo = io.BytesIO()
+    gm.build_pdf(completo)
+
+    inicio = time.perf_counter()
+    manual = gm.build_pdf(io.BytesIO())
+    segundos_manual = time.perf_counter() - inicio
+    vista.render(secciones="ejemplo completo")
+    resultado = vista.render(secciones="EJEMPLO COMPLETO")
+
+    assert resultado.paginas == _numeros(resultado.contenido[0]) == [11, 12]
+    assert resultado.tipo == "application/pdf"
+    # Las mismas cadenas que en esas páginas del manual
+    texto = _texto(resultado.contenido[0])
+    assert re.findall(rb"\((.*?)\) Tj", texto) and all(
+        cadena in _texto(completo.getvalue()) for cadena in re.findall(rb"\(.*?\) Tj", texto))
+    # Con la plantilla caliente, una sección cuesta una fracción del manual
+    assert resultado.segundos < segundos_manual / 5
+    assert manual.page == 14
+
+
+def test_rango_de_paginas_y_secciones_separadas(vista):
+    rango = vista.render(paginas=(12, 14))
+    assert rango.paginas == _numeros(rango.contenido[0]) == [12, 13, 14]
+    assert rango.contenido[0].count(b"/Type /Page\n") == 3
+
+    separadas = vista.render(secciones=[10, 0, "flujo de cálculo"])
+    assert separadas.paginas == [1, 4, 11, 12]
+    # La portada no lleva número de página
+    assert _numeros(separadas.contenido[0]) == [4, 11, 12]
+    # Detrás de la sección del proyecto, que se maqueta para saber cuánto ocupa
+    assert vista.render(secciones="flujo de caja").paginas == [13]
+
+    with pytest.raises(KeyError):
+        vista.render(secciones="no existe")
+    with pytest.raises(ValueError):
+        vista.render(secciones=1, paginas=2)
+    with pytest.raises(ValueError):
+        vista.render(secciones=1, formato="gif")
+
+
+def test_clasificacion_del_proyecto(vista):
+    resultado = vista.clasificacion(dict(EJEMPLO_COMPLETO, precio_venta=900000))
+    texto = _texto(resultado.contenido[0])
+    assert b"NO HACER" in texto and b"Margen del proyecto" in texto
+    assert b"/MediaBox [ 0 0 453.5433 100 ]" in resultado.contenido[0]
+
+
+def test_png_y_svg():
+    pytest.importorskip("pymupdf")
+    vista = VistaPrevia()
+
+    png = vista.render(secciones=10, formato="png")
+    svg = vista.clasificacion(formato="svg")
+
+    assert len(png.contenido) == 2 and all(c.startswith(b"\x89PNG") for c in png.contenido)
+    assert png.tipo == "image/png"
+    assert svg.contenido[0].startswith(b"<svg") and svg.tipo == "image/svg+xml"
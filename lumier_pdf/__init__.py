@@ -0,0 +1,6 @@
+"""
+Motor de cálculo y utilidades de generación de PDF - Lumier Casas Boutique
+
+Los módulos de este paquete se importan bajo demanda; importar el paquete
+no carga numpy ni reportlab.
+"""
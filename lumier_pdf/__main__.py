@@ -0,0 +1,5 @@
+import sys
+
+from lumier_pdf.cli import main
+
+sys.exit(main())
@@ -0,0 +1,187 @@
+"""
+Generación de dossiers en lote - Lumier Casas Boutique
+
+Reparte un dossier por proyecto entre los procesos de un ProcessPoolExecutor.
+Cada worker importa reportlab y construye la hoja de estilos una sola vez al
+arrancar, y la reutiliza en todos los trabajos que recibe. Un proyecto que
+falla no interrumpe el lote: su error queda registrado en el resumen.
+
+Cada dossier se guarda como <id>.pdf, o <id>-v<versión>.pdf con las filas de
+project_versions (todas las versiones de un proyecto tienen su slug). Dos
+proyectos con la misma salida no se sobrescriben: el segundo queda como
+fallido.
+
+Uso:
+    python -m lumier_pdf.batch proyectos.jsonl dossiers/ --workers 8 --estado oportunidad
+"""
+
+import argparse
+import math
+import os
+import re
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from dataclasses import dataclass
+
+from lumier_pdf.carga import leer, normalizar
+from lumier_pdf.formato import formatear_numero
+
+# Estado de cada worker, creado por _init_worker
+_styles = None
+
+
+@dataclass
+class ResultadoTrabajo:
+    """Resultado de renderizar un dossier"""
+    id: str
+    salida: str
+    error: str = None
+    segundos: float = 0.0
+
+    @property
+    def ok(self):
+        return self.error is None
+
+
+@dataclass
+class ResumenLote:
+    """Resultados y rendimiento de un lote"""
+    resultados: list
+    segundos: float
+
+    @property
+    def total(self):
+        return len(self.resultados)
+
+    @property
+    def fallidos(self):
+        return [r for r in self.resultados if not r.ok]
+
+    @property
+    def pdfs_por_segundo(self):
+        generados = self.total - len(self.fallidos)
+        return generados / self.segundos if self.segundos > 0 else 0.0
+
+    def percentil(self, p):
+        """Latencia por dossier (segundos) en el percentil p, de 0 a 100"""
+        latencias = sorted(r.segundos for r in self.resultados if r.ok)
+        if not latencias:
+            return 0.0
+        return latencias[max(0, math.ceil(p / 100 * len(latencias)) - 1)]
+
+    def __str__(self):
+        generados = self.total - len(self.fallidos)
+        lineas = [
+            f"✅ {generados} dossiers generados, ❌ {len(self.fallidos)} fallidos "
+            f"en {formatear_numero(self.segundos)} s",
+            f"   {formatear_numero(self.pdfs_por_segundo, 1)} PDFs/s  |  "
+            f"p50 {formatear_numero(self.percentil(50) * 1000, 0)} ms  |  "
+            f"p95 {formatear_numero(self.percentil(95) * 1000, 0)} ms",
+        ]
+        lineas.extend(f"   - {r.id}: {r.error}" for r in self.fallidos)
+        return "\n".join(lineas)
+
+
+def _init_worker():
+    """Inicializador del worker: importa reportlab y construye los estilos una vez"""
+    global _styles
+    from lumier_pdf import manual
+    _styles = manual.build_styles()
+
+
+def _render(trabajo):
+    """Renderiza un dossier; los errores se devuelven en el resultado, no se propagan"""
+    from lumier_pdf import manual
+
+    inicio = time.perf_counter()
+    try:
+        manual.build_dossier(trabajo["proyecto"], trabajo["salida"], styles=_styles)
+        error = None
+    except Exception as exc:
+        error = f"{type(exc).__name__}: {exc}"
+    return ResultadoTrabajo(trabajo["id"], trabajo["salida"], error, time.perf_counter() - inicio)
+
+
+def leer_proyectos(ruta, estado=None):
+    """
+    Lee proyectos de un JSON (lista), JSON Lines ('-' para stdin), CSV o base
+    de datos (ver lumier_pdf.carga.leer) sin cargarlos todos. Con `estado`,
+    solo los que tienen ese status.
+    """
+    for registro in leer(ruta, estado=estado):
+        yield normalizar(registro)
+
+
+def _trabajos(proyectos, directorio):
+    for indice, proyecto in enumerate(proyectos, 1):
+        id_trabajo = str(proyecto.get("id") or indice)
+        if proyecto.get("version") is not None:
+            id_trabajo += f"-v{proyecto['version']}"
+        salida = proyecto.get("salida") or os.path.join(
+            directorio, re.sub(r"[^\w.-]+", "_", id_trabajo) + ".pdf")
+        yield {"id": id_trabajo, "salida": salida, "proyecto": proyecto}
+
+
+def _recoger(terminados, pendientes, resultados):
+    for futuro in terminados:
+        trabajo = pendientes.pop(futuro)
+        try:
+            resultados.append(futuro.result())
+        except Exception as exc:
+            # El worker murió o el trabajo no se pudo enviar
+            resultados.append(ResultadoTrabajo(trabajo["id"], trabajo["salida"], f"{type(exc).__name__}: {exc}"))
+
+
+def generar_lote(proyectos, directorio, workers=None, en_vuelo=None):
+    """
+    Genera un dossier por proyecto en `directorio` y devuelve un ResumenLote.
+
+    `proyectos` puede ser una lista o cualquier iterable (p. ej. un stream de
+    leer_proyectos); como mucho `en_vuelo` trabajos esperan en la cola a la vez.
+    """
+    os.makedirs(directorio, exist_ok=True)
+    workers = workers or os.cpu_count() or 1
+    en_vuelo = en_vuelo or workers * 4
+
+    resultados = []
+    pendientes = {}
+    salidas = set()
+    inicio = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as pool:
+        for trabajo in _trabajos(proyectos, directorio):
+            salida = os.path.abspath(trabajo["salida"])
+            if salida in salidas:
+                resultados.append(ResultadoTrabajo(trabajo["id"], trabajo["salida"],
+                                                   f"Salida duplicada: {trabajo['salida']} ya es la de otro proyecto"))
+                continue
+            salidas.add(salida)
+            if len(pendientes) >= en_vuelo:
+                terminados, _ = wait(pendientes, return_when=FIRST_COMPLETED)
+                _recoger(terminados, pendientes, resultados)
+            pendientes[pool.submit(_render, trabajo)] = trabajo
+        _recoger(list(pendientes), pendientes, resultados)
+
+    return ResumenLote(resultados, time.perf_counter() - inicio)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Genera un dossier PDF por proyecto")
+    parser.add_argument("entrada", help="JSON, JSON Lines, CSV o base de datos con los proyectos ('-' para stdin)")
+    parser.add_argument("directorio", help="Directorio de salida de los dossiers")
+    parser.add_argument("--workers", type=int, default=None, help="Procesos (por defecto, nº de CPUs)")
+    parser.add_argument("--estado", default=None, help="Genera solo los proyectos con este status")
+    args = parser.parse_args(argv)
+
+    # Una fuente sin estados no es un lote vacío: sale con error
+    try:
+        resumen = generar_lote(leer_proyectos(args.entrada, args.estado), args.directorio, workers=args.workers)
+    except ValueError as exc:
+        print(f"❌ {exc}", file=sys.stderr)
+        return 2
+    print(resumen)
+    return 1 if resumen.fallidos else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
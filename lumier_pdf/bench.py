@@ -0,0 +1,520 @@
+"""
+Mediciones de rendimiento del generador de PDF - Lumier Casas Boutique
+
+Uso:
+    python -m lumier_pdf.bench formularios --paginas 300
+    python -m lumier_pdf.bench suite --guardar bench.json
+    python -m lumier_pdf.bench suite --comparar bench.json --umbral 0.15
+    python -m lumier_pdf.bench memoria --proyectos 5000
+    python -m lumier_pdf.bench carga --filas 1000000
+    python -m lumier_pdf.bench fuentes --dossiers 50
+    python -m lumier_pdf.bench paralelo --proyectos 500 --workers 1 2 4 8
+
+La suite mide cada caso (el manual completo, normal y optimizado, la vista
+previa del ejemplo completo y de la clasificación, wrap/draw de cada
+flowable, los gráficos, carteras de 10, 100 y 1000 proyectos y el listado
+de la cartera con 1000 y 10.000 filas) con el mejor tiempo de varias
+repeticiones, páginas por segundo, bytes de salida y el pico de
+memoria de tracemalloc (en una ejecución aparte, porque tracemalloc ralentiza).
+Los PDF se generan en modo invariante, así que los bytes son reproducibles.
+
+Con --comparar, el comando termina con código 1 si algún caso empeora más
+del umbral respecto a la línea base en tiempo, memoria o bytes.
+
+`memoria` construye una cartera grande en un fichero temporal, en un proceso
+nuevo, y mide el pico de RSS (memoria residente del proceso, no solo la de
+Python) sobre el RSS que deja la importación. `carga` hace lo mismo con lumier_pdf.carga.cargar
+sobre una copia SQLite de project_versions con tantas filas como se pidan.
+
+`fuentes` genera dossiers seguidos y da el tiempo y los bytes por documento
+sin fuente de símbolos (solo base-14), con el subconjunto de DejaVu del
+proceso, recortándolo de nuevo en cada documento y con el TTF completo
+incrustado (solo para medir: sus glifos no corresponden a los códigos).
+
+`paralelo` construye la misma cartera maquetando en el proceso principal y
+con cada número de workers de lumier_pdf.paralelo (incluido el arranque del
+pool) y da la aceleración respecto a la secuencial.
+"""
+
+import argparse
+import fnmatch
+import functools
+import gc
+import io
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+
+from lumier_pdf.calculos import EJEMPLO_COMPLETO
+from lumier_pdf.formato import formatear_numero
+
+# Empeoramiento relativo a partir del cual un caso es una regresión
+UMBRAL_REGRESION = 0.20
+
+# Métricas en las que más es peor
+METRICAS_REGRESION = ("segundos", "pico_memoria", "bytes")
+
+# Repeticiones de wrap/drawOn por caso de flowable y de gráfico
+VECES_FLOWABLE = 1000
+VECES_GRAFICO = 50
+
+TAMANOS_CARTERA = (10, 100, 1000)
+TAMANOS_LISTADO = (1000, 10000)
+
+# Formas de incrustar la fuente de símbolos que compara `fuentes`
+MODOS_FUENTES = ("base14", "subconjunto", "por_documento", "completa")
+
+
+def cartera_ejemplo(n):
+    """n copias numeradas del proyecto del Anexo A"""
+    return [dict(EJEMPLO_COMPLETO, nombre=f"Proyecto {i + 1}") for i in range(n)]
+
+
+def listado_ejemplo(n):
+    """Generador de n proyectos del Anexo A con dirección y precio de venta distintos"""
+    for i in range(n):
+        yield dict(EJEMPLO_COMPLETO, direccion=f"Calle de Serrano {i + 1}, Madrid",
+                   precio_venta=EJEMPLO_COMPLETO["precio_venta"] * (0.9 + (i % 25) / 100))
+
+
+def _medir(build, repeticiones):
+    """Mejor tiempo de `repeticiones` construcciones en memoria, tamaño y páginas"""
+    mejor = None
+    for _ in range(repeticiones):
+        buffer = io.BytesIO()
+        inicio = time.perf_counter()
+        doc = build(buffer)
+        segundos = time.perf_counter() - inicio
+        mejor = segundos if mejor is None else min(mejor, segundos)
+    return {"segundos": mejor, "bytes": len(buffer.getvalue()), "paginas": doc.page}
+
+
+def medir_formularios(paginas=300, repeticiones=3):
+    """Compara la cartera dibujando cabecera y pie por página frente a Form XObjects"""
+    from lumier_pdf import manual as gm
+
+    styles = gm.build_styles()
+    # Cada sección de proyecto ocupa dos páginas
+    proyectos = cartera_ejemplo(max(1, paginas // 2))
+
+    def build(use_forms):
+        return lambda buffer: gm.build_portfolio(proyectos, buffer, styles=styles, use_forms=use_forms)
+
+    return {
+        "antes": _medir(build(False), repeticiones),
+        "despues": _medir(build(True), repeticiones),
+    }
+
+
+def _informe_comparacion(titulo, resultado):
+    antes, despues = resultado["antes"], resultado["despues"]
+    print(f"{titulo} ({antes['paginas']} páginas)")
+    print(f"  {'':10} {'tiempo (s)':>12} {'tamaño (KB)':>12}")
+    for nombre in ("antes", "despues"):
+        r = resultado[nombre]
+        print(f"  {nombre:10} {formatear_numero(r['segundos'], 3):>12} {formatear_numero(r['bytes'] / 1024, 1):>12}")
+    print(f"  ahorro     {formatear_numero((1 - despues['segundos'] / antes['segundos']) * 100, 1):>11}%"
+          f" {formatear_numero((1 - despues['bytes'] / antes['bytes']) * 100, 1):>11}%")
+
+
+def _documento(build):
+    """Caso que construye un documento en memoria: devuelve (páginas, bytes)"""
+    def ejecutar():
+        buffer = io.BytesIO()
+        doc = build(buffer)
+        return doc.page, len(buffer.getvalue())
+    return ejecutar
+
+
+def _flowable(crear, veces):
+    """Caso que crea un flowable y lo maqueta y dibuja `veces` veces en un canvas"""
+    from reportlab.lib.pagesizes import A4
+    from reportlab.pdfgen.canvas import Canvas
+
+    def ejecutar():
+        canvas = Canvas(io.BytesIO(), pagesize=A4)
+        flowable = crear()
+        for _ in range(veces):
+            ancho, alto = flowable.wrap(A4[0], A4[1])
+            flowable.drawOn(canvas, 0, A4[1] - alto)
+        return 0, 0
+    return ejecutar
+
+
+def _vista_previa(vista, **seleccion):
+    """Caso que maqueta en memoria una parte del manual con una VistaPrevia ya creada"""
+    def ejecutar():
+        buffer = io.BytesIO()
+        doc = vista.construir(buffer, **seleccion)
+        return len(doc.preview_pages), len(buffer.getvalue())
+    return ejecutar
+
+
+def casos_suite():
+    """Casos de la suite: nombre -> (ejecutar, repeticiones máximas)"""
+    from lumier_pdf import manual as gm
+
+    from lumier_pdf.vista_previa import VistaPrevia
+
+    styles = gm.build_styles()
+    vista = VistaPrevia(styles)
+    casos = {
+        "manual": (_documento(gm.build_pdf), None),
+        "manual.optimizado": (_documento(functools.partial(gm.build_pdf, optimize=9)), None),
+        "vista_previa.ejemplo": (_vista_previa(vista, secciones="ejemplo completo"), None),
+        "vista_previa.clasificacion": (lambda: (1, len(vista.clasificacion().contenido[0])), None),
+        "flowable.ColoredBox": (_flowable(
+            lambda: gm.ColoredBox("1. RESUMEN EJECUTIVO", gm.LUMIER_BLACK, gm.LUMIER_GOLD, height=35, font_size=14),
+            VECES_FLOWABLE), None),
+        "flowable.InfoCard": (_flowable(
+            lambda: gm.InfoCard("Margen", "14,03%", "AJUSTADO"), VECES_FLOWABLE), None),
+        "flowable.FormulaBox": (_flowable(
+            lambda: gm.FormulaBox("BENEFICIO NETO = Venta Neta - Inversión Total",
+                                  "Donde: Inversión Total = Adquisición + Gastos Reforma + Intereses"),
+            VECES_FLOWABLE), None),
+        "flowable.MarginIndicator": (_flowable(gm.MarginIndicator, VECES_FLOWABLE), None),
+        "grafico.create_cost_bar_chart": (_flowable(gm.create_cost_bar_chart, VECES_GRAFICO), None),
+        "grafico.create_investment_pie": (_flowable(gm.create_investment_pie, VECES_GRAFICO), None),
+    }
+    for n in TAMANOS_CARTERA:
+        build = functools.partial(gm.build_portfolio, cartera_ejemplo(n), styles=styles)
+        # Las carteras grandes tardan segundos: basta una repetición
+        casos[f"cartera.{n}"] = (_documento(build), 1 if n >= 1000 else None)
+    for n in TAMANOS_LISTADO:
+        # Cada ejecución necesita un generador nuevo
+        build = lambda buffer, n=n: gm.build_portfolio_listing(listado_ejemplo(n), buffer, styles=styles)
+        casos[f"listado.{n}"] = (_documento(build), 1 if n >= 10000 else None)
+    return casos
+
+
+def _medir_caso(ejecutar, repeticiones):
+    """Mejor tiempo de `repeticiones` ejecuciones y pico de memoria de una más"""
+    mejor = None
+    for _ in range(repeticiones):
+        gc.collect()
+        inicio = time.perf_counter()
+        paginas, tamano = ejecutar()
+        segundos = time.perf_counter() - inicio
+        mejor = segundos if mejor is None else min(mejor, segundos)
+
+    gc.collect()
+    tracemalloc.start()
+    try:
+        ejecutar()
+        _, pico = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {
+        "segundos": mejor,
+        "paginas": paginas,
+        "paginas_por_segundo": paginas / mejor if paginas else 0.0,
+        "bytes": tamano,
+        "pico_memoria": pico,
+    }
+
+
+def entorno():
+    """Versiones con las que se ha medido: las líneas base solo son comparables en el mismo entorno"""
+    import numpy
+    from reportlab import Version
+
+    return {
+        "python": platform.python_version(),
+        "reportlab": Version,
+        "numpy": numpy.__version__,
+        "maquina": platform.machine(),
+        "sistema": platform.system(),
+    }
+
+
+def medir_suite(patron="*", repeticiones=3):
+    """Mide los casos cuyo nombre encaja con `patron` (fnmatch) y devuelve el informe"""
+    from reportlab import rl_config
+
+    invariante = rl_config.invariant
+    rl_config.invariant = 1
+    try:
+        casos = {}
+        for nombre, (ejecutar, maximo) in casos_suite().items():
+            if fnmatch.fnmatch(nombre, patron):
+                casos[nombre] = _medir_caso(ejecutar, min(repeticiones, maximo or repeticiones))
+    finally:
+        rl_config.invariant = invariante
+    return {"entorno": entorno(), "casos": casos}
+
+
+def comparar(actual, base, umbral=UMBRAL_REGRESION):
+    """Regresiones de `actual` frente a `base`: (caso, métrica, valor base, valor actual)"""
+    regresiones = []
+    for nombre, medicion in actual["casos"].items():
+        referencia = base["casos"].get(nombre)
+        if referencia is None:
+            continue
+        for metrica in METRICAS_REGRESION:
+            if medicion[metrica] > referencia[metrica] * (1 + umbral):
+                regresiones.append((nombre, metrica, referencia[metrica], medicion[metrica]))
+    return regresiones
+
+
+def _rss():
+    """Pico de RSS de este proceso en bytes (ru_maxrss va en KB en Linux y en bytes en macOS)"""
+    import resource
+
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * (1 if sys.platform == "darwin" else 1024)
+
+
+def _medir_rss(proyectos):
+    from lumier_pdf import manual as gm
+
+    import tempfile
+
+    cartera = cartera_ejemplo(proyectos)
+    base = _rss()
+    inicio = time.perf_counter()
+    # En un fichero, para que el PDF escrito no cuente en el RSS
+    with tempfile.TemporaryFile() as salida:
+        doc = gm.build_portfolio(iter(cartera), salida)
+        tamano = salida.tell()
+    return {
+        "proyectos": proyectos,
+        "paginas": doc.page,
+        "segundos": time.perf_counter() - inicio,
+        "bytes": tamano,
+        "rss_base": base,
+        "rss_pico": _rss(),
+    }
+
+
+def medir_memoria(proyectos=2000):
+    """Pico de RSS al construir una cartera de `proyectos` proyectos, en un proceso nuevo"""
+    entorno = dict(os.environ, PYTHONPATH=os.pathsep.join(p for p in sys.path if p))
+    resultado = subprocess.run([sys.executable, "-m", "lumier_pdf.bench", "_rss", str(proyectos)],
+                               capture_output=True, text=True, env=entorno, check=True)
+    return json.loads(resultado.stdout)
+
+
+def base_sqlite_ejemplo(ruta, filas):
+    """Base SQLite con el esquema de lumier_pdf.carga y `filas` versiones activas del ejemplo"""
+    import sqlite3
+
+    from lumier_pdf.carga import ESQUEMA_SQLITE
+
+    data = json.dumps({"precioCompra": 1065000, "m2Construidos": 158, "m2ZZCC": 11, "terrazaM2": 2,
+                       "calidad": 3, "precioVenta": 1600000,
+                       "fechaCompra": "2026-01-15", "fechaVenta": "2026-08-15"})
+    conexion = sqlite3.connect(ruta)
+    with conexion:
+        conexion.executescript(ESQUEMA_SQLITE)
+        conexion.executemany("INSERT INTO projects (id, slug, name) VALUES (?, ?, ?)",
+                             ((str(i), f"proyecto-{i}", f"Proyecto {i}") for i in range(filas)))
+        conexion.executemany("INSERT INTO project_versions (id, project_id, version_number, version_name, data, "
+                             "is_active) VALUES (?, ?, 1, 'Inicial', ?, TRUE)",
+                             ((str(i), str(i), data) for i in range(filas)))
+    conexion.close()
+
+
+def _medir_rss_carga(ruta):
+    from lumier_pdf.carga import cargar
+
+    base = _rss()
+    inicio = time.perf_counter()
+    ids, _ = cargar(ruta)
+    return {"filas": len(ids), "segundos": time.perf_counter() - inicio, "rss_base": base, "rss_pico": _rss()}
+
+
+def medir_carga(filas=100000):
+    """Tiempo y pico de RSS de cargar() sobre una base SQLite de `filas` versiones, en un proceso nuevo"""
+    import tempfile
+
+    with tempfile.TemporaryDirectory() as directorio:
+        ruta = os.path.join(directorio, "versiones.sqlite")
+        base_sqlite_ejemplo(ruta, filas)
+        entorno = dict(os.environ, PYTHONPATH=os.pathsep.join(p for p in sys.path if p))
+        resultado = subprocess.run([sys.executable, "-m", "lumier_pdf.bench", "_rss_carga", ruta],
+                                   capture_output=True, text=True, env=entorno, check=True)
+    return json.loads(resultado.stdout)
+
+
+def medir_fuentes(dossiers=20):
+    """
+    Segundos y bytes por dossier en cada modo de MODOS_FUENTES, generando
+    `dossiers` documentos seguidos en el mismo proceso
+    """
+    import zlib
+
+    from lumier_pdf import manual as gm
+    from lumier_pdf.fuentes import fuente_simbolos
+
+    styles = gm.build_styles()
+    fuente = fuente_simbolos()
+    if fuente is None:
+        raise FileNotFoundError("No se encuentra la fuente de símbolos")
+    subconjunto = fuente.fuente_comprimida, fuente.longitud
+    codigos = fuente.codigos
+    with open(fuente.ruta, "rb") as fichero:
+        completa = fichero.read()
+    resultados = {}
+    try:
+        for modo in MODOS_FUENTES:
+            # Sin glifos, todos los símbolos pasan a Symbol/ZapfDingbats y la fuente no se incrusta
+            fuente.codigos = {} if modo == "base14" else codigos
+            inicio = time.perf_counter()
+            for _ in range(dossiers):
+                if modo == "por_documento":
+                    # Se vuelve a leer el TTF, recortar y comprimir al incrustarla
+                    fuente._face = None
+                elif modo == "completa":
+                    fuente.fuente_comprimida, fuente.longitud = zlib.compress(completa), len(completa)
+                buffer = io.BytesIO()
+                gm.build_dossier(EJEMPLO_COMPLETO, buffer, styles=styles)
+            resultados[modo] = {"segundos": (time.perf_counter() - inicio) / dossiers, "bytes": len(buffer.getvalue())}
+            fuente.fuente_comprimida, fuente.longitud = subconjunto
+    finally:
+        fuente.codigos = codigos
+    return resultados
+
+
+def medir_paralelo(proyectos=500, workers=(1, 2, 4)):
+    """Segundos de la cartera de `proyectos` maquetada en secuencia y con cada número de `workers`"""
+    from lumier_pdf import manual as gm
+
+    styles = gm.build_styles()
+    cartera = cartera_ejemplo(proyectos)
+    resultados = {}
+    for n in (None, *workers):
+        inicio = time.perf_counter()
+        doc = gm.build_portfolio(cartera, io.BytesIO(), styles=styles, workers=n)
+        resultados[n or 0] = {"segundos": time.perf_counter() - inicio, "paginas": doc.page}
+    return resultados
+
+
+def _informe_paralelo(resultados):
+    secuencial = resultados[0]
+    print(f"Cartera en paralelo ({formatear_numero(secuencial['paginas'], 0)} páginas, {os.cpu_count()} CPUs)")
+    print(f"  {'workers':10} {'tiempo (s)':>12} {'aceleración':>12}")
+    for workers, r in resultados.items():
+        print(f"  {workers or 'secuencial':<10} {formatear_numero(r['segundos'], 3):>12} "
+              f"{formatear_numero(secuencial['segundos'] / r['segundos'], 2):>11}x")
+
+
+def _informe_fuentes(resultados):
+    base = resultados["base14"]
+    print("Fuente de símbolos por dossier")
+    print(f"  {'':14} {'tiempo (ms)':>12} {'tamaño (KB)':>12} {'fuente (KB)':>12}")
+    for modo, r in resultados.items():
+        print(f"  {modo:14} {formatear_numero(r['segundos'] * 1000, 2):>12} "
+              f"{formatear_numero(r['bytes'] / 1024, 1):>12} {formatear_numero((r['bytes'] - base['bytes']) / 1024, 1):>12}")
+
+
+def _informe_memoria(r):
+    incremento = r["rss_pico"] - r["rss_base"]
+    print(f"Cartera de {formatear_numero(r['proyectos'], 0)} proyectos ({formatear_numero(r['paginas'], 0)} páginas, "
+          f"{formatear_numero(r['segundos'], 2)} s)")
+    print(f"  RSS tras importar  {formatear_numero(r['rss_base'] / 2**20, 1):>10} MB")
+    print(f"  RSS máximo         {formatear_numero(r['rss_pico'] / 2**20, 1):>10} MB")
+    print(f"  incremento         {formatear_numero(incremento / 2**20, 1):>10} MB "
+          f"({formatear_numero(incremento / r['proyectos'] / 1024, 1)} KB por proyecto)")
+
+
+def _informe_carga(r):
+    incremento = r["rss_pico"] - r["rss_base"]
+    print(f"Carga de {formatear_numero(r['filas'], 0)} versiones desde SQLite: {formatear_numero(r['segundos'], 2)} s "
+          f"({formatear_numero(r['filas'] / r['segundos'], 0)} filas/s)")
+    print(f"  RSS tras importar  {formatear_numero(r['rss_base'] / 2**20, 1):>10} MB")
+    print(f"  RSS máximo         {formatear_numero(r['rss_pico'] / 2**20, 1):>10} MB")
+    print(f"  incremento         {formatear_numero(incremento / 2**20, 1):>10} MB "
+          f"({formatear_numero(incremento / r['filas'], 1)} bytes por fila)")
+
+
+def _informe_suite(informe):
+    print(f"  {'caso':32} {'tiempo (ms)':>12} {'págs/s':>9} {'tamaño (KB)':>12} {'pico (MB)':>10}")
+    for nombre, r in informe["casos"].items():
+        print(f"  {nombre:32} {formatear_numero(r['segundos'] * 1000, 2):>12} "
+              f"{formatear_numero(r['paginas_por_segundo'], 1) if r['paginas'] else '-':>9} "
+              f"{formatear_numero(r['bytes'] / 1024, 1) if r['bytes'] else '-':>12} "
+              f"{formatear_numero(r['pico_memoria'] / 2**20, 2):>10}")
+
+
+def _informe_regresiones(regresiones, umbral):
+    if not regresiones:
+        print(f"✅ Sin regresiones (umbral {formatear_numero(umbral * 100, 0)}%)")
+        return
+    print(f"❌ {len(regresiones)} regresiones (umbral {formatear_numero(umbral * 100, 0)}%):")
+    for nombre, metrica, base, actual in regresiones:
+        print(f"   - {nombre} {metrica}: {formatear_numero(base, 4)} → {formatear_numero(actual, 4)} "
+              f"(+{formatear_numero((actual / base - 1) * 100, 1)}%)")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Mediciones del generador de PDF")
+    sub = parser.add_subparsers(dest="medicion", required=True)
+    formularios = sub.add_parser("formularios", help="Cabecera/pie por página frente a Form XObjects")
+    formularios.add_argument("--paginas", type=int, default=300)
+    formularios.add_argument("--repeticiones", type=int, default=3)
+    suite = sub.add_parser("suite", help="Suite completa con línea base en JSON")
+    suite.add_argument("--casos", default="*", help="Patrón de los casos a medir (p. ej. 'flowable.*')")
+    suite.add_argument("--repeticiones", type=int, default=3)
+    suite.add_argument("--guardar", default=None, help="Guarda las mediciones como línea base en este JSON")
+    suite.add_argument("--comparar", default=None, help="Compara con la línea base de este JSON")
+    suite.add_argument("--umbral", type=float, default=UMBRAL_REGRESION,
+                       help="Empeoramiento relativo que cuenta como regresión (0.20 = 20%%)")
+    memoria = sub.add_parser("memoria", help="Pico de RSS de una cartera grande")
+    memoria.add_argument("--proyectos", type=int, default=2000)
+    # Lo que ejecuta el proceso nuevo de `memoria`
+    sub.add_parser("_rss").add_argument("proyectos", type=int)
+    carga = sub.add_parser("carga", help="Tiempo y pico de RSS de cargar versiones desde SQLite")
+    carga.add_argument("--filas", type=int, default=100000)
+    sub.add_parser("_rss_carga").add_argument("ruta")
+    fuentes = sub.add_parser("fuentes", help="Tiempo y tamaño por dossier según cómo se incrusta la fuente de símbolos")
+    fuentes.add_argument("--dossiers", type=int, default=20)
+    paralelo = sub.add_parser("paralelo", help="Cartera maquetada en secuencia y en varios procesos")
+    paralelo.add_argument("--proyectos", type=int, default=500)
+    paralelo.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    args = parser.parse_args(argv)
+
+    if args.medicion == "formularios":
+        _informe_comparacion("Form XObjects", medir_formularios(args.paginas, args.repeticiones))
+        return 0
+    if args.medicion == "memoria":
+        _informe_memoria(medir_memoria(args.proyectos))
+        return 0
+    if args.medicion == "_rss":
+        print(json.dumps(_medir_rss(args.proyectos)))
+        return 0
+    if args.medicion == "carga":
+        _informe_carga(medir_carga(args.filas))
+        return 0
+    if args.medicion == "_rss_carga":
+        print(json.dumps(_medir_rss_carga(args.ruta)))
+        return 0
+    if args.medicion == "fuentes":
+        _informe_fuentes(medir_fuentes(args.dossiers))
+        return 0
+    if args.medicion == "paralelo":
+        _informe_paralelo(medir_paralelo(args.proyectos, args.workers))
+        return 0
+
+    informe = medir_suite(args.casos, args.repeticiones)
+    _informe_suite(informe)
+    codigo = 0
+    if args.comparar:
+        with open(args.comparar, encoding="utf-8") as fichero:
+            base = json.load(fichero)
+        if base.get("entorno") != informe["entorno"]:
+            print("⚠️  La línea base se midió en otro entorno: los tiempos pueden no ser comparables")
+        regresiones = comparar(informe, base, args.umbral)
+        _informe_regresiones(regresiones, args.umbral)
+        codigo = 1 if regresiones else 0
+    if args.guardar:
+        with open(args.guardar, "w", encoding="utf-8") as fichero:
+            json.dump(informe, fichero, indent=2, ensure_ascii=False)
+    return codigo
+
+
+if __name__ == "__main__":
+    sys.exit(main())
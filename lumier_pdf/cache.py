@@ -0,0 +1,209 @@
+"""
+Caché de secciones - Lumier Casas Boutique
+
+Los documentos se construyen como una secuencia de secciones separadas por
+PageBreak. Cada sección se identifica por la huella (SHA-256) de sus entradas
+y el contenido de sus páginas ya maquetadas se guarda en disco. Al
+reconstruir, solo se maquetan las secciones cuya huella ha cambiado; el resto
+se cose desde la caché.
+
+Lo que se guarda es el contenido de la página sin encabezado ni pie (ver
+lumier_pdf.costura): esos se dibujan siempre en la construcción final, así
+que la numeración de header_footer es correcta aunque cambie el número de
+páginas de una sección anterior.
+
+    cache = CacheSecciones(".cache/secciones")
+    cache.construir(doc, [(clave, lambda: flowables), ...], first_page, header_footer)
+    print(cache)   # Caché de secciones: 12/14 aciertos (85,7%)
+"""
+
+import hashlib
+import json
+import os
+import sys
+from functools import lru_cache
+
+import numpy as np
+from reportlab import Version as REPORTLAB_VERSION
+from reportlab.platypus import PageBreak
+
+from lumier_pdf.costura import CanvasCaptura, MarcaSeccion, coser, tras_decorar
+from lumier_pdf.formato import formatear_porcentaje
+
+# Cambia cuando cambia el formato de lo que se guarda en disco
+FORMATO = 2
+
+# Atributos que no forman parte del contenido de un flowable
+_IGNORADOS = frozenset(("canv", "_frame", "_doctemplate"))
+
+
+def _codigo(code):
+    """Bytes estables de un code object (el repr de los anidados incluye su dirección)"""
+    partes = [code.co_code]
+    for constante in code.co_consts:
+        partes.append(_codigo(constante) if hasattr(constante, "co_code") else repr(constante).encode())
+    return b"\0".join(partes)
+
+
+def _atributos(objeto):
+    """Atributos de instancia: los de su __dict__ y los de los __slots__ de su clase"""
+    atributos = dict(getattr(objeto, "__dict__", {}))
+    for clase in type(objeto).__mro__:
+        slots = clase.__dict__.get("__slots__", ())
+        for nombre in (slots,) if isinstance(slots, str) else slots:
+            if nombre not in atributos and hasattr(objeto, nombre):
+                atributos[nombre] = getattr(objeto, nombre)
+    return atributos.items()
+
+
+class _Huella:
+    """
+    Huella estable (entre procesos) del contenido de un objeto. Memoriza por
+    id(), así que solo es válida mientras los objetos recorridos siguen vivos.
+    """
+
+    def __init__(self):
+        self._memo = {}
+
+    def __call__(self, objeto):
+        return self._digest(objeto, set())
+
+    def _digest(self, objeto, pila):
+        if objeto is None or isinstance(objeto, (bool, int, float, str, bytes)):
+            return hashlib.sha256(repr(objeto).encode("utf-8", "surrogatepass")).digest()
+        clave = id(objeto)
+        if clave in self._memo:
+            return self._memo[clave]
+        if clave in pila:
+            return b"<ciclo>"
+        pila.add(clave)
+        h = hashlib.sha256(type(objeto).__qualname__.encode())
+        try:
+            if isinstance(objeto, np.ndarray):
+                h.update(str(objeto.dtype).encode() + repr(objeto.shape).encode())
+                h.update(np.ascontiguousarray(objeto).tobytes())
+            elif isinstance(objeto, np.generic):
+                h.update(repr(objeto.item()).encode())
+            elif isinstance(objeto, (list, tuple)):
+                for valor in objeto:
+                    h.update(self._digest(valor, pila))
+            elif isinstance(objeto, dict):
+                self._items(h, objeto.items(), pila)
+            elif isinstance(objeto, (set, frozenset)):
+                for digest in sorted(self._digest(v, pila) for v in objeto):
+                    h.update(digest)
+            elif isinstance(objeto, type):
+                h.update(f"{objeto.__module__}.{objeto.__qualname__}".encode())
+            elif hasattr(objeto, "__code__") or hasattr(objeto, "__func__"):
+                funcion = getattr(objeto, "__func__", objeto)
+                h.update(f"{funcion.__module__}.{funcion.__qualname__}".encode())
+                h.update(_codigo(funcion.__code__))
+            elif hasattr(objeto, "__dict__") or hasattr(type(objeto), "__slots__"):
+                self._items(h, ((k, v) for k, v in _atributos(objeto) if k not in _IGNORADOS), pila)
+            else:
+                h.update(repr(objeto).encode())
+        finally:
+            pila.discard(clave)
+        digest = h.digest()
+        self._memo[clave] = digest
+        return digest
+
+    def _items(self, h, items, pila):
+        for k, v in sorted(items, key=lambda kv: repr(kv[0])):
+            h.update(self._digest(k, pila) + self._digest(v, pila))
+
+
+def huella(*objetos):
+    """Huella hexadecimal del contenido de uno o varios objetos"""
+    return _Huella()(objetos).hex()
+
+
+@lru_cache(maxsize=None)
+def huella_codigo(modulo):
+    """Huella del código fuente de un módulo y del paquete lumier_pdf"""
+    h = hashlib.sha256()
+    paquete = os.path.dirname(os.path.abspath(__file__))
+    rutas = [getattr(sys.modules.get(modulo), "__file__", None)]
+    rutas += sorted(os.path.join(paquete, f) for f in os.listdir(paquete) if f.endswith(".py"))
+    for ruta in rutas:
+        if ruta:
+            with open(ruta, "rb") as fichero:
+                h.update(fichero.read())
+    return h.hexdigest()
+
+
+class CacheSecciones:
+    """Páginas maquetadas por huella de sección, en `directorio`"""
+
+    def __init__(self, directorio):
+        self.directorio = directorio
+        self.aciertos = 0
+        self.fallos = 0
+
+    @property
+    def ratio(self):
+        total = self.aciertos + self.fallos
+        return self.aciertos / total if total else 0.0
+
+    def __str__(self):
+        return (f"Caché de secciones: {self.aciertos}/{self.aciertos + self.fallos} aciertos "
+                f"({formatear_porcentaje(self.ratio * 100, 1)})")
+
+    def _ruta(self, clave):
+        return os.path.join(self.directorio, f"{clave}.json")
+
+    def leer(self, clave):
+        """Páginas guardadas de una sección, o None"""
+        try:
+            with open(self._ruta(clave), encoding="utf-8") as fichero:
+                datos = json.load(fichero)
+        except (OSError, ValueError):
+            return None
+        return datos["paginas"] if datos.get("formato") == FORMATO else None
+
+    def guardar(self, clave, paginas):
+        os.makedirs(self.directorio, exist_ok=True)
+        temporal = f"{self._ruta(clave)}.{os.getpid()}.tmp"
+        with open(temporal, "w", encoding="utf-8") as fichero:
+            json.dump({"formato": FORMATO, "paginas": paginas}, fichero)
+        os.replace(temporal, self._ruta(clave))
+
+    def clave(self, doc, entradas):
+        """Huella de una sección: sus entradas más el formato y la geometría de página"""
+        geometria = (doc.pagesize, doc.leftMargin, doc.rightMargin, doc.topMargin, doc.bottomMargin)
+        return huella(FORMATO, REPORTLAB_VERSION, geometria, entradas)
+
+    def construir(self, doc, secciones, onFirstPage, onLaterPages):
+        """
+        doc.build con caché. `secciones` es una lista de (clave, producir), donde
+        producir() devuelve los flowables de la sección y solo se llama si la
+        clave no está en caché; con clave None la sección no se guarda. Entre
+        dos secciones se inserta un PageBreak.
+        """
+        story = []
+        capturas = {}
+        pendientes = {}
+        for indice, (clave, producir) in enumerate(secciones):
+            if indice:
+                story.append(PageBreak())
+            paginas = self.leer(clave) if clave else None
+            if paginas is not None:
+                self.aciertos += 1
+                story.append(MarcaSeccion(None))
+                story.extend(coser(paginas))
+            else:
+                if clave:
+                    self.fallos += 1
+                    capturas[indice] = []
+                    pendientes[indice] = clave
+                story.append(MarcaSeccion(indice if clave else None))
+                story.extend(producir())
+
+        canvasmaker = type("CanvasCaptura", (CanvasCaptura,), {"capturas": capturas})
+        doc.build(story, onFirstPage=tras_decorar(onFirstPage), onLaterPages=tras_decorar(onLaterPages),
+                  canvasmaker=canvasmaker)
+
+        for indice, clave in pendientes.items():
+            if capturas[indice]:
+                self.guardar(clave, capturas[indice])
+        return doc
@@ -0,0 +1,256 @@
+"""
+Motor de cálculo vectorizado - Lumier Casas Boutique
+
+Implementa las fórmulas documentadas en MANUAL_CALCULOS.md sobre columnas
+NumPy: cada entrada es un array con un valor por proyecto y toda la cartera
+se evalúa en una sola pasada, sin bucles de Python por proyecto.
+"""
+
+from itertools import islice
+
+import numpy as np
+
+# Constantes fijas (MANUAL_CALCULOS.md, sección 10.1)
+IVA = 1.21
+ITP = 0.02
+INSCRIPCION_ESCRITURA = 1530.0
+GASTOS_VENTA = 800.0
+COSTOS_TENENCIA = 2490.0
+PLUSVALIA = 0.0027
+COSTE_TERRAZA_M2 = 36.5
+COSTE_TOLDO = 2500.0
+SUPLEMENTO_CLASICO = 790.0
+PERMISO_CONSTRUCCION_M2 = 34.2
+FACTOR_INTERES = 0.5
+DIAS_POR_MES = 30.44
+
+# Tablas de costes por calidad (€/m²). El índice es la calidad (1-5);
+# la posición 0 no se usa.
+COSTE_OBRA = np.array([0, 350, 420, 560, 700, 900], dtype=np.float64)
+COSTE_MATERIALES = np.array([0, 300, 400, 512, 650, 850], dtype=np.float64)
+COSTE_INTERIORISMO = np.array([0, 40, 50, 59.1, 75, 95], dtype=np.float64)
+COSTE_MOBILIARIO = np.array([0, 60, 80, 101.7, 130, 170], dtype=np.float64)
+COSTE_ARQUITECTURA = np.array([0, 25, 32, 38.3, 48, 60], dtype=np.float64)
+# Coste de reforma por m² (obra + materiales + interiorismo + mobiliario)
+COSTE_REFORMA_M2 = COSTE_OBRA + COSTE_MATERIALES + COSTE_INTERIORISMO + COSTE_MOBILIARIO
+
+# Clasificación de proyectos por margen
+UMBRAL_OPORTUNIDAD = 16.0
+UMBRAL_AJUSTADO = 13.0
+OPORTUNIDAD, AJUSTADO, NO_HACER = 0, 1, 2
+CLASIFICACIONES = ("OPORTUNIDAD", "AJUSTADO", "NO HACER")
+
+# Columnas de entrada. Las obligatorias no tienen valor por defecto; los
+# porcentajes de intermediación valen 0 cuando no hay intermediario y
+# factor_coste_reforma escala los €/m² de reforma de la tabla de calidades.
+CAMPOS_OBLIGATORIOS = ("precio_compra", "m2_construidos", "calidad", "precio_venta")
+VALORES_POR_DEFECTO = {
+    "m2_zzcc": 0.0,
+    "terraza_m2": 0.0,
+    "es_clasico": 0.0,
+    "toldo_pergola": 0.0,
+    "extras": 0.0,
+    "factor_coste_reforma": 1.0,
+    "intermediacion_compra": 0.0,
+    "intermediacion_venta": 0.0,
+    "deuda": 0.0,
+    "interes_financiero": 0.0,
+    "meses": 0.0,
+}
+CAMPOS_ENTRADA = CAMPOS_OBLIGATORIOS + tuple(VALORES_POR_DEFECTO)
+
+# Proyectos por bloque en calcular_por_bloques
+BLOQUE_CALCULO = 4096
+
+# Proyecto del Anexo A del manual (compra 15/01/2026, venta 15/08/2026)
+EJEMPLO_COMPLETO = {
+    "precio_compra": 1065000.0,
+    "m2_construidos": 158.0,
+    "m2_zzcc": 11.0,
+    "terraza_m2": 2.0,
+    "calidad": 3,
+    "es_clasico": False,
+    "toldo_pergola": False,
+    "extras": 0.0,
+    "factor_coste_reforma": 1.0,
+    "intermediacion_compra": 0.0,
+    "intermediacion_venta": 3.0,
+    "precio_venta": 1600000.0,
+    "deuda": 500000.0,
+    "interes_financiero": 6.25,
+    "meses": 212 / DIAS_POR_MES,
+}
+
+
+def meses_entre(fecha_compra, fecha_venta):
+    """Meses de proyecto entre dos fechas (o arrays de fechas) ISO"""
+    dias = (np.asarray(fecha_venta, dtype="datetime64[D]")
+            - np.asarray(fecha_compra, dtype="datetime64[D]"))
+    return dias.astype(np.float64) / DIAS_POR_MES
+
+
+def desde_calculator_data(data):
+    """Convierte un `CalculatorData` (JSON de project_versions) a entradas del motor"""
+    meses = 0.0
+    if data.get("fechaCompra") and data.get("fechaVenta"):
+        meses = float(meses_entre(data["fechaCompra"][:10], data["fechaVenta"][:10]))
+
+    return {
+        "precio_compra": data.get("precioCompra") or 0.0,
+        "m2_construidos": data.get("m2Construidos") or 0.0,
+        "m2_zzcc": data.get("m2ZZCC") or 0.0,
+        "terraza_m2": data.get("terrazaM2") or 0.0,
+        "calidad": data.get("calidad") or 3,
+        "es_clasico": bool(data.get("esClasico")),
+        "toldo_pergola": bool(data.get("toldoPergola")),
+        "extras": data.get("extras") or 0.0,
+        "intermediacion_compra": (data.get("porcentajeIntermediacionCompra") or 0.0)
+        if data.get("intermediacionCompra") else 0.0,
+        "intermediacion_venta": (data.get("porcentajeIntermediacionVenta") or 0.0)
+        if data.get("intermediacionVenta") else 0.0,
+        "precio_venta": data.get("precioVenta") or 0.0,
+        "deuda": data.get("deuda") or 0.0,
+        "interes_financiero": data.get("interesFinanciero") or 0.0,
+        "meses": meses,
+        "direccion": data.get("direccion") or "",
+        "ciudad": data.get("ciudad") or "",
+    }
+
+
+def columnas(proyectos):
+    """Agrupa una lista de proyectos (dicts) en columnas NumPy"""
+    proyectos = list(proyectos)
+    cols = {}
+    for campo in CAMPOS_ENTRADA:
+        defecto = VALORES_POR_DEFECTO.get(campo)
+        if defecto is None:
+            cols[campo] = np.fromiter((p[campo] for p in proyectos), dtype=np.float64, count=len(proyectos))
+        else:
+            cols[campo] = np.fromiter((p.get(campo, defecto) for p in proyectos), dtype=np.float64,
+                                      count=len(proyectos))
+    return cols
+
+
+def calcular(entradas):
+    """
+    Calcula todas las partidas y métricas para una cartera de proyectos.
+
+    `entradas` es un mapping de nombre de columna a array (o escalar, que se
+    difunde). Devuelve un dict de arrays float64 con una posición por proyecto;
+    `clasificacion` es int8 (OPORTUNIDAD, AJUSTADO o NO_HACER).
+    """
+    faltan = [c for c in CAMPOS_OBLIGATORIOS if c not in entradas]
+    if faltan:
+        raise ValueError(f"Faltan columnas obligatorias: {', '.join(faltan)}")
+
+    e = {c: np.asarray(entradas.get(c, VALORES_POR_DEFECTO.get(c)), dtype=np.float64)
+         for c in CAMPOS_ENTRADA}
+    precio_compra = e["precio_compra"]
+    precio_venta = e["precio_venta"]
+    m2 = e["m2_construidos"]
+    calidad = np.clip(e["calidad"].astype(np.intp), 1, 5)
+
+    # Adquisición
+    honorario_compra = precio_compra * (e["intermediacion_compra"] / 100) * IVA
+    itp = precio_compra * ITP
+    total_adquisicion = precio_compra + honorario_compra + INSCRIPCION_ESCRITURA + itp
+
+    # Hard costs
+    m2_reforma = m2 * e["factor_coste_reforma"]
+    obra = m2_reforma * COSTE_OBRA[calidad]
+    materiales = m2_reforma * COSTE_MATERIALES[calidad]
+    interiorismo = m2_reforma * COSTE_INTERIORISMO[calidad] + e["es_clasico"] * SUPLEMENTO_CLASICO
+    mobiliario = m2_reforma * COSTE_MOBILIARIO[calidad]
+    terraza = np.maximum(e["terraza_m2"], 0) * COSTE_TERRAZA_M2
+    toldo = e["toldo_pergola"] * COSTE_TOLDO
+    hard_costs = obra + materiales + interiorismo + mobiliario + terraza + toldo + e["extras"]
+
+    # Soft costs
+    arquitectura = m2 * COSTE_ARQUITECTURA[calidad]
+    permiso = m2 * PERMISO_CONSTRUCCION_M2
+    plusvalia = precio_venta * PLUSVALIA
+    soft_costs = arquitectura + permiso + GASTOS_VENTA + COSTOS_TENENCIA + plusvalia
+    total_gastos = hard_costs + soft_costs
+
+    # Venta y financiación
+    honorarios_venta = precio_venta * (e["intermediacion_venta"] / 100) * IVA
+    venta_neta = precio_venta - honorarios_venta
+    intereses = e["deuda"] * (e["interes_financiero"] / 100) * FACTOR_INTERES
+
+    # Métricas
+    inversion_total = total_adquisicion + total_gastos + intereses
+    equity = total_adquisicion + total_gastos - e["deuda"]
+    beneficio_neto = venta_neta - inversion_total
+    meses = e["meses"]
+    m2_totales = m2 + e["m2_zzcc"]
+
+    with np.errstate(divide="ignore", invalid="ignore", over="ignore"):
+        roi = np.where(inversion_total > 0, beneficio_neto / inversion_total * 100, 0.0)
+        margen = np.where(precio_venta > 0, beneficio_neto / precio_venta * 100, 0.0)
+        tir_valida = (inversion_total > 0) & (venta_neta > 0) & (meses > 0)
+        tir = np.where(tir_valida, ((venta_neta / inversion_total) ** (12 / meses) - 1) * 100, 0.0)
+        beneficio_m2 = np.where(m2_totales > 0, beneficio_neto / m2_totales, 0.0)
+
+    clasificacion = np.where(
+        margen >= UMBRAL_OPORTUNIDAD, OPORTUNIDAD,
+        np.where(margen >= UMBRAL_AJUSTADO, AJUSTADO, NO_HACER)
+    ).astype(np.int8)
+
+    n = np.broadcast_shapes(*(v.shape for v in e.values()))
+    resultados = {
+        "honorario_compra": honorario_compra,
+        "inscripcion_escritura": INSCRIPCION_ESCRITURA,
+        "itp": itp,
+        "total_adquisicion": total_adquisicion,
+        "obra": obra,
+        "materiales": materiales,
+        "interiorismo": interiorismo,
+        "mobiliario": mobiliario,
+        "terraza": terraza,
+        "toldo": toldo,
+        "extras": e["extras"],
+        "hard_costs": hard_costs,
+        "arquitectura": arquitectura,
+        "permiso_construccion": permiso,
+        "gastos_venta": GASTOS_VENTA,
+        "costos_tenencia": COSTOS_TENENCIA,
+        "plusvalia": plusvalia,
+        "soft_costs": soft_costs,
+        "total_gastos": total_gastos,
+        "honorarios_venta": honorarios_venta,
+        "venta_neta": venta_neta,
+        "intereses": intereses,
+        "equity": equity,
+        "inversion_total": inversion_total,
+        "beneficio_neto": beneficio_neto,
+        "roi": roi,
+        "margen": margen,
+        "tir": tir,
+        "m2_totales": m2_totales,
+        "beneficio_m2": beneficio_m2,
+    }
+    resultados = {k: np.broadcast_to(np.asarray(v, dtype=np.float64), n) for k, v in resultados.items()}
+    resultados["clasificacion"] = np.broadcast_to(clasificacion, n)
+    return resultados
+
+
+def calcular_proyecto(proyecto):
+    """Calcula un único proyecto y devuelve escalares de Python"""
+    resultados = calcular({k: np.atleast_1d(v) for k, v in proyecto.items()})
+    return {k: v[0].item() for k, v in resultados.items()}
+
+
+def calcular_por_bloques(proyectos, tamano=BLOQUE_CALCULO):
+    """
+    Calcula un iterable de proyectos (por ejemplo, un generador que lee de
+    disco) de `tamano` en `tamano` y devuelve (proyecto, resultados) para cada
+    uno, con escalares de Python. Solo hay un bloque en memoria a la vez.
+    """
+    proyectos = iter(proyectos)
+    while True:
+        bloque = list(islice(proyectos, tamano))
+        if not bloque:
+            return
+        resultados = {k: v.tolist() for k, v in calcular(columnas(bloque)).items()}
+        for i, proyecto in enumerate(bloque):
+            yield proyecto, {k: v[i] for k, v in resultados.items()}
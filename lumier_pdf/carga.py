@@ -0,0 +1,394 @@
+"""
+Carga de proyectos - Lumier Casas Boutique
+
+Lee versiones de proyecto de un export (JSON, JSON Lines o CSV) o de la base
+de datos (tablas projects y project_versions de lib/database.sql, en Postgres
+o en una copia local en SQLite) y las entrega en bloques de columnas NumPy
+para calculos.calcular. Todo se lee en streaming: los JSON se decodifican
+objeto a objeto, en Postgres se usa un cursor de servidor y las filas se
+piden por lotes. En memoria solo hay un bloque de registros a la vez, así
+que un millón de versiones no llega a ser un millón de dicts.
+
+    for bloque in bloques(leer("versiones.csv")):
+        resultados = calcular(bloque.columnas)
+
+    with PoolConexiones(lambda: psycopg.connect(dsn)) as pool:
+        ids, columnas = cargar(pool)
+
+Los registros pueden ser filas de project_versions (con el CalculatorData en
+`data`, como objeto o como texto JSON), CalculatorData sueltos o proyectos en
+el formato del motor.
+
+El estado del pipeline (oportunidad, en_ejecucion...) no está en
+lib/database.sql: es la columna status de projects_v2
+(docs/sql/02_projects_v2.sql), que la calculadora enlaza con projects por la
+dirección (property_address = name). leer(fuente, estado="oportunidad") lo
+filtra en la base de datos con ese JOIN, o en los registros de un export por
+su `status`; con una fuente que no tiene estados es un error, no un lote vacío.
+"""
+
+import csv
+import json
+import queue
+import sqlite3
+import sys
+import threading
+from contextlib import contextmanager
+from dataclasses import dataclass
+from itertools import islice
+
+import numpy as np
+
+from lumier_pdf.calculos import BLOQUE_CALCULO, columnas, desde_calculator_data
+
+# Filas que se piden a la base de datos en cada viaje
+TAMANO_LOTE = 2000
+
+# Conexiones abiertas como mucho por PoolConexiones
+TAMANO_POOL = 4
+
+# Bytes que se leen de cada vez de un JSON con un array de registros
+TAMANO_LECTURA = 1 << 16
+
+# Nombre del cursor de servidor en Postgres
+NOMBRE_CURSOR = "lumier_versiones"
+
+# Versión activa de cada proyecto con su slug y su nombre
+CONSULTA_VERSIONES = """
+SELECT p.slug, p.name, v.project_id, v.version_number, v.version_name, v.data{columnas}
+FROM project_versions v
+JOIN projects p ON p.id = v.project_id
+{union}
+{filtro}
+ORDER BY v.project_id, v.version_number
+"""
+
+# Estado de cada proyecto en projects_v2, enlazado como en la calculadora
+# (app/calculadora/[projectSlug]/page.tsx): por la dirección
+UNION_ESTADOS = "JOIN projects_v2 e ON e.property_address = p.name"
+
+# Esquema de lib/database.sql en SQLite (UUID y JSONB como texto), para
+# trabajar y hacer pruebas con una copia local
+ESQUEMA_SQLITE = """
+CREATE TABLE IF NOT EXISTS projects (
+    id TEXT PRIMARY KEY,
+    slug TEXT UNIQUE NOT NULL,
+    name TEXT NOT NULL,
+    description TEXT,
+    created_at TEXT DEFAULT CURRENT_TIMESTAMP,
+    updated_at TEXT DEFAULT CURRENT_TIMESTAMP
+);
+CREATE TABLE IF NOT EXISTS project_versions (
+    id TEXT PRIMARY KEY,
+    project_id TEXT REFERENCES projects(id) ON DELETE CASCADE,
+    version_number INTEGER NOT NULL,
+    version_name TEXT NOT NULL,
+    data TEXT NOT NULL,
+    is_active BOOLEAN DEFAULT FALSE,
+    created_at TEXT DEFAULT CURRENT_TIMESTAMP,
+    UNIQUE(project_id, version_number)
+);
+CREATE INDEX IF NOT EXISTS idx_versions_project ON project_versions(project_id);
+"""
+
+# Columnas de projects_v2 que se usan, para añadir estados a la copia local
+ESQUEMA_SQLITE_ESTADOS = """
+CREATE TABLE IF NOT EXISTS projects_v2 (
+    project_id TEXT PRIMARY KEY,
+    project_code TEXT UNIQUE,
+    status TEXT DEFAULT 'oportunidad',
+    property_address TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_projects_v2_status ON projects_v2(status);
+"""
+
+
+def normalizar(registro):
+    """
+    Acepta un proyecto en formato del motor, un `CalculatorData` o una fila de
+    `project_versions`/`projects_v2` con el CalculatorData en `data`.
+    """
+    if "data" in registro:
+        data = registro["data"]
+        proyecto = desde_calculator_data(json.loads(data) if isinstance(data, str) else data)
+        proyecto["id"] = registro.get("slug") or registro.get("project_id") or registro.get("id")
+        proyecto["nombre"] = registro.get("name") or registro.get("nombre")
+        proyecto["status"] = registro.get("status")
+        # Varias versiones de un proyecto comparten el id
+        proyecto["version"] = registro.get("version_number")
+        return proyecto
+    if "precioCompra" in registro:
+        proyecto = desde_calculator_data(registro)
+        for clave in ("id", "nombre", "status", "salida"):
+            if clave in registro:
+                proyecto[clave] = registro[clave]
+        return proyecto
+    return registro
+
+
+def _array_json(fichero, tamano=TAMANO_LECTURA):
+    """Objetos de un array JSON, decodificados de uno en uno según se lee el fichero"""
+    decoder = json.JSONDecoder()
+    texto, pos = fichero.read(tamano).lstrip(), 1
+    if not texto.startswith("["):
+        raise ValueError("Se esperaba un array JSON de registros")
+    while True:
+        # Separadores entre objetos
+        while True:
+            while pos < len(texto) and texto[pos] in " \t\r\n,":
+                pos += 1
+            if pos < len(texto):
+                break
+            texto, pos = fichero.read(tamano), 0
+            if not texto:
+                raise ValueError("Array JSON sin cerrar")
+        if texto[pos] == "]":
+            return
+        try:
+            objeto, fin = decoder.raw_decode(texto, pos)
+        except json.JSONDecodeError:
+            # El objeto sigue en el siguiente trozo del fichero
+            mas = fichero.read(tamano)
+            if not mas:
+                raise
+            texto, pos = texto[pos:] + mas, 0
+            continue
+        yield objeto
+        pos = fin
+        # Lo ya decodificado se descarta de vez en cuando, no en cada objeto
+        if pos > tamano:
+            texto, pos = texto[pos:], 0
+
+
+def leer_json(ruta):
+    """Registros de un JSON Lines ('-' para stdin) o de un JSON con un array de registros"""
+    if ruta == "-" or ruta.endswith(".jsonl"):
+        fichero = sys.stdin if ruta == "-" else open(ruta, encoding="utf-8")
+        with fichero:
+            for linea in fichero:
+                if linea.strip():
+                    yield json.loads(linea)
+    else:
+        with open(ruta, encoding="utf-8") as fichero:
+            yield from _array_json(fichero)
+
+
+def _valor_csv(texto):
+    # Números, true/false y la columna `data` vienen como texto JSON
+    if texto == "":
+        return None
+    try:
+        return json.loads(texto)
+    except ValueError:
+        return texto
+
+
+def leer_csv(ruta):
+    """Registros de un CSV con cabecera (un export de project_versions o CalculatorData en columnas)"""
+    with open(ruta, encoding="utf-8", newline="") as fichero:
+        for fila in csv.DictReader(fichero):
+            yield {clave: _valor_csv(valor) for clave, valor in fila.items()}
+
+
+class PoolConexiones:
+    """
+    Pool de conexiones DB-API. Abre como mucho `tamano` conexiones con
+    conectar() según se piden y las reutiliza; quien pide una con todas
+    ocupadas espera a que se libere.
+
+        with PoolConexiones(lambda: psycopg.connect(dsn)) as pool:
+            with pool.conexion() as conexion:
+                ...
+    """
+
+    def __init__(self, conectar, tamano=TAMANO_POOL):
+        self._conectar = conectar
+        self._libres = queue.LifoQueue()
+        self._plazas = threading.BoundedSemaphore(tamano)
+        self._abiertas = []
+        self._cerrojo = threading.Lock()
+
+    @property
+    def abiertas(self):
+        return len(self._abiertas)
+
+    @contextmanager
+    def conexion(self):
+        """Conexión del pool; al devolverla se cierra su transacción (rollback si hubo error)"""
+        with self._plazas:
+            try:
+                conexion = self._libres.get_nowait()
+            except queue.Empty:
+                conexion = self._conectar()
+                with self._cerrojo:
+                    self._abiertas.append(conexion)
+            try:
+                yield conexion
+            except BaseException:
+                conexion.rollback()
+                raise
+            else:
+                conexion.commit()
+            finally:
+                self._libres.put(conexion)
+
+    def cerrar(self):
+        with self._cerrojo:
+            for conexion in self._abiertas:
+                conexion.close()
+            self._abiertas = []
+        self._libres = queue.LifoQueue()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.cerrar()
+
+
+def _es_postgres(conexion):
+    return type(conexion).__module__.split(".")[0] in ("psycopg", "psycopg2")
+
+
+def _cursor(conexion, tamano_lote):
+    """Cursor de servidor en Postgres (psycopg 2 o 3); en SQLite, uno normal, que ya lee paso a paso"""
+    if _es_postgres(conexion):
+        cursor = conexion.cursor(name=NOMBRE_CURSOR)
+        cursor.itersize = tamano_lote
+        return cursor
+    return conexion.cursor()
+
+
+def _comprobar_estados(conexion):
+    """ValueError si la base de datos no tiene la tabla projects_v2 con los estados"""
+    cursor = conexion.cursor()
+    try:
+        cursor.execute("SELECT status FROM projects_v2 WHERE 1 = 0")
+    except Exception as exc:
+        raise ValueError("La base de datos no tiene estados de proyecto (projects_v2.status, ver "
+                         "docs/sql/02_projects_v2.sql): no se puede filtrar por estado") from exc
+    finally:
+        cursor.close()
+
+
+def leer_sql(fuente, solo_activas=True, estado=None, tamano_lote=TAMANO_LOTE):
+    """
+    Versiones de proyecto de la base de datos, pedidas de `tamano_lote` en
+    `tamano_lote`. `fuente` es un PoolConexiones o una conexión DB-API. Con
+    `estado`, solo las de los proyectos con ese status en projects_v2, que
+    llega en la columna `status`.
+    """
+    if not isinstance(fuente, PoolConexiones):
+        fuente = PoolConexiones(lambda conexion=fuente: conexion, tamano=1)
+    filtros = ["v.is_active"] if solo_activas else []
+    with fuente.conexion() as conexion:
+        parametros = ()
+        if estado is not None:
+            _comprobar_estados(conexion)
+            filtros.append("CAST(e.status AS TEXT) = " + ("%s" if _es_postgres(conexion) else "?"))
+            parametros = (estado,)
+        consulta = CONSULTA_VERSIONES.format(
+            columnas=", e.status" if estado is not None else "",
+            union=UNION_ESTADOS if estado is not None else "",
+            filtro="WHERE " + " AND ".join(filtros) if filtros else "",
+        )
+        cursor = _cursor(conexion, tamano_lote)
+        try:
+            cursor.execute(consulta, parametros)
+            while True:
+                filas = cursor.fetchmany(tamano_lote)
+                if not filas:
+                    return
+                # Con cursores de servidor, description solo existe tras la primera lectura
+                nombres = [d[0] for d in cursor.description]
+                for fila in filas:
+                    yield dict(zip(nombres, fila))
+        finally:
+            cursor.close()
+
+
+def _conectar_postgres(dsn):
+    try:
+        import psycopg
+    except ImportError:
+        import psycopg2 as psycopg
+    return psycopg.connect(dsn)
+
+
+def leer(fuente, estado=None, **kwargs):
+    """
+    Registros de `fuente`: una ruta .csv, .json, .jsonl o .sqlite/.db, '-'
+    (JSON Lines por stdin), un DSN postgresql://, una conexión DB-API o un
+    PoolConexiones. Con `estado`, solo los de los proyectos con ese status.
+    Los kwargs van a leer_sql.
+    """
+    if isinstance(fuente, PoolConexiones) or hasattr(fuente, "cursor"):
+        return leer_sql(fuente, estado=estado, **kwargs)
+    if fuente.startswith(("postgres://", "postgresql://")):
+        return _leer_conexion(_conectar_postgres(fuente), estado=estado, **kwargs)
+    if fuente.endswith((".sqlite", ".sqlite3", ".db")):
+        return _leer_conexion(sqlite3.connect(fuente), estado=estado, **kwargs)
+    registros = leer_csv(fuente) if fuente.endswith(".csv") else leer_json(fuente)
+    return registros if estado is None else _con_estado(registros, estado)
+
+
+def _con_estado(registros, estado):
+    """Registros con status `estado`; ValueError al terminar si ninguno tenía status"""
+    con_status = False
+    for registro in registros:
+        if registro.get("status") is not None:
+            con_status = True
+            if registro["status"] == estado:
+                yield registro
+    if not con_status:
+        raise ValueError("Los registros no tienen estado de proyecto (status): no se puede filtrar por estado")
+
+
+def _leer_conexion(conexion, **kwargs):
+    """leer_sql sobre una conexión propia, que se cierra al terminar"""
+    try:
+        yield from leer_sql(conexion, **kwargs)
+    finally:
+        conexion.close()
+
+
+@dataclass
+class Bloque:
+    """Proyectos normalizados de un bloque y sus columnas NumPy"""
+    proyectos: list
+    columnas: dict
+
+    def __len__(self):
+        return len(self.proyectos)
+
+    @property
+    def ids(self):
+        return [str(p.get("id") or p.get("nombre") or "") for p in self.proyectos]
+
+
+def bloques(registros, tamano=BLOQUE_CALCULO):
+    """Normaliza los registros y los agrupa en Bloques de `tamano` proyectos"""
+    registros = iter(registros)
+    while True:
+        proyectos = [normalizar(r) for r in islice(registros, tamano)]
+        if not proyectos:
+            return
+        yield Bloque(proyectos, columnas(proyectos))
+
+
+def cargar(fuente, tamano=BLOQUE_CALCULO, **kwargs):
+    """
+    Lee toda la fuente (ver leer) y devuelve (ids, columnas): un array de
+    cadenas y un dict de arrays float64 con un valor por proyecto, listos para
+    calcular(). De cada bloque solo se guardan sus columnas: los registros se
+    liberan antes de leer el siguiente.
+    """
+    ids, partes = [], []
+    for bloque in bloques(leer(fuente, **kwargs), tamano):
+        ids.append(np.array(bloque.ids, dtype=str))
+        partes.append(bloque.columnas)
+    if not partes:
+        return np.array([], dtype=str), columnas([])
+    # Campo a campo, soltando los bloques de cada uno: el pico es el
+    # resultado más una columna, no el doble del resultado
+    return np.concatenate(ids), {campo: np.concatenate([p.pop(campo) for p in partes]) for campo in list(partes[0])}
@@ -0,0 +1,285 @@
+"""
+Línea de comandos - Lumier Casas Boutique
+
+    python -m lumier_pdf generate [--markdown] [--cache DIR] [--optimizar [NIVEL]] [--workers N] [-o SALIDA]
+    python -m lumier_pdf batch proyectos.jsonl dossiers/ --workers 8
+    python -m lumier_pdf calc proyectos.jsonl [--json]
+    python -m lumier_pdf preview proyecto.json -o preview.pdf
+    python -m lumier_pdf preview proyecto.json --seccion "ejemplo completo" --formato png -o ejemplo.png
+    python -m lumier_pdf serve --port 8000 --workers 4 [--cache DIR]
+
+El ejecutor de trabajos lanza estos comandos muchas veces por minuto y en los
+trabajos cortos domina el arranque. Por eso este módulo solo importa la
+biblioteca estándar: cada comando importa lo que necesita al ejecutarse
+(`calc` carga numpy pero no reportlab). Con --profile-startup se imprime en
+stderr cuánto ha costado cada importación y con --trace se guarda una traza
+de la construcción (ver lumier_pdf.traza).
+"""
+
+import argparse
+import contextlib
+import sys
+import time
+
+# Presupuesto de importación de este módulo (lo comprueba test_cli)
+PRESUPUESTO_IMPORTACION_MS = 50
+
+# Módulos más lentos que muestra --profile-startup
+MODULOS_PERFIL = 15
+
+
+class _CargadorMedido:
+    """Envuelve el loader de un módulo para medir su ejecución"""
+
+    def __init__(self, cargador, nombre, perfil):
+        self._cargador = cargador
+        self._nombre = nombre
+        self._perfil = perfil
+
+    def create_module(self, spec):
+        return self._cargador.create_module(spec)
+
+    def exec_module(self, modulo):
+        perfil = self._perfil
+        perfil.profundidad += 1
+        inicio = time.perf_counter()
+        try:
+            self._cargador.exec_module(modulo)
+        finally:
+            segundos = time.perf_counter() - inicio
+            perfil.profundidad -= 1
+            perfil.tiempos[self._nombre] = segundos
+            if not perfil.profundidad:
+                perfil.importacion += segundos
+
+    def __getattr__(self, nombre):
+        return getattr(self._cargador, nombre)
+
+
+class PerfilArranque:
+    """
+    Buscador de sys.meta_path que mide el tiempo de cada importación (incluidas
+    las de sus dependencias, como `python -X importtime`).
+    """
+
+    def __init__(self):
+        self.tiempos = {}
+        self.importacion = 0.0
+        self.profundidad = 0
+        self.inicio = time.perf_counter()
+
+    def find_spec(self, nombre, path=None, target=None):
+        for buscador in sys.meta_path:
+            if buscador is self or not hasattr(buscador, "find_spec"):
+                continue
+            spec = buscador.find_spec(nombre, path, target)
+            if spec is not None:
+                break
+        else:
+            return None
+        if spec.loader is not None and hasattr(spec.loader, "exec_module"):
+            spec.loader = _CargadorMedido(spec.loader, nombre, self)
+        return spec
+
+    def __enter__(self):
+        sys.meta_path.insert(0, self)
+        return self
+
+    def __exit__(self, *exc):
+        sys.meta_path.remove(self)
+        self.total = time.perf_counter() - self.inicio
+
+    def informe(self, limite=MODULOS_PERFIL):
+        """Tiempo total y las importaciones más lentas"""
+        from lumier_pdf.formato import formatear_numero
+
+        lineas = [
+            f"Arranque: {formatear_numero(self.total * 1000, 1)} ms "
+            f"(importaciones {formatear_numero(self.importacion * 1000, 1)} ms, "
+            f"{len(self.tiempos)} módulos)",
+            "Importaciones más lentas (ms, con sus dependencias):",
+        ]
+        for nombre, segundos in sorted(self.tiempos.items(), key=lambda kv: -kv[1])[:limite]:
+            lineas.append(f"  {formatear_numero(segundos * 1000, 1):>8}  {nombre}")
+        return "\n".join(lineas)
+
+
+def _generate(args):
+    from lumier_pdf import manual as gm
+
+    cache = None
+    if args.cache:
+        from lumier_pdf.cache import CacheSecciones
+        cache = CacheSecciones(args.cache)
+
+    if args.markdown:
+        import os
+        from lumier_pdf.markdown import ParserMarkdown
+
+        markdown = ParserMarkdown(os.path.join(args.cache, "markdown") if args.cache else None)
+        salida = args.output or "MANUAL_CALCULOS.pdf"
+        gm.build_markdown_manual(args.source, salida, cache=cache, parser=markdown)
+        print(f"✅ PDF generado: {salida}")
+        print(f"   {markdown}")
+    else:
+        salida = args.output or "MANUAL_CALCULOS_VISUAL.pdf"
+        doc = gm.build_pdf(salida, cache=cache, optimize=args.optimizar, workers=args.workers)
+        print(f"✅ PDF generado: {salida}")
+        if args.optimizar is not None:
+            print(doc.size_report)
+    if cache:
+        print(f"   {cache}")
+    return 0
+
+
+def _batch(args):
+    from lumier_pdf import batch
+    return batch.main(args.argumentos)
+
+
+def _calc(args):
+    import json
+
+    from lumier_pdf.batch import leer_proyectos
+    from lumier_pdf.calculos import CLASIFICACIONES, calcular_por_bloques
+    from lumier_pdf.formato import formatear_euros, formatear_porcentaje
+
+    for i, (proyecto, fila) in enumerate(calcular_por_bloques(leer_proyectos(args.entrada))):
+        fila["clasificacion"] = CLASIFICACIONES[fila["clasificacion"]]
+        nombre = str(proyecto.get("nombre") or proyecto.get("id") or i + 1)
+        if args.json:
+            print(json.dumps({"id": nombre, **fila}, ensure_ascii=False))
+        else:
+            print(f"{nombre}: beneficio {formatear_euros(fila['beneficio_neto'])}, "
+                  f"margen {formatear_porcentaje(fila['margen'])}, ROI {formatear_porcentaje(fila['roi'])}, "
+                  f"TIR {formatear_porcentaje(fila['tir'])} → {fila['clasificacion']}")
+    return 0
+
+
+def _paginas(texto):
+    desde, _, hasta = texto.partition("-")
+    return int(desde), int(hasta or desde)
+
+
+def _preview(args):
+    from lumier_pdf import manual as gm
+    from lumier_pdf.batch import leer_proyectos
+
+    proyecto = next(iter(leer_proyectos(args.entrada)), None)
+    if proyecto is None:
+        print("❌ No hay ningún proyecto en la entrada", file=sys.stderr)
+        return 1
+    if not (args.seccion or args.paginas or args.clasificacion):
+        gm.build_dossier(proyecto, args.output)
+        print(f"✅ Vista previa generada: {args.output}")
+        return 0
+
+    import os
+
+    from lumier_pdf.vista_previa import VistaPrevia
+
+    vista = VistaPrevia()
+    if args.clasificacion:
+        resultado = vista.clasificacion(proyecto, formato=args.formato)
+    else:
+        secciones = args.seccion and [int(s) if s.isdigit() else s for s in args.seccion]
+        resultado = vista.render(proyecto, secciones=secciones, paginas=args.paginas, formato=args.formato)
+    base, extension = os.path.splitext(args.output)
+    for pagina, contenido in zip(resultado.paginas, resultado.contenido):
+        # Con varias imágenes, una por página: preview-10.png, preview-11.png...
+        salida = args.output if len(resultado.contenido) == 1 else f"{base}-{pagina}{extension}"
+        with open(salida, "wb") as fichero:
+            fichero.write(contenido)
+        print(f"✅ Vista previa generada: {salida}")
+    return 0
+
+
+def _serve(args):
+    import asyncio
+
+    from lumier_pdf.servicio import CachePDF, servir
+
+    print(f"Servicio de dossiers en http://{args.host}:{args.port} (workers: {args.workers or 'uno por CPU'}, "
+          f"cola {args.cola}, timeout {args.timeout} s)", file=sys.stderr)
+    try:
+        asyncio.run(servir(args.host, args.port, workers=args.workers, cola=args.cola, timeout=args.timeout,
+                           cache=CachePDF(directorio=args.cache)))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+def crear_parser():
+    parser = argparse.ArgumentParser(prog="python -m lumier_pdf", description="Documentos de Lumier Casas Boutique")
+    parser.add_argument("--profile-startup", action="store_true",
+                        help="Imprime en stderr el tiempo de arranque y las importaciones más lentas")
+    parser.add_argument("--trace", default=None, metavar="FICHERO",
+                        help="Mide fases, flowables y páginas y guarda una traza JSON de Chrome/Perfetto")
+    sub = parser.add_subparsers(dest="comando", required=True)
+
+    generate = sub.add_parser("generate", help="Genera el manual de cálculos")
+    generate.add_argument("--markdown", action="store_true", help="Genera el manual a partir del Markdown")
+    generate.add_argument("--source", default="MANUAL_CALCULOS.md", help="Markdown de origen (con --markdown)")
+    generate.add_argument("--cache", default=None, help="Directorio de la caché de secciones")
+    generate.add_argument("--optimizar", type=int, nargs="?", const=9, default=None, metavar="NIVEL",
+                          help="Comprime con este nivel (0-9, por defecto 9), quita duplicados, linealiza "
+                               "e imprime los tamaños por categoría (solo el manual visual)")
+    generate.add_argument("--workers", type=int, default=None,
+                          help="Maqueta las secciones en este número de procesos (solo el manual visual)")
+    generate.add_argument("-o", "--output", default=None, help="PDF de salida")
+    generate.set_defaults(ejecutar=_generate)
+
+    batch = sub.add_parser("batch", help="Genera un dossier por proyecto (ver lumier_pdf.batch)",
+                           add_help=False)
+    batch.add_argument("argumentos", nargs=argparse.REMAINDER)
+    batch.set_defaults(ejecutar=_batch)
+
+    calc = sub.add_parser("calc", help="Calcula los proyectos sin generar PDF")
+    calc.add_argument("entrada", help="JSON, JSON Lines, CSV, SQLite o DSN postgresql:// ('-' para stdin)")
+    calc.add_argument("--json", action="store_true", help="Un objeto JSON por proyecto")
+    calc.set_defaults(ejecutar=_calc)
+
+    preview = sub.add_parser("preview", help="Dossier o páginas del manual del primer proyecto de la entrada")
+    preview.add_argument("entrada", help="JSON o JSON Lines con el proyecto ('-' para stdin)")
+    preview.add_argument("-o", "--output", default="preview.pdf", help="Fichero de salida")
+    seleccion = preview.add_mutually_exclusive_group()
+    seleccion.add_argument("--seccion", action="append", default=None,
+                           help="Sección del manual (índice o parte del título); se puede repetir")
+    seleccion.add_argument("--paginas", type=_paginas, default=None, metavar="DESDE[-HASTA]",
+                           help="Páginas del manual, como 11 o 11-12")
+    seleccion.add_argument("--clasificacion", action="store_true",
+                           help="Solo el indicador de clasificación del proyecto")
+    preview.add_argument("--formato", choices=("pdf", "png", "svg"), default="pdf",
+                         help="Formato de la vista previa del manual (png y svg necesitan pymupdf)")
+    preview.set_defaults(ejecutar=_preview)
+
+    serve = sub.add_parser("serve", help="Servicio HTTP local de dossiers (ver lumier_pdf.servicio)")
+    serve.add_argument("--host", default="127.0.0.1")
+    serve.add_argument("--port", type=int, default=8000)
+    serve.add_argument("--workers", type=int, default=None, help="Procesos de render (por defecto, nº de CPUs)")
+    serve.add_argument("--cola", type=int, default=32, help="Peticiones que pueden esperar antes de devolver 503")
+    serve.add_argument("--timeout", type=float, default=60.0, help="Segundos antes de devolver 504")
+    serve.add_argument("--cache", default=None, help="Directorio donde guardar los PDF generados")
+    serve.set_defaults(ejecutar=_serve)
+    return parser
+
+
+def main(argv=None):
+    args = crear_parser().parse_args(argv)
+    if not (args.profile_startup or args.trace):
+        return args.ejecutar(args)
+
+    with contextlib.ExitStack() as pila:
+        perfil = pila.enter_context(PerfilArranque()) if args.profile_startup else None
+        if args.trace:
+            from lumier_pdf.traza import Traza
+            traza = pila.enter_context(Traza())
+        codigo = args.ejecutar(args)
+
+    if perfil:
+        print(perfil.informe(), file=sys.stderr)
+    if args.trace:
+        traza.guardar(args.trace)
+        print(traza.resumen(), file=sys.stderr)
+        print(f"Traza de Chrome guardada en {args.trace}", file=sys.stderr)
+    return codigo
@@ -0,0 +1,124 @@
+"""
+Captura y costura de páginas - Lumier Casas Boutique
+
+La caché de secciones (lumier_pdf.cache) y la maquetación en paralelo
+(lumier_pdf.paralelo) maquetan una sección en un build y la dibujan en otro.
+Las dos guardan el contenido de cada página sin encabezado ni pie y lo cosen
+en el build final, que dibuja los encabezados y pies con la numeración
+global:
+
+    capturas = {0: []}
+    canvasmaker = type("Captura", (CanvasCaptura,), {"capturas": capturas})
+    decorar = tras_decorar(header_footer)
+    doc.build([MarcaSeccion(0), *flowables], onFirstPage=decorar, onLaterPages=decorar,
+              canvasmaker=canvasmaker)
+    ...
+    story.extend(coser(capturas[0]))
+
+Cada página capturada es un diccionario {"contenido", "fuentes", "indice"}
+que se puede guardar en JSON o enviar a otro proceso. Las páginas que usan
+recursos propios (Form XObjects, imágenes, ExtGState, sombreados) o
+anotaciones no se pueden coser en otro documento: su sección queda en None.
+"""
+
+import re
+
+from reportlab.pdfgen.canvas import Canvas
+from reportlab.platypus import Flowable, PageBreak
+from reportlab.platypus.doctemplate import ActionFlowable
+
+# Operadores que usan recursos de página (XObjects, ExtGState, sombreados): esas
+# páginas no se pueden coser en otro documento sin sus recursos
+_RECURSOS = re.compile(r"/\S+ (?:Do|gs|sh)\b")
+_FUENTE = re.compile(r"(/F\d+(?:\+\d+)?)(?= [-\d.]+ Tf)")
+
+
+class MarcaSeccion(ActionFlowable):
+    """Indica al canvas de captura a qué sección pertenecen las páginas siguientes"""
+
+    def __init__(self, indice):
+        ActionFlowable.__init__(self)
+        self.indice = indice
+
+    def apply(self, doc):
+        # Se aplica sin dibujar nada, después de empezar la página de la sección
+        doc.canv._seccion = self.indice
+
+
+class PaginaCacheada(Flowable):
+    """
+    Contenido de una página capturada, con las fuentes traducidas a este
+    documento y sus encabezados en el índice del documento, si lo tiene
+    """
+
+    def __init__(self, contenido, fuentes, indice=()):
+        Flowable.__init__(self)
+        self.contenido = contenido
+        self.fuentes = fuentes
+        self.indice = indice
+
+    def wrap(self, availWidth, availHeight):
+        return (0, 0)
+
+    def drawOn(self, canvas, x, y, _sW=0):
+        # El contenido está en coordenadas de página: se añade tal cual
+        nombres = {interno: canvas._doc.getInternalFontName(ps) for interno, ps in self.fuentes.items()}
+        canvas._code.append("q")
+        canvas._code.append(_FUENTE.sub(lambda m: nombres[m.group(1)], self.contenido))
+        canvas._code.append("Q")
+        indice = getattr(canvas._doctemplate, "indice", None)
+        if indice is not None:
+            for nivel, texto in self.indice:
+                indice.registrar(canvas, nivel, texto)
+
+
+class CanvasCaptura(Canvas):
+    """
+    Canvas que guarda el contenido de cada página de las secciones marcadas.
+    `capturas` ({sección: [páginas]}) se fija en una subclase por build; la
+    lista de una sección pasa a None si alguna de sus páginas no se puede coser.
+    """
+
+    capturas = None
+
+    def __init__(self, *args, **kwargs):
+        Canvas.__init__(self, *args, **kwargs)
+        self._seccion = None
+        self._inicio = 0
+        self._anotaciones = 0
+        self._indice = None
+        self._pagina = 0
+
+    def showPage(self):
+        if self._seccion is not None and self.capturas.get(self._seccion) is not None:
+            contenido = "\n".join(self._code[self._inicio:])
+            internos = set(_FUENTE.findall(contenido))
+            fuentes = {interno: ps for ps, interno in self._doc.fontMapping.items() if interno in internos}
+            if (_RECURSOS.search(contenido) or len(fuentes) < len(internos)
+                    or len(self._annotationrefs) > self._anotaciones):
+                self.capturas[self._seccion] = None
+            else:
+                self.capturas[self._seccion].append({
+                    "contenido": contenido, "fuentes": fuentes,
+                    "indice": self._indice.de_pagina(self._pagina) if self._indice is not None else [],
+                })
+        Canvas.showPage(self)
+
+
+def tras_decorar(callback):
+    """Envuelve un callback de página para que la captura empiece después de él"""
+    def decorar(canvas, doc):
+        callback(canvas, doc)
+        canvas._inicio = len(canvas._code)
+        canvas._anotaciones = len(canvas._annotationrefs)
+        canvas._indice = getattr(doc, "indice", None)
+        canvas._pagina = doc.page
+    return decorar
+
+
+def coser(paginas):
+    """Flowables que dibujan unas páginas capturadas, con un PageBreak entre dos"""
+    for numero, pagina in enumerate(paginas):
+        if numero:
+            yield PageBreak()
+        yield PaginaCacheada(pagina["contenido"], pagina["fuentes"], pagina["indice"])
@@ -0,0 +1,198 @@
+"""
+Flujo de caja mensual - Lumier Casas Boutique
+
+Sustituye el atajo `Interés = Deuda × (Tasa Anual / 100) / 2` de la sección 7
+del manual por un calendario mensual de cobros y pagos:
+
+    mes 0          compra (precio, ITP, honorarios, escritura), arquitectura,
+                   permiso de obra y comisión de apertura
+    meses 1..obra  hard costs en disposiciones iguales
+    cada mes       costes de tenencia, prorrateados por días
+    venta          venta neta, gastos de venta, plusvalía, devolución del
+                   préstamo y comisión de cancelación
+
+El préstamo financia la misma fracción (deuda / coste total) de cada pago y
+devenga interés mes a mes sobre el saldo dispuesto; los intereses los paga el
+equity. El último mes puede ser parcial: el plazo es `meses` exacto.
+
+Todo se calcula sobre matrices (proyectos × meses) para la cartera completa.
+La TIR es la tasa anual que anula el valor actual de los flujos: `tir` la
+del proyecto (intereses y comisiones como coste, sin la deuda) y
+`tir_equity` la de los flujos del equity.
+
+    flujo = flujo_caja(columnas(proyectos))
+    flujo["intereses"], flujo["tir"], flujo["equity_pico"]   # (proyectos,)
+    flujo["equity_acumulado"]                                # (proyectos, meses + 1)
+"""
+
+import numpy as np
+
+from lumier_pdf.calculos import calcular
+
+# Parámetros del calendario. Las comisiones son % sobre la deuda; con
+# meses_obra = 0 la obra dura el FRACCION_OBRA del plazo.
+PARAMETROS_FLUJO = {
+    "comision_apertura": 0.0,
+    "comision_cancelacion": 0.0,
+    "meses_obra": 0.0,
+}
+FRACCION_OBRA = 0.75
+
+MAX_ITERACIONES_TIR = 200
+
+
+def _columna(entradas, campo, forma):
+    valor = entradas.get(campo, PARAMETROS_FLUJO.get(campo, 0.0))
+    return np.broadcast_to(np.asarray(valor, dtype=np.float64), forma)
+
+
+def _van(flujos, anios, tasa):
+    """Valor actual de cada fila de flujos y su derivada respecto a la tasa"""
+    descuento = np.exp(-anios * np.log1p(tasa)[:, np.newaxis])
+    van = (flujos * descuento).sum(axis=1)
+    derivada = -(anios * flujos * descuento).sum(axis=1) / (1 + tasa)
+    return van, derivada
+
+
+def tir_anual(flujos, anios, tolerancia=1e-10):
+    """
+    TIR anual (en tanto por uno) de cada fila de `flujos`, con `anios` el
+    instante de cada flujo en años; 0 si la fila no cambia de signo.
+
+    Newton con bisección de respaldo sobre un intervalo que contiene la raíz,
+    partiendo del múltiplo del dinero anualizado. Cada iteración solo evalúa
+    las filas que aún no han convergido.
+    """
+    n = flujos.shape[0]
+    anios = np.broadcast_to(anios, flujos.shape)
+    tasa = np.zeros(n)
+    activos = np.flatnonzero((flujos > 0).any(axis=1) & (flujos < 0).any(axis=1))
+    if not len(activos):
+        return tasa
+
+    f, a = flujos[activos], anios[activos]
+    cobros, pagos = np.maximum(f, 0), np.maximum(-f, 0)
+    with np.errstate(divide="ignore", invalid="ignore", over="ignore"):
+        plazo = (cobros * a).sum(axis=1) / cobros.sum(axis=1) - (pagos * a).sum(axis=1) / pagos.sum(axis=1)
+        inicial = (cobros.sum(axis=1) / pagos.sum(axis=1)) ** (1 / plazo) - 1
+    x = np.where(np.isfinite(inicial) & (inicial > -1), inicial, 0.0)
+    inferior = np.full(len(activos), -1 + 1e-12)
+    superior = np.full(len(activos), np.inf)
+
+    with np.errstate(divide="ignore", over="ignore", invalid="ignore"):
+        for _ in range(MAX_ITERACIONES_TIR):
+            van, derivada = _van(f, a, x)
+            # El VAN decrece con la tasa
+            inferior = np.where(van > 0, x, inferior)
+            superior = np.where(van > 0, superior, x)
+            nueva = x - van / derivada
+            fuera = ~np.isfinite(nueva) | (nueva <= inferior) | (nueva >= superior)
+            biseccion = np.where(np.isfinite(superior), (inferior + superior) / 2, 2 * x + 1)
+            nueva = np.where(fuera, biseccion, nueva)
+
+            pendientes = np.abs(nueva - x) > tolerancia * (1 + np.abs(x))
+            tasa[activos] = nueva
+            if not pendientes.any():
+                break
+            activos, f, a = activos[pendientes], f[pendientes], a[pendientes]
+            x, inferior, superior = nueva[pendientes], inferior[pendientes], superior[pendientes]
+
+    return tasa
+
+
+def flujo_caja(entradas):
+    """
+    Calendario mensual de una cartera. `entradas` son las columnas del motor
+    (ver calculos.columnas) más, opcionalmente, las de PARAMETROS_FLUJO.
+
+    Devuelve arrays por proyecto (intereses, comisiones, inversion_total,
+    beneficio_neto, roi, margen, tir, tir_equity, equity_pico) y matrices (proyectos ×
+    meses + 1) con el calendario: tiempo, costes, disposiciones, saldo_deuda,
+    intereses_mensuales, flujo_equity y equity_acumulado.
+    """
+    r = calcular(entradas)
+    forma = np.broadcast_shapes(r["margen"].shape, (1,))
+    partida = {k: np.broadcast_to(v, forma).astype(np.float64).reshape(-1) for k, v in r.items()}
+    meses = np.maximum(_columna(entradas, "meses", forma).reshape(-1), 0.0)
+    deuda = _columna(entradas, "deuda", forma).reshape(-1)
+    interes = _columna(entradas, "interes_financiero", forma).reshape(-1) / 100
+    meses_obra = _columna(entradas, "meses_obra", forma).reshape(-1)
+    apertura = deuda * _columna(entradas, "comision_apertura", forma).reshape(-1) / 100
+    cancelacion = deuda * _columna(entradas, "comision_cancelacion", forma).reshape(-1) / 100
+
+    # Rejilla temporal: columna t = fin del mes t; la venta cae en el mes ceil(meses)
+    ultimo = np.ceil(meses).astype(np.intp)
+    t = np.arange(int(ultimo.max(initial=0)) + 1)
+    tiempo = np.minimum(t, meses[:, np.newaxis])
+    duracion = np.diff(tiempo, axis=1, prepend=0.0)
+    mes_venta = t == ultimo[:, np.newaxis]
+
+    # Pagos del proyecto (sin financiación)
+    costes = np.zeros(tiempo.shape)
+    costes[:, 0] = partida["total_adquisicion"] + partida["arquitectura"] + partida["permiso_construccion"]
+    obra = np.where(meses_obra > 0, np.round(meses_obra), np.round(FRACCION_OBRA * meses))
+    obra = np.clip(obra, 1, np.maximum(ultimo, 1))
+    inicio_obra = np.minimum(ultimo, 1)
+    en_obra = (t >= inicio_obra[:, np.newaxis]) & (t < (inicio_obra + obra)[:, np.newaxis])
+    costes += en_obra * (partida["hard_costs"] / obra)[:, np.newaxis]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        tenencia = np.where(meses[:, np.newaxis] > 0, duracion / meses[:, np.newaxis], mes_venta)
+    costes += tenencia * partida["costos_tenencia"][:, np.newaxis]
+    costes += mes_venta * (partida["gastos_venta"] + partida["plusvalia"])[:, np.newaxis]
+
+    # Préstamo: financia la fracción deuda / coste total de cada pago
+    coste_total = partida["total_adquisicion"] + partida["total_gastos"]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        financiado = np.clip(np.where(coste_total > 0, deuda / coste_total, 0.0), 0.0, 1.0)
+    disposiciones = costes * financiado[:, np.newaxis]
+    saldo_deuda = np.cumsum(disposiciones, axis=1)
+    saldo_anterior = np.concatenate((np.zeros((len(meses), 1)), saldo_deuda[:, :-1]), axis=1)
+    intereses_mensuales = saldo_anterior * (interes / 12)[:, np.newaxis] * duracion
+    devolucion = saldo_deuda[np.arange(len(meses)), ultimo]
+    saldo_deuda = np.where(t < ultimo[:, np.newaxis], saldo_deuda, 0.0)
+
+    # Flujos del equity
+    comisiones = np.zeros(tiempo.shape)
+    comisiones[:, 0] += apertura
+    comisiones += mes_venta * cancelacion[:, np.newaxis]
+    cobros = mes_venta * (partida["venta_neta"] - devolucion)[:, np.newaxis]
+    flujo_equity = cobros - (costes - disposiciones) - intereses_mensuales - comisiones
+    equity_acumulado = -np.cumsum(np.where(mes_venta, flujo_equity - cobros, flujo_equity), axis=1)
+
+    intereses = intereses_mensuales.sum(axis=1)
+    total_comisiones = apertura + cancelacion
+    inversion_total = costes.sum(axis=1) + intereses + total_comisiones
+    beneficio_neto = partida["venta_neta"] - inversion_total
+    precio_venta = _columna(entradas, "precio_venta", forma).reshape(-1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        roi = np.where(inversion_total > 0, beneficio_neto / inversion_total * 100, 0.0)
+        margen = np.where(precio_venta > 0, beneficio_neto / precio_venta * 100, 0.0)
+    # TIR del proyecto (sin deuda, con intereses y comisiones como coste) y del equity
+    flujo_proyecto = mes_venta * partida["venta_neta"][:, np.newaxis] - costes - intereses_mensuales - comisiones
+    tir = tir_anual(flujo_proyecto, tiempo / 12) * 100
+    tir_equity = tir_anual(flujo_equity, tiempo / 12) * 100
+
+    return {
+        "intereses": intereses,
+        "comisiones": total_comisiones,
+        "inversion_total": inversion_total,
+        "beneficio_neto": beneficio_neto,
+        "roi": roi,
+        "margen": margen,
+        "tir": tir,
+        "tir_equity": tir_equity,
+        "equity_pico": equity_acumulado.max(axis=1),
+        "tiempo": tiempo,
+        "costes": costes,
+        "disposiciones": disposiciones,
+        "saldo_deuda": saldo_deuda,
+        "intereses_mensuales": intereses_mensuales,
+        "flujo_equity": flujo_equity,
+        "equity_acumulado": equity_acumulado,
+    }
+
+
+def flujo_caja_proyecto(proyecto):
+    """Calendario de un único proyecto: escalares y filas de la matriz"""
+    flujo = flujo_caja({k: np.atleast_1d(v) for k, v in proyecto.items()})
+    return {k: (v[0].item() if v.ndim == 1 else v[0]) for k, v in flujo.items()}
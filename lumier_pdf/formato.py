@@ -0,0 +1,22 @@
+"""
+Formato de cifras para los documentos - Lumier Casas Boutique
+
+Las cifras se muestran con el formato español del manual: punto como
+separador de miles y coma decimal ("1.087.830,00 €", "14,03%").
+"""
+
+
+def formatear_numero(valor, decimales=2):
+    """Número con separador de miles '.' y coma decimal"""
+    texto = f"{valor:,.{decimales}f}"
+    return texto.replace(",", "\x00").replace(".", ",").replace("\x00", ".")
+
+
+def formatear_euros(valor, decimales=2):
+    """Importe en euros: 1.087.830,00 €"""
+    return f"{formatear_numero(valor, decimales)} €"
+
+
+def formatear_porcentaje(valor, decimales=2):
+    """Porcentaje ya multiplicado por 100: 14,03%"""
+    return f"{formatear_numero(valor, decimales)}%"
@@ -0,0 +1,255 @@
+"""
+Fuentes TrueType - Lumier Casas Boutique
+
+Los documentos usan las fuentes base-14 (Helvetica, Courier), que no tienen
+⚠, ─ ni los emojis de los marcadores. reportlab busca esos caracteres en
+Symbol y ZapfDingbats, que no se incrustan, y lo que tampoco encuentra ahí
+sale como ■.
+
+Mientras dura un bloque simbolos(), una fuente de símbolos incrustada (DejaVu
+Sans) va delante de Symbol y ZapfDingbats como fuente de sustitución de las
+base-14, y los caracteres que no existen en WinAnsi salen de ella en
+párrafos, tablas, lienzo y gráficos sin tocar el texto. Su repertorio de
+glifos es fijo (SIMBOLOS): el subconjunto se recorta y se comprime una vez por
+proceso y cada documento solo lo copia. Los emojis sin glifo se cambian por
+uno parecido (SUSTITUTOS).
+
+    with simbolos():
+        doc.build(story)
+
+Los constructores de lumier_pdf.manual (build_pdf, build_dossier...) ya
+construyen cada documento dentro de simbolos().
+
+reportlab busca las fuentes de sustitución de todas las base-14 en una sola
+lista global, pdfmetrics.standardT1SubstitutionFonts, sin forma de dársela a
+un documento. La fuente de símbolos solo está en esa lista mientras algún
+hilo tiene un bloque simbolos() en curso y se quita al terminar el último (si
+no estaba ya antes); entretanto, los documentos de otros hilos también la
+usan. Si no se encuentra el fichero de la fuente, simbolos() no cambia nada y
+los documentos salen como antes.
+"""
+
+import codecs
+import os
+import threading
+import zlib
+from contextlib import contextmanager
+
+from reportlab.pdfbase import pdfdoc, pdfmetrics
+from reportlab.pdfbase.ttfonts import FF_NONSYMBOLIC, FF_SYMBOLIC, TTFontFace, makeToUnicodeCMap
+
+# Directorios donde se buscan los ficheros de fuentes (LUMIER_FUENTES, si
+# está definida, va primero)
+DIRECTORIOS_FUENTES = (
+    "/usr/share/fonts/truetype/dejavu",
+    "/usr/share/fonts/dejavu",
+    "/usr/share/fonts/TTF",
+    "/Library/Fonts",
+    os.path.expanduser("~/Library/Fonts"),
+    "C:/Windows/Fonts",
+)
+
+# Fuente de la que salen los símbolos y nombre con el que se registra
+FICHERO_SIMBOLOS = "DejaVuSans.ttf"
+NOMBRE_SIMBOLOS = "LumierSimbolos"
+
+# Glifos de la fuente de símbolos: los que usan el generador y
+# MANUAL_CALCULOS.md, más algunas flechas, marcas y líneas de caja
+SIMBOLOS = "✓✔✗✘★☆⚠≥≤≠≈±→←↑↓⇒●○■□▲▼◆▤▥☰•─│┌┐└┘├┤┬┴┼═║"
+
+# Caracteres sin glifo en la fuente de símbolos y el símbolo que los sustituye
+# ("" para los que se omiten, como el selector de variación de los emojis)
+SUSTITUTOS = {
+    "\ufe0f": "",
+    "📋": "▤",
+    "📊": "▥",
+    "🔴": "●",
+    "🟡": "●",
+    "🟢": "●",
+    "✅": "✔",
+    "❌": "✘",
+}
+
+# Prefijo del nombre de la fuente de símbolos en el PDF (seis mayúsculas, como
+# exige la especificación para las fuentes recortadas)
+PREFIJO_SUBCONJUNTO = "LUMIER"
+
+_codecs = {}
+
+# Bloques simbolos() en curso (en cualquier hilo) y si la fuente ya estaba en
+# la lista de sustitución antes del primero
+_activos = 0
+_estaba = False
+_cerrojo = threading.Lock()
+
+
+def buscar_fuente(fichero):
+    """Ruta de un fichero de fuente: tal cual si existe, o en LUMIER_FUENTES y DIRECTORIOS_FUENTES"""
+    if os.path.isfile(fichero):
+        return fichero
+    directorios = (os.environ.get("LUMIER_FUENTES"),) + DIRECTORIOS_FUENTES
+    for directorio in directorios:
+        if directorio and os.path.isfile(os.path.join(directorio, fichero)):
+            return os.path.join(directorio, fichero)
+    return None
+
+
+def _buscar_codec(nombre):
+    return _codecs.get(nombre)
+
+
+codecs.register(_buscar_codec)
+
+
+class FuenteSimbolos:
+    """
+    Fuente de un byte con un repertorio fijo de glifos de un TTF, para usarla
+    como fuente de sustitución de las base-14 (reportlab la trata como una
+    Type 1: codifica el texto con su `encName` y mide con `widths`). El TTF
+    se lee la primera vez que hace falta.
+    """
+    _dynamicFont = 0
+    _multiByte = 0
+    shapable = False
+
+    def __init__(self, nombre, ruta, repertorio=SIMBOLOS, sustitutos=SUSTITUTOS):
+        self.fontName = nombre
+        self.ruta = ruta
+        self.repertorio = repertorio
+        self.sustitutos = sustitutos
+        self.substitutionFonts = []
+        self.encName = f"lumier_{nombre.lower()}"
+        self._face = None
+        _codecs[self.encName] = codecs.CodecInfo(self._codificar, self._decodificar, name=self.encName)
+
+    def _cargar(self):
+        face = TTFontFace(self.ruta)
+        caracteres = [c for c in dict.fromkeys(self.repertorio) if ord(c) in face.charToGlyph][:255]
+        # El código 0 es el glifo notdef, como en los subconjuntos de reportlab
+        self.subset = [0] + [ord(c) for c in caracteres]
+        self.codigos = {c: bytes((i,)) for i, c in enumerate(caracteres, 1)}
+        for caracter, sustituto in self.sustitutos.items():
+            if sustituto == "" or sustituto in self.codigos:
+                self.codigos[caracter] = self.codigos[sustituto] if sustituto else b""
+        self.widths = [face.getCharWidth(u) if i else 0 for i, u in enumerate(self.subset)]
+        self.widths += [0] * (256 - len(self.widths))
+        self.nombre_pdf = f"{PREFIJO_SUBCONJUNTO}+{face.name.decode('latin-1')}"
+        datos = face.makeSubset(self.subset)
+        self.fuente_comprimida = zlib.compress(datos)
+        self.longitud = len(datos)
+        self.cmap_comprimido = zlib.compress(makeToUnicodeCMap(self.nombre_pdf, self.subset).encode("latin-1"))
+        self._face = face
+
+    @property
+    def face(self):
+        if self._face is None:
+            self._cargar()
+        return self._face
+
+    def __getattr__(self, nombre):
+        # widths, codigos, subset... existen después de cargar el TTF
+        if nombre.startswith("__") or self.__dict__.get("_face") is not None:
+            raise AttributeError(nombre)
+        self._cargar()
+        return getattr(self, nombre)
+
+    def _codificar(self, texto, errors="strict"):
+        codigos = self.codigos
+        salida = []
+        for i, caracter in enumerate(texto):
+            codigo = codigos.get(caracter)
+            if codigo is None:
+                # reportlab pasa el tramo sin glifo a la siguiente fuente de sustitución
+                fin = i + 1
+                while fin < len(texto) and texto[fin] not in codigos:
+                    fin += 1
+                raise UnicodeEncodeError(self.encName, texto, i, fin, "sin glifo en la fuente de símbolos")
+            salida.append(codigo)
+        return b"".join(salida), len(texto)
+
+    def _decodificar(self, datos, errors="strict"):
+        caracteres = [chr(u) for u in self.subset]
+        return "".join(caracteres[b] for b in bytes(datos)), len(datos)
+
+    def stringWidth(self, text, size, encoding="utf8"):
+        return sum(self.widths[b] for b in text.encode(self.encName)) * 0.001 * size
+
+    def addObjects(self, doc):
+        """Incrusta en `doc` el subconjunto ya recortado y comprimido"""
+        face = self.face
+        interno = "F" + repr(len(doc.fontMapping) + 1)
+        doc.fontMapping[self.fontName] = "/" + interno
+
+        fichero = pdfdoc.PDFStream(dictionary=pdfdoc.PDFDictionary({
+            "Length1": self.longitud, "Filter": pdfdoc.PDFName("FlateDecode")}), content=self.fuente_comprimida)
+        flags = (face.flags & ~FF_NONSYMBOLIC) | FF_SYMBOLIC
+        descriptor = pdfdoc.PDFDictionary({
+            "Type": "/FontDescriptor",
+            "Ascent": face.ascent,
+            "CapHeight": face.capHeight,
+            "Descent": face.descent,
+            "Flags": flags,
+            "FontBBox": pdfdoc.PDFArray(face.bbox),
+            "FontName": pdfdoc.PDFName(self.nombre_pdf),
+            "ItalicAngle": face.italicAngle,
+            "StemV": face.stemV,
+            "FontFile2": doc.Reference(fichero, f"fontFile:{self.fontName}"),
+            "MissingWidth": face.defaultWidth,
+        })
+        cmap = pdfdoc.PDFStream(dictionary=pdfdoc.PDFDictionary({"Filter": pdfdoc.PDFName("FlateDecode")}),
+                                content=self.cmap_comprimido)
+
+        fuente = pdfdoc.PDFTrueTypeFont()
+        fuente.Name = interno
+        fuente.BaseFont = self.nombre_pdf
+        fuente.FirstChar = 0
+        fuente.LastChar = len(self.subset) - 1
+        fuente.Widths = pdfdoc.PDFArray(self.widths[:len(self.subset)])
+        fuente.ToUnicode = doc.Reference(cmap, f"toUnicodeCMap:{self.fontName}")
+        fuente.FontDescriptor = doc.Reference(descriptor, f"fontDescriptor:{self.fontName}")
+        doc.Reference(fuente, interno)
+        doc.idToObject["BasicFonts"].dict[interno] = fuente
+
+
+def fuente_simbolos(fichero=FICHERO_SIMBOLOS, nombre=NOMBRE_SIMBOLOS):
+    """
+    La fuente de símbolos, registrada una vez por proceso (sin tocar las
+    fuentes de sustitución), o None si no se encuentra `fichero`
+    """
+    try:
+        return pdfmetrics.getFont(nombre)
+    except KeyError:
+        ruta = buscar_fuente(fichero)
+        if ruta is None:
+            return None
+        fuente = FuenteSimbolos(nombre, ruta)
+        pdfmetrics.registerFont(fuente)
+        return fuente
+
+
+@contextmanager
+def simbolos(fichero=FICHERO_SIMBOLOS, nombre=NOMBRE_SIMBOLOS):
+    """
+    Durante el bloque, la fuente de símbolos es la primera fuente de
+    sustitución de las base-14. Devuelve la fuente, o None si no se encuentra
+    `fichero`. También sirve como decorador: @simbolos().
+    """
+    global _activos, _estaba
+    fuente = fuente_simbolos(fichero, nombre)
+    if fuente is None:
+        yield None
+        return
+    sustitucion = pdfmetrics.standardT1SubstitutionFonts
+    with _cerrojo:
+        if not _activos:
+            _estaba = fuente in sustitucion
+            if not _estaba:
+                sustitucion.insert(0, fuente)
+        _activos += 1
+    try:
+        yield fuente
+    finally:
+        with _cerrojo:
+            _activos -= 1
+            if not _activos and not _estaba:
+                sustitucion[:] = [f for f in sustitucion if f is not fuente]
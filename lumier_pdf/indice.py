@@ -0,0 +1,139 @@
+"""
+Índice automático - Lumier Casas Boutique
+
+El índice de la página 2 se escribía a mano, sin números de página, y se
+desajustaba cada vez que una sección cambiaba de sitio. Indice lo construye
+con los encabezados del documento según se dibujan: la página real de cada
+uno y su entrada en el índice del PDF (outline).
+
+multiBuild lo resolvería maquetando el documento dos veces, la primera solo
+para saber las páginas. Aquí se maqueta una vez: HuecoIndice reserva el resto
+del marco de su página y dibuja en él un Form XObject que todavía no existe;
+al terminar el build, con todos los encabezados ya dibujados, se graba el
+formulario con la tabla de contenidos. El hueco ocupa lo mismo con cualquier
+índice, así que la paginación no depende de él.
+
+    indice = Indice(nivel, tabla)
+    indice.instalar(doc)
+    doc.build([..., HuecoIndice(), ...])
+
+nivel(flowable) devuelve el nivel del encabezado (0, 1...) o None si el
+flowable no lo es, y tabla(entradas) el flowable que se dibuja en el hueco
+(se reduce si no cabe). Las páginas cosidas desde la caché o desde otro
+proceso (lumier_pdf.cache, lumier_pdf.paralelo) guardan sus entradas y las
+vuelven a registrar al coserse.
+"""
+
+import re
+from dataclasses import dataclass
+from xml.sax.saxutils import unescape
+
+from reportlab.platypus import Flowable
+
+# Nombre del Form XObject con la tabla de contenidos
+FORMULARIO = "LumierIndice"
+
+
+@dataclass
+class Entrada:
+    """Un encabezado del documento y la página en la que está"""
+    nivel: int
+    texto: str
+    pagina: int
+
+
+def _en_winansi(caracter):
+    try:
+        caracter.encode("cp1252")
+    except UnicodeEncodeError:
+        return False
+    return True
+
+
+def texto_plano(texto):
+    """Texto de un encabezado sin marcas ni los caracteres que no tienen las fuentes estándar (iconos)"""
+    texto = unescape(re.sub(r"<[^>]*>", "", texto))
+    return " ".join("".join(c for c in texto if _en_winansi(c)).split())
+
+
+class HuecoIndice(Flowable):
+    """Reserva el resto del marco para la tabla de contenidos del Indice del documento"""
+
+    def wrap(self, availWidth, availHeight):
+        self.width, self.height = availWidth, availHeight
+        return (availWidth, availHeight)
+
+    def draw(self):
+        indice = getattr(self.canv._doctemplate, "indice", None)
+        if indice is not None:
+            indice.reservar(self.canv, self.width, self.height)
+
+
+class Indice:
+    """
+    Encabezados de un documento y su tabla de contenidos. Con `entradas`, el
+    índice ya está completo (el de una vista previa, por ejemplo) y no
+    registra los encabezados que se dibujan.
+    """
+
+    def __init__(self, nivel, tabla, entradas=None):
+        self.nivel = nivel
+        self.tabla = tabla
+        self.recoger = entradas is None
+        self.entradas = list(entradas or [])
+        self.hueco = None
+        self._nivel_outline = -1
+
+    def instalar(self, doc):
+        """Registra los encabezados de `doc` y graba la tabla al terminar su build"""
+        doc.indice = self
+        doc.afterFlowable = lambda flowable: self._tras_flowable(doc, flowable)
+        terminar = doc._endBuild
+
+        def _endBuild():
+            # La última página aún está abierta: todos los encabezados están dibujados
+            self.grabar(doc.canv)
+            terminar()
+
+        doc._endBuild = _endBuild
+        return doc
+
+    def _tras_flowable(self, doc, flowable):
+        nivel = self.nivel(flowable)
+        if nivel is not None:
+            self.registrar(doc.canv, nivel, texto_plano(getattr(flowable, "text", "")))
+
+    def registrar(self, canv, nivel, texto):
+        """Añade un encabezado de la página actual al índice y al outline"""
+        if not self.recoger:
+            return
+        clave = f"indice{len(self.entradas)}"
+        canv.bookmarkPage(clave)
+        # El outline no admite saltar de nivel (un apartado sin sección encima)
+        self._nivel_outline = min(nivel, self._nivel_outline + 1)
+        canv.addOutlineEntry(texto, clave, level=self._nivel_outline)
+        self.entradas.append(Entrada(nivel, texto, canv._doctemplate.page))
+
+    def de_pagina(self, pagina):
+        """[nivel, texto] de los encabezados de una página, para guardarla y coserla después"""
+        return [[entrada.nivel, entrada.texto] for entrada in self.entradas if entrada.pagina == pagina]
+
+    def reservar(self, canv, ancho, alto):
+        """Dibuja en el hueco el formulario que grabar() rellena al final"""
+        self.hueco = (ancho, alto)
+        canv.doForm(FORMULARIO)
+
+    def grabar(self, canv):
+        """Graba el formulario del hueco con la tabla de contenidos"""
+        if self.hueco is None:
+            return
+        ancho, alto = self.hueco
+        canv.beginForm(FORMULARIO, 0, 0, ancho, alto)
+        if self.entradas:
+            tabla = self.tabla(self.entradas)
+            _, h = tabla.wrap(ancho, alto)
+            escala = min(1, alto / h)
+            canv.translate(0, alto)
+            canv.scale(escala, escala)
+            tabla.drawOn(canv, 0, -h)
+        canv.endForm()
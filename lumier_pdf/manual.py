@@ -0,0 +1,2360 @@
+"""
+Generador de PDF del Manual de Cálculos - Lumier Casas Boutique
+Diseño profesional con gráficos y colores
+
+Los constructores de documentos (build_pdf, build_dossier, build_portfolio...)
+están en el paquete para que la CLI, los workers de batch y serve y la vista
+previa funcionen desde cualquier directorio. generate_manual_pdf.py, en la
+raíz del repositorio, es el mismo módulo con su nombre de siempre.
+"""
+
+from reportlab.lib.pagesizes import A4
+from reportlab.lib.units import mm
+from reportlab.lib.colors import HexColor, white
+from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+from reportlab.lib.enums import TA_CENTER, TA_LEFT, TA_RIGHT, TA_JUSTIFY
+from reportlab.platypus import (
+    SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle,
+    PageBreak, Flowable
+)
+from reportlab.pdfbase.pdfmetrics import stringWidth
+from xml.sax.saxutils import escape, unescape
+from functools import lru_cache, partial, wraps
+from itertools import islice
+import hashlib
+import io
+import os
+import re
+import zlib
+
+from lumier_pdf.cache import huella, huella_codigo
+from lumier_pdf.calculos import (
+    COSTE_ARQUITECTURA, COSTE_INTERIORISMO, COSTE_MATERIALES, COSTE_MOBILIARIO, COSTE_OBRA, COSTE_TERRAZA_M2,
+    COSTE_TOLDO, COSTOS_TENENCIA, EJEMPLO_COMPLETO, FACTOR_INTERES, GASTOS_VENTA, ITP, INSCRIPCION_ESCRITURA,
+    CLASIFICACIONES, PERMISO_CONSTRUCCION_M2, PLUSVALIA, SUPLEMENTO_CLASICO, UMBRAL_AJUSTADO, UMBRAL_OPORTUNIDAD,
+    VALORES_POR_DEFECTO, calcular_por_bloques, calcular_proyecto
+)
+from lumier_pdf.formato import formatear_euros, formatear_numero, formatear_porcentaje
+from lumier_pdf.flujos import flujo_caja_proyecto
+from lumier_pdf.sensibilidad import EJES, sensibilidad, valor_base, variacion
+from lumier_pdf.traza import trazar
+
+# Colores corporativos Lumier
+LUMIER_GOLD = HexColor('#d4af37')
+LUMIER_GOLD_LIGHT = HexColor('#f4e4bc')
+LUMIER_BLACK = HexColor('#1a1a1a')
+LUMIER_GRAY = HexColor('#666666')
+LUMIER_LIGHT_GRAY = HexColor('#f5f5f5')
+LUMIER_GREEN = HexColor('#22c55e')
+LUMIER_YELLOW = HexColor('#eab308')
+LUMIER_RED = HexColor('#ef4444')
+LUMIER_BLUE = HexColor('#3b82f6')
+
+# Tamaño de página
+width, height = A4
+
+# Color, rango y recomendación de cada clasificación por margen
+CLASIFICACION_COLORES = (LUMIER_GREEN, LUMIER_YELLOW, LUMIER_RED)
+CLASIFICACION_RANGOS = ("Margen ≥ 16%", "Margen entre 13% y 16%", "Margen < 13%")
+CLASIFICACION_RECOMENDACIONES = (
+    "Proceder con el proyecto.",
+    "Revisar costes o negociar precio de compra/venta para mejorar el margen.",
+    "Descartar o renegociar significativamente.",
+)
+
+# Tablas con datos de proyecto: anchos y estilos compartidos por todos los documentos
+EXAMPLE_COL_WIDTHS = [50*mm, 50*mm, 50*mm]
+EXAMPLE_TABLE_STYLE = TableStyle([
+    ('BACKGROUND', (0, 0), (-1, 0), LUMIER_BLACK),
+    ('TEXTCOLOR', (0, 0), (-1, 0), LUMIER_GOLD),
+    ('BACKGROUND', (0, -1), (-1, -1), LUMIER_GOLD_LIGHT),
+    ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+    ('FONTNAME', (0, -1), (-1, -1), 'Helvetica-Bold'),
+    ('FONTNAME', (0, 1), (-1, -2), 'Helvetica'),
+    ('FONTSIZE', (0, 0), (-1, -1), 10),
+    ('ALIGN', (1, 0), (-1, -1), 'RIGHT'),
+    ('GRID', (0, 0), (-1, -1), 0.5, LUMIER_GRAY),
+    ('TOPPADDING', (0, 0), (-1, -1), 6),
+    ('BOTTOMPADDING', (0, 0), (-1, -1), 6),
+])
+
+INPUT_COL_WIDTHS = [40*mm, 35*mm, 45*mm, 35*mm]
+INPUT_TABLE_STYLE = TableStyle([
+    ('BACKGROUND', (0, 0), (-1, 0), LUMIER_BLACK),
+    ('TEXTCOLOR', (0, 0), (-1, 0), LUMIER_GOLD),
+    ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+    ('FONTSIZE', (0, 0), (-1, -1), 9),
+    ('GRID', (0, 0), (-1, -1), 0.5, LUMIER_GRAY),
+    ('ALIGN', (1, 0), (1, -1), 'RIGHT'),
+    ('ALIGN', (3, 0), (3, -1), 'RIGHT'),
+    ('TOPPADDING', (0, 0), (-1, -1), 5),
+    ('BOTTOMPADDING', (0, 0), (-1, -1), 5),
+])
+
+CALC_COL_WIDTHS = [80*mm, 50*mm]
+CALC_TABLE_STYLE = TableStyle([
+    ('BACKGROUND', (0, 0), (-1, 0), LUMIER_BLACK),
+    ('TEXTCOLOR', (0, 0), (-1, 0), LUMIER_GOLD),
+    ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+    ('FONTSIZE', (0, 0), (-1, -1), 10),
+    ('ALIGN', (1, 0), (1, -1), 'RIGHT'),
+    ('GRID', (0, 0), (-1, -1), 0.5, LUMIER_GRAY),
+    ('TOPPADDING', (0, 0), (-1, -1), 5),
+    ('BOTTOMPADDING', (0, 0), (-1, -1), 5),
+    # Destacar totales
+    ('BACKGROUND', (0, 5), (-1, 5), LUMIER_GOLD_LIGHT),
+    ('FONTNAME', (0, 5), (-1, 5), 'Helvetica-Bold'),
+    ('BACKGROUND', (0, 9), (-1, 9), HexColor('#dbeafe')),
+    ('FONTNAME', (0, 9), (-1, 9), 'Helvetica-Bold'),
+    ('BACKGROUND', (0, 11), (-1, 11), LUMIER_GREEN),
+    ('TEXTCOLOR', (0, 11), (-1, 11), white),
+    ('FONTNAME', (0, 11), (-1, 11), 'Helvetica-Bold'),
+])
+
+METRICS_COL_WIDTHS = [25*mm, 25*mm, 25*mm, 25*mm, 25*mm, 25*mm]
+METRICS_TABLE_STYLES = tuple(TableStyle([
+    ('BACKGROUND', (0, 0), (0, 0), LUMIER_BLUE),
+    ('BACKGROUND', (1, 0), (1, 0), HexColor('#dbeafe')),
+    ('BACKGROUND', (2, 0), (2, 0), color),
+    ('BACKGROUND', (3, 0), (3, 0), LUMIER_GOLD_LIGHT),
+    ('BACKGROUND', (4, 0), (4, 0), LUMIER_GREEN),
+    ('BACKGROUND', (5, 0), (5, 0), HexColor('#dcfce7')),
+    ('TEXTCOLOR', (0, 0), (0, 0), white),
+    ('TEXTCOLOR', (4, 0), (4, 0), white),
+    ('FONTNAME', (0, 0), (-1, -1), 'Helvetica-Bold'),
+    ('FONTSIZE', (0, 0), (-1, -1), 12),
+    ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+    ('TOPPADDING', (0, 0), (-1, -1), 10),
+    ('BOTTOMPADDING', (0, 0), (-1, -1), 10),
+]) for color in CLASIFICACION_COLORES)
+
+PROBABILITY_COL_WIDTHS = [50*mm, 40*mm, 60*mm]
+PROBABILITY_TABLE_STYLE = TableStyle([
+    ('BACKGROUND', (0, 0), (-1, 0), LUMIER_BLACK),
+    ('TEXTCOLOR', (0, 0), (-1, 0), LUMIER_GOLD),
+    ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+    ('FONTNAME', (0, 1), (0, -1), 'Helvetica-Bold'),
+    ('TEXTCOLOR', (0, 1), (0, 1), LUMIER_GREEN),
+    ('TEXTCOLOR', (0, 2), (0, 2), LUMIER_YELLOW),
+    ('TEXTCOLOR', (0, 3), (0, 3), LUMIER_RED),
+    ('FONTSIZE', (0, 0), (-1, -1), 10),
+    ('ALIGN', (1, 0), (1, -1), 'RIGHT'),
+    ('GRID', (0, 0), (-1, -1), 0.5, LUMIER_GRAY),
+    ('TOPPADDING', (0, 0), (-1, -1), 6),
+    ('BOTTOMPADDING', (0, 0), (-1, -1), 6),
+])
+
+DISTRIBUTION_COL_WIDTHS = [30*mm, 30*mm, 30*mm, 30*mm, 30*mm]
+DISTRIBUTION_TABLE_STYLE = TableStyle([
+    ('BACKGROUND', (0, 0), (-1, 0), LUMIER_BLACK),
+    ('TEXTCOLOR', (0, 0), (-1, 0), LUMIER_GOLD),
+    ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+    ('FONTNAME', (0, 1), (0, -1), 'Helvetica-Bold'),
+    ('FONTSIZE', (0, 0), (-1, -1), 10),
+    ('ALIGN', (1, 0), (-1, -1), 'RIGHT'),
+    ('GRID', (0, 0), (-1, -1), 0.5, LUMIER_GRAY),
+    ('ROWBACKGROUNDS', (0, 1), (-1, -1), [white, LUMIER_LIGHT_GRAY]),
+    ('TOPPADDING', (0, 0), (-1, -1), 6),
+    ('BOTTOMPADDING', (0, 0), (-1, -1), 6),
+])
+
+CASH_FLOW_COL_WIDTHS = [50*mm, 50*mm, 50*mm]
+CASH_FLOW_TABLE_STYLE = TableStyle([
+    ('BACKGROUND', (0, 0), (-1, 0), LUMIER_BLACK),
+    ('TEXTCOLOR', (0, 0), (-1, 0), LUMIER_GOLD),
+    ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+    ('FONTNAME', (0, 1), (0, -1), 'Helvetica-Bold'),
+    ('FONTSIZE', (0, 0), (-1, -1), 9),
+    ('ALIGN', (1, 0), (-1, -1), 'RIGHT'),
+    ('GRID', (0, 0), (-1, -1), 0.5, LUMIER_GRAY),
+    ('ROWBACKGROUNDS', (0, 1), (-1, -1), [white, LUMIER_LIGHT_GRAY]),
+    ('TOPPADDING', (0, 0), (-1, -1), 6),
+    ('BOTTOMPADDING', (0, 0), (-1, -1), 6),
+])
+
+OFFER_COL_WIDTHS = [50*mm, 33*mm, 33*mm, 34*mm]
+OFFER_TABLE_STYLE = TableStyle([
+    ('BACKGROUND', (0, 0), (-1, 0), LUMIER_BLACK),
+    ('TEXTCOLOR', (0, 0), (-1, 0), LUMIER_GOLD),
+    ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+    ('FONTNAME', (0, 1), (0, -1), 'Helvetica-Bold'),
+    ('TEXTCOLOR', (0, 1), (0, 1), LUMIER_GREEN),
+    ('TEXTCOLOR', (0, 2), (0, 2), LUMIER_YELLOW),
+    ('BACKGROUND', (0, -1), (-1, -1), LUMIER_LIGHT_GRAY),
+    ('FONTNAME', (0, -1), (-1, -1), 'Helvetica-Oblique'),
+    ('FONTSIZE', (0, 0), (-1, -1), 9),
+    ('ALIGN', (1, 0), (-1, -1), 'RIGHT'),
+    ('GRID', (0, 0), (-1, -1), 0.5, LUMIER_GRAY),
+    ('TOPPADDING', (0, 0), (-1, -1), 6),
+    ('BOTTOMPADDING', (0, 0), (-1, -1), 6),
+])
+
+# Objetivos de la tabla de precio máximo de oferta: (etiqueta, métrica, valor)
+OFFER_TARGETS = (
+    (f"Margen {formatear_porcentaje(UMBRAL_OPORTUNIDAD, 0)} (OPORTUNIDAD)", "margen", UMBRAL_OPORTUNIDAD),
+    (f"Margen {formatear_porcentaje(UMBRAL_AJUSTADO, 0)} (AJUSTADO)", "margen", UMBRAL_AJUSTADO),
+)
+
+# Rejillas de la sección de sensibilidad: (eje x, eje y, puntos por eje)
+SENSITIVITY_GRIDS = (
+    ("precio_compra", "precio_venta", 200),
+    ("coste_m2", "precio_venta", 7),
+)
+
+# Escenarios simulados por documento; la semilla fija hace el PDF reproducible
+SIMULATION_DRAWS = 200_000
+SIMULATION_SEED = 2026
+
+# Tablas del manual en Markdown: celdas con Paragraph, anchos según el contenido
+# MANUAL_CALCULOS.md está en la raíz del repositorio, junto al paquete
+MARKDOWN_SOURCE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "MANUAL_CALCULOS.md")
+MARKDOWN_TABLE_WIDTH = A4[0] - 40*mm
+MARKDOWN_TABLE_STYLE = TableStyle([
+    ('BACKGROUND', (0, 0), (-1, 0), LUMIER_BLACK),
+    ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+    ('GRID', (0, 0), (-1, -1), 0.5, LUMIER_GRAY),
+    ('ROWBACKGROUNDS', (0, 1), (-1, -1), [white, LUMIER_LIGHT_GRAY]),
+    ('TOPPADDING', (0, 0), (-1, -1), 4),
+    ('BOTTOMPADDING', (0, 0), (-1, -1), 4),
+])
+
+# Índice del manual: secciones (cajas de color) con su número y, debajo, sus apartados (LumierHeading2)
+TOC_COL_WIDTHS = [15*mm, 135*mm, 15*mm]
+TOC_TABLE_STYLE = TableStyle([
+    ('FONTNAME', (0, 0), (-1, -1), 'Helvetica-Bold'),
+    ('FONTSIZE', (0, 0), (-1, -1), 11),
+    ('TEXTCOLOR', (0, 0), (0, -1), LUMIER_GOLD),
+    ('TEXTCOLOR', (1, 0), (-1, -1), LUMIER_BLACK),
+    ('ALIGN', (-1, 0), (-1, -1), 'RIGHT'),
+    ('TOPPADDING', (0, 0), (-1, -1), 6),
+    ('BOTTOMPADDING', (0, 0), (-1, -1), 4),
+])
+TOC_NUMBER = re.compile(r"(\d+)\.\s+")
+
+# Tablas de áreas de mejora del manual: #, área, problema y propuesta
+IMPROVEMENT_COL_WIDTHS = [8*mm, 32*mm, 50*mm, 80*mm]
+
+# Tabla de la cartera: (cabecera, ancho, alineación) de cada columna y alturas fijas
+PORTFOLIO_COLUMNS = (
+    ("Dirección", 48*mm, 'LEFT'),
+    ("Compra", 22*mm, 'RIGHT'),
+    ("Venta", 22*mm, 'RIGHT'),
+    ("Margen", 16*mm, 'RIGHT'),
+    ("ROI", 16*mm, 'RIGHT'),
+    ("TIR", 16*mm, 'RIGHT'),
+    ("Clasificación", 25*mm, 'CENTER'),
+)
+PORTFOLIO_HEADER_HEIGHT = 18
+PORTFOLIO_ROW_HEIGHT = 14
+
+# Versión de ReportLab con la que se han comprobado los atributos internos que
+# usan styled_table (Table._cellStyles) y CompactFlowable (_postponed)
+REPORTLAB_PROBADO = "5.0.1"
+
+# Comandos de TableStyle que Table copia en el CellStyle de cada celda (el resto
+# son fondos, líneas y spans, que se guardan una vez por tabla)
+CELL_STYLE_COMMANDS = frozenset((
+    'FONT', 'FONTNAME', 'FACE', 'SIZE', 'FONTSIZE', 'LEADING', 'TEXTCOLOR', 'ALIGN', 'ALIGNMENT', 'VALIGN',
+    'LEFTPADDING', 'RIGHTPADDING', 'TOPPADDING', 'BOTTOMPADDING', 'HREF', 'DESTINATION', 'DIRECTION', 'SHAPING',
+))
+
+# (id del TableStyle, filas, columnas) -> (TableStyle, CellStyles compartidos, TableStyle de dibujo)
+_SHARED_TABLE_STYLES = {}
+
+def styled_table(data, col_widths, style, **kwargs):
+    """
+    Tabla con uno de los TableStyle del módulo. Table crea un CellStyle por celda
+    y copia en él los comandos de fuente, color, alineación y márgenes; esos
+    CellStyle solo dependen del estilo y de la forma de la tabla, así que se
+    calculan una vez y todas las tablas iguales los comparten. A cada tabla solo
+    se le aplican los fondos, líneas y spans: no se le puede volver a llamar a
+    setStyle.
+
+    Table acepta cellStyles en su constructor, pero la única forma de obtener
+    los que calcula es su atributo interno _cellStyles (ReportLab
+    REPORTLAB_PROBADO). Si una versión lo quita, la tabla se crea con su
+    estilo completo, como haría Table sin compartir nada.
+    """
+    rows, cols = len(data), len(data[0])
+    key = (id(style), rows, cols)
+    if key not in _SHARED_TABLE_STYLES:
+        commands = style.getCommands()
+        # Los comandos de filas especiales ('splitfirst', 'splitlast') se aplican al partir la tabla
+        is_cell = [c[0] in CELL_STYLE_COMMANDS and not isinstance(c[1][1], str) for c in commands]
+        template = Table([[""] * cols for _ in range(rows)],
+                         style=[c for c, cell in zip(commands, is_cell) if cell])
+        drawing = TableStyle([c for c, cell in zip(commands, is_cell) if not cell])
+        # Se guarda el estilo para que su id no se reutilice
+        _SHARED_TABLE_STYLES[key] = (style, getattr(template, "_cellStyles", None), drawing)
+    _, cell_styles, drawing = _SHARED_TABLE_STYLES[key]
+    if cell_styles is None:
+        return Table(data, colWidths=col_widths, style=style, **kwargs)
+    table = Table(data, colWidths=col_widths, cellStyles=cell_styles, **kwargs)
+    table.setStyle(drawing)
+    return table
+
+class CompactFlowable(Flowable):
+    """
+    Flowable ligero para documentos con decenas de miles de cajas y tarjetas:
+    no llama a Flowable.__init__, y los ocho atributos que este pone en cada
+    objeto son aquí valores de clase. Cada instancia solo guarda los suyos
+    (unos 140 bytes en lugar de 210). Las subclases no cambian después de
+    crearse, así que una misma instancia puede aparecer varias veces en la
+    story (ver shared).
+    """
+    width = height = wrapped = 0
+    hAlign = 'LEFT'
+    vAlign = 'BOTTOM'
+    _traceInfo = None
+    _showBoundary = None
+    encoding = None
+
+    def drawOn(self, canvas, x, y, _sW=0):
+        Flowable.drawOn(self, canvas, x, y, _sW)
+        # doc.build marca con _postponed los flowables que pasan al siguiente
+        # marco y no lo borra al dibujarlos: una instancia compartida aplazada
+        # dos veces daría un LayoutError. _postponed es interno de
+        # BaseDocTemplate.handle_flowable (ReportLab 5.0.1, ver REPORTLAB_PROBADO);
+        # si cambia, test_tablas_y_cabeceras_compartidas lo detecta
+        if hasattr(self, "_postponed"):
+            del self._postponed
+
+@lru_cache(maxsize=1024)
+def shared(cls, *args, **kwargs):
+    """
+    Instancia única de un CompactFlowable para cada combinación de argumentos:
+    las cabeceras de sección y leyendas que se repiten en cada documento se
+    crean una vez por proceso.
+    """
+    return cls(*args, **kwargs)
+
+class ColoredBox(CompactFlowable):
+    """Caja de color con texto"""
+
+    def __init__(self, text, bg_color, text_color=white, width=None, height=30, font_size=12):
+        self.text = text
+        self.bg_color = bg_color
+        self.text_color = text_color
+        self.box_width = width or (A4[0] - 40*mm)
+        self.box_height = height
+        self.font_size = font_size
+
+    def draw(self):
+        self.canv.setFillColor(self.bg_color)
+        self.canv.roundRect(0, 0, self.box_width, self.box_height, 5, fill=1, stroke=0)
+        self.canv.setFillColor(self.text_color)
+        # Los títulos largos se reducen hasta caber en la caja
+        font_size = self.font_size
+        text_width = stringWidth(self.text, "Helvetica-Bold", font_size)
+        if text_width > self.box_width - 20:
+            font_size *= (self.box_width - 20) / text_width
+        self.canv.setFont("Helvetica-Bold", font_size)
+        self.canv.drawCentredString(self.box_width/2, self.box_height/2 - 4, self.text)
+
+    def wrap(self, availWidth, availHeight):
+        return (self.box_width, self.box_height)
+
+class InfoCard(CompactFlowable):
+    """Tarjeta de información con icono"""
+
+    def __init__(self, title, value, subtitle="", color=LUMIER_GOLD, width=120, height=80):
+        self.title = title
+        self.value = value
+        self.subtitle = subtitle
+        self.color = color
+        self.card_width = width
+        self.card_height = height
+
+    def draw(self):
+        # Fondo
+        self.canv.setFillColor(LUMIER_LIGHT_GRAY)
+        self.canv.roundRect(0, 0, self.card_width, self.card_height, 8, fill=1, stroke=0)
+
+        # Barra superior de color
+        self.canv.setFillColor(self.color)
+        self.canv.roundRect(0, self.card_height-8, self.card_width, 8, 0, fill=1, stroke=0)
+
+        # Título
+        self.canv.setFillColor(LUMIER_GRAY)
+        self.canv.setFont("Helvetica", 9)
+        self.canv.drawString(10, self.card_height - 25, self.title)
+
+        # Valor
+        self.canv.setFillColor(LUMIER_BLACK)
+        self.canv.setFont("Helvetica-Bold", 18)
+        self.canv.drawString(10, self.card_height - 50, self.value)
+
+        # Subtítulo
+        if self.subtitle:
+            self.canv.setFillColor(self.color)
+            self.canv.setFont("Helvetica", 8)
+            self.canv.drawString(10, 10, self.subtitle)
+
+    def wrap(self, availWidth, availHeight):
+        return (self.card_width, self.card_height)
+
+class FormulaBox(CompactFlowable):
+    """Caja para mostrar fórmulas; con varias líneas se alinean a la izquierda"""
+    LINE_HEIGHT = 14
+
+    def __init__(self, formula, description="", width=None):
+        self.formula = formula
+        self.description = description
+        self.box_width = width or (A4[0] - 50*mm)
+        self.lines = formula.split("\n")
+        extra = (len(self.lines) - 1) * self.LINE_HEIGHT
+        self.box_height = (50 if description else 35) + extra
+        # Las líneas largas se reducen hasta caber en la caja
+        longest = max(stringWidth(line, "Courier-Bold", 11) for line in self.lines)
+        self.font_size = min(11, 11 * (self.box_width - 20) / longest) if longest else 11
+
+    def draw(self):
+        # Fondo
+        self.canv.setFillColor(HexColor('#fefce8'))  # Amarillo muy claro
+        self.canv.setStrokeColor(LUMIER_GOLD)
+        self.canv.setLineWidth(2)
+        self.canv.roundRect(0, 0, self.box_width, self.box_height, 5, fill=1, stroke=1)
+
+        # Fórmula
+        self.canv.setFillColor(LUMIER_BLACK)
+        self.canv.setFont("Courier-Bold", self.font_size)
+        if len(self.lines) > 1:
+            y_pos = self.box_height - 20
+            for line in self.lines:
+                self.canv.drawString(10, y_pos, line)
+                y_pos -= self.LINE_HEIGHT
+        else:
+            y_pos = self.box_height - 20 if self.description else self.box_height/2 - 4
+            self.canv.drawCentredString(self.box_width/2, y_pos, self.formula)
+
+        # Descripción
+        if self.description:
+            self.canv.setFillColor(LUMIER_GRAY)
+            self.canv.setFont("Helvetica-Oblique", 9)
+            self.canv.drawCentredString(self.box_width/2, 10, self.description)
+
+    def wrap(self, availWidth, availHeight):
+        return (self.box_width, self.box_height)
+
+class MarginIndicator(CompactFlowable):
+    """
+    Indicador visual de margen con semáforo. Con `clasificacion` (el índice de
+    CLASIFICACIONES de un proyecto) se resalta su indicador y con `margen` se
+    escribe debajo el margen del proyecto.
+    """
+
+    def __init__(self, width=None, clasificacion=None, margen=None):
+        self.box_width = width or (A4[0] - 50*mm)
+        self.box_height = 100
+        self.clasificacion = clasificacion
+        self.margen = margen
+
+    def draw(self):
+        # Título
+        self.canv.setFillColor(LUMIER_BLACK)
+        self.canv.setFont("Helvetica-Bold", 12)
+        self.canv.drawString(10, self.box_height - 15, "Clasificación de Proyectos por Margen")
+
+        # Fondo del indicador del proyecto
+        if self.clasificacion is not None:
+            self.canv.setFillColor(LUMIER_GOLD_LIGHT)
+            self.canv.roundRect(10 + 150*self.clasificacion - 5, self.box_height - 78, 145, 52, 5, fill=1, stroke=0)
+
+        # Indicadores
+        indicators = [
+            (LUMIER_GREEN, f"≥ {formatear_porcentaje(UMBRAL_OPORTUNIDAD, 0)}", "OPORTUNIDAD", "Proceder"),
+            (LUMIER_YELLOW, f"{formatear_numero(UMBRAL_AJUSTADO, 0)}-{formatear_porcentaje(UMBRAL_OPORTUNIDAD, 0)}",
+             "AJUSTADO", "Revisar"),
+            (LUMIER_RED, f"< {formatear_porcentaje(UMBRAL_AJUSTADO, 0)}", "NO HACER", "Descartar"),
+        ]
+
+        x = 10
+        for color, range_text, label, action in indicators:
+            # Círculo de color
+            self.canv.setFillColor(color)
+            self.canv.circle(x + 15, self.box_height - 45, 12, fill=1, stroke=0)
+
+            # Rango
+            self.canv.setFillColor(LUMIER_BLACK)
+            self.canv.setFont("Helvetica-Bold", 11)
+            self.canv.drawString(x + 35, self.box_height - 40, range_text)
+
+            # Label
+            self.canv.setFont("Helvetica-Bold", 10)
+            self.canv.drawString(x + 35, self.box_height - 55, label)
+
+            # Acción
+            self.canv.setFillColor(LUMIER_GRAY)
+            self.canv.setFont("Helvetica", 9)
+            self.canv.drawString(x + 35, self.box_height - 68, action)
+
+            x += 150
+
+        # Margen del proyecto
+        if self.margen is not None:
+            self.canv.setFillColor(LUMIER_BLACK)
+            self.canv.setFont("Helvetica-Bold", 10)
+            texto = f"Margen del proyecto: {formatear_porcentaje(self.margen)}"
+            if self.clasificacion is not None:
+                texto += f" → {CLASIFICACIONES[self.clasificacion]}"
+            self.canv.drawString(10, 10, texto)
+
+    def wrap(self, availWidth, availHeight):
+        return (self.box_width, self.box_height)
+
+def axis_label(eje, valor):
+    """Texto de una marca de eje de sensibilidad"""
+    if eje == "meses":
+        return formatear_numero(valor, 1)
+    if eje == "interes_financiero":
+        return formatear_porcentaje(valor)
+    if eje == "coste_m2":
+        return formatear_euros(valor, 0)
+    return f"{formatear_numero(valor / 1000, 0)}k €"
+
+class SensitivityHeatmap(CompactFlowable):
+    """
+    Mapa de calor del margen sobre una rejilla de sensibilidad, coloreado con los
+    umbrales de MarginIndicator. Las celdas contiguas de una fila con la misma
+    clasificación se dibujan como un único rectángulo, así que una rejilla de
+    200×200 cuesta unos cientos de operaciones y no 40.000. Con rejillas pequeñas
+    se imprime el margen de cada celda.
+    """
+
+    def __init__(self, rejilla, base=None, width=None, height=180, show_values=None):
+        self.rejilla = rejilla
+        self.base = base
+        self.box_width = width or (A4[0] - 50*mm)
+        self.box_height = height
+        filas, columnas = rejilla.forma
+        self.show_values = show_values if show_values is not None else max(filas, columnas) <= 12
+
+    def draw(self):
+        import numpy as np
+
+        rejilla = self.rejilla
+        filas, columnas = rejilla.forma
+        x0, y0 = 55, 30
+        plot_width = self.box_width - x0 - 10
+        plot_height = self.box_height - y0 - 10
+        cell_width = plot_width / columnas
+        cell_height = plot_height / filas
+
+        margen = rejilla.margen
+        clasificacion = np.where(margen >= UMBRAL_OPORTUNIDAD, 0, np.where(margen >= UMBRAL_AJUSTADO, 1, 2))
+        for i in range(filas):
+            fila = clasificacion[i]
+            cortes = np.flatnonzero(np.diff(fila)) + 1
+            inicios = np.concatenate(([0], cortes))
+            finales = np.concatenate((cortes, [columnas]))
+            for inicio, final in zip(inicios, finales):
+                self.canv.setFillColor(CLASIFICACION_COLORES[fila[inicio]])
+                # Solape de medio punto para que no se vean juntas entre filas
+                solape = 0.5 if i < filas - 1 else 0
+                self.canv.rect(x0 + inicio * cell_width, y0 + i * cell_height,
+                               (final - inicio) * cell_width, cell_height + solape, fill=1, stroke=0)
+
+        if self.show_values:
+            self.canv.setStrokeColor(white)
+            self.canv.setLineWidth(1)
+            for i in range(1, filas):
+                self.canv.line(x0, y0 + i * cell_height, x0 + plot_width, y0 + i * cell_height)
+            for j in range(1, columnas):
+                self.canv.line(x0 + j * cell_width, y0, x0 + j * cell_width, y0 + plot_height)
+            self.canv.setFillColor(white)
+            self.canv.setFont("Helvetica-Bold", 8)
+            for i in range(filas):
+                for j in range(columnas):
+                    self.canv.drawCentredString(x0 + (j + 0.5) * cell_width, y0 + (i + 0.5) * cell_height - 3,
+                                                formatear_porcentaje(margen[i, j], 1))
+
+        # Proyecto actual: recuadro en su celda si hay valores impresos, círculo si no
+        if self.base is not None:
+            bx, by = self.base
+            vx, vy = rejilla.valores_x, rejilla.valores_y
+            if vx[0] <= bx <= vx[-1] and vy[0] <= by <= vy[-1]:
+                self.canv.setStrokeColor(LUMIER_BLACK)
+                self.canv.setLineWidth(1.5)
+                if self.show_values:
+                    j, i = np.abs(vx - bx).argmin(), np.abs(vy - by).argmin()
+                    self.canv.rect(x0 + j * cell_width, y0 + i * cell_height, cell_width, cell_height,
+                                   fill=0, stroke=1)
+                else:
+                    px = x0 + (bx - vx[0]) / ((vx[-1] - vx[0]) or 1) * (plot_width - cell_width) + cell_width / 2
+                    py = y0 + (by - vy[0]) / ((vy[-1] - vy[0]) or 1) * (plot_height - cell_height) + cell_height / 2
+                    self.canv.setFillColor(white)
+                    self.canv.circle(px, py, 4, fill=1, stroke=1)
+
+        # Marcas de los ejes
+        marcas = None if self.show_values else 5
+        self.canv.setFillColor(LUMIER_GRAY)
+        self.canv.setFont("Helvetica", 7)
+        for j in np.unique(np.linspace(0, columnas - 1, min(columnas, marcas or columnas)).round().astype(int)):
+            self.canv.drawCentredString(x0 + (j + 0.5) * cell_width, y0 - 10,
+                                        axis_label(rejilla.eje_x, rejilla.valores_x[j]))
+        for i in np.unique(np.linspace(0, filas - 1, min(filas, marcas or filas)).round().astype(int)):
+            self.canv.drawRightString(x0 - 4, y0 + (i + 0.5) * cell_height - 3,
+                                      axis_label(rejilla.eje_y, rejilla.valores_y[i]))
+
+        self.canv.setFillColor(LUMIER_BLACK)
+        self.canv.setFont("Helvetica-Bold", 8)
+        self.canv.drawCentredString(x0 + plot_width / 2, y0 - 24, EJES[rejilla.eje_x])
+        self.canv.saveState()
+        self.canv.translate(10, y0 + plot_height / 2)
+        self.canv.rotate(90)
+        self.canv.drawCentredString(0, 0, EJES[rejilla.eje_y])
+        self.canv.restoreState()
+
+    def wrap(self, availWidth, availHeight):
+        return (self.box_width, self.box_height)
+
+def fit_text(text, font_name, font_size, width):
+    """Recorta `text` con '…' hasta que quepa en `width`"""
+    if stringWidth(text, font_name, font_size) <= width:
+        return text
+    while text and stringWidth(text + "…", font_name, font_size) > width:
+        text = text[:-1]
+    return text + "…"
+
+class PortfolioTable(Flowable):
+    """
+    Tabla de la cartera que lee sus filas de un generador. Las filas son
+    ((textos de las columnas), código de clasificación) y tienen altura fija,
+    así que no hace falta medirlas: cada split saca del generador las filas que
+    caben en el marco y devuelve un trozo con la cabecera repetida más la propia
+    tabla con el resto. Maquetar cuesta lo mismo por página sea cual sea el
+    número de filas, y solo hay en memoria las de una página (Table vuelve a
+    medir todas las filas restantes en cada split).
+    """
+    def __init__(self, rows, columns=PORTFOLIO_COLUMNS, header_height=PORTFOLIO_HEADER_HEIGHT,
+                 row_height=PORTFOLIO_ROW_HEIGHT):
+        Flowable.__init__(self)
+        self.rows = iter(rows)
+        self.pending = []
+        self.columns = columns
+        self.header_height = header_height
+        self.row_height = row_height
+        self.table_width = sum(width for _, width, _ in columns)
+
+    def _capacity(self, availHeight):
+        return max(0, int((availHeight - self.header_height) // self.row_height))
+
+    def _read(self, count):
+        """Lee del generador hasta tener `count` filas pendientes (menos si se acaba)"""
+        if len(self.pending) < count:
+            self.pending.extend(islice(self.rows, count - len(self.pending)))
+
+    def wrap(self, availWidth, availHeight):
+        capacity = self._capacity(availHeight)
+        # Con una fila más de las que caben se sabe si hay que partir
+        self._read(capacity + 1)
+        if len(self.pending) > capacity:
+            return (self.table_width, availHeight + self.row_height)
+        return (self.table_width, self.header_height + len(self.pending) * self.row_height)
+
+    def split(self, availWidth, availHeight):
+        capacity = self._capacity(availHeight)
+        if not capacity:
+            return []
+        self._read(capacity + 1)
+        chunk = PortfolioTable(self.pending[:capacity], self.columns, self.header_height, self.row_height)
+        del self.pending[:capacity]
+        # El resto sigue siendo esta tabla: si doc.build ya la aplazó una vez, la
+        # siguiente vez que no quepa en lo que queda de página daría un LayoutError
+        if hasattr(self, "_postponed"):
+            del self._postponed
+        return [chunk, self]
+
+    def draw(self):
+        canv = self.canv
+        top = self.header_height + len(self.pending) * self.row_height
+
+        canv.setFillColor(LUMIER_BLACK)
+        canv.rect(0, top - self.header_height, self.table_width, self.header_height, fill=1, stroke=0)
+        canv.setFillColor(LUMIER_GOLD)
+        canv.setFont("Helvetica-Bold", 8)
+        self._draw_cells([title for title, _, _ in self.columns], top - self.header_height / 2 - 3)
+
+        canv.setFillColor(LUMIER_LIGHT_GRAY)
+        for i in range(1, len(self.pending), 2):
+            canv.rect(0, top - self.header_height - (i + 1) * self.row_height, self.table_width, self.row_height,
+                      fill=1, stroke=0)
+
+        # Clasificación: etiqueta blanca sobre el color de MarginIndicator
+        x = self.table_width - self.columns[-1][1]
+        for i, (_, clasificacion) in enumerate(self.pending):
+            canv.setFillColor(CLASIFICACION_COLORES[clasificacion])
+            canv.roundRect(x + 2, top - self.header_height - (i + 1) * self.row_height + 2,
+                           self.columns[-1][1] - 4, self.row_height - 4, 2, fill=1, stroke=0)
+
+        canv.setFont("Helvetica", 7.5)
+        for i, (cells, _) in enumerate(self.pending):
+            y = top - self.header_height - (i + 0.5) * self.row_height - 2.5
+            canv.setFillColor(LUMIER_BLACK)
+            self._draw_cells(cells[:-1], y)
+            canv.setFillColor(white)
+            self._draw_cells(cells[-1:], y, len(self.columns) - 1)
+
+        canv.setStrokeColor(LUMIER_GRAY)
+        canv.setLineWidth(0.5)
+        canv.rect(0, 0, self.table_width, top, fill=0, stroke=1)
+
+    def _draw_cells(self, cells, y, first=0):
+        x = sum(width for _, width, _ in self.columns[:first])
+        font_name, font_size = self.canv._fontname, self.canv._fontsize
+        for text, (_, width, align) in zip(cells, self.columns[first:]):
+            text = fit_text(text, font_name, font_size, width - 8)
+            if align == 'RIGHT':
+                self.canv.drawRightString(x + width - 4, y, text)
+            elif align == 'CENTER':
+                self.canv.drawCentredString(x + width / 2, y, text)
+            else:
+                self.canv.drawString(x + 4, y, text)
+            x += width
+
+# Series del gráfico de costes por calidad y partidas de la tarta de inversión
+COST_CHART_COLORS = (LUMIER_GOLD, LUMIER_BLUE)
+COST_CHART_STEP = 200
+INVESTMENT_ITEMS = (
+    ("Adquisición", "total_adquisicion", LUMIER_GOLD),
+    ("Hard Costs", "hard_costs", LUMIER_BLUE),
+    ("Soft Costs", "soft_costs", LUMIER_GREEN),
+    ("Intereses", "intereses", LUMIER_RED),
+)
+
+def quality_cost_curves(factor=1.0):
+    """Obra y materiales (€/m²) de cada calidad, escalados por factor_coste_reforma"""
+    return tuple(
+        (label, tuple(round(float(coste) * factor, 2) for coste in tabla[1:]))
+        for label, tabla in (("Obra", COSTE_OBRA), ("Materiales", COSTE_MATERIALES))
+    )
+
+def investment_split(resultado):
+    """Peso de cada partida en la inversión total (%, a una décima), sin las partidas nulas"""
+    total = resultado["inversion_total"]
+    return tuple(
+        (label, round(resultado[key] / total * 100, 1))
+        for label, key, _ in INVESTMENT_ITEMS if resultado[key] > 0
+    )
+
+# Los gráficos importan reportlab.graphics al crearse: generar un documento
+# sin gráficos (o solo calcular) no lo carga
+@trazar("grafico")
+def create_cost_bar_chart(curves=None):
+    """Crea gráfico de barras de costes por calidad (por defecto, las tablas de calculos)"""
+    from reportlab.graphics.charts.barcharts import VerticalBarChart
+    from reportlab.graphics.shapes import Drawing, Rect, String
+
+    curves = curves or quality_cost_curves()
+    drawing = Drawing(450, 200)
+
+    bc = VerticalBarChart()
+    bc.x = 50
+    bc.y = 30
+    bc.height = 140
+    bc.width = 380
+    bc.data = [values for _, values in curves]
+    bc.strokeColor = None
+    bc.categoryAxis.categoryNames = [f'{calidad}★' for calidad in range(1, len(curves[0][1]) + 1)]
+    bc.categoryAxis.labels.fontName = 'Helvetica'
+    bc.categoryAxis.labels.fontSize = 10
+    bc.valueAxis.valueMin = 0
+    bc.valueAxis.valueMax = COST_CHART_STEP * -(-max(max(values) for _, values in curves) // COST_CHART_STEP)
+    bc.valueAxis.valueStep = COST_CHART_STEP
+    drawing.add(bc)
+
+    # Leyenda
+    for i, (label, _) in enumerate(curves):
+        color = COST_CHART_COLORS[i % len(COST_CHART_COLORS)]
+        bc.bars[i].fillColor = color
+        drawing.add(Rect(60 + 120 * i, 180, 15, 10, fillColor=color, strokeColor=None))
+        drawing.add(String(80 + 120 * i, 182, f"{label} (€/m²)", fontName='Helvetica', fontSize=9))
+
+    return drawing
+
+@trazar("grafico")
+def create_equity_curve(flujo):
+    """Crea gráfico de equity acumulado y saldo del préstamo por mes"""
+    from reportlab.graphics.charts.lineplots import LinePlot
+    from reportlab.graphics.shapes import Drawing, Rect, String
+    from reportlab.graphics.widgets.markers import makeMarker
+
+    drawing = Drawing(450, 200)
+
+    tiempo = flujo["tiempo"]
+    data = [
+        list(zip(tiempo, flujo["equity_acumulado"] / 1000)),
+        list(zip(tiempo, flujo["saldo_deuda"] / 1000)),
+    ]
+
+    lp = LinePlot()
+    lp.x = 50
+    lp.y = 30
+    lp.height = 140
+    lp.width = 380
+    lp.data = data
+    lp.lines[0].strokeColor = LUMIER_GOLD
+    lp.lines[0].strokeWidth = 2
+    lp.lines[0].symbol = makeMarker('FilledCircle', size=4, fillColor=LUMIER_GOLD, strokeColor=None)
+    lp.lines[1].strokeColor = LUMIER_BLUE
+    lp.lines[1].strokeWidth = 2
+    lp.lines[1].symbol = makeMarker('FilledCircle', size=4, fillColor=LUMIER_BLUE, strokeColor=None)
+    lp.xValueAxis.valueMin = 0
+    lp.xValueAxis.valueMax = max(float(tiempo[-1]), 1)
+    lp.xValueAxis.valueStep = max(1, int(tiempo[-1] // 12) + 1)
+    lp.xValueAxis.labels.fontName = 'Helvetica'
+    lp.xValueAxis.labels.fontSize = 8
+    lp.yValueAxis.valueMin = 0
+    lp.yValueAxis.labels.fontName = 'Helvetica'
+    lp.yValueAxis.labels.fontSize = 8
+    lp.yValueAxis.labelTextFormat = lambda v: f"{formatear_numero(v, 0)}k"
+    drawing.add(lp)
+
+    # Leyenda
+    drawing.add(Rect(60, 185, 15, 10, fillColor=LUMIER_GOLD, strokeColor=None))
+    drawing.add(String(80, 187, "Equity acumulado (k€)", fontName='Helvetica', fontSize=9))
+    drawing.add(Rect(210, 185, 15, 10, fillColor=LUMIER_BLUE, strokeColor=None))
+    drawing.add(String(230, 187, "Saldo del préstamo (k€)", fontName='Helvetica', fontSize=9))
+    drawing.add(String(240, 5, "Mes", fontName='Helvetica', fontSize=8, textAnchor='middle'))
+
+    return drawing
+
+@trazar("grafico")
+def create_margin_histogram(margenes, bins=40):
+    """Crea histograma de márgenes simulados coloreado por clasificación"""
+    import numpy as np
+    from reportlab.graphics.shapes import Drawing, Line, Rect, String
+
+    drawing = Drawing(450, 200)
+    x0, y0, plot_width, plot_height = 50, 30, 380, 140
+
+    minimo, maximo = np.percentile(margenes, [0.5, 99.5])
+    minimo = min(minimo, UMBRAL_AJUSTADO - 1)
+    maximo = max(maximo, UMBRAL_OPORTUNIDAD + 1)
+    counts, edges = np.histogram(margenes, bins=bins, range=(minimo, maximo))
+    frecuencias = counts / len(margenes) * 100
+    escala_y = plot_height / max(frecuencias.max(), 1e-9)
+    escala_x = plot_width / (maximo - minimo)
+
+    bar_width = plot_width / bins
+    for i, frecuencia in enumerate(frecuencias):
+        centro = (edges[i] + edges[i + 1]) / 2
+        if centro >= UMBRAL_OPORTUNIDAD:
+            color = LUMIER_GREEN
+        elif centro >= UMBRAL_AJUSTADO:
+            color = LUMIER_YELLOW
+        else:
+            color = LUMIER_RED
+        drawing.add(Rect(x0 + i * bar_width, y0, bar_width * 0.9, frecuencia * escala_y,
+                         fillColor=color, strokeColor=None))
+
+    # Ejes
+    drawing.add(Line(x0, y0, x0 + plot_width, y0, strokeColor=LUMIER_GRAY, strokeWidth=0.5))
+    drawing.add(Line(x0, y0, x0, y0 + plot_height, strokeColor=LUMIER_GRAY, strokeWidth=0.5))
+    for marca in np.linspace(minimo, maximo, 6):
+        x = x0 + (marca - minimo) * escala_x
+        drawing.add(String(x, y0 - 12, formatear_porcentaje(marca, 0), fontName='Helvetica',
+                           fontSize=8, textAnchor='middle'))
+    drawing.add(String(x0 - 5, y0 + plot_height - 3, formatear_porcentaje(frecuencias.max(), 1),
+                       fontName='Helvetica', fontSize=8, textAnchor='end'))
+
+    # Umbrales de clasificación
+    for umbral in (UMBRAL_AJUSTADO, UMBRAL_OPORTUNIDAD):
+        x = x0 + (umbral - minimo) * escala_x
+        drawing.add(Line(x, y0, x, y0 + plot_height + 10, strokeColor=LUMIER_BLACK,
+                         strokeWidth=1, strokeDashArray=[3, 2]))
+        drawing.add(String(x, y0 + plot_height + 14, formatear_porcentaje(umbral, 0),
+                           fontName='Helvetica-Bold', fontSize=8, textAnchor='middle'))
+
+    return drawing
+
+@trazar("grafico")
+def create_investment_pie(split=None):
+    """Crea gráfico de tarta de distribución de inversión (por defecto, la del ejemplo del manual)"""
+    from reportlab.graphics.charts.piecharts import Pie
+    from reportlab.graphics.shapes import Drawing, Rect, String
+
+    split = split or investment_split(calcular_proyecto(EJEMPLO_COMPLETO))
+    colors = {label: color for label, _, color in INVESTMENT_ITEMS}
+    drawing = Drawing(340, 180)
+
+    pc = Pie()
+    pc.x = 40
+    pc.y = 20
+    pc.width = 120
+    pc.height = 120
+    pc.data = [peso for _, peso in split]
+    pc.slices.strokeWidth = 0.5
+    for i, (label, _) in enumerate(split):
+        pc.slices[i].fillColor = colors[label]
+    drawing.add(pc)
+
+    # Leyenda: las partidas pequeñas quedan juntas y sus etiquetas se solaparían
+    for i, (label, peso) in enumerate(split):
+        y = 120 - 20 * i
+        drawing.add(Rect(200, y, 10, 10, fillColor=colors[label], strokeColor=None))
+        drawing.add(String(216, y + 2, f"{label} {formatear_porcentaje(peso, 1)}", fontName='Helvetica',
+                           fontSize=9))
+
+    return drawing
+
+def draw_drawing(canvas, drawing):
+    """Dibuja un Drawing de reportlab.graphics en el origen del canvas"""
+    from reportlab.graphics import renderPDF
+
+    renderPDF.draw(drawing, canvas, 0, 0)
+
+class ChartForm(CompactFlowable):
+    """
+    Gráfico create(*data) como flowable. Se graba como Form XObject la primera
+    vez que aparece en un documento y las siguientes solo se referencia; con
+    shared(ChartForm, create, *data), el Drawing se construye una vez por
+    proceso para cada combinación de datos.
+    """
+
+    def __init__(self, create, *data):
+        self.drawing = create(*data)
+        digest = hashlib.sha1(repr((create.__qualname__, data)).encode("utf-8")).hexdigest()[:16]
+        self.name = f"LumierChart{digest}"
+
+    def wrap(self, availWidth, availHeight):
+        return (self.drawing.width, self.drawing.height)
+
+    def draw(self):
+        use_form(self.canv, self.name, draw_drawing, self.drawing)
+
+def draw_header_footer(canvas, title):
+    """Partes fijas del encabezado y pie de página"""
+    # Encabezado
+    canvas.setFillColor(LUMIER_BLACK)
+    canvas.rect(0, height - 25*mm, width, 25*mm, fill=1, stroke=0)
+
+    canvas.setFillColor(LUMIER_GOLD)
+    canvas.setFont("Helvetica-Bold", 14)
+    canvas.drawString(20*mm, height - 17*mm, "LUMIER CASAS BOUTIQUE")
+
+    canvas.setFillColor(white)
+    canvas.setFont("Helvetica", 10)
+    canvas.drawRightString(width - 20*mm, height - 17*mm, title)
+
+    # Línea dorada
+    canvas.setStrokeColor(LUMIER_GOLD)
+    canvas.setLineWidth(3)
+    canvas.line(0, height - 25*mm, width, height - 25*mm)
+
+    # Pie de página
+    canvas.setFillColor(LUMIER_LIGHT_GRAY)
+    canvas.rect(0, 0, width, 15*mm, fill=1, stroke=0)
+
+    canvas.setFillColor(LUMIER_GRAY)
+    canvas.setFont("Helvetica", 8)
+    canvas.drawString(20*mm, 6*mm, "Documento confidencial - Uso interno")
+
+def draw_page_number(canvas, doc):
+    """Número de página del pie"""
+    canvas.setFillColor(LUMIER_GRAY)
+    canvas.setFont("Helvetica", 8)
+    canvas.drawRightString(width - 20*mm, 6*mm, f"Página {doc.page}")
+
+def header_footer(canvas, doc):
+    """Encabezado y pie de página"""
+    canvas.saveState()
+    draw_header_footer(canvas, doc.title or "Manual Técnico de Cálculos")
+    draw_page_number(canvas, doc)
+    canvas.restoreState()
+
+def use_form(canvas, name, draw, *args):
+    """Dibuja a través de un Form XObject, grabándolo la primera vez que se usa en el documento"""
+    if not canvas.hasForm(name):
+        canvas.beginForm(name)
+        draw(canvas, *args)
+        canvas.endForm()
+    canvas.doForm(name)
+
+def header_footer_form(canvas, doc):
+    """Encabezado y pie de página como Form XObject: solo el número de página se dibuja en cada página"""
+    title = doc.title or "Manual Técnico de Cálculos"
+    use_form(canvas, f"LumierHeaderFooter{zlib.crc32(title.encode('utf-8')):08x}", draw_header_footer, title)
+    canvas.saveState()
+    draw_page_number(canvas, doc)
+    canvas.restoreState()
+
+def draw_cover(canvas):
+    """Portada completa"""
+    # Fondo negro completo para la parte superior (60% de la página)
+    canvas.setFillColor(LUMIER_BLACK)
+    canvas.rect(0, height * 0.40, width, height * 0.60, fill=1, stroke=0)
+
+    # === LOGO LUMIER (estilo oficial) ===
+    # Texto principal "LUMIER" en dorado
+    canvas.setFillColor(LUMIER_GOLD)
+    canvas.setFont("Helvetica-Bold", 48)
+    canvas.drawCentredString(width/2, height - 70*mm, "LUMIER")
+
+    # Subtítulo "CASAS BOUTIQUE" en blanco, espaciado
+    canvas.setFillColor(white)
+    canvas.setFont("Helvetica", 16)
+    # Añadir espaciado entre letras manualmente
+    spaced_text = "C A S A S   B O U T I Q U E"
+    canvas.drawCentredString(width/2, height - 85*mm, spaced_text)
+
+    # Línea decorativa dorada debajo del logo
+    canvas.setStrokeColor(LUMIER_GOLD)
+    canvas.setLineWidth(1.5)
+    canvas.line(width/2 - 70*mm, height - 100*mm, width/2 + 70*mm, height - 100*mm)
+
+    # === TÍTULO DEL DOCUMENTO ===
+    canvas.setFillColor(LUMIER_GOLD)
+    canvas.setFont("Helvetica-Bold", 28)
+    canvas.drawCentredString(width/2, height - 130*mm, "Manual Técnico de Cálculos")
+
+    canvas.setFillColor(HexColor('#999999'))
+    canvas.setFont("Helvetica", 13)
+    canvas.drawCentredString(width/2, height - 145*mm, "Calculadora de Renovaciones Inmobiliarias")
+
+    # === SECCIÓN INFERIOR (fondo beige/crema) ===
+    canvas.setFillColor(HexColor('#f5f0e6'))  # Beige más suave
+    canvas.rect(0, 0, width, height * 0.40, fill=1, stroke=0)
+
+    # Línea dorada de separación
+    canvas.setStrokeColor(LUMIER_GOLD)
+    canvas.setLineWidth(3)
+    canvas.line(0, height * 0.40, width, height * 0.40)
+
+    # Texto "Documento para Revisión..."
+    canvas.setFillColor(LUMIER_BLACK)
+    canvas.setFont("Helvetica-Bold", 16)
+    canvas.drawCentredString(width/2, height * 0.40 - 25*mm, "Documento para Revisión del Equipo Financiero")
+
+    # Versión
+    canvas.setFillColor(LUMIER_GRAY)
+    canvas.setFont("Helvetica", 12)
+    canvas.drawCentredString(width/2, height * 0.40 - 38*mm, "Versión 2.0  |  Enero 2026")
+
+    # === CAJA BLANCA CON CONTENIDO ===
+    box_width = width - 50*mm
+    box_height = 75*mm
+    box_x = 25*mm
+    box_y = 20*mm
+
+    # Sombra sutil
+    canvas.setFillColor(HexColor('#e0e0e0'))
+    canvas.roundRect(box_x + 2*mm, box_y - 2*mm, box_width, box_height, 8, fill=1, stroke=0)
+
+    # Caja blanca
+    canvas.setFillColor(white)
+    canvas.roundRect(box_x, box_y, box_width, box_height, 8, fill=1, stroke=0)
+
+    # Contenido de la caja
+    canvas.setFillColor(LUMIER_BLACK)
+    canvas.setFont("Helvetica-Bold", 12)
+    canvas.drawString(box_x + 15*mm, box_y + box_height - 18*mm, "Este documento incluye:")
+
+    items = [
+        ("✓", "Todas las fórmulas de cálculo documentadas"),
+        ("✓", "Constantes y parámetros configurables"),
+        ("✓", "Ejemplos paso a paso"),
+        ("✓", "Áreas de mejora identificadas"),
+        ("✓", "Recomendaciones para el equipo financiero")
+    ]
+
+    y = box_y + box_height - 32*mm
+    for check, text in items:
+        canvas.setFillColor(LUMIER_GREEN)
+        canvas.setFont("Helvetica-Bold", 11)
+        canvas.drawString(box_x + 15*mm, y, check)
+        canvas.setFillColor(LUMIER_BLACK)
+        canvas.setFont("Helvetica", 10)
+        canvas.drawString(box_x + 25*mm, y, text)
+        y -= 11*mm
+
+def first_page(canvas, doc):
+    """Primera página - Portada"""
+    canvas.saveState()
+    draw_cover(canvas)
+    canvas.restoreState()
+
+def first_page_form(canvas, doc):
+    """Primera página - Portada como Form XObject"""
+    use_form(canvas, "LumierCover", draw_cover)
+
+@trazar("seccion")
+def acquisition_example(proyecto, resultado, styles):
+    """Tabla del ejemplo práctico de adquisición"""
+    example_data = [
+        ["Concepto", "Cálculo", "Resultado"],
+        ["Precio Compra", "-", formatear_euros(proyecto["precio_compra"], 0)],
+        ["Honorarios (sin interm.)", "0", formatear_euros(resultado["honorario_compra"], 0)],
+        ["Inscripción", "Fijo", formatear_euros(INSCRIPCION_ESCRITURA, 0)],
+        [f"ITP ({formatear_porcentaje(ITP * 100, 0)})", f"{formatear_numero(proyecto['precio_compra'], 0)} × {ITP}",
+         formatear_euros(resultado["itp"], 0)],
+        ["TOTAL ADQUISICIÓN", "", formatear_euros(resultado["total_adquisicion"], 0)],
+    ]
+
+    example_table = styled_table(example_data, EXAMPLE_COL_WIDTHS, EXAMPLE_TABLE_STYLE)
+    return [example_table]
+
+@trazar("seccion")
+def project_section(proyecto, resultado, styles, title="EJEMPLO COMPLETO DE CÁLCULO"):
+    """Datos, resumen de cálculo, métricas y clasificación de un proyecto"""
+    proyecto = {**VALORES_POR_DEFECTO, **proyecto}
+    story = []
+    story.append(ColoredBox(title, LUMIER_GOLD, LUMIER_BLACK, height=35, font_size=14))
+    story.append(Spacer(1, 8*mm))
+
+    # Datos de entrada
+    story.append(Paragraph("Datos del Proyecto", styles['LumierHeading2']))
+
+    def intermediacion(porcentaje):
+        return f"Sí ({formatear_numero(porcentaje, 0)}%)" if porcentaje else "No"
+
+    input_data = [
+        ["Parámetro", "Valor", "Parámetro", "Valor"],
+        ["Precio Compra", formatear_euros(proyecto["precio_compra"], 0), "Calidad", f"{proyecto['calidad']}★"],
+        ["M² Construidos", f"{formatear_numero(proyecto['m2_construidos'], 0)} m²",
+         "Intermediación Venta", intermediacion(proyecto["intermediacion_venta"])],
+        ["M² ZZCC", f"{formatear_numero(proyecto['m2_zzcc'], 0)} m²",
+         "Precio Venta", formatear_euros(proyecto["precio_venta"], 0)],
+        ["Terraza", f"{formatear_numero(proyecto['terraza_m2'], 0)} m²",
+         "Deuda", formatear_euros(proyecto["deuda"], 0)],
+        ["Intermed. Compra", intermediacion(proyecto["intermediacion_compra"]),
+         "Interés", formatear_porcentaje(proyecto["interes_financiero"])],
+    ]
+
+    input_table = styled_table(input_data, INPUT_COL_WIDTHS, INPUT_TABLE_STYLE)
+    story.append(input_table)
+    story.append(Spacer(1, 8*mm))
+
+    # Resumen de cálculo
+    story.append(Paragraph("Resumen del Cálculo", styles['LumierHeading2']))
+
+    calc_data = [
+        ["Concepto", "Importe"],
+        ["Total Adquisición", formatear_euros(resultado["total_adquisicion"])],
+        ["Hard Costs", formatear_euros(resultado["hard_costs"])],
+        ["Soft Costs", formatear_euros(resultado["soft_costs"])],
+        ["Intereses", formatear_euros(resultado["intereses"])],
+        ["INVERSIÓN TOTAL", formatear_euros(resultado["inversion_total"])],
+        ["", ""],
+        ["Precio Venta", formatear_euros(proyecto["precio_venta"])],
+        ["- Honorarios Venta", f"- {formatear_euros(resultado['honorarios_venta'])}"],
+        ["VENTA NETA", formatear_euros(resultado["venta_neta"])],
+        ["", ""],
+        ["BENEFICIO NETO", formatear_euros(resultado["beneficio_neto"])],
+    ]
+
+    calc_table = styled_table(calc_data, CALC_COL_WIDTHS, CALC_TABLE_STYLE)
+    story.append(calc_table)
+    story.append(Spacer(1, 8*mm))
+
+    # Métricas finales
+    story.append(Paragraph("Métricas de Rentabilidad", styles['LumierHeading2']))
+
+    final_metrics = [
+        ["ROI", formatear_porcentaje(resultado["roi"]), "Margen", formatear_porcentaje(resultado["margen"]),
+         "TIR", formatear_porcentaje(resultado["tir"])],
+    ]
+    clasificacion = int(resultado["clasificacion"])
+
+    fm_table = styled_table(final_metrics, METRICS_COL_WIDTHS, METRICS_TABLE_STYLES[clasificacion])
+    story.append(fm_table)
+    story.append(Spacer(1, 8*mm))
+
+    # Clasificación final
+    story.append(Paragraph(
+        f"📊 Clasificación: {CLASIFICACIONES[clasificacion]} ({CLASIFICACION_RANGOS[clasificacion]})",
+        styles['LumierHeading3']
+    ))
+    story.append(Paragraph(
+        f"Recomendación: {CLASIFICACION_RECOMENDACIONES[clasificacion]}",
+        styles['LumierBody']
+    ))
+
+    return story
+
+@trazar("seccion")
+def charts_section(proyecto, resultado, styles):
+    """Reparto de la inversión del proyecto y costes de reforma por calidad"""
+    factor = proyecto.get("factor_coste_reforma", VALORES_POR_DEFECTO["factor_coste_reforma"])
+
+    story = []
+    story.append(shared(ColoredBox, "DISTRIBUCIÓN DE LA INVERSIÓN", LUMIER_BLACK, LUMIER_GOLD, height=35, font_size=14))
+    story.append(Spacer(1, 8*mm))
+    story.append(Paragraph("Reparto de la Inversión Total", styles['LumierHeading2']))
+    story.append(shared(ChartForm, create_investment_pie, investment_split(resultado)))
+    story.append(Spacer(1, 5*mm))
+    story.append(Paragraph("Costes de Reforma por Calidad (€/m²)", styles['LumierHeading2']))
+    # Igual en todos los proyectos con el mismo factor: un solo Form por documento
+    story.append(shared(ChartForm, create_cost_bar_chart, quality_cost_curves(factor)))
+    story.append(Paragraph(
+        f"Calidad del proyecto: {proyecto['calidad']}★ "
+        f"({formatear_euros(resultado['obra'] + resultado['materiales'], 0)} en obra y materiales)",
+        styles['LumierNote']
+    ))
+
+    return story
+
+@trazar("seccion")
+def cash_flow_section(proyecto, resultado, styles):
+    """Calendario mensual: intereses exactos, TIR real, equity máximo y curva de equity"""
+    flujo = flujo_caja_proyecto(proyecto)
+
+    story = []
+    story.append(shared(ColoredBox, "FLUJO DE CAJA MENSUAL", LUMIER_BLACK, LUMIER_GOLD, height=35, font_size=14))
+    story.append(Spacer(1, 8*mm))
+    story.append(Paragraph(
+        "La compra, arquitectura y permisos se pagan en el mes 0 y la obra en disposiciones mensuales "
+        "iguales durante el 75% del plazo. El préstamo financia la misma proporción de cada pago y "
+        "devenga interés sobre el saldo dispuesto hasta la venta, cuando se devuelve.",
+        styles['LumierBody']
+    ))
+
+    cash_flow_data = [
+        ["Concepto", "Cálculo simplificado", "Calendario mensual"],
+        ["Intereses", formatear_euros(resultado["intereses"]), formatear_euros(flujo["intereses"])],
+        ["Inversión Total", formatear_euros(resultado["inversion_total"]), formatear_euros(flujo["inversion_total"])],
+        ["Beneficio Neto", formatear_euros(resultado["beneficio_neto"]), formatear_euros(flujo["beneficio_neto"])],
+        ["Margen", formatear_porcentaje(resultado["margen"]), formatear_porcentaje(flujo["margen"])],
+        ["TIR", formatear_porcentaje(resultado["tir"]), formatear_porcentaje(flujo["tir"])],
+        ["TIR del Equity", "-", formatear_porcentaje(flujo["tir_equity"])],
+        ["Equity Máximo", formatear_euros(resultado["equity"]), formatear_euros(flujo["equity_pico"])],
+    ]
+    cash_flow_table = styled_table(cash_flow_data, CASH_FLOW_COL_WIDTHS, CASH_FLOW_TABLE_STYLE)
+    story.append(cash_flow_table)
+    story.append(Spacer(1, 5*mm))
+
+    story.append(Paragraph("Curva de Equity", styles['LumierHeading2']))
+    story.append(create_equity_curve(flujo))
+
+    return story
+
+@trazar("seccion")
+def offer_section(proyecto, resultado, styles, targets=OFFER_TARGETS):
+    """Precio máximo de compra, mínimo de venta y hard costs máximos para cada objetivo"""
+    from lumier_pdf.objetivo import resolver_proyecto
+
+    def importe(valor):
+        return "No alcanzable" if valor is None else formatear_euros(valor, 0)
+
+    offer_data = [["Objetivo", "Compra máxima", "Venta mínima", "Hard costs máx."]]
+    for etiqueta, metrica, objetivo in targets:
+        offer_data.append([etiqueta] + [
+            importe(resolver_proyecto(proyecto, variable, metrica, objetivo))
+            for variable in ("precio_compra", "precio_venta", "hard_costs")
+        ])
+    offer_data.append(["Proyecto actual", formatear_euros(proyecto["precio_compra"], 0),
+                       formatear_euros(proyecto["precio_venta"], 0), formatear_euros(resultado["hard_costs"], 0)])
+
+    offer_table = styled_table(offer_data, OFFER_COL_WIDTHS, OFFER_TABLE_STYLE)
+    return [
+        Paragraph("Precio máximo de oferta", styles['LumierHeading2']),
+        Paragraph("Cada columna varía una sola entrada manteniendo el resto del proyecto.", styles['LumierBody']),
+        offer_table,
+    ]
+
+@trazar("seccion")
+def sensitivity_section(proyecto, resultado, styles, grids=SENSITIVITY_GRIDS):
+    """Mapas de calor del margen frente a pares de entradas (±10% de su valor actual)"""
+    story = []
+    story.append(shared(ColoredBox, "9. ANÁLISIS DE SENSIBILIDAD", LUMIER_BLACK, LUMIER_GOLD, height=35, font_size=14))
+    story.append(Spacer(1, 8*mm))
+    story.append(Paragraph(
+        "Margen del proyecto con el modelo de costes completo al variar dos entradas entre -10% y +10% "
+        "de su valor actual. Verde: OPORTUNIDAD (≥ 16%), amarillo: AJUSTADO (13-16%), rojo: NO HACER "
+        "(< 13%). El círculo o recuadro negro marca el proyecto actual.",
+        styles['LumierBody']
+    ))
+
+    for eje_x, eje_y, puntos in grids:
+        rejilla = sensibilidad(proyecto, eje_x, variacion(proyecto, eje_x, n=puntos),
+                               eje_y, variacion(proyecto, eje_y, n=puntos))
+        story.append(Paragraph(f"{EJES[eje_y]} × {EJES[eje_x]} ({puntos}×{puntos})", styles['LumierHeading2']))
+        story.append(SensitivityHeatmap(rejilla, base=(valor_base(proyecto, eje_x), valor_base(proyecto, eje_y))))
+        story.append(Spacer(1, 5*mm))
+
+    return story
+
+@trazar("seccion")
+def simulation_section(proyecto, resultado, styles, draws=SIMULATION_DRAWS):
+    """Distribución Monte Carlo del margen y probabilidad de cada clasificación"""
+    from lumier_pdf.montecarlo import simular
+
+    simulacion = simular(proyecto, draws, semilla=SIMULATION_SEED)
+
+    story = []
+    story.append(shared(ColoredBox, "ANÁLISIS DE ESCENARIOS (MONTE CARLO)", LUMIER_BLACK, LUMIER_GOLD, height=35, font_size=14))
+    story.append(Spacer(1, 8*mm))
+    story.append(Paragraph(
+        f"Se simulan {formatear_numero(draws, 0)} escenarios variando el precio de venta (-10% a +5%), "
+        "el coste de reforma por m² (hasta +25%), la duración del proyecto (hasta +50%) "
+        "y el tipo de interés (±0,5 puntos).",
+        styles['LumierBody']
+    ))
+
+    story.append(Paragraph("Distribución del Margen", styles['LumierHeading2']))
+    story.append(create_margin_histogram(simulacion.margen))
+    story.append(Spacer(1, 5*mm))
+
+    story.append(Paragraph("Probabilidad por Clasificación", styles['LumierHeading2']))
+    probability_data = [["Clasificación", "Probabilidad", "Rango"]]
+    for nombre, probabilidad, rango in zip(CLASIFICACIONES, simulacion.probabilidades, CLASIFICACION_RANGOS):
+        probability_data.append([nombre, formatear_porcentaje(probabilidad * 100, 1), rango])
+    probability_table = styled_table(probability_data, PROBABILITY_COL_WIDTHS, PROBABILITY_TABLE_STYLE)
+    story.append(probability_table)
+    story.append(Spacer(1, 5*mm))
+
+    story.append(Paragraph("Percentiles de Rentabilidad", styles['LumierHeading2']))
+    distribution_data = [["Métrica", "P5", "P50", "P95", "Media"]]
+    for metrica, etiqueta in (("margen", "Margen"), ("roi", "ROI"), ("tir", "TIR")):
+        p5, p50, p95 = simulacion.percentiles(metrica)
+        media = getattr(simulacion, metrica).mean()
+        distribution_data.append([etiqueta] + [formatear_porcentaje(v) for v in (p5, p50, p95, media)])
+    distribution_table = styled_table(distribution_data, DISTRIBUTION_COL_WIDTHS, DISTRIBUTION_TABLE_STYLE)
+    story.append(distribution_table)
+
+    return story
+
+def portfolio_rows(proyectos):
+    """Filas de PortfolioTable calculadas por bloques a medida que se leen los proyectos"""
+    for proyecto, resultado in calcular_por_bloques(proyectos):
+        clasificacion = int(resultado["clasificacion"])
+        yield (
+            str(proyecto.get("direccion") or proyecto.get("nombre") or "Proyecto"),
+            formatear_euros(proyecto["precio_compra"], 0),
+            formatear_euros(proyecto["precio_venta"], 0),
+            formatear_porcentaje(resultado["margen"]),
+            formatear_porcentaje(resultado["roi"]),
+            formatear_porcentaje(resultado["tir"]),
+            CLASIFICACIONES[clasificacion],
+        ), clasificacion
+
+@trazar("seccion")
+def portfolio_listing_section(proyectos, styles):
+    """Tabla con una fila por proyecto; `proyectos` puede ser un generador"""
+    return [
+        shared(ColoredBox, "CARTERA DE PROYECTOS", LUMIER_BLACK, LUMIER_GOLD, height=35, font_size=14),
+        Spacer(1, 8*mm),
+        Paragraph(
+            "Un proyecto por fila con su compra, venta y rentabilidad. La última columna usa los colores "
+            "de la clasificación por margen: verde OPORTUNIDAD (≥ 16%), amarillo AJUSTADO (13-16%) y "
+            "rojo NO HACER (< 13%).",
+            styles['LumierBody']
+        ),
+        PortfolioTable(portfolio_rows(proyectos)),
+    ]
+
+def with_symbols(function):
+    """
+    Decorador de las construcciones de documentos: la función entera (story y
+    doc.build) corre con la fuente de símbolos (ver lumier_pdf.fuentes), así
+    que ✓, ★, ⚠, ─ y demás símbolos que no están en WinAnsi salen de DejaVu
+    Sans incrustada en lugar de Symbol/ZapfDingbats.
+    """
+    @wraps(function)
+    def wrapper(*args, **kwargs):
+        from lumier_pdf.fuentes import simbolos
+
+        with simbolos():
+            return function(*args, **kwargs)
+    return wrapper
+
+def build_styles():
+    """Hoja de estilos con los estilos de párrafo Lumier. Todas las construcciones crean sus estilos aquí."""
+    styles = getSampleStyleSheet()
+
+    # Estilos personalizados
+    styles.add(ParagraphStyle(
+        name='LumierTitle',
+        parent=styles['Heading1'],
+        fontSize=20,
+        textColor=LUMIER_BLACK,
+        spaceAfter=20,
+        spaceBefore=10,
+        fontName='Helvetica-Bold'
+    ))
+
+    styles.add(ParagraphStyle(
+        name='LumierHeading2',
+        parent=styles['Heading2'],
+        fontSize=14,
+        textColor=LUMIER_GOLD,
+        spaceAfter=12,
+        spaceBefore=15,
+        fontName='Helvetica-Bold',
+        borderColor=LUMIER_GOLD,
+        borderWidth=0,
+        borderPadding=5
+    ))
+
+    styles.add(ParagraphStyle(
+        name='LumierHeading3',
+        parent=styles['Heading3'],
+        fontSize=12,
+        textColor=LUMIER_BLACK,
+        spaceAfter=8,
+        spaceBefore=12,
+        fontName='Helvetica-Bold'
+    ))
+
+    styles.add(ParagraphStyle(
+        name='LumierBody',
+        parent=styles['Normal'],
+        fontSize=10,
+        textColor=LUMIER_BLACK,
+        spaceAfter=8,
+        alignment=TA_JUSTIFY,
+        fontName='Helvetica'
+    ))
+
+    styles.add(ParagraphStyle(
+        name='LumierNote',
+        parent=styles['Normal'],
+        fontSize=9,
+        textColor=LUMIER_GRAY,
+        spaceAfter=6,
+        leftIndent=20,
+        fontName='Helvetica-Oblique'
+    ))
+
+    styles.add(ParagraphStyle(
+        name='LumierBullet',
+        parent=styles['LumierBody'],
+        alignment=TA_LEFT,
+        spaceAfter=3,
+        leftIndent=15,
+        bulletIndent=3
+    ))
+
+    styles.add(ParagraphStyle(
+        name='LumierCell',
+        parent=styles['Normal'],
+        fontSize=8.5,
+        leading=10.5,
+        textColor=LUMIER_BLACK,
+        fontName='Helvetica'
+    ))
+
+    styles.add(ParagraphStyle(
+        name='LumierCellHeader',
+        parent=styles['LumierCell'],
+        textColor=LUMIER_GOLD,
+        fontName='Helvetica-Bold'
+    ))
+
+    # Celdas centradas y a la derecha: un estilo compartido por todas las tablas
+    for name in ('LumierCell', 'LumierCellHeader'):
+        styles.add(ParagraphStyle(name=f'{name}Center', parent=styles[name], alignment=TA_CENTER))
+        styles.add(ParagraphStyle(name=f'{name}Right', parent=styles[name], alignment=TA_RIGHT))
+
+    return styles
+
+def new_document(output, title):
+    """Documento A4 con los márgenes del manual"""
+    return SimpleDocTemplate(
+        output,
+        pagesize=A4,
+        rightMargin=20*mm,
+        leftMargin=20*mm,
+        topMargin=35*mm,
+        bottomMargin=25*mm,
+        title=title
+    )
+
+def heading_level(flowable):
+    """Nivel en el índice de un encabezado del manual: 0 las cajas de sección, 1 los LumierHeading2"""
+    if isinstance(flowable, ColoredBox):
+        return 0
+    if isinstance(flowable, Paragraph) and flowable.style.name == 'LumierHeading2':
+        return 1
+    return None
+
+def toc_table(entries):
+    """Tabla de contenidos del manual con la página de cada encabezado"""
+    rows, commands = [], []
+    for row, entry in enumerate(entries):
+        if entry.nivel == 0:
+            number = TOC_NUMBER.match(entry.texto)
+            if number:
+                rows.append([f"{number.group(1)}.", entry.texto[number.end():], str(entry.pagina)])
+            else:
+                rows.append(["", entry.texto, str(entry.pagina)])
+            if row:
+                commands.append(('LINEABOVE', (0, row), (-1, row), 0.5, LUMIER_LIGHT_GRAY))
+        else:
+            rows.append(["", entry.texto, str(entry.pagina)])
+            commands += [
+                ('FONTNAME', (1, row), (-1, row), 'Helvetica'),
+                ('FONTSIZE', (1, row), (-1, row), 9),
+                ('TEXTCOLOR', (1, row), (-1, row), LUMIER_GRAY),
+                ('LEFTPADDING', (1, row), (1, row), 12),
+                ('TOPPADDING', (0, row), (-1, row), 1),
+                ('BOTTOMPADDING', (0, row), (-1, row), 3),
+            ]
+    table = Table(rows, colWidths=TOC_COL_WIDTHS)
+    table.setStyle(TOC_TABLE_STYLE)
+    table.setStyle(TableStyle(commands))
+    return table
+
+def manual_index(entries=None):
+    """Índice automático del manual (ver lumier_pdf.indice); con `entries`, ya completo"""
+    from lumier_pdf.indice import Indice
+
+    return Indice(heading_level, toc_table, entries)
+
+def markdown_section(nodos, titulo):
+    """Nodos bajo el título `titulo` del Markdown, hasta el siguiente título de su nivel o superior"""
+    for inicio, nodo in enumerate(nodos):
+        if nodo["tipo"] == "titulo" and nodo["texto"] == titulo:
+            break
+    else:
+        raise ValueError(f"{MARKDOWN_SOURCE} no tiene el apartado '{titulo}'")
+    section = []
+    for nodo in nodos[inicio + 1:]:
+        if nodo["tipo"] == "titulo" and nodo["nivel"] <= nodos[inicio]["nivel"]:
+            break
+        section.append(nodo)
+    return section
+
+def markdown_node(nodos, titulo, tipo):
+    """Primer nodo de tipo `tipo` del apartado `titulo`"""
+    for nodo in markdown_section(nodos, titulo):
+        if nodo["tipo"] == tipo:
+            return nodo
+    raise ValueError(f"{MARKDOWN_SOURCE}: el apartado '{titulo}' no tiene {tipo}")
+
+def markdown_formula(nodos, titulo, description=""):
+    """FormulaBox con el primer bloque de código del apartado `titulo` (sin líneas en blanco)"""
+    lines = [line for line in markdown_node(nodos, titulo, "codigo")["lineas"] if line.strip()]
+    return FormulaBox("\n".join(lines), description)
+
+def cell_text(texto):
+    """Texto plano de una celda del Markdown (sin marcado de Paragraph)"""
+    return unescape(re.sub(r"<[^>]+>", "", texto))
+
+def kpi_rows(nodos):
+    """Indicadores clave del resumen ejecutivo, de su tabla en el Markdown"""
+    tabla = markdown_node(nodos, "Indicadores Clave de Decisión", "tabla")
+    return [[cell_text(c) for c in row] for row in [tabla["cabecera"]] + tabla["filas"]]
+
+def quality_cost_rows():
+    """Tabla de €/m² por calidad (1★ a 5★) de las tablas de lumier_pdf.calculos, con su total"""
+    costs = (
+        ("Obra", COSTE_OBRA),
+        ("Materiales", COSTE_MATERIALES),
+        ("Interiorismo", COSTE_INTERIORISMO),
+        ("Mobiliario", COSTE_MOBILIARIO),
+        ("Arquitectura", COSTE_ARQUITECTURA),
+    )
+    rows = [["Concepto"] + [f"{q}★" for q in range(1, 6)]]
+    rows += [[label] + [formatear_numero(v, 0) for v in table[1:]] for label, table in costs]
+    total = sum(table for _, table in costs)
+    rows.append(["TOTAL €/m²"] + [formatear_numero(v, 0) for v in total[1:]])
+    return rows
+
+def improvements(nodos, titulo):
+    """
+    Áreas de mejora de un apartado de prioridad del Markdown: número, área,
+    problema y propuesta de cada una. Un párrafo sin etiqueta es la propuesta y
+    una lista se añade al párrafo que la precede.
+    """
+    items, key = [], None
+    for nodo in markdown_section(nodos, titulo):
+        if nodo["tipo"] == "titulo":
+            number, _, area = nodo["texto"].partition(". ")
+            items.append({"number": number, "area": area, "Problema": "", "Propuesta": ""})
+            key = None
+        elif nodo["tipo"] == "parrafo" and items:
+            label = re.match(r"<b>(\w+):</b>\s*", nodo["texto"])
+            key = label.group(1) if label else "Propuesta"
+            items[-1][key] = nodo["texto"][label.end():] if label else nodo["texto"]
+        elif nodo["tipo"] == "lista" and key:
+            items[-1][key] += " " + "; ".join(elemento["texto"] for elemento in nodo["elementos"])
+    return items
+
+def improvement_rows(nodos, titulo, styles):
+    """Filas (#, área, problema, propuesta) de la tabla de un apartado de prioridad"""
+    cell = styles['LumierCell']
+    return [["#", "Área", "Problema", "Propuesta"]] + [
+        [item["number"], Paragraph(escape(item["area"]), cell), Paragraph(item["Problema"], cell),
+         Paragraph(item["Propuesta"].rstrip(":"), cell)]
+        for item in improvements(nodos, titulo)
+    ]
+
+@trazar("story")
+def manual_skeleton(styles, nodos):
+    """
+    Esqueleto del manual: flowables estáticos y, donde el contenido depende del
+    proyecto, funciones (proyecto, resultado, styles) que devuelven flowables.
+    Las fórmulas, los indicadores y las áreas de mejora salen de `nodos` (el
+    AST de MANUAL_CALCULOS.md) y las cifras, de lumier_pdf.calculos.
+    """
+    from lumier_pdf.indice import HuecoIndice
+
+    story = []
+
+    # ============= PÁGINA 2: ÍNDICE =============
+    story.append(PageBreak())
+    story.append(Paragraph("Índice de Contenidos", styles['LumierTitle']))
+    story.append(Spacer(1, 10*mm))
+
+    # La tabla se graba al terminar el build, con las páginas de cada encabezado
+    story.append(HuecoIndice())
+
+    # ============= PÁGINA 3: RESUMEN EJECUTIVO =============
+    story.append(PageBreak())
+    story.append(shared(ColoredBox, "1. RESUMEN EJECUTIVO", LUMIER_BLACK, LUMIER_GOLD, height=35, font_size=14))
+    story.append(Spacer(1, 8*mm))
+
+    story.append(Paragraph(
+        "La calculadora determina la rentabilidad de proyectos de renovación inmobiliaria "
+        "mediante el análisis de todos los costes asociados y la proyección de beneficios.",
+        styles['LumierBody']
+    ))
+    story.append(Spacer(1, 5*mm))
+
+    # Fórmula principal
+    story.append(Paragraph("Fórmula Principal", styles['LumierHeading2']))
+    story.append(markdown_formula(nodos, "1. Resumen Ejecutivo"))
+    story.append(Spacer(1, 8*mm))
+
+    # Indicadores clave
+    story.append(Paragraph("Indicadores Clave de Decisión", styles['LumierHeading2']))
+
+    kpi_data = kpi_rows(nodos)
+
+    kpi_table = Table(kpi_data, colWidths=[22*mm, 90*mm, 50*mm])
+    kpi_table.setStyle(TableStyle([
+        ('BACKGROUND', (0, 0), (-1, 0), LUMIER_BLACK),
+        ('TEXTCOLOR', (0, 0), (-1, 0), LUMIER_GOLD),
+        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+        ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
+        ('FONTSIZE', (0, 0), (-1, -1), 10),
+        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+        ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+        ('GRID', (0, 0), (-1, -1), 0.5, LUMIER_GRAY),
+        ('BACKGROUND', (0, 1), (-1, -1), white),
+        ('ROWBACKGROUNDS', (0, 1), (-1, -1), [white, LUMIER_LIGHT_GRAY]),
+        ('TOPPADDING', (0, 0), (-1, -1), 8),
+        ('BOTTOMPADDING', (0, 0), (-1, -1), 8),
+    ]))
+    story.append(kpi_table)
+    story.append(Spacer(1, 8*mm))
+
+    # Clasificación de proyectos
+    story.append(Paragraph("Sistema de Clasificación", styles['LumierHeading2']))
+    story.append(shared(MarginIndicator))
+
+    # ============= PÁGINA 4: FLUJO DE CÁLCULO =============
+    story.append(PageBreak())
+    story.append(shared(ColoredBox, "2. FLUJO DE CÁLCULO", LUMIER_BLACK, LUMIER_GOLD, height=35, font_size=14))
+    story.append(Spacer(1, 8*mm))
+
+    story.append(Paragraph(
+        "El siguiente diagrama muestra el flujo completo del cálculo de rentabilidad:",
+        styles['LumierBody']
+    ))
+    story.append(Spacer(1, 5*mm))
+
+    # Diagrama de flujo simplificado con tabla
+    flow_data = [
+        ["ENTRADA", "→", "PROCESO", "→", "SALIDA"],
+        ["Precio Compra\nM² Construidos\nCalidad (1-5★)\nPrecio Venta\nFinanciación", "",
+         "1. Calcular Adquisición\n2. Calcular Hard Costs\n3. Calcular Soft Costs\n4. Calcular Venta Neta\n5. Calcular Intereses", "",
+         "Inversión Total\nBeneficio Neto\nROI\nMargen\nTIR"],
+    ]
+
+    flow_table = Table(flow_data, colWidths=[45*mm, 10*mm, 50*mm, 10*mm, 45*mm])
+    flow_table.setStyle(TableStyle([
+        ('BACKGROUND', (0, 0), (0, 0), LUMIER_BLUE),
+        ('BACKGROUND', (2, 0), (2, 0), LUMIER_GOLD),
+        ('BACKGROUND', (4, 0), (4, 0), LUMIER_GREEN),
+        ('TEXTCOLOR', (0, 0), (-1, 0), white),
+        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+        ('FONTSIZE', (0, 0), (-1, 0), 11),
+        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+        ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+        ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
+        ('FONTSIZE', (0, 1), (-1, -1), 9),
+        ('BACKGROUND', (0, 1), (0, 1), HexColor('#dbeafe')),
+        ('BACKGROUND', (2, 1), (2, 1), LUMIER_GOLD_LIGHT),
+        ('BACKGROUND', (4, 1), (4, 1), HexColor('#dcfce7')),
+        ('TOPPADDING', (0, 0), (-1, -1), 10),
+        ('BOTTOMPADDING', (0, 0), (-1, -1), 10),
+        ('FONTNAME', (1, 0), (1, -1), 'Helvetica-Bold'),
+        ('FONTNAME', (3, 0), (3, -1), 'Helvetica-Bold'),
+        ('FONTSIZE', (1, 0), (3, -1), 14),
+        ('TEXTCOLOR', (1, 0), (1, -1), LUMIER_GRAY),
+        ('TEXTCOLOR', (3, 0), (3, -1), LUMIER_GRAY),
+    ]))
+    story.append(flow_table)
+    story.append(Spacer(1, 10*mm))
+
+    # Desglose de inversión
+    story.append(Paragraph("Composición Típica de la Inversión", styles['LumierHeading2']))
+
+    inv_data = [
+        ["Componente", "% Típico", "Descripción"],
+        ["Adquisición", "82-85%", "Precio + ITP + Escrituras + Honorarios"],
+        ["Hard Costs", "12-15%", "Obra + Materiales + Interiorismo + Mobiliario"],
+        ["Soft Costs", "1-2%", "Arquitectura + Permisos + Tenencia + Plusvalía"],
+        ["Intereses", "1-2%", "Coste financiero del préstamo"],
+    ]
+
+    inv_table = Table(inv_data, colWidths=[40*mm, 25*mm, 95*mm])
+    inv_table.setStyle(TableStyle([
+        ('BACKGROUND', (0, 0), (-1, 0), LUMIER_BLACK),
+        ('TEXTCOLOR', (0, 0), (-1, 0), LUMIER_GOLD),
+        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+        ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
+        ('FONTSIZE', (0, 0), (-1, -1), 10),
+        ('ALIGN', (1, 0), (1, -1), 'CENTER'),
+        ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+        ('GRID', (0, 0), (-1, -1), 0.5, LUMIER_GRAY),
+        ('ROWBACKGROUNDS', (0, 1), (-1, -1), [white, LUMIER_LIGHT_GRAY]),
+        ('TOPPADDING', (0, 0), (-1, -1), 8),
+        ('BOTTOMPADDING', (0, 0), (-1, -1), 8),
+    ]))
+    story.append(inv_table)
+
+    # ============= PÁGINA 5: CÁLCULOS DE ADQUISICIÓN =============
+    story.append(PageBreak())
+    story.append(shared(ColoredBox, "3. CÁLCULOS DE ADQUISICIÓN", LUMIER_BLACK, LUMIER_GOLD, height=35, font_size=14))
+    story.append(Spacer(1, 8*mm))
+
+    story.append(Paragraph("3.1 Honorarios de Compra (con intermediación)", styles['LumierHeading3']))
+    story.append(markdown_formula(nodos, "3.1 Honorarios de Compra (si hay intermediación)"))
+    story.append(Spacer(1, 5*mm))
+
+    story.append(Paragraph("3.2 Impuesto de Transmisiones Patrimoniales", styles['LumierHeading3']))
+    story.append(markdown_formula(nodos, "3.3 Impuesto de Transmisiones Patrimoniales (ITP)",
+                                  "⚠️ ÁREA DE MEJORA: Debería variar por Comunidad Autónoma"))
+    story.append(Spacer(1, 5*mm))
+
+    story.append(Paragraph("3.3 Otros Gastos Fijos", styles['LumierHeading3']))
+
+    fixed_costs = [
+        ["Concepto", "Valor Actual", "Notas"],
+        ["Inscripción Escritura", formatear_euros(INSCRIPCION_ESCRITURA, 0), "Valor fijo"],
+    ]
+
+    fixed_table = Table(fixed_costs, colWidths=[50*mm, 40*mm, 70*mm])
+    fixed_table.setStyle(TableStyle([
+        ('BACKGROUND', (0, 0), (-1, 0), LUMIER_GOLD),
+        ('TEXTCOLOR', (0, 0), (-1, 0), LUMIER_BLACK),
+        ('FONTNAME', (0, 0), (-1, -1), 'Helvetica'),
+        ('FONTSIZE', (0, 0), (-1, -1), 10),
+        ('ALIGN', (1, 0), (1, -1), 'RIGHT'),
+        ('GRID', (0, 0), (-1, -1), 0.5, LUMIER_GRAY),
+        ('TOPPADDING', (0, 0), (-1, -1), 6),
+        ('BOTTOMPADDING', (0, 0), (-1, -1), 6),
+    ]))
+    story.append(fixed_table)
+    story.append(Spacer(1, 5*mm))
+
+    story.append(Paragraph("3.4 Total Adquisición", styles['LumierHeading3']))
+    story.append(markdown_formula(nodos, "3.4 Total Adquisición"))
+
+    # Ejemplo práctico
+    story.append(Spacer(1, 8*mm))
+    story.append(Paragraph("📋 Ejemplo Práctico", styles['LumierHeading2']))
+
+    story.append(acquisition_example)
+
+    # ============= PÁGINA 6: HARD COSTS =============
+    story.append(PageBreak())
+    story.append(shared(ColoredBox, "4. HARD COSTS (REFORMA)", LUMIER_BLACK, LUMIER_GOLD, height=35, font_size=14))
+    story.append(Spacer(1, 8*mm))
+
+    story.append(Paragraph(
+        "Los costes de reforma varían según el nivel de calidad seleccionado (1★ a 5★). "
+        "A mayor calidad, mayor coste pero también mayor valor de venta potencial.",
+        styles['LumierBody']
+    ))
+    story.append(Spacer(1, 5*mm))
+
+    # Tabla de costes por calidad
+    story.append(Paragraph("Tabla de Costes por Nivel de Calidad (€/m²)", styles['LumierHeading2']))
+
+    quality_data = quality_cost_rows()
+
+    quality_table = Table(quality_data, colWidths=[40*mm, 22*mm, 22*mm, 22*mm, 22*mm, 22*mm])
+    quality_table.setStyle(TableStyle([
+        ('BACKGROUND', (0, 0), (-1, 0), LUMIER_BLACK),
+        ('BACKGROUND', (0, 0), (0, -1), LUMIER_BLACK),
+        ('TEXTCOLOR', (0, 0), (-1, 0), LUMIER_GOLD),
+        ('TEXTCOLOR', (0, 0), (0, -1), LUMIER_GOLD),
+        ('BACKGROUND', (0, -1), (-1, -1), LUMIER_GOLD_LIGHT),
+        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+        ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
+        ('FONTNAME', (0, -1), (-1, -1), 'Helvetica-Bold'),
+        ('FONTSIZE', (0, 0), (-1, -1), 10),
+        ('ALIGN', (1, 0), (-1, -1), 'CENTER'),
+        ('GRID', (0, 0), (-1, -1), 0.5, LUMIER_GRAY),
+        ('TOPPADDING', (0, 0), (-1, -1), 8),
+        ('BOTTOMPADDING', (0, 0), (-1, -1), 8),
+    ]))
+    story.append(quality_table)
+    story.append(Spacer(1, 8*mm))
+
+    # Costes adicionales
+    story.append(Paragraph("Costes Adicionales", styles['LumierHeading2']))
+
+    additional_data = [
+        ["Concepto", "Valor", "Condición"],
+        ["Terraza", f"{formatear_numero(COSTE_TERRAZA_M2)} €/m²", "Si terrazaM2 > 0"],
+        ["Toldo/Pérgola", formatear_euros(COSTE_TOLDO, 0), "Si toldoPergola = true"],
+        ["Suplemento Clásico", formatear_euros(SUPLEMENTO_CLASICO, 0), "Si esClasico = true"],
+        ["Extras", "Variable", "Valor manual"],
+    ]
+
+    add_table = Table(additional_data, colWidths=[50*mm, 40*mm, 60*mm])
+    add_table.setStyle(TableStyle([
+        ('BACKGROUND', (0, 0), (-1, 0), LUMIER_GOLD),
+        ('TEXTCOLOR', (0, 0), (-1, 0), LUMIER_BLACK),
+        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+        ('FONTSIZE', (0, 0), (-1, -1), 10),
+        ('ALIGN', (1, 0), (1, -1), 'RIGHT'),
+        ('GRID', (0, 0), (-1, -1), 0.5, LUMIER_GRAY),
+        ('TOPPADDING', (0, 0), (-1, -1), 6),
+        ('BOTTOMPADDING', (0, 0), (-1, -1), 6),
+    ]))
+    story.append(add_table)
+    story.append(Spacer(1, 8*mm))
+
+    story.append(Paragraph("Fórmula de Hard Costs", styles['LumierHeading3']))
+    story.append(markdown_formula(nodos, "4.8 Total Hard Costs"))
+
+    # ============= PÁGINA 7: SOFT COSTS =============
+    story.append(PageBreak())
+    story.append(shared(ColoredBox, "5. SOFT COSTS", LUMIER_BLACK, LUMIER_GOLD, height=35, font_size=14))
+    story.append(Spacer(1, 8*mm))
+
+    soft_data = [
+        ["Concepto", "Fórmula/Valor", "Notas"],
+        ["Arquitectura", f"m² × ({formatear_numero(COSTE_ARQUITECTURA[1:].min(), 0)}-"
+                         f"{formatear_numero(COSTE_ARQUITECTURA[1:].max(), 0)} €/m²)", "Según calidad"],
+        ["Permiso Construcción", f"m² × {formatear_numero(PERMISO_CONSTRUCCION_M2)} €/m²", "Fijo por m²"],
+        ["Gastos Venta", formatear_euros(GASTOS_VENTA, 0), "Valor fijo"],
+        ["Costos Tenencia", formatear_euros(COSTOS_TENENCIA, 0), "⚠️ Debería ser dinámico"],
+        ["Plusvalía", f"Precio Venta × {formatear_porcentaje(PLUSVALIA * 100)}", "⚠️ Simplificación"],
+    ]
+
+    soft_table = Table(soft_data, colWidths=[45*mm, 50*mm, 55*mm])
+    soft_table.setStyle(TableStyle([
+        ('BACKGROUND', (0, 0), (-1, 0), LUMIER_BLACK),
+        ('TEXTCOLOR', (0, 0), (-1, 0), LUMIER_GOLD),
+        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+        ('FONTSIZE', (0, 0), (-1, -1), 10),
+        ('GRID', (0, 0), (-1, -1), 0.5, LUMIER_GRAY),
+        ('ROWBACKGROUNDS', (0, 1), (-1, -1), [white, LUMIER_LIGHT_GRAY]),
+        ('TOPPADDING', (0, 0), (-1, -1), 8),
+        ('BOTTOMPADDING', (0, 0), (-1, -1), 8),
+    ]))
+    story.append(soft_table)
+    story.append(Spacer(1, 8*mm))
+
+    story.append(markdown_formula(nodos, "5.6 Total Soft Costs"))
+
+    # ============= CÁLCULOS DE VENTA =============
+    story.append(Spacer(1, 10*mm))
+    story.append(shared(ColoredBox, "6. CÁLCULOS DE VENTA", LUMIER_BLACK, LUMIER_GOLD, height=35, font_size=14))
+    story.append(Spacer(1, 8*mm))
+
+    story.append(Paragraph("6.1 Honorarios de Venta (con intermediación)", styles['LumierHeading3']))
+    story.append(markdown_formula(nodos, "6.1 Honorarios de Venta (si hay intermediación)"))
+    story.append(Spacer(1, 5*mm))
+
+    story.append(Paragraph("6.2 Venta Neta", styles['LumierHeading3']))
+    story.append(markdown_formula(nodos, "6.2 Venta Neta"))
+
+    # ============= PÁGINA 8: FINANCIACIÓN Y MÉTRICAS =============
+    story.append(PageBreak())
+    story.append(shared(ColoredBox, "7. FINANCIACIÓN", LUMIER_BLACK, LUMIER_GOLD, height=35, font_size=14))
+    story.append(Spacer(1, 8*mm))
+
+    story.append(Paragraph("7.1 Interés del Proyecto", styles['LumierHeading3']))
+    story.append(markdown_formula(nodos, "7.1 Interés del Proyecto",
+                                  f"Se asume uso promedio del {formatear_porcentaje(FACTOR_INTERES * 100, 0)} del tiempo"))
+    story.append(Paragraph(
+        "⚠️ ÁREA DE MEJORA: El cálculo actual no considera comisiones de apertura, "
+        "cancelación anticipada, ni el calendario real de disposición del préstamo.",
+        styles['LumierNote']
+    ))
+    story.append(Spacer(1, 5*mm))
+
+    story.append(Paragraph("7.2 Equity Necesario", styles['LumierHeading3']))
+    story.append(markdown_formula(nodos, "7.2 Equity Necesario"))
+
+    # Métricas
+    story.append(Spacer(1, 10*mm))
+    story.append(shared(ColoredBox, "8. MÉTRICAS DE RENTABILIDAD", LUMIER_BLACK, LUMIER_GOLD, height=35, font_size=14))
+    story.append(Spacer(1, 8*mm))
+
+    metrics_data = [
+        ["Métrica", "Fórmula", "Interpretación"],
+        ["Inversión Total", "Adquisición + Gastos + Intereses", "Capital total comprometido"],
+        ["Beneficio Neto", "Venta Neta - Inversión Total", "Ganancia absoluta"],
+        ["ROI", "(Beneficio / Inversión) × 100", "Retorno sobre inversión"],
+        ["Margen", "(Beneficio / Precio Venta) × 100", "% sobre precio de venta"],
+        ["TIR", "((Venta/Inv)^(12/meses)) - 1", "Rentabilidad anualizada"],
+    ]
+
+    metrics_table = Table(metrics_data, colWidths=[35*mm, 60*mm, 55*mm])
+    metrics_table.setStyle(TableStyle([
+        ('BACKGROUND', (0, 0), (-1, 0), LUMIER_BLACK),
+        ('TEXTCOLOR', (0, 0), (-1, 0), LUMIER_GOLD),
+        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+        ('FONTNAME', (1, 1), (1, -1), 'Courier'),
+        ('FONTSIZE', (0, 0), (-1, -1), 9),
+        ('GRID', (0, 0), (-1, -1), 0.5, LUMIER_GRAY),
+        ('ROWBACKGROUNDS', (0, 1), (-1, -1), [white, LUMIER_LIGHT_GRAY]),
+        ('TOPPADDING', (0, 0), (-1, -1), 8),
+        ('BOTTOMPADDING', (0, 0), (-1, -1), 8),
+        ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+    ]))
+    story.append(metrics_table)
+
+    # ============= PÁGINA 9: ANÁLISIS DE SENSIBILIDAD =============
+    story.append(PageBreak())
+    story.append(sensitivity_section)
+
+    # ============= PÁGINA 10: ÁREAS DE MEJORA =============
+    story.append(PageBreak())
+    story.append(shared(ColoredBox, "10. ÁREAS DE MEJORA IDENTIFICADAS", LUMIER_BLACK, LUMIER_GOLD, height=35, font_size=14))
+    story.append(Spacer(1, 8*mm))
+
+    story.append(Paragraph(f'Prioridad Alta <font color="{LUMIER_RED.hexval()}">●</font>', styles['LumierHeading2']))
+
+    high_priority = improvement_rows(nodos, "11.1 Prioridad Alta", styles)
+
+    hp_table = Table(high_priority, colWidths=IMPROVEMENT_COL_WIDTHS)
+    hp_table.setStyle(TableStyle([
+        ('BACKGROUND', (0, 0), (-1, 0), LUMIER_RED),
+        ('TEXTCOLOR', (0, 0), (-1, 0), white),
+        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+        ('FONTSIZE', (0, 0), (-1, -1), 9),
+        ('GRID', (0, 0), (-1, -1), 0.5, LUMIER_GRAY),
+        ('TOPPADDING', (0, 0), (-1, -1), 6),
+        ('BOTTOMPADDING', (0, 0), (-1, -1), 6),
+        ('VALIGN', (0, 0), (-1, -1), 'TOP'),
+    ]))
+    story.append(hp_table)
+    story.append(Spacer(1, 8*mm))
+
+    story.append(Paragraph(f'Prioridad Media <font color="{LUMIER_YELLOW.hexval()}">●</font>', styles['LumierHeading2']))
+
+    med_priority = improvement_rows(nodos, "11.2 Prioridad Media", styles)
+
+    mp_table = Table(med_priority, colWidths=IMPROVEMENT_COL_WIDTHS)
+    mp_table.setStyle(TableStyle([
+        ('BACKGROUND', (0, 0), (-1, 0), LUMIER_YELLOW),
+        ('TEXTCOLOR', (0, 0), (-1, 0), LUMIER_BLACK),
+        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+        ('FONTSIZE', (0, 0), (-1, -1), 9),
+        ('GRID', (0, 0), (-1, -1), 0.5, LUMIER_GRAY),
+        ('TOPPADDING', (0, 0), (-1, -1), 6),
+        ('BOTTOMPADDING', (0, 0), (-1, -1), 6),
+        ('VALIGN', (0, 0), (-1, -1), 'TOP'),
+    ]))
+    story.append(mp_table)
+    story.append(Spacer(1, 8*mm))
+
+    story.append(Paragraph(f'Prioridad Baja <font color="{LUMIER_GREEN.hexval()}">●</font> (Futuras)', styles['LumierHeading2']))
+
+    low_priority = [
+        [Paragraph(f"{item['number']}. {escape(item['area'])}: {item['Propuesta']}", styles['LumierBody'])]
+        for item in improvements(nodos, "11.3 Prioridad Baja (Mejoras Futuras)")
+    ]
+
+    lp_table = Table(low_priority, colWidths=[150*mm])
+    lp_table.setStyle(TableStyle([
+        ('FONTSIZE', (0, 0), (-1, -1), 10),
+        ('LEFTPADDING', (0, 0), (-1, -1), 15),
+        ('TOPPADDING', (0, 0), (-1, -1), 4),
+        ('BOTTOMPADDING', (0, 0), (-1, -1), 4),
+    ]))
+    story.append(lp_table)
+
+    # ============= PÁGINA 11: EJEMPLO COMPLETO =============
+    story.append(PageBreak())
+    story.append(project_section)
+
+    # ============= FLUJO DE CAJA MENSUAL =============
+    story.append(PageBreak())
+    story.append(cash_flow_section)
+
+    # ============= ESCENARIOS (MONTE CARLO) =============
+    story.append(PageBreak())
+    story.append(simulation_section)
+
+    return story
+
+def markdown_table(nodo, styles, width=MARKDOWN_TABLE_WIDTH):
+    """Tabla de un nodo `tabla` del Markdown, con anchos según el contenido"""
+    rows = [nodo["cabecera"]] + nodo["filas"]
+    data = []
+    for r, row in enumerate(rows):
+        base = styles['LumierCellHeader'] if r == 0 else styles['LumierCell']
+        data.append([
+            Paragraph(text, base if align == 'LEFT' else styles[f"{base.name}{align.title()}"])
+            for text, align in zip(row, nodo["alineaciones"])
+        ])
+
+    # Cada columna recibe un ancho proporcional a su texto más largo (acotado)
+    lengths = [
+        min(max(len(re.sub(r"<[^>]+>", "", row[c])) for row in rows), 40) + 4
+        for c in range(len(nodo["cabecera"]))
+    ]
+    col_widths = [width * n / sum(lengths) for n in lengths]
+
+    return styled_table(data, col_widths, MARKDOWN_TABLE_STYLE, repeatRows=1)
+
+@trazar("story")
+def markdown_flowables(nodos, styles):
+    """
+    Flowables de los nodos de lumier_pdf.markdown: títulos de nivel 1 como
+    ColoredBox, bloques de código como FormulaBox, tablas con el estilo Lumier
+    y citas como notas.
+    """
+    story = []
+    for nodo in nodos:
+        tipo = nodo["tipo"]
+        if tipo == "titulo":
+            if nodo["nivel"] == 1:
+                story.append(ColoredBox(nodo["texto"].upper(), LUMIER_BLACK, LUMIER_GOLD, height=35, font_size=14))
+                story.append(Spacer(1, 8*mm))
+            else:
+                style = styles['LumierHeading2'] if nodo["nivel"] == 2 else styles['LumierHeading3']
+                story.append(Paragraph(escape(nodo["texto"]), style))
+        elif tipo == "codigo":
+            story.append(FormulaBox("\n".join(nodo["lineas"])))
+            story.append(Spacer(1, 4*mm))
+        elif tipo == "tabla":
+            story.append(markdown_table(nodo, styles))
+            story.append(Spacer(1, 5*mm))
+        elif tipo == "lista":
+            for elemento in nodo["elementos"]:
+                style = styles['LumierBullet']
+                if elemento["nivel"]:
+                    indent = 15 * elemento["nivel"]
+                    style = ParagraphStyle(f"LumierBullet{elemento['nivel']}", parent=style,
+                                           leftIndent=style.leftIndent + indent,
+                                           bulletIndent=style.bulletIndent + indent)
+                story.append(Paragraph(elemento["texto"], style, bulletText=elemento["marca"]))
+        elif tipo == "cita":
+            for linea in nodo["lineas"]:
+                story.append(Paragraph(linea, styles['LumierNote']))
+        elif tipo == "parrafo":
+            story.append(Paragraph(nodo["texto"], styles['LumierBody']))
+        elif tipo == "separador":
+            story.append(Spacer(1, 5*mm))
+    return story
+
+def markdown_sections(nodos):
+    """Divide los nodos en secciones, una por título de nivel 1"""
+    sections = []
+    for nodo in nodos:
+        if not sections or (nodo["tipo"] == "titulo" and nodo["nivel"] == 1):
+            sections.append([])
+        sections[-1].append(nodo)
+    return sections
+
+@trazar("documento")
+@with_symbols
+def build_markdown_manual(source=MARKDOWN_SOURCE, output="MANUAL_CALCULOS.pdf", styles=None, use_forms=True,
+                          cache=None, parser=None):
+    """
+    Construye el manual a partir de su Markdown: portada y una sección por
+    título de nivel 1. `parser` (un ParserMarkdown) reutiliza el análisis de
+    los bloques que no han cambiado; con `cache` (un CacheSecciones), solo se
+    maquetan las secciones que han cambiado.
+    """
+    from lumier_pdf.markdown import ParserMarkdown
+
+    styles = styles or build_styles()
+    nodos = (parser or ParserMarkdown()).analizar(source)
+    doc = new_document(output, "Manual Técnico de Cálculos")
+    if use_forms:
+        on_first_page, on_later_pages = first_page_form, header_footer_form
+    else:
+        on_first_page, on_later_pages = first_page, header_footer
+
+    # La primera página es la portada: una sección vacía
+    sections = [[]] + markdown_sections(nodos)
+    if cache is None:
+        story = []
+        for section in sections[1:]:
+            story.append(PageBreak())
+            story.extend(markdown_flowables(section, styles))
+        doc.build(story, onFirstPage=on_first_page, onLaterPages=on_later_pages)
+        return doc
+
+    inputs = (markdown_flowables.__qualname__, huella_codigo(__name__), huella(styles))
+    return cache.construir(doc, [
+        (cache.clave(doc, (inputs, section)) if section else None,
+         lambda section=section: markdown_flowables(section, styles))
+        for section in sections
+    ], on_first_page, on_later_pages)
+
+def split_sections(items):
+    """Divide una lista de flowables en secciones por sus PageBreak"""
+    sections = [[]]
+    for item in items:
+        if isinstance(item, PageBreak):
+            sections.append([])
+        else:
+            sections[-1].append(item)
+    return sections
+
+class ManualTemplate:
+    """
+    Plantilla compilada del manual.
+
+    Al crearla se construyen una sola vez los estilos, los TableStyle y todos los
+    flowables estáticos; render() solo crea las tablas con datos del proyecto.
+    Las fórmulas y las áreas de mejora salen del Markdown `source`.
+    """
+
+    def __init__(self, styles=None, source=MARKDOWN_SOURCE):
+        from lumier_pdf.markdown import ParserMarkdown
+
+        self.styles = styles or build_styles()
+        self.nodos = ParserMarkdown().analizar(source)
+        self.skeleton = manual_skeleton(self.styles, self.nodos)
+        self.sections = split_sections(self.skeleton)
+        self._section_inputs = None
+
+    def section_inputs(self, proyecto):
+        """
+        Entradas de cada sección para la caché: la huella de cada flowable
+        estático y, por cada función con datos del proyecto, su nombre, el
+        código fuente y el proyecto.
+        """
+        if self._section_inputs is None:
+            # Huellas de un esqueleto recién creado: maquetar modifica los flowables
+            styles_digest = huella(self.styles)
+            self._section_inputs = [
+                [huella(item) if isinstance(item, Flowable) else None for item in section]
+                for section in split_sections(manual_skeleton(self.styles, self.nodos))
+            ] + [styles_digest]
+
+        *static_inputs, styles_digest = self._section_inputs
+        return [
+            [digest or (item.__qualname__, huella_codigo(item.__module__), proyecto, styles_digest)
+             for digest, item in zip(digests, section)]
+            for digests, section in zip(static_inputs, self.sections)
+        ]
+
+    @staticmethod
+    def standalone(section):
+        """
+        Si la sección se puede maquetar fuera del documento (en la caché o en
+        otro proceso): la portada la dibuja first_page y el índice depende de
+        todas las demás secciones.
+        """
+        from lumier_pdf.indice import HuecoIndice
+
+        return bool(section) and not any(isinstance(item, HuecoIndice) for item in section)
+
+    @trazar("story")
+    def fill(self, section, proyecto, resultado):
+        """Flowables de una sección con los datos del proyecto"""
+        story = []
+        for item in section:
+            if isinstance(item, Flowable):
+                story.append(item)
+            else:
+                story.extend(item(proyecto, resultado, self.styles))
+        return story
+
+    @with_symbols
+    def render(self, output, proyecto=None, use_forms=True, cache=None, workers=None):
+        """
+        Construye el manual con los datos de `proyecto` (por defecto, el del Anexo A).
+
+        El índice y el outline del PDF se generan con los encabezados de las
+        secciones (ver lumier_pdf.indice). Con use_forms, la portada y las
+        partes fijas del encabezado y pie se graban una vez como Form XObjects
+        y cada página solo las referencia. Con `cache` (un CacheSecciones),
+        solo se maquetan las secciones que han cambiado; con `workers`, las
+        secciones se maquetan en ese número de procesos (ver lumier_pdf.paralelo).
+        """
+        if cache is not None and workers:
+            raise ValueError("cache y workers no se pueden usar a la vez")
+        proyecto = proyecto or EJEMPLO_COMPLETO
+        resultado = calcular_proyecto(proyecto)
+
+        doc = manual_index().instalar(new_document(output, "Manual Técnico de Cálculos"))
+        if use_forms:
+            on_first_page, on_later_pages = first_page_form, header_footer_form
+        else:
+            on_first_page, on_later_pages = first_page, header_footer
+
+        if workers:
+            from lumier_pdf.paralelo import construir_en_paralelo
+
+            sections = [
+                (partial(manual_section, index, proyecto) if self.standalone(section) else None,
+                 lambda section=section: self.fill(section, proyecto, resultado))
+                for index, section in enumerate(self.sections)
+            ]
+            return construir_en_paralelo(doc, sections, on_first_page, on_later_pages, self.styles, workers)
+
+        if cache is None:
+            from lumier_pdf.memoria import construir_acotado, por_capitulos
+
+            # Cada sección se rellena justo antes de maquetarla (ver lumier_pdf.memoria)
+            chapters = (self.fill(section, proyecto, resultado) for section in self.sections)
+            return construir_acotado(doc, por_capitulos(chapters), on_first_page, on_later_pages)
+
+        sections = [
+            (cache.clave(doc, inputs) if self.standalone(section) else None,
+             lambda section=section: self.fill(section, proyecto, resultado))
+            for section, inputs in zip(self.sections, self.section_inputs(proyecto))
+        ]
+        return cache.construir(doc, sections, on_first_page, on_later_pages)
+
+@lru_cache(maxsize=4)
+def compiled_template(styles=None):
+    """
+    ManualTemplate de unos estilos (None: los de build_styles), creada una vez
+    por proceso. El esqueleto se compila al crearla, así que los cambios en
+    MANUAL_CALCULOS.md se ven en un proceso nuevo o creando otra ManualTemplate.
+    """
+    return ManualTemplate(styles)
+
+def manual_section(index, proyecto, styles):
+    """Flowables de la sección `index` del manual (para maquetarla en otro proceso)"""
+    template = compiled_template(styles)
+    return template.fill(template.sections[index], proyecto, calcular_proyecto(proyecto))
+
+@trazar("documento")
+@with_symbols
+def build_pdf(output="MANUAL_CALCULOS_VISUAL.pdf", proyecto=None, styles=None, use_forms=True, cache=None,
+              optimize=None, workers=None):
+    """
+    Construye el PDF completo. Con optimize (un nivel de compresión de 0 a 9),
+    lo escribe optimizado y linealizado (ver lumier_pdf.optimizar) y deja en
+    doc.size_report el informe de tamaños por categoría. Con workers, las
+    secciones se maquetan en ese número de procesos. La plantilla se compila
+    una vez por proceso y estilos (ver compiled_template).
+    """
+    template = compiled_template(styles)
+    if optimize is None:
+        return template.render(output, proyecto, use_forms, cache, workers)
+    from lumier_pdf.optimizar import optimizar
+    from lumier_pdf.salida import escribir, sin_streaming
+
+    # Dentro de write_pdf o iter_pdf, solo sale el PDF optimizado
+    buffer = io.BytesIO()
+    with sin_streaming():
+        doc = template.render(buffer, proyecto, use_forms, cache, workers)
+    data, doc.size_report = optimizar(buffer.getvalue(), nivel=optimize)
+    escribir(data, output)
+    return doc
+
+@trazar("documento")
+@with_symbols
+def build_dossier(proyecto, output, styles=None, use_forms=True, simulation_draws=0, sensitivity=False,
+                  cash_flow=False, charts=True):
+    """
+    Construye el dossier de un proyecto para el Comité de Inversión. Con
+    simulation_draws > 0 añade la página de escenarios Monte Carlo, con
+    sensitivity la de análisis de sensibilidad, con cash_flow la del flujo de
+    caja mensual y con charts la de gráficos de inversión y costes.
+    """
+    styles = styles or build_styles()
+    resultado = calcular_proyecto(proyecto)
+    nombre = proyecto.get("nombre") or proyecto.get("direccion") or "Proyecto"
+
+    doc = new_document(output, "Dossier de Inversión")
+    story = [Paragraph(escape(nombre), styles['LumierTitle'])]
+    if proyecto.get("direccion") and proyecto.get("direccion") != nombre:
+        story.append(Paragraph(escape(proyecto["direccion"]), styles['LumierBody']))
+    story.extend(project_section(proyecto, resultado, styles, title="DOSSIER DE INVERSIÓN"))
+    story.append(Spacer(1, 5*mm))
+    story.extend(offer_section(proyecto, resultado, styles))
+    if charts:
+        story.append(PageBreak())
+        story.extend(charts_section(proyecto, resultado, styles))
+    if cash_flow:
+        story.append(PageBreak())
+        story.extend(cash_flow_section(proyecto, resultado, styles))
+    if sensitivity:
+        story.append(PageBreak())
+        story.extend(sensitivity_section(proyecto, resultado, styles))
+    if simulation_draws:
+        story.append(PageBreak())
+        story.extend(simulation_section(proyecto, resultado, styles, simulation_draws))
+
+    page_callback = header_footer_form if use_forms else header_footer
+    doc.build(story, onFirstPage=page_callback, onLaterPages=page_callback)
+    return doc
+
+def portfolio_section(proyecto, styles, charts=False):
+    """Sección de un proyecto de la cartera y, con charts, su página de gráficos"""
+    nombre = proyecto.get("nombre") or proyecto.get("direccion") or "Proyecto"
+    resultado = calcular_proyecto(proyecto)
+    story = project_section(proyecto, resultado, styles, title=nombre.upper())
+    if charts:
+        story.append(PageBreak())
+        story.extend(charts_section(proyecto, resultado, styles))
+    return story
+
+@trazar("documento")
+@with_symbols
+def build_portfolio(proyectos, output, styles=None, use_forms=True, cache=None, charts=False, workers=None):
+    """
+    Construye un documento con una sección por proyecto de la cartera.
+    `proyectos` puede ser un generador: cada sección se crea justo antes de
+    maquetarla y las páginas ya escritas no se quedan en memoria (ver
+    lumier_pdf.memoria). Con `cache` (un CacheSecciones), solo se maquetan los
+    proyectos que han cambiado.
+    Con charts, cada proyecto lleva además su página de gráficos; los que se
+    repiten entre proyectos se graban una sola vez en el documento. Con
+    workers, los proyectos se maquetan en ese número de procesos (ver
+    lumier_pdf.paralelo).
+    """
+    if cache is not None and workers:
+        raise ValueError("cache y workers no se pueden usar a la vez")
+    styles = styles or build_styles()
+    doc = new_document(output, "Cartera de Proyectos")
+
+    def section(proyecto):
+        return portfolio_section(proyecto, styles, charts)
+
+    page_callback = header_footer_form if use_forms else header_footer
+    if workers:
+        from lumier_pdf.paralelo import construir_en_paralelo
+
+        sections = [(partial(portfolio_section, proyecto, charts=charts), partial(section, proyecto))
+                    for proyecto in proyectos]
+        return construir_en_paralelo(doc, sections, page_callback, page_callback, styles, workers)
+
+    if cache is None:
+        from lumier_pdf.memoria import construir_acotado, por_capitulos
+
+        chapters = (section(proyecto) for proyecto in proyectos)
+        return construir_acotado(doc, por_capitulos(chapters), page_callback, page_callback)
+
+    inputs = (project_section.__qualname__, charts, huella_codigo(__name__), huella(styles))
+    sections = [
+        (cache.clave(doc, (inputs, proyecto)), lambda proyecto=proyecto: section(proyecto))
+        for proyecto in proyectos
+    ]
+    return cache.construir(doc, sections, page_callback, page_callback)
+
+@trazar("documento")
+@with_symbols
+def build_portfolio_listing(proyectos, output, styles=None, use_forms=True):
+    """
+    Construye el listado de la cartera. `proyectos` puede ser un generador (por
+    ejemplo, lumier_pdf.batch.leer_proyectos): se lee y se maqueta página a
+    página, así que la memoria no crece con el número de proyectos.
+    """
+    styles = styles or build_styles()
+    doc = new_document(output, "Cartera de Proyectos")
+    page_callback = header_footer_form if use_forms else header_footer
+    doc.build(portfolio_listing_section(proyectos, styles), onFirstPage=page_callback,
+              onLaterPages=page_callback)
+    return doc
@@ -0,0 +1,282 @@
+"""
+Manual en Markdown - Lumier Casas Boutique
+
+Convierte MANUAL_CALCULOS.md en una lista de nodos (el AST) que
+lumier_pdf.manual maqueta como flowables. El AST solo usa dicts, listas y
+cadenas, así que se guarda en JSON:
+
+    {"tipo": "titulo", "nivel": 1, "texto": "1. Resumen Ejecutivo"}
+    {"tipo": "codigo", "lenguaje": "", "lineas": ["M2 Totales = ..."]}
+    {"tipo": "tabla", "cabecera": [...], "filas": [[...]], "alineaciones": [...]}
+    {"tipo": "lista", "elementos": [{"nivel": 0, "marca": "•", "texto": ...}]}
+    {"tipo": "cita", "lineas": [...]}
+    {"tipo": "parrafo", "texto": ...}
+    {"tipo": "separador"}
+
+Los textos de tablas, listas, citas y párrafos ya vienen con el marcado de
+Paragraph de ReportLab (<b>, <i>, <font>); los de títulos y código, en plano.
+
+El fichero se divide en bloques y cada bloque se analiza por separado. El
+parser guarda el AST por huella (SHA-256) del fichero y los nodos por huella
+del bloque, así que al editar el manual solo se vuelven a analizar los
+bloques que han cambiado:
+
+    parser = ParserMarkdown(".cache/markdown")
+    nodos = parser.analizar("MANUAL_CALCULOS.md")
+    print(parser)   # Markdown: 3 bloques analizados, 412 reutilizados
+"""
+
+import hashlib
+import json
+import os
+import re
+from xml.sax.saxutils import escape
+
+# Cambia cuando cambia el formato de los nodos guardados en disco
+FORMATO = 1
+
+_VALLA = re.compile(r"^(`{3,}|~{3,})\s*([\w+-]*)\s*$")
+_TITULO = re.compile(r"^(#{1,6})\s+(.*?)\s*#*\s*$")
+_SEPARADOR = re.compile(r"^\s*([-*_])(?:\s*\1){2,}\s*$")
+_ELEMENTO = re.compile(r"^(\s*)([-*+]|\d+[.)])\s+(.*)$")
+_ALINEACION = re.compile(r"^\s*(:?)-+(:?)\s*$")
+
+_CODIGO = re.compile(r"`([^`]+)`")
+_ENLACE = re.compile(r"\[([^\]]+)\]\([^)]*\)")
+_NEGRITA = re.compile(r"\*\*(?=\S)(.+?)(?<=\S)\*\*")
+_CURSIVA = re.compile(r"(?<![\*\w])\*(?=\S)(.+?)(?<=\S)\*(?![\*\w])")
+
+
+def _huella(texto):
+    return hashlib.sha256(texto.encode("utf-8")).hexdigest()
+
+
+def marcado(texto):
+    """Marcado de Paragraph de un texto con formato en línea de Markdown"""
+    # El código en línea se aparta antes para que su contenido no se interprete
+    codigos = []
+
+    def apartar(m):
+        codigos.append(f'<font face="Courier">{escape(m.group(1))}</font>')
+        return f"\0{len(codigos) - 1}\0"
+
+    texto = _CODIGO.sub(apartar, texto)
+    texto = escape(_ENLACE.sub(r"\1", texto))
+    texto = _NEGRITA.sub(r"<b>\1</b>", texto)
+    texto = _CURSIVA.sub(r"<i>\1</i>", texto)
+    return re.sub(r"\0(\d+)\0", lambda m: codigos[int(m.group(1))], texto)
+
+
+def plano(texto):
+    """Texto sin formato en línea (para títulos)"""
+    texto = _ENLACE.sub(r"\1", _CODIGO.sub(r"\1", texto))
+    return _CURSIVA.sub(r"\1", _NEGRITA.sub(r"\1", texto))
+
+
+def _tipo(linea):
+    """Tipo del bloque de varias líneas que empieza en `linea`"""
+    if linea.lstrip().startswith("|"):
+        return "tabla"
+    if linea.lstrip().startswith(">"):
+        return "cita"
+    if _ELEMENTO.match(linea):
+        return "lista"
+    return "parrafo"
+
+
+def _continua(tipo, linea):
+    """Si `linea` sigue el bloque de tipo `tipo`"""
+    if not linea.strip() or _VALLA.match(linea) or _TITULO.match(linea) or _SEPARADOR.match(linea):
+        return False
+    if tipo == "lista":
+        return bool(_ELEMENTO.match(linea)) or linea[:1].isspace()
+    return _tipo(linea) == tipo
+
+
+def bloques(texto):
+    """Divide un texto Markdown en bloques (cadenas con las líneas de cada bloque)"""
+    lineas = texto.splitlines()
+    resultado = []
+    i = 0
+    while i < len(lineas):
+        linea = lineas[i]
+        if not linea.strip():
+            i += 1
+            continue
+        valla = _VALLA.match(linea)
+        if valla:
+            fin = i + 1
+            while fin < len(lineas) and not lineas[fin].strip().startswith(valla.group(1)):
+                fin += 1
+            resultado.append("\n".join(lineas[i:fin + 1]))
+            i = fin + 1
+            continue
+        if _TITULO.match(linea) or _SEPARADOR.match(linea):
+            resultado.append(linea)
+            i += 1
+            continue
+        tipo = _tipo(linea)
+        fin = i + 1
+        while fin < len(lineas) and _continua(tipo, lineas[fin]):
+            fin += 1
+        resultado.append("\n".join(lineas[i:fin]))
+        i = fin
+    return resultado
+
+
+def _celdas(linea):
+    linea = linea.strip()
+    if linea.startswith("|"):
+        linea = linea[1:]
+    if linea.endswith("|"):
+        linea = linea[:-1]
+    return [celda.strip() for celda in linea.split("|")]
+
+
+def _tabla(lineas):
+    """Nodo de una tabla, o None si la segunda línea no es la de alineaciones"""
+    if len(lineas) < 2:
+        return None
+    alineaciones = []
+    for celda in _celdas(lineas[1]):
+        m = _ALINEACION.match(celda)
+        if not m:
+            return None
+        izquierda, derecha = m.groups()
+        alineaciones.append("CENTER" if izquierda and derecha else "RIGHT" if derecha else "LEFT")
+    cabecera = _celdas(lineas[0])
+    columnas = len(cabecera)
+    filas = [(_celdas(linea) + [""] * columnas)[:columnas] for linea in lineas[2:]]
+    return {
+        "tipo": "tabla",
+        "cabecera": [marcado(c) for c in cabecera],
+        "filas": [[marcado(c) for c in fila] for fila in filas],
+        "alineaciones": (alineaciones + ["LEFT"] * columnas)[:columnas],
+    }
+
+
+def _lista(lineas):
+    elementos = []
+    for linea in lineas:
+        m = _ELEMENTO.match(linea)
+        if m:
+            sangria, marca, texto = m.groups()
+            elementos.append({
+                "nivel": len(sangria.expandtabs(4)) // 2,
+                "marca": marca if marca[0].isdigit() else "•",
+                "texto": marcado(texto),
+            })
+        elif elementos:
+            elementos[-1]["texto"] += " " + marcado(linea.strip())
+    return {"tipo": "lista", "elementos": elementos}
+
+
+def _cita(lineas):
+    resultado = []
+    for linea in lineas:
+        linea = re.sub(r"^\s*>\s?", "", linea)
+        if not linea.strip():
+            continue
+        m = _ELEMENTO.match(linea)
+        resultado.append(f"• {marcado(m.group(3))}" if m and not m.group(2)[0].isdigit() else marcado(linea))
+    return {"tipo": "cita", "lineas": resultado}
+
+
+def analizar_bloque(bloque):
+    """Nodo del AST de un bloque devuelto por bloques()"""
+    lineas = bloque.split("\n")
+    valla = _VALLA.match(lineas[0])
+    if valla:
+        if len(lineas) > 1 and lineas[-1].strip().startswith(valla.group(1)):
+            lineas = lineas[:-1]
+        return {"tipo": "codigo", "lenguaje": valla.group(2), "lineas": lineas[1:]}
+    titulo = _TITULO.match(lineas[0])
+    if titulo:
+        return {"tipo": "titulo", "nivel": len(titulo.group(1)), "texto": plano(titulo.group(2))}
+    if _SEPARADOR.match(lineas[0]):
+        return {"tipo": "separador"}
+
+    tipo = _tipo(lineas[0])
+    if tipo == "tabla":
+        nodo = _tabla(lineas)
+        if nodo:
+            return nodo
+    elif tipo == "lista":
+        return _lista(lineas)
+    elif tipo == "cita":
+        return _cita(lineas)
+    return {"tipo": "parrafo", "texto": "<br/>".join(marcado(linea.strip()) for linea in lineas)}
+
+
+class ParserMarkdown:
+    """
+    Parser con caché: el AST por huella del fichero y los nodos por huella de
+    bloque, en memoria y, con `directorio`, también en disco.
+    """
+
+    def __init__(self, directorio=None):
+        self.directorio = directorio
+        self.analizados = 0
+        self.reutilizados = 0
+        self._documentos = {}
+        self._nodos = {}
+
+    def __str__(self):
+        return f"Markdown: {self.analizados} bloques analizados, {self.reutilizados} reutilizados"
+
+    def analizar_texto(self, texto):
+        """AST de un texto Markdown"""
+        clave = _huella(texto)
+        if clave in self._documentos:
+            huellas = self._documentos[clave]
+            self.reutilizados += len(huellas)
+        else:
+            huellas = []
+            for bloque in bloques(texto):
+                huella = _huella(bloque)
+                if huella in self._nodos:
+                    self.reutilizados += 1
+                else:
+                    self._nodos[huella] = analizar_bloque(bloque)
+                    self.analizados += 1
+                huellas.append(huella)
+            self._documentos[clave] = huellas
+        return [self._nodos[huella] for huella in huellas]
+
+    def analizar(self, ruta):
+        """AST de un fichero Markdown"""
+        with open(ruta, encoding="utf-8") as fichero:
+            texto = fichero.read()
+        if not self.directorio:
+            return self.analizar_texto(texto)
+
+        guardado = self._leer(ruta)
+        clave = _huella(texto)
+        if guardado:
+            self._nodos.update(guardado["nodos"])
+            self._documentos.setdefault(guardado["huella"], guardado["bloques"])
+        nodos = self.analizar_texto(texto)
+        if not guardado or guardado["huella"] != clave:
+            huellas = self._documentos[clave]
+            self._guardar(ruta, {"huella": clave, "bloques": huellas,
+                                 "nodos": {h: self._nodos[h] for h in huellas}})
+        return nodos
+
+    def _ruta(self, ruta):
+        return os.path.join(self.directorio, f"{_huella(os.path.abspath(ruta))[:16]}.json")
+
+    def _leer(self, ruta):
+        try:
+            with open(self._ruta(ruta), encoding="utf-8") as fichero:
+                datos = json.load(fichero)
+        except (OSError, ValueError):
+            return None
+        return datos if datos.get("formato") == FORMATO else None
+
+    def _guardar(self, ruta, datos):
+        os.makedirs(self.directorio, exist_ok=True)
+        destino = self._ruta(ruta)
+        temporal = f"{destino}.{os.getpid()}.tmp"
+        with open(temporal, "w", encoding="utf-8") as fichero:
+            json.dump({"formato": FORMATO, **datos}, fichero)
+        os.replace(temporal, destino)
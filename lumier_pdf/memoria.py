@@ -0,0 +1,210 @@
+"""
+Construcción con memoria acotada - Lumier Casas Boutique
+
+doc.build recibe la story entera como lista y reportlab guarda hasta el final
+el contenido sin comprimir de cada página ya escrita, así que una cartera con
+un capítulo por proyecto ocupa en memoria lo que ocupan todos sus proyectos.
+construir_acotado maqueta desde un generador y suelta lo que ya ha escrito:
+
+- StoryPerezosa es la lista que consume doc.build, pero saca los flowables
+  del generador a medida que se maquetan: cada capítulo se produce justo
+  antes de maquetarlo y se libera al escribir su última página;
+- CanvasAcotado comprime el contenido de cada página al cerrarla, lo vuelca
+  a un fichero temporal y deja en memoria solo el diccionario de la página,
+  sin los atributos vacíos;
+- al guardar, los objetos del PDF salen por bloques según se formatean, como
+  con lumier_pdf.salida.write_pdf, en vez de juntar el fichero entero en
+  memoria antes de escribirlo.
+
+    doc = construir_acotado(new_document("cartera.pdf", titulo), por_capitulos(capitulos),
+                            header_footer_form, header_footer_form)
+
+El PDF es el mismo, byte a byte, que el de doc.build con la story en una
+lista. Lo único que crece con el número de páginas es lo que reportlab guarda
+de cada objeto para escribir las referencias (en torno a 1,5 KB por página).
+"""
+
+import tempfile
+
+from reportlab import rl_config
+from reportlab.pdfbase.pdfdoc import (
+    PDFArray, PDFBase85Encode, PDFDictionary, PDFName, PDFObjectReference, PDFPage, PDFStream, PDFZCompress,
+)
+from reportlab.pdfgen.canvas import Canvas
+from reportlab.platypus import PageBreak
+
+from lumier_pdf.salida import en_streaming, streaming
+
+
+def por_capitulos(capitulos):
+    """Flowables de una secuencia de capítulos (listas de flowables), con un PageBreak entre dos"""
+    for numero, capitulo in enumerate(capitulos):
+        if numero:
+            yield PageBreak()
+        yield from capitulo
+
+
+class StoryPerezosa:
+    """
+    Story para doc.build que lee sus flowables de un iterable. Solo implementa
+    lo que usa BaseDocTemplate: len, índices, cortes desde el principio,
+    borrar e insertar. len() cuenta los flowables leídos más uno mientras
+    queden por leer, y antes lee hasta el primero sin keepWithNext, para que
+    handle_keepWithNext vea el grupo entero.
+    """
+
+    def __init__(self, flowables):
+        self._fuente = iter(flowables)
+        self._leidos = []
+        self._agotada = False
+
+    def _leer(self, cuantos):
+        """Lee del iterable hasta tener `cuantos` flowables (menos si se acaba)"""
+        while len(self._leidos) < cuantos and not self._agotada:
+            try:
+                self._leidos.append(next(self._fuente))
+            except StopIteration:
+                self._agotada = True
+
+    def __len__(self):
+        self._leer(1)
+        while not self._agotada and self._leidos[-1].getKeepWithNext():
+            self._leer(len(self._leidos) + 1)
+        return len(self._leidos) + (0 if self._agotada else 1)
+
+    def __getitem__(self, indice):
+        if isinstance(indice, slice):
+            self._leer(indice.stop if indice.stop is not None and indice.stop >= 0 else float("inf"))
+        else:
+            self._leer(indice + 1)
+        return self._leidos[indice]
+
+    def __setitem__(self, indice, valor):
+        self._leidos[indice] = valor
+
+    def __delitem__(self, indice):
+        del self._leidos[indice]
+
+    def insert(self, indice, flowable):
+        self._leidos.insert(indice, flowable)
+
+
+class _StreamVolcado(PDFStream):
+    """Stream de una página ya codificado y guardado en el fichero temporal"""
+
+    __Comment__ = "page stream"
+
+    def __init__(self, fichero, posicion, longitud, dictionary):
+        # PDFStream.format copia el diccionario, así que las páginas comparten uno
+        PDFStream.__init__(self, dictionary)
+        self.fichero = fichero
+        self.posicion = posicion
+        self.longitud = longitud
+
+    def format(self, document):
+        self.fichero.seek(self.posicion)
+        self.content = self.fichero.read(self.longitud)
+        try:
+            return PDFStream.format(self, document)
+        finally:
+            self.content = None
+
+
+class _PaginaVolcada(PDFPage):
+    """PDFPage que solo guarda los atributos que no tienen el valor de la clase"""
+
+    ExtGState = None
+    Rotate = 0
+    Annots = []
+    _shadingUsed = {}
+
+    def format(self, document):
+        try:
+            return PDFPage.format(self, document)
+        finally:
+            # Ya escrita: solo hace falta su nombre, para las referencias de /Kids
+            self.__dict__ = {"__InternalName__": self.__InternalName__}
+
+
+for _nombre in PDFPage.__NoDefault__:
+    if _nombre not in _PaginaVolcada.__dict__:
+        setattr(_PaginaVolcada, _nombre, None)
+
+# Para distinguir los atributos que la clase no tiene
+_SIN_VALOR = object()
+
+
+class CanvasAcotado(Canvas):
+    """
+    Canvas que no guarda en memoria el contenido de las páginas ya escritas
+    (ver el docstring del módulo).
+    """
+
+    def __init__(self, *args, **kwargs):
+        Canvas.__init__(self, *args, **kwargs)
+        self._volcado = tempfile.TemporaryFile()
+        self._diccionarios = {}
+        self._diccionarios_stream = {}
+
+    def _compartido(self, diccionario):
+        """
+        Un único PDFDictionary para todas las páginas con las mismas entradas,
+        si todas son nombres o referencias (los formularios, /Trans vacío)
+        """
+        clave = []
+        for nombre, valor in diccionario.dict.items():
+            if isinstance(valor, PDFObjectReference):
+                valor = (PDFObjectReference, valor.name)
+            elif not isinstance(valor, str):
+                return diccionario
+            clave.append((nombre, valor))
+        return self._diccionarios.setdefault(tuple(clave), diccionario)
+
+    def showPage(self):
+        Canvas.showPage(self)
+        pagina = self._doc.Pages.pages[-1]
+        filtros = ()
+        if pagina.compression:
+            filtros = rl_config.useA85 and (PDFBase85Encode, PDFZCompress) or (PDFZCompress,)
+        contenido = pagina.stream
+        for filtro in reversed(filtros):
+            contenido = filtro.encode(contenido)
+        if isinstance(contenido, str):
+            contenido = contenido.encode("latin1")
+        posicion = self._volcado.seek(0, 2)
+        self._volcado.write(contenido)
+
+        pagina.__class__ = _PaginaVolcada
+        atributos = {}
+        for nombre, valor in pagina.__dict__.items():
+            if nombre == "stream" or valor == getattr(_PaginaVolcada, nombre, _SIN_VALOR):
+                continue
+            atributos[nombre] = self._compartido(valor) if isinstance(valor, PDFDictionary) else valor
+        pagina.__dict__ = atributos
+        if filtros not in self._diccionarios_stream:
+            self._diccionarios_stream[filtros] = PDFDictionary(
+                {"Filter": PDFArray([PDFName(filtro.pdfname) for filtro in filtros])} if filtros else None)
+        pagina.Contents = _StreamVolcado(self._volcado, posicion, len(contenido), self._diccionarios_stream[filtros])
+
+    def save(self):
+        if len(self._code):
+            self.showPage()
+        try:
+            if en_streaming():
+                # Dentro de write_pdf o iter_pdf: el PDF ya sale por bloques
+                self._doc.SaveToFile(self._filename, self)
+            elif isinstance(self._filename, str):
+                with open(self._filename, "wb") as fichero, streaming(fichero.write):
+                    self._doc.SaveToFile(fichero, self)
+            else:
+                with streaming(self._filename.write):
+                    self._doc.SaveToFile(self._filename, self)
+        finally:
+            self._volcado.close()
+
+
+def construir_acotado(doc, flowables, onFirstPage, onLaterPages):
+    """doc.build de un iterable de flowables con CanvasAcotado (ver el docstring del módulo)"""
+    doc.build(StoryPerezosa(flowables), onFirstPage=onFirstPage, onLaterPages=onLaterPages,
+              canvasmaker=CanvasAcotado)
+    return doc
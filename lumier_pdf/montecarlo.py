@@ -0,0 +1,152 @@
+"""
+Simulación Monte Carlo de márgenes - Lumier Casas Boutique
+
+Muestrea las entradas inciertas de un proyecto (precio de venta, coste de
+reforma €/m², meses y tipo de interés) y evalúa todas las muestras con el
+motor vectorizado de calculos.py. El resultado son las distribuciones de
+margen, ROI y TIR y la probabilidad de cada clasificación del manual.
+
+    simulacion = simular(proyecto, muestras=1_000_000)
+    simulacion.probabilidades   # (OPORTUNIDAD, AJUSTADO, NO HACER)
+    simulacion.percentiles("margen")
+"""
+
+from dataclasses import dataclass
+
+import numpy as np
+
+from lumier_pdf.calculos import (
+    CLASIFICACIONES, COSTE_REFORMA_M2, UMBRAL_AJUSTADO, UMBRAL_OPORTUNIDAD, VALORES_POR_DEFECTO,
+    calcular
+)
+
+# Muestras evaluadas por bloque: acota la memoria de los intermedios del motor
+TAMANO_BLOQUE = 1 << 18
+
+METRICAS = ("margen", "roi", "tir")
+
+
+@dataclass(frozen=True)
+class Normal:
+    media: float
+    desviacion: float
+
+    def muestrear(self, rng, n):
+        return rng.normal(self.media, self.desviacion, n)
+
+
+@dataclass(frozen=True)
+class Triangular:
+    minimo: float
+    moda: float
+    maximo: float
+
+    def muestrear(self, rng, n):
+        if self.minimo == self.maximo:
+            return np.full(n, float(self.moda))
+        return rng.triangular(self.minimo, self.moda, self.maximo, n)
+
+
+@dataclass(frozen=True)
+class Uniforme:
+    minimo: float
+    maximo: float
+
+    def muestrear(self, rng, n):
+        return rng.uniform(self.minimo, self.maximo, n)
+
+
+@dataclass(frozen=True)
+class Fija:
+    valor: float
+
+    def muestrear(self, rng, n):
+        return np.full(n, float(self.valor))
+
+
+def coste_m2_reforma(proyecto):
+    """Coste de reforma €/m² del proyecto según su calidad"""
+    calidad = int(np.clip(proyecto["calidad"], 1, 5))
+    return float(COSTE_REFORMA_M2[calidad] * proyecto.get("factor_coste_reforma", 1.0))
+
+
+def distribuciones_por_defecto(proyecto):
+    """
+    Incertidumbre por defecto: precio de venta entre -10% y +5%, sobrecoste de
+    reforma de hasta +25%, retrasos de hasta +50% del plazo y ±0,5 puntos de
+    tipo de interés.
+    """
+    precio_venta = proyecto["precio_venta"]
+    coste_m2 = coste_m2_reforma(proyecto)
+    meses = proyecto.get("meses", VALORES_POR_DEFECTO["meses"])
+    interes = proyecto.get("interes_financiero", VALORES_POR_DEFECTO["interes_financiero"])
+    return {
+        "precio_venta": Triangular(0.90 * precio_venta, precio_venta, 1.05 * precio_venta),
+        "coste_m2": Triangular(0.95 * coste_m2, coste_m2, 1.25 * coste_m2),
+        "meses": Triangular(meses, 1.10 * meses, 1.50 * meses),
+        "interes_financiero": Normal(interes, 0.5),
+    }
+
+
+@dataclass
+class Simulacion:
+    """Distribuciones simuladas de un proyecto"""
+    margen: np.ndarray
+    roi: np.ndarray
+    tir: np.ndarray
+
+    @property
+    def muestras(self):
+        return len(self.margen)
+
+    @property
+    def probabilidades(self):
+        """Probabilidad de OPORTUNIDAD, AJUSTADO y NO HACER"""
+        oportunidad = np.count_nonzero(self.margen >= UMBRAL_OPORTUNIDAD) / self.muestras
+        no_hacer = np.count_nonzero(self.margen < UMBRAL_AJUSTADO) / self.muestras
+        return (float(oportunidad), float(1.0 - oportunidad - no_hacer), float(no_hacer))
+
+    def percentiles(self, metrica, q=(5, 50, 95)):
+        return tuple(float(v) for v in np.percentile(getattr(self, metrica), q))
+
+    def resumen(self):
+        """Media y percentiles 5/50/95 de cada métrica y probabilidades por clasificación"""
+        resumen = {}
+        for metrica in METRICAS:
+            p5, p50, p95 = self.percentiles(metrica)
+            resumen[metrica] = {"media": float(getattr(self, metrica).mean()), "p5": p5, "p50": p50, "p95": p95}
+        resumen["probabilidades"] = dict(zip(CLASIFICACIONES, self.probabilidades))
+        return resumen
+
+
+def simular(proyecto, muestras=1_000_000, distribuciones=None, semilla=None):
+    """
+    Simula `muestras` escenarios de un proyecto. `distribuciones` sustituye
+    (total o parcialmente) a distribuciones_por_defecto(); sus claves son
+    precio_venta, coste_m2, meses e interes_financiero.
+    """
+    distribuciones = {**distribuciones_por_defecto(proyecto), **(distribuciones or {})}
+    rng = np.random.default_rng(semilla)
+    coste_base = COSTE_REFORMA_M2[int(np.clip(proyecto["calidad"], 1, 5))]
+    fijas = {k: v for k, v in proyecto.items() if k not in distribuciones}
+
+    salida = {m: np.empty(muestras) for m in METRICAS}
+    for inicio in range(0, muestras, TAMANO_BLOQUE):
+        n = min(TAMANO_BLOQUE, muestras - inicio)
+        entradas = dict(fijas)
+        entradas["precio_venta"] = distribuciones["precio_venta"].muestrear(rng, n)
+        entradas["factor_coste_reforma"] = distribuciones["coste_m2"].muestrear(rng, n) / coste_base
+        entradas["meses"] = np.maximum(distribuciones["meses"].muestrear(rng, n), 0.0)
+        entradas["interes_financiero"] = np.maximum(distribuciones["interes_financiero"].muestrear(rng, n), 0.0)
+
+        resultados = calcular(entradas)
+        for metrica in METRICAS:
+            salida[metrica][inicio:inicio + n] = resultados[metrica]
+
+    return Simulacion(**salida)
+
+
+def simular_cartera(proyectos, muestras=1_000_000, semilla=None):
+    """Resumen de la simulación de cada proyecto de una cartera"""
+    rng = np.random.default_rng(semilla)
+    return [simular(p, muestras, semilla=rng.integers(2**63)).resumen() for p in proyectos]
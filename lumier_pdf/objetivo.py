@@ -0,0 +1,144 @@
+"""
+Búsqueda de objetivos - Lumier Casas Boutique
+
+Para una cartera de proyectos, encuentra el precio de compra máximo, el precio
+de venta mínimo o los hard costs máximos con los que cada proyecto todavía
+alcanza un margen, ROI o TIR objetivo.
+
+Todos los proyectos se resuelven a la vez: cada iteración evalúa la cartera
+completa con el motor vectorizado. Se parte de un intervalo que contiene la
+solución y se avanza con pasos de secante (regula falsi, variante de
+Illinois), que en métricas lineales como el margen convergen en uno o dos
+pasos; si la secante se sale del intervalo se bisecta.
+
+    maximos = resolver(columnas(proyectos), "precio_compra", "margen", 16.0)
+"""
+
+import numpy as np
+
+from lumier_pdf.calculos import calcular
+
+# Variables que se pueden despejar y si la métrica crece (+1) o decrece (-1) con ellas
+VARIABLES = {
+    "precio_compra": -1.0,
+    "precio_venta": 1.0,
+    "hard_costs": -1.0,
+}
+METRICAS = ("margen", "roi", "tir")
+
+MAX_ITERACIONES = 100
+MAX_AMPLIACIONES = 60
+
+
+def _evaluador(entradas, variable, metrica):
+    """Función x -> métrica de cada proyecto con `variable` = x"""
+    entradas = dict(entradas)
+    if variable == "hard_costs":
+        # Los hard costs se fijan ajustando extras: extras = x - resto de hard costs
+        base = calcular(entradas)
+        resto = base["hard_costs"] - base["extras"]
+        columna = "extras"
+    else:
+        resto = 0.0
+        columna = variable
+
+    def evaluar(x):
+        entradas[columna] = x - resto
+        return calcular(entradas)[metrica]
+
+    return evaluar
+
+
+def _limites(entradas, variable, n):
+    """Intervalo inicial [inferior, superior] de la búsqueda"""
+    if variable == "precio_venta":
+        inversion = np.maximum(calcular(entradas)["inversion_total"], 1.0)
+        return np.broadcast_to(inversion / 2, n), np.broadcast_to(inversion * 2, n)
+    precio_venta = np.broadcast_to(np.asarray(entradas["precio_venta"], dtype=np.float64), n)
+    return np.zeros(n), np.maximum(precio_venta, 1.0)
+
+
+def resolver(entradas, variable, metrica="margen", objetivo=16.0, tolerancia=0.01):
+    """
+    Valor de `variable` (precio_compra, precio_venta o hard_costs) con el que
+    `metrica` (margen, roi o tir) es igual a `objetivo` en cada proyecto.
+
+    Para precio_compra y hard_costs es el máximo admisible y para precio_venta el
+    mínimo. `entradas` son columnas del motor (ver calculos.columnas). Devuelve
+    un array en euros, a `tolerancia` de la solución por el lado que cumple el
+    objetivo, con NaN donde el objetivo no es alcanzable.
+    """
+    if variable not in VARIABLES:
+        raise ValueError(f"Variable desconocida: {variable} (admitidas: {', '.join(VARIABLES)})")
+    if metrica not in METRICAS:
+        raise ValueError(f"Métrica desconocida: {metrica} (admitidas: {', '.join(METRICAS)})")
+
+    n = np.broadcast_shapes(*(np.shape(v) for v in entradas.values()))
+    evaluar = _evaluador(entradas, variable, metrica)
+    signo = VARIABLES[variable]
+
+    def g(x):
+        # Creciente en x y nula en la solución
+        return signo * (evaluar(x) - objetivo)
+
+    inferior, superior = _limites(entradas, variable, n)
+    g_inferior, g_superior = g(inferior), g(superior)
+
+    # Amplía el intervalo hasta que contenga la solución
+    for _ in range(MAX_AMPLIACIONES):
+        bajos = (g_inferior > 0) & (inferior > 0) & (variable == "precio_venta")
+        cortos = (g_superior < 0) & (g_inferior <= 0)
+        if not (bajos.any() or cortos.any()):
+            break
+        inferior = np.where(bajos, inferior / 2, inferior)
+        superior = np.where(cortos, superior * 2, superior)
+        g_inferior = np.where(bajos, g(inferior), g_inferior)
+        g_superior = np.where(cortos, g(superior), g_superior)
+
+    alcanzable = (g_inferior <= 0) & (g_superior >= 0)
+    # Extremo que se mantuvo en el último paso (-1 inferior, 1 superior) para Illinois
+    lado = np.zeros(n, dtype=np.int8)
+
+    def acotar(x, pendientes, illinois):
+        nonlocal inferior, superior, g_inferior, g_superior, lado
+        gx = g(x)
+        sube = pendientes & (gx <= 0)
+        baja = pendientes & (gx > 0)
+        if illinois:
+            # Si el mismo extremo se mantiene dos veces, se divide su g por 2
+            g_superior = np.where(sube & (lado == 1), g_superior / 2, g_superior)
+            g_inferior = np.where(baja & (lado == -1), g_inferior / 2, g_inferior)
+            lado = np.where(sube, 1, np.where(baja, -1, lado))
+        inferior = np.where(sube, x, inferior)
+        g_inferior = np.where(sube, gx, g_inferior)
+        superior = np.where(baja, x, superior)
+        g_superior = np.where(baja, gx, g_superior)
+        return sube, baja
+
+    for _ in range(MAX_ITERACIONES):
+        pendientes = alcanzable & (superior - inferior > tolerancia)
+        if not pendientes.any():
+            break
+
+        # Paso de secante; bisección si se sale del intervalo
+        with np.errstate(divide="ignore", invalid="ignore"):
+            x = superior - g_superior * (superior - inferior) / (g_superior - g_inferior)
+        fuera = ~np.isfinite(x) | (x <= inferior) | (x >= superior)
+        x = np.where(pendientes & ~fuera, x, (inferior + superior) / 2)
+        sube, baja = acotar(x, pendientes, illinois=True)
+
+        # Sonda a media tolerancia del paso hacia el otro extremo: cuando la
+        # secante ya ha caído sobre la solución, cierra el intervalo
+        sonda = np.where(sube, x + tolerancia / 2, x - tolerancia / 2)
+        sonda = np.clip(sonda, inferior, superior)
+        acotar(sonda, pendientes & (superior - inferior > tolerancia), illinois=False)
+
+    # Extremo que cumple el objetivo: el inferior si la métrica decrece con la variable
+    solucion = inferior if signo < 0 else superior
+    return np.where(alcanzable, solucion, np.nan)
+
+
+def resolver_proyecto(proyecto, variable, metrica="margen", objetivo=16.0):
+    """Como resolver() para un único proyecto; None si el objetivo no es alcanzable"""
+    valor = resolver({k: np.atleast_1d(v) for k, v in proyecto.items()}, variable, metrica, objetivo)[0]
+    return None if np.isnan(valor) else float(valor)
@@ -0,0 +1,546 @@
+"""
+Optimización de PDF - Lumier Casas Boutique
+
+Reescribe un PDF de reportlab para que pese menos y se empiece a ver antes de
+terminar de descargarlo (la "vista web rápida" de Acrobat):
+
+- los streams se descomprimen y se vuelven a comprimir con Flate al nivel
+  pedido, sin la capa ASCII85 que reportlab añade por defecto;
+- a las fuentes TrueType incrustadas se les quita la tabla `name`, que los
+  visores no usan y que en un subconjunto de DejaVu pesa más que los glifos;
+- los diccionarios se escriben sin espacios sobrantes ni entradas obsoletas
+  o con el valor por defecto (/ProcSet, /Rotate 0, /Trans vacía);
+- los objetos idénticos (fondos, formularios, fuentes repetidas) se guardan
+  una sola vez y los que nada usa se descartan;
+- con linealizar, el fichero sigue el anexo F de ISO 32000-1: diccionario de
+  linealización, referencias y objetos de la primera página al principio,
+  luego los de cada página en orden y un stream de pistas para que el visor
+  pida cada página por rangos.
+
+    datos, informe = optimizar(pdf, nivel=9)
+    print(informe)
+
+Solo lee PDFs con tablas de referencias clásicas, como los de reportlab.
+"""
+
+import re
+import zlib
+from collections import Counter
+from dataclasses import dataclass, field
+
+from reportlab.lib.rl_accel import asciiBase85Decode
+from reportlab.pdfbase.ttfonts import TTFontMaker
+
+from lumier_pdf.formato import formatear_numero
+
+NIVEL_COMPRESION = 9
+
+# Tablas TrueType que no hacen falta en una fuente incrustada
+TABLAS_SOBRANTES = (b"name",)
+
+# Categorías del informe de tamaños, en el orden en que se imprimen
+CATEGORIAS = ("contenido", "formularios", "imágenes", "fuentes", "ficheros de fuente", "páginas", "estructura",
+              "referencias")
+
+# Denominador de la posición fraccionaria de las referencias compartidas de
+# las pistas (no se usa: se escriben con 0 bits)
+DENOMINADOR_PISTAS = 4
+
+_CABECERA_OBJETO = re.compile(rb"\s*(\d+) (\d+) obj\s*")
+_LONGITUD = re.compile(rb"/Length\s+(\d+)")
+_FILTRO = re.compile(rb"/Filter\s*(\[[^\]]*\]|/\w+)")
+# Cadenas (que se dejan como están) o referencias a objetos
+_REFERENCIA = re.compile(rb"(\((?:\\.|[^\\)])*\))|(?<![\d.])(\d+) 0 R\b")
+# Cadenas, espacios junto a delimitadores u otros espacios
+_ESPACIOS = re.compile(rb"(\((?:\\.|[^\\)])*\))|\s*([\[\]<>/])\s*|\s+")
+_PAGINA = re.compile(rb"/Type\s*/Page(?!s)\b")
+_NODO = re.compile(rb"/Type\s*/(Pages|Catalog)\b")
+
+
+@dataclass
+class Objeto:
+    """Objeto del PDF: su diccionario (o valor), su stream tal como se escribe y su categoría"""
+    diccionario: bytes
+    stream: bytes = None
+    categoria: str = "estructura"
+    bytes_antes: int = 0
+
+
+@dataclass
+class InformeTamano:
+    """Objetos y bytes por categoría antes y después de optimizar"""
+    categorias: dict = field(default_factory=lambda: {c: [0, 0, 0, 0] for c in CATEGORIAS})
+    duplicados: int = 0
+    descartados: int = 0
+    linealizado: bool = False
+
+    @property
+    def antes(self):
+        return sum(c[1] for c in self.categorias.values())
+
+    @property
+    def despues(self):
+        return sum(c[3] for c in self.categorias.values())
+
+    def __str__(self):
+        lineas = [f"  {'categoría':20} {'objetos':>8} {'antes (KB)':>11} {'después (KB)':>13} {'ahorro':>8}"]
+        for nombre, (objetos, antes, objetos_despues, despues) in self.categorias.items():
+            if antes or despues:
+                ahorro = f"{formatear_numero((1 - despues / antes) * 100, 1)}%" if antes else "-"
+                lineas.append(f"  {nombre:20} {objetos_despues:>8} {formatear_numero(antes / 1024, 1):>11} "
+                              f"{formatear_numero(despues / 1024, 1):>13} {ahorro:>8}")
+        lineas.append(f"  {'total':20} {'':>8} {formatear_numero(self.antes / 1024, 1):>11} "
+                      f"{formatear_numero(self.despues / 1024, 1):>13} "
+                      f"{formatear_numero((1 - self.despues / self.antes) * 100, 1):>7}%")
+        lineas.append(f"  {self.duplicados} objetos duplicados, {self.descartados} sin usar"
+                      + (", linealizado" if self.linealizado else ""))
+        return "\n".join(lineas)
+
+
+class PDF:
+    """Objetos y trailer de un PDF leído con leer_pdf"""
+
+    def __init__(self, version, objetos, raiz, info, ident):
+        self.version = version
+        self.objetos = objetos
+        self.raiz = raiz
+        self.info = info
+        self.ident = ident
+
+    def referencias(self, numero):
+        """Números de los objetos a los que apunta `numero`, en orden y sin repetir"""
+        return list(dict.fromkeys(int(m.group(2)) for m in _REFERENCIA.finditer(self.objetos[numero].diccionario)
+                                  if m.group(2)))
+
+    def paginas(self):
+        """Objetos página en orden, recorriendo el árbol de páginas"""
+        raiz = re.search(rb"/Pages\s+(\d+) 0 R", self.objetos[self.raiz].diccionario)
+        paginas, pendientes = [], [int(raiz.group(1))]
+        while pendientes:
+            numero = pendientes.pop(0)
+            objeto = self.objetos[numero]
+            if _PAGINA.search(objeto.diccionario):
+                paginas.append(numero)
+            else:
+                hijos = re.search(rb"/Kids\s*\[([^\]]*)\]", objeto.diccionario).group(1)
+                pendientes[:0] = [int(n) for n in re.findall(rb"(\d+) 0 R", hijos)]
+        return paginas
+
+    def alcance(self, pagina):
+        """La página y los objetos que usa (sin pasar a otras páginas ni al árbol de páginas)"""
+        vistos, pendientes = {pagina: None}, [pagina]
+        while pendientes:
+            for numero in self.referencias(pendientes.pop(0)):
+                if numero not in vistos and numero in self.objetos:
+                    diccionario = self.objetos[numero].diccionario
+                    if not (_PAGINA.search(diccionario) or _NODO.search(diccionario)):
+                        vistos[numero] = None
+                        pendientes.append(numero)
+        return list(vistos)
+
+
+def leer_pdf(datos):
+    """Lee los objetos de un PDF con tablas de referencias clásicas (los streams, sin decodificar)"""
+    version = datos[:datos.index(b"\n")].strip()
+    pos = datos.index(b"\n") + 1
+    while datos[pos:pos + 1] == b"%":
+        pos = datos.index(b"\n", pos) + 1
+    objetos = {}
+    while True:
+        # search y no match: en un PDF linealizado hay referencias y trailer entre objetos
+        cabecera = _CABECERA_OBJETO.search(datos, pos)
+        if not cabecera:
+            break
+        inicio = cabecera.end()
+        fin = datos.index(b"endobj", inicio)
+        marca = datos.find(b"stream", inicio, fin)
+        if marca == -1:
+            objeto = Objeto(datos[inicio:fin].strip())
+        else:
+            diccionario = datos[inicio:marca].strip()
+            comienzo = marca + 6 + (2 if datos[marca + 6:marca + 8] == b"\r\n" else 1)
+            longitud = int(_LONGITUD.search(diccionario).group(1))
+            objeto = Objeto(diccionario, datos[comienzo:comienzo + longitud])
+            fin = datos.index(b"endobj", comienzo + longitud)
+        pos = fin + 6
+        objeto.bytes_antes = pos - cabecera.start()
+        objetos[int(cabecera.group(1))] = objeto
+
+    # En un PDF linealizado, el trailer con /Root es el de la primera página
+    trailer = next(t for t in reversed(re.findall(rb"trailer\s*(<<.*?>>)\s*startxref", datos, re.S))
+                   if b"/Root" in t)
+    raiz = int(re.search(rb"/Root\s+(\d+) 0 R", trailer).group(1))
+    info = re.search(rb"/Info\s+(\d+) 0 R", trailer)
+    ident = re.search(rb"/ID\s*(\[[^\]]*\])", trailer)
+    return PDF(version, objetos, raiz, info and int(info.group(1)), ident and ident.group(1))
+
+
+def _quitar(diccionario, clave, valor=rb"\[[^\]]*\]|<<\s*>>|\d+ 0 R|/[^\s/\[\]<>()]+|[-+\d.]+"):
+    """Diccionario sin la entrada `clave` (con un valor simple, o `valor` si se da)"""
+    return re.sub(rb"/" + clave + rb"(?![\w.])\s*(?:" + valor + rb")", b"", diccionario)
+
+
+def _anadir(diccionario, entradas):
+    return diccionario[:diccionario.rindex(b">>")].rstrip() + entradas + b">>"
+
+
+def _compactar(diccionario):
+    """Diccionario sin espacios sobrantes ni entradas obsoletas o con su valor por defecto"""
+    diccionario = _quitar(diccionario, b"ProcSet")
+    diccionario = _quitar(diccionario, b"Rotate", rb"0(?![\d.])")
+    diccionario = _quitar(diccionario, b"Trans", rb"<<\s*>>")
+
+    def sustituir(m):
+        if m.group(1):
+            return m.group(1)
+        return m.group(2) or b" "
+    return _ESPACIOS.sub(sustituir, diccionario).strip()
+
+
+def _decodificar(objeto):
+    """Stream decodificado, o None si usa filtros que no se rehacen (imágenes con predictor, JPEG...)"""
+    diccionario = objeto.diccionario
+    filtro = _FILTRO.search(diccionario)
+    if b"/DecodeParms" in diccionario:
+        return None
+    datos = objeto.stream
+    for nombre in re.findall(rb"/(\w+)", filtro.group(1)) if filtro else ():
+        if nombre == b"ASCII85Decode":
+            datos = asciiBase85Decode(datos)
+        elif nombre == b"FlateDecode":
+            datos = zlib.decompress(datos)
+        else:
+            return None
+    return datos
+
+
+def recortar_truetype(datos, tablas=TABLAS_SOBRANTES):
+    """Fuente TrueType sin las tablas `tablas`, con el directorio y las sumas de control rehechos"""
+    numero = int.from_bytes(datos[4:6], "big")
+    fuente = TTFontMaker()
+    for i in range(numero):
+        entrada = datos[12 + 16 * i:28 + 16 * i]
+        etiqueta = entrada[:4]
+        if etiqueta not in tablas:
+            inicio, longitud = int.from_bytes(entrada[8:12], "big"), int.from_bytes(entrada[12:16], "big")
+            fuente.add(etiqueta.decode("latin-1"), datos[inicio:inicio + longitud])
+    return fuente.makeStream()
+
+
+def _categoria(objeto, datos):
+    diccionario = objeto.diccionario
+    if b"/Length1" in diccionario or b"/Length2" in diccionario:
+        return "ficheros de fuente"
+    if re.search(rb"/Type\s*/Font(Descriptor)?\b", diccionario) or (datos and b"begincmap" in datos):
+        return "fuentes"
+    if re.search(rb"/Subtype\s*/Form\b", diccionario):
+        return "formularios"
+    if re.search(rb"/Subtype\s*/Image\b", diccionario):
+        return "imágenes"
+    if _PAGINA.search(diccionario):
+        return "páginas"
+    return "contenido" if objeto.stream is not None else "estructura"
+
+
+def _optimizar_objeto(objeto, nivel):
+    datos = _decodificar(objeto) if objeto.stream is not None else None
+    objeto.categoria = _categoria(objeto, datos)
+    diccionario = _compactar(objeto.diccionario)
+    if datos is None:
+        objeto.diccionario = _quitar(diccionario, b"Length")
+        return
+    if objeto.categoria == "ficheros de fuente" and datos[:4] in (b"\x00\x01\x00\x00", b"true"):
+        datos = recortar_truetype(datos)
+        diccionario = _anadir(_quitar(diccionario, b"Length1"), b"/Length1 %d" % len(datos))
+    diccionario = _quitar(_quitar(diccionario, b"Filter"), b"Length")
+    comprimido = zlib.compress(datos, nivel) if nivel else datos
+    if len(comprimido) < len(datos):
+        diccionario = _anadir(diccionario, b"/Filter/FlateDecode")
+        datos = comprimido
+    objeto.diccionario, objeto.stream = _compactar(diccionario), datos
+
+
+def _renumerar(diccionario, mapa):
+    def sustituir(m):
+        if m.group(1):
+            return m.group(1)
+        return b"%d 0 R" % mapa.get(int(m.group(2)), 0)
+    return _REFERENCIA.sub(sustituir, diccionario)
+
+
+def _deduplicar(pdf):
+    """Deja un solo objeto de cada grupo de idénticos (hasta que no queden) y devuelve cuántos quitó"""
+    alias = {}
+    while True:
+        mapa = {n: alias.get(n, n) for n in pdf.objetos}
+        vistos, nuevos = {}, 0
+        for numero, objeto in pdf.objetos.items():
+            # Páginas y anotaciones pertenecen a un solo sitio aunque sean iguales
+            if numero in alias or re.search(rb"/Type\s*/(Page|Annot|Catalog)\b", objeto.diccionario):
+                continue
+            clave = (_renumerar(objeto.diccionario, mapa), objeto.stream)
+            if clave in vistos:
+                alias[numero] = vistos[clave]
+                nuevos += 1
+            else:
+                vistos[clave] = numero
+        if not nuevos:
+            break
+    for numero, original in alias.items():
+        del pdf.objetos[numero]
+        while original in alias:
+            original = alias[original]
+        alias[numero] = original
+    mapa = {**{n: n for n in pdf.objetos}, **alias}
+    for objeto in pdf.objetos.values():
+        objeto.diccionario = _renumerar(objeto.diccionario, mapa)
+    return len(alias)
+
+
+def _vivos(pdf):
+    """Objetos alcanzables desde el catálogo y la información del documento, en orden"""
+    vistos = {}
+    pendientes = [n for n in (pdf.raiz, pdf.info) if n is not None]
+    while pendientes:
+        numero = pendientes.pop()
+        if numero not in vistos and numero in pdf.objetos:
+            vistos[numero] = None
+            pendientes.extend(pdf.referencias(numero))
+    return [n for n in pdf.objetos if n in vistos]
+
+
+def _serializar(numero, objeto, mapa):
+    diccionario = _renumerar(objeto.diccionario, mapa)
+    if objeto.stream is None:
+        return b"%d 0 obj\n%s\nendobj\n" % (numero, diccionario)
+    return b"%d 0 obj\n%s\nstream\n%s\nendstream\nendobj\n" % (
+        numero, _anadir(diccionario, b"/Length %d" % len(objeto.stream)), objeto.stream)
+
+
+def _trailer(pdf, mapa, tamano, extra=b""):
+    info = b"/Info %d 0 R" % mapa[pdf.info] if pdf.info in mapa else b""
+    ident = b"/ID" + pdf.ident if pdf.ident else b""
+    return b"trailer\n<</Size %d/Root %d 0 R%s%s%s>>\n" % (tamano, mapa[pdf.raiz], info, ident, extra)
+
+
+def _cabecera(pdf):
+    return pdf.version + b"\n%\xe2\xe3\xcf\xd3\n"
+
+
+def _xref(primero, posiciones, libre=False):
+    entradas = [b"0000000000 65535 f \n"] if libre else []
+    entradas += [b"%010d 00000 n \n" % p for p in posiciones]
+    return b"xref\n%d %d\n" % (0 if libre else primero, len(entradas)) + b"".join(entradas)
+
+
+def _escribir(pdf, orden):
+    """PDF sin linealizar con los objetos de `orden` numerados desde 1"""
+    mapa = {n: i for i, n in enumerate(orden, 1)}
+    salida = bytearray(_cabecera(pdf))
+    posiciones, tamanos = [], {}
+    for numero in orden:
+        posiciones.append(len(salida))
+        objeto = _serializar(mapa[numero], pdf.objetos[numero], mapa)
+        tamanos[numero] = len(objeto)
+        salida += objeto
+    inicio_xref = len(salida)
+    salida += _xref(1, posiciones, libre=True)
+    salida += _trailer(pdf, mapa, len(orden) + 1) + b"startxref\n%d\n%%%%EOF\n" % inicio_xref
+    return bytes(salida), tamanos
+
+
+class _Bits:
+    """Escritor de enteros de ancho fijo en bits, como los de las tablas de pistas"""
+
+    def __init__(self):
+        self.datos = bytearray()
+        self.valor = 0
+        self.bits = 0
+
+    def escribir(self, valor, bits):
+        self.valor = (self.valor << bits) | valor
+        self.bits += bits
+        while self.bits >= 8:
+            self.bits -= 8
+            self.datos.append((self.valor >> self.bits) & 0xFF)
+        self.valor &= (1 << self.bits) - 1
+
+    def alinear(self):
+        if self.bits:
+            self.escribir(0, 8 - self.bits)
+
+
+def _pistas(paginas, primera, compartidos, posicion, longitud, contenido, mapa):
+    """
+    Stream de pistas (tablas F.3 a F.6 de ISO 32000-1): desplazamientos de
+    página y objetos compartidos. Las posiciones son las del fichero sin el
+    propio stream de pistas.
+    """
+    identificadores = {n: i for i, n in enumerate(primera + compartidos)}
+    filas = []
+    for i, (objetos, usados, fin) in enumerate(paginas):
+        inicio = posicion[objetos[0]]
+        stream = contenido.get(objetos[0])
+        if stream in posicion and inicio <= posicion[stream] < fin:
+            desplazamiento, tamano = posicion[stream] - inicio, longitud[stream]
+        else:
+            desplazamiento = tamano = 0
+        # La primera página no referencia objetos compartidos: los suyos están en su sección
+        ids = [] if i == 0 else [identificadores[n] for n in usados if n in identificadores]
+        filas.append((len(objetos), fin - inicio, ids, desplazamiento, tamano))
+
+    def rango(valores):
+        return min(valores), (max(valores) - min(valores)).bit_length()
+
+    pagina = _Bits()
+    objetos_min, objetos_bits = rango([f[0] for f in filas])
+    largo_min, largo_bits = rango([f[1] for f in filas])
+    desp_min, desp_bits = rango([f[3] for f in filas])
+    cont_min, cont_bits = rango([f[4] for f in filas])
+    nref_bits = max(len(f[2]) for f in filas).bit_length()
+    id_bits = max([0] + [max(f[2]) for f in filas if f[2]]).bit_length()
+    for valor, bits in ((objetos_min, 32), (posicion[paginas[0][0][0]], 32), (objetos_bits, 16), (largo_min, 32),
+                        (largo_bits, 16), (desp_min, 32), (desp_bits, 16), (cont_min, 32), (cont_bits, 16),
+                        (nref_bits, 16), (id_bits, 16), (0, 16), (DENOMINADOR_PISTAS, 16)):
+        pagina.escribir(valor, bits)
+    for columna, minimo, bits in ((0, objetos_min, objetos_bits), (1, largo_min, largo_bits)):
+        for fila in filas:
+            pagina.escribir(fila[columna] - minimo, bits)
+        pagina.alinear()
+    for fila in filas:
+        pagina.escribir(len(fila[2]), nref_bits)
+    pagina.alinear()
+    for fila in filas:
+        for identificador in fila[2]:
+            pagina.escribir(identificador, id_bits)
+    pagina.alinear()
+    for columna, minimo, bits in ((3, desp_min, desp_bits), (4, cont_min, cont_bits)):
+        for fila in filas:
+            pagina.escribir(fila[columna] - minimo, bits)
+        pagina.alinear()
+
+    grupos = primera + compartidos
+    grupo_min, grupo_bits = rango([longitud[n] for n in grupos])
+    tabla = _Bits()
+    for valor, bits in ((mapa[compartidos[0]] if compartidos else 0, 32),
+                        (posicion[compartidos[0]] if compartidos else 0, 32),
+                        (len(primera), 32), (len(grupos), 32), (0, 16), (grupo_min, 32), (grupo_bits, 16)):
+        tabla.escribir(valor, bits)
+    for numero in grupos:
+        tabla.escribir(longitud[numero] - grupo_min, grupo_bits)
+    tabla.alinear()
+    for _ in grupos:
+        tabla.escribir(0, 1)
+    tabla.alinear()
+    return bytes(pagina.datos), bytes(tabla.datos)
+
+
+def _escribir_linealizado(pdf, vivos, nivel):
+    """PDF linealizado (anexo F de ISO 32000-1) con los objetos de `vivos`"""
+    paginas = pdf.paginas()
+    alcances = [pdf.alcance(p) for p in paginas]
+    primera = alcances[0]
+    en_primera = set(primera)
+    usos = Counter(n for alcance in alcances[1:] for n in alcance if n not in en_primera)
+    propios = [[n for n in alcance if n not in en_primera and usos[n] == 1] for alcance in alcances[1:]]
+    compartidos = list(dict.fromkeys(n for alcance in alcances[1:] for n in alcance if usos.get(n, 0) > 1))
+    colocados = en_primera.union(compartidos, *propios, (pdf.raiz,))
+    otros = [n for n in vivos if n not in colocados]
+
+    # Los objetos de la primera página llevan los números más altos (tras la
+    # linealización, el catálogo y las pistas), como en el ejemplo de la norma
+    principal = [n for objetos in propios for n in objetos] + compartidos + otros
+    mapa = {n: i for i, n in enumerate(principal, 1)}
+    lineal, pistas = len(principal) + 1, len(principal) + 3
+    mapa[pdf.raiz] = len(principal) + 2
+    mapa.update({n: i for i, n in enumerate(primera, pistas + 1)})
+    total = pistas + 1 + len(primera)
+
+    objetos = {n: _serializar(mapa[n], pdf.objetos[n], mapa) for n in vivos}
+    contenido = {}
+    for pagina in paginas:
+        stream = re.search(rb"/Contents\s*\[?\s*(\d+) 0 R", pdf.objetos[pagina].diccionario)
+        contenido[pagina] = stream and int(stream.group(1))
+
+    # Partes de tamaño fijo antes de las pistas: los números van con ceros a la izquierda
+    plantilla = b"%d 0 obj\n<</Linearized 1/L %%010d/H[%%010d %%010d]/O %d/E %%010d/N %d/T %%010d>>\nendobj\n" % (
+        lineal, mapa[paginas[0]], len(paginas))
+    cabecera = _cabecera(pdf)
+    linealizacion = len(plantilla % (0, 0, 0, 0, 0))
+    inicio_xref = len(cabecera) + linealizacion
+    trailer_primera = _trailer(pdf, mapa, total, b"/Prev %010d" % 0) + b"startxref\n0\n%%EOF\n"
+    xref_primera = len(_xref(lineal, [0] * (total - lineal))) + len(trailer_primera)
+    catalogo = objetos[pdf.raiz]
+    inicio_pistas = inicio_xref + xref_primera + len(catalogo)
+
+    # Posiciones como si no hubiera stream de pistas
+    posicion, longitud = {}, {}
+    cursor = inicio_pistas
+    secciones = [primera] + propios + [compartidos, otros]
+    for seccion in secciones:
+        for numero in seccion:
+            posicion[numero], longitud[numero] = cursor, len(objetos[numero])
+            cursor += longitud[numero]
+    fin_primera = inicio_pistas + sum(longitud[n] for n in primera)
+    limites = [posicion[p] for p in paginas[1:]] + [posicion[compartidos[0]] if compartidos else
+                                                      (posicion[otros[0]] if otros else cursor)]
+    datos_paginas = [(primera, primera, fin_primera)]
+    datos_paginas += [([pagina] + [n for n in seccion if n != pagina], alcance, fin)
+                      for pagina, seccion, alcance, fin in zip(paginas[1:], propios, alcances[1:], limites[1:])]
+    tabla_paginas, tabla_compartidos = _pistas(datos_paginas, primera, compartidos, posicion, longitud, contenido,
+                                               mapa)
+    datos_pistas = tabla_paginas + tabla_compartidos
+    comprimido = zlib.compress(datos_pistas, nivel) if nivel else datos_pistas
+    filtro = b"/Filter/FlateDecode" if len(comprimido) < len(datos_pistas) else b""
+    if not filtro:
+        comprimido = datos_pistas
+    objeto_pistas = b"%d 0 obj\n<</S %d%s/Length %d>>\nstream\n%s\nendstream\nendobj\n" % (
+        pistas, len(tabla_paginas), filtro, len(comprimido), comprimido)
+    desfase = len(objeto_pistas)
+
+    cuerpo = b"".join(objetos[n] for seccion in secciones for n in seccion)
+    inicio_principal = inicio_pistas + desfase + len(cuerpo)
+    xref_principal = _xref(1, [posicion[n] + desfase for n in principal], libre=True)
+    final = b"trailer\n<</Size %d>>\nstartxref\n%d\n%%%%EOF\n" % (lineal, inicio_xref)
+    tamano = inicio_principal + len(xref_principal) + len(final)
+
+    posiciones_primera = [len(cabecera), inicio_xref + xref_primera, inicio_pistas]
+    posiciones_primera += [posicion[n] + desfase for n in primera]
+    trailer_primera = _trailer(pdf, mapa, total, b"/Prev %010d" % inicio_principal) + b"startxref\n0\n%%EOF\n"
+    principio = (cabecera
+                 + plantilla % (tamano, inicio_pistas, desfase, fin_primera + desfase,
+                                inicio_principal + len(b"xref\n0 %d" % lineal))
+                 + _xref(lineal, posiciones_primera) + trailer_primera + catalogo)
+    salida = principio + objeto_pistas + cuerpo + xref_principal + final
+    assert len(salida) == tamano
+
+    tamanos = {n: len(objetos[n]) for n in vivos}
+    return salida, tamanos
+
+
+def optimizar(datos, nivel=NIVEL_COMPRESION, linealizar=True):
+    """
+    Optimiza los bytes de un PDF de reportlab. Devuelve (bytes optimizados,
+    InformeTamano). `nivel` es el de zlib (0 escribe los streams sin comprimir).
+    """
+    pdf = leer_pdf(datos)
+    informe = InformeTamano(linealizado=linealizar)
+    for objeto in pdf.objetos.values():
+        _optimizar_objeto(objeto, nivel)
+        fila = informe.categorias[objeto.categoria]
+        fila[0] += 1
+        fila[1] += objeto.bytes_antes
+    informe.duplicados = _deduplicar(pdf)
+    vivos = _vivos(pdf)
+    informe.descartados = len(pdf.objetos) - len(vivos)
+    if linealizar:
+        salida, tamanos = _escribir_linealizado(pdf, vivos, nivel)
+    else:
+        salida, tamanos = _escribir(pdf, vivos)
+    for numero, tamano in tamanos.items():
+        fila = informe.categorias[pdf.objetos[numero].categoria]
+        fila[2] += 1
+        fila[3] += tamano
+    informe.categorias["referencias"][1] = len(datos) - informe.antes
+    informe.categorias["referencias"][3] = len(salida) - sum(tamanos.values())
+    return salida, informe
@@ -0,0 +1,164 @@
+"""
+Maquetación en paralelo - Lumier Casas Boutique
+
+Los documentos son secuencias de secciones separadas por PageBreak, y cada
+sección se maqueta sin mirar a las demás: lo único que las une es la
+numeración de header_footer ("Página {doc.page}") y la portada que dibuja
+first_page. construir_en_paralelo reparte las secciones entre procesos. Cada
+worker maqueta las suyas y guarda el contenido de sus páginas sin encabezado
+ni pie (lumier_pdf.costura, como la caché de secciones). El proceso
+principal cose cada sección según le llega, en orden, y hace un único
+doc.build que dibuja la portada, los encabezados y pies con la numeración
+global y una entrada del índice del PDF (outline) por sección. Si el documento tiene un índice automático
+(lumier_pdf.indice), los workers guardan los encabezados de cada página y el
+outline sale de ellos.
+
+    doc = gm.build_portfolio(proyectos, "cartera.pdf", workers=8)
+    doc = gm.build_pdf("manual.pdf", workers=4)
+
+Las páginas que usan recursos propios (los Form XObjects de los gráficos,
+imágenes) o anotaciones no se pueden coser: sus secciones se maquetan en el
+proceso principal durante el build final. Los workers construyen sus flowables
+con build_styles(); si el documento usa otros estilos, todas sus secciones se
+maquetan en el proceso principal.
+"""
+
+import io
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import closing
+from itertools import repeat
+from xml.sax.saxutils import unescape
+
+from reportlab.platypus import Flowable, PageBreak, SimpleDocTemplate
+
+from lumier_pdf import batch
+from lumier_pdf.cache import huella
+from lumier_pdf.costura import CanvasCaptura, MarcaSeccion, coser, tras_decorar
+from lumier_pdf.fuentes import simbolos
+from lumier_pdf.indice import Indice
+
+# Trabajos que recibe cada worker por envío, como fracción del reparto justo
+TROZOS_POR_WORKER = 4
+
+# Huella de los estilos de este worker, calculada en su primer trabajo
+_huella_estilos = None
+
+
+class EntradaIndice(Flowable):
+    """Marca la página en la que se dibuja y la añade al índice del PDF"""
+
+    def __init__(self, titulo, clave, nivel=0):
+        Flowable.__init__(self)
+        self.titulo = titulo
+        self.clave = clave
+        self.nivel = nivel
+
+    def wrap(self, availWidth, availHeight):
+        return (0, 0)
+
+    def draw(self):
+        self.canv.bookmarkPage(self.clave)
+        self.canv.addOutlineEntry(self.titulo, self.clave, level=self.nivel)
+
+
+def titulo_seccion(flowables):
+    """Texto (sin marcas) del primer flowable que lo tiene: la cabecera de la sección"""
+    for flowable in flowables:
+        texto = getattr(flowable, "text", None)
+        if isinstance(texto, str) and texto.strip():
+            return unescape(re.sub(r"<[^>]*>", "", texto)).strip()
+    return None
+
+
+class _CanvasTrabajo(CanvasCaptura):
+    """Canvas de captura de un worker: el PDF del worker no se escribe"""
+
+    def save(self):
+        pass
+
+
+def _geometria(doc):
+    return (doc.pagesize, doc.leftMargin, doc.rightMargin, doc.topMargin, doc.bottomMargin)
+
+
+def _maquetar(trabajo, geometria, estilos, nivel=None):
+    """
+    En un worker: (título, páginas) de una sección, con páginas None si no se
+    pueden coser o si el documento no usa los estilos del worker. Con `nivel`
+    (el del Indice del documento), cada página guarda sus encabezados.
+    """
+    global _huella_estilos
+    if _huella_estilos is None:
+        _huella_estilos = huella(batch._styles)
+    if estilos != _huella_estilos:
+        return None, None
+
+    # Como en el proceso principal, los flowables se crean y se maquetan con la fuente de símbolos
+    with simbolos():
+        flowables = trabajo(styles=batch._styles)
+        titulo = titulo_seccion(flowables)
+        pagesize, izquierdo, derecho, superior, inferior = geometria
+        doc = SimpleDocTemplate(io.BytesIO(), pagesize=pagesize, leftMargin=izquierdo, rightMargin=derecho,
+                                topMargin=superior, bottomMargin=inferior)
+        if nivel is not None:
+            Indice(nivel, None).instalar(doc)
+        capturas = {0: []}
+        canvasmaker = type("CanvasTrabajo", (_CanvasTrabajo,), {"capturas": capturas})
+        # Sin encabezado ni pie: los dibuja el build final
+        sin_decorar = tras_decorar(lambda canvas, doc: None)
+        doc.build([MarcaSeccion(0), *flowables], onFirstPage=sin_decorar, onLaterPages=sin_decorar,
+                  canvasmaker=canvasmaker)
+    return titulo, capturas[0]
+
+
+def _en_workers(trabajos, workers, geometria, estilos, nivel):
+    """
+    Resultados de _maquetar, en el orden de `trabajos`, según los entregan los
+    workers: cada uno se puede coser en cuanto llega, sin esperar a los demás
+    ni guardarlos todos. Cerrar el generador cierra el pool.
+    """
+    if not trabajos:
+        return
+    trozo = max(1, len(trabajos) // (workers * TROZOS_POR_WORKER))
+    with ProcessPoolExecutor(workers, initializer=batch._init_worker) as pool:
+        yield from pool.map(_maquetar, trabajos, repeat(geometria), repeat(estilos), repeat(nivel), chunksize=trozo)
+
+
+def construir_en_paralelo(doc, secciones, onFirstPage, onLaterPages, styles, workers=None):
+    """
+    doc.build con las secciones maquetadas en `workers` procesos (por defecto,
+    uno por CPU). `secciones` es una lista de (trabajo, producir): en un worker,
+    trabajo(styles=...) devuelve los flowables de la sección, así que debe
+    poder enviarse a otro proceso (una función de módulo o un
+    functools.partial); producir() los devuelve en este proceso, con `styles`.
+    Con trabajo None la sección se maqueta aquí. Entre dos secciones se
+    inserta un PageBreak. En doc.parallel_sections queda cuántas secciones se
+    cosieron desde los workers.
+    """
+    indice_documento = getattr(doc, "indice", None)
+    trabajos = [trabajo for trabajo, _ in secciones if trabajo is not None]
+    resultados = _en_workers(trabajos, workers or os.cpu_count() or 1, _geometria(doc), huella(styles),
+                             indice_documento and indice_documento.nivel)
+    story = []
+    cosidas = 0
+    with closing(resultados):
+        for indice, (trabajo, producir) in enumerate(secciones):
+            if indice:
+                story.append(PageBreak())
+            titulo, paginas = next(resultados) if trabajo is not None else (None, None)
+            if paginas is None:
+                flowables = producir()
+                titulo = titulo_seccion(flowables)
+            if titulo and indice_documento is None:
+                story.append(EntradaIndice(titulo, f"seccion{indice}"))
+            if paginas is None:
+                story.extend(flowables)
+                continue
+            cosidas += 1
+            story.extend(coser(paginas))
+
+    doc.build(story, onFirstPage=onFirstPage, onLaterPages=onLaterPages)
+    doc.parallel_sections = cosidas
+    return doc
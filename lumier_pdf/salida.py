@@ -0,0 +1,219 @@
+"""
+Salida en streaming de los PDF - Lumier Casas Boutique
+
+ReportLab formatea todos los objetos del documento al guardar y los une en un
+único bytes antes de escribirlo, así que el PDF serializado llega a estar dos
+veces en memoria. Aquí cada objeto se envía al destino (fichero, stdout,
+socket, respuesta HTTP...) según se formatea, agrupado en bloques.
+
+    write_pdf(lambda out: build_pdf(out), sys.stdout.buffer)
+    for bloque in iter_pdf(lambda out: build_dossier(proyecto, out)):
+        respuesta.write(bloque)
+    with streaming(respuesta.write):
+        canvas.save()
+
+`build` es cualquier función que construya un documento sobre el `output`
+que recibe (build_pdf, build_dossier, ManualTemplate.render...). Las dos
+usan streaming(), que sirve también a quien guarda el documento por su
+cuenta (el canvas de lumier_pdf.memoria); en_streaming() dice si el hilo
+actual ya tiene un destino activo. Quien construye un PDF intermedio y
+escribe otro (build_pdf con optimize) lo hace dentro de sin_streaming() y
+manda el resultado con escribir().
+
+ReportLab crea el PDFFile desde pdfdoc.PDFDocument.format() con el nombre
+global pdfdoc.PDFFile, sin forma de pasarle otra clase. StreamingPDFFile solo
+ocupa ese nombre mientras algún hilo tiene una salida en streaming en curso
+y se restaura el original al terminar la última; entretanto, los documentos
+de otros hilos, sin destino, se guardan igual que con el original.
+"""
+
+import io
+import queue
+import threading
+from contextlib import contextmanager
+
+from reportlab.pdfbase import pdfdoc
+
+TAMANO_BLOQUE = 64 * 1024
+
+_local = threading.local()
+
+# Salidas en streaming en curso (en cualquier hilo) y PDFFile que había antes
+_activas = 0
+_original = None
+_cerrojo = threading.Lock()
+
+
+class StreamingPDFFile(pdfdoc.PDFFile):
+    """
+    PDFFile que, si el hilo actual tiene un destino activo, le envía cada
+    fragmento en lugar de acumularlo. Sin destino se comporta como el original.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        destino = getattr(_local, "destino", None)
+        if destino is not None:
+            for fragmento in self.strings:
+                destino(fragmento)
+            self.strings = []
+            self.write = destino
+
+
+class _Bloques:
+    """Agrupa fragmentos pequeños en bloques de `tamano` bytes"""
+
+    def __init__(self, write, tamano=TAMANO_BLOQUE):
+        self._write = write
+        self._tamano = tamano
+        self._partes = []
+        self._acumulado = 0
+
+    def __call__(self, fragmento):
+        self._partes.append(fragmento)
+        self._acumulado += len(fragmento)
+        if self._acumulado >= self._tamano:
+            self.flush()
+
+    def flush(self):
+        if self._partes:
+            self._write(b"".join(self._partes))
+            self._partes = []
+            self._acumulado = 0
+
+
+@contextmanager
+def _pdffile_streaming():
+    """pdfdoc.PDFFile es StreamingPDFFile mientras dura alguno de estos bloques"""
+    global _activas, _original
+    with _cerrojo:
+        if not _activas:
+            _original = pdfdoc.PDFFile
+            pdfdoc.PDFFile = StreamingPDFFile
+        _activas += 1
+    try:
+        yield
+    finally:
+        with _cerrojo:
+            _activas -= 1
+            if not _activas:
+                pdfdoc.PDFFile = _original
+                _original = None
+
+
+def en_streaming():
+    """True si los PDF que se guarden en este hilo ya salen por bloques a un destino"""
+    return getattr(_local, "destino", None) is not None
+
+
+@contextmanager
+def streaming(write, tamano_bloque=TAMANO_BLOQUE):
+    """Durante el bloque, los PDF guardados en este hilo se envían a `write`"""
+    bloques = _Bloques(write, tamano_bloque)
+    anterior = getattr(_local, "destino", None)
+    _local.destino = bloques
+    try:
+        with _pdffile_streaming():
+            yield
+            bloques.flush()
+    finally:
+        _local.destino = anterior
+
+
+@contextmanager
+def sin_streaming():
+    """
+    Durante el bloque, los PDF guardados en este hilo se escriben en su propio
+    `output`, aunque haya una salida en streaming en curso. Sirve para
+    construir un PDF intermedio (para optimizarlo, por ejemplo) y mandar
+    después el resultado con escribir().
+    """
+    anterior = getattr(_local, "destino", None)
+    _local.destino = None
+    try:
+        yield
+    finally:
+        _local.destino = anterior
+
+
+def escribir(datos, output):
+    """
+    Escribe los bytes de un PDF ya formateado en `output` (una ruta o un
+    fichero abierto en binario) o, si el hilo tiene una salida en streaming
+    en curso, en su destino, como los PDF que guarda reportlab.
+    """
+    destino = getattr(_local, "destino", None)
+    if destino is not None:
+        # Por bloques, como si los fragmentos vinieran de reportlab
+        vista = memoryview(datos)
+        for inicio in range(0, len(vista), destino._tamano):
+            destino(vista[inicio:inicio + destino._tamano])
+    elif hasattr(output, "write"):
+        output.write(datos)
+    else:
+        with open(output, "wb") as fichero:
+            fichero.write(datos)
+
+
+def write_pdf(build, destino, tamano_bloque=TAMANO_BLOQUE):
+    """
+    Construye un PDF escribiéndolo en `destino` por bloques. `destino` es una
+    ruta o cualquier objeto con write() (para un socket, sock.makefile("wb")).
+    """
+    if not hasattr(destino, "write"):
+        with open(destino, "wb") as fichero:
+            return write_pdf(build, fichero, tamano_bloque)
+    with streaming(destino.write, tamano_bloque):
+        # ReportLab solo escribirá b"": el contenido ya ha salido por bloques
+        return build(destino)
+
+
+class _Cancelado(Exception):
+    pass
+
+
+def iter_pdf(build, tamano_bloque=TAMANO_BLOQUE, max_bloques=16):
+    """
+    Generador de bloques de bytes del PDF. El documento se construye en un hilo
+    y como mucho `max_bloques` bloques esperan a ser consumidos.
+    """
+    cola = queue.Queue(maxsize=max_bloques)
+    cancelado = threading.Event()
+    fin = object()
+
+    def enviar(bloque):
+        while True:
+            if cancelado.is_set():
+                raise _Cancelado()
+            try:
+                cola.put(bloque, timeout=0.1)
+                return
+            except queue.Full:
+                pass
+
+    def producir():
+        try:
+            with streaming(enviar, tamano_bloque):
+                build(io.BytesIO())
+            enviar(fin)
+        except _Cancelado:
+            pass
+        except BaseException as exc:
+            try:
+                enviar(exc)
+            except _Cancelado:
+                pass
+
+    hilo = threading.Thread(target=producir, name="iter_pdf", daemon=True)
+    hilo.start()
+    try:
+        while True:
+            bloque = cola.get()
+            if bloque is fin:
+                break
+            if isinstance(bloque, BaseException):
+                raise bloque
+            yield bloque
+    finally:
+        cancelado.set()
+        hilo.join()
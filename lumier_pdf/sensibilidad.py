@@ -0,0 +1,93 @@
+"""
+Análisis de sensibilidad - Lumier Casas Boutique
+
+Evalúa un proyecto sobre una rejilla N×M de dos entradas (precio de compra o
+de venta, coste de reforma €/m², meses, tipo de interés, deuda) con el modelo
+de costes completo de calculos.py. Los valores de un eje se difunden como
+columna y los del otro como fila, así que toda la rejilla se calcula en una
+sola pasada del motor.
+
+    rejilla = sensibilidad(proyecto, "precio_compra", variacion(proyecto, "precio_compra", n=200),
+                           "precio_venta", variacion(proyecto, "precio_venta", n=200))
+    rejilla.margen   # array (200, 200): filas = eje y, columnas = eje x
+"""
+
+from dataclasses import dataclass
+
+import numpy as np
+
+from lumier_pdf.calculos import VALORES_POR_DEFECTO, calcular
+from lumier_pdf.montecarlo import coste_m2_reforma
+
+# Ejes admitidos y su etiqueta en los informes
+EJES = {
+    "precio_compra": "Precio Compra",
+    "precio_venta": "Precio Venta",
+    "coste_m2": "Coste Reforma €/m²",
+    "meses": "Meses",
+    "interes_financiero": "Interés",
+    "deuda": "Deuda",
+}
+
+
+def valor_base(proyecto, eje):
+    """Valor actual de un eje en el proyecto"""
+    if eje not in EJES:
+        raise ValueError(f"Eje desconocido: {eje} (admitidos: {', '.join(EJES)})")
+    if eje == "coste_m2":
+        return coste_m2_reforma(proyecto)
+    return float(proyecto.get(eje, VALORES_POR_DEFECTO.get(eje, 0.0)))
+
+
+def variacion(proyecto, eje, desde=-0.10, hasta=0.10, n=5):
+    """`n` valores del eje entre -10% y +10% (por defecto) de su valor actual"""
+    return valor_base(proyecto, eje) * (1 + np.linspace(desde, hasta, n))
+
+
+def _entrada(proyecto, eje, valores):
+    """Convierte los valores de un eje en la columna del motor que le corresponde"""
+    if eje == "coste_m2":
+        # El motor escala la tabla de calidades; coste_m2 / coste actual da el factor
+        base = coste_m2_reforma(proyecto) / proyecto.get("factor_coste_reforma", 1.0)
+        return "factor_coste_reforma", valores / base
+    return eje, valores
+
+
+@dataclass
+class Rejilla:
+    """Resultado de una rejilla de sensibilidad; cada array tiene forma (len(y), len(x))"""
+    eje_x: str
+    valores_x: np.ndarray
+    eje_y: str
+    valores_y: np.ndarray
+    resultados: dict
+
+    @property
+    def forma(self):
+        return (len(self.valores_y), len(self.valores_x))
+
+    @property
+    def margen(self):
+        return self.resultados["margen"]
+
+    def __getitem__(self, metrica):
+        return self.resultados[metrica]
+
+
+def sensibilidad(proyecto, eje_x, valores_x, eje_y, valores_y):
+    """Calcula el proyecto en todas las combinaciones de `valores_x` × `valores_y`"""
+    if eje_x == eje_y:
+        raise ValueError(f"Los dos ejes deben ser distintos: {eje_x}")
+    for eje in (eje_x, eje_y):
+        valor_base(proyecto, eje)
+
+    valores_x = np.asarray(valores_x, dtype=np.float64)
+    valores_y = np.asarray(valores_y, dtype=np.float64)
+    columna_x, x = _entrada(proyecto, eje_x, valores_x)
+    columna_y, y = _entrada(proyecto, eje_y, valores_y)
+
+    entradas = dict(proyecto)
+    entradas[columna_x] = x[np.newaxis, :]
+    entradas[columna_y] = y[:, np.newaxis]
+    resultados = calcular(entradas)
+    return Rejilla(eje_x, valores_x, eje_y, valores_y, resultados)
@@ -0,0 +1,393 @@
+"""
+Servicio de dossiers - Lumier Casas Boutique
+
+Servidor HTTP local (asyncio, solo biblioteca estándar) para que la web pida
+dossiers bajo demanda en lugar de lanzar un proceso por documento:
+
+    python -m lumier_pdf serve --port 8000 --workers 4 --cache .cache/dossiers
+
+    POST /dossier[?sensibilidad=1&flujo_caja=1&simulaciones=10000&graficos=0]
+         cuerpo: un proyecto (formato del motor, CalculatorData o fila de
+         project_versions) → application/pdf
+    GET  /health   estado, workers y cola
+    GET  /metrics  contadores y latencias en JSON
+
+Los dossiers se renderizan en un pool de procesos que importan reportlab y
+construyen los estilos al arrancar (batch._init_worker). Cada PDF se guarda
+por la huella de sus entradas y del código que lo genera: una petición
+repetida se sirve de la caché sin pasar por el pool, y varias peticiones
+iguales a la vez comparten un único render. Como mucho hay `workers`
+dossiers en el pool; si además hay `cola` peticiones esperando, las nuevas
+reciben 503 con Retry-After. Pasado `timeout` la petición recibe 504, pero el
+render sigue y su resultado queda en la caché.
+"""
+
+import asyncio
+import hashlib
+import io
+import json
+import os
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import ProcessPoolExecutor
+from urllib.parse import parse_qsl, urlsplit
+
+from lumier_pdf import batch
+from lumier_pdf.calculos import CAMPOS_OBLIGATORIOS
+from lumier_pdf.carga import normalizar
+from lumier_pdf.formato import formatear_numero
+
+# Peticiones que pueden esperar a un worker libre antes de devolver 503
+TAMANO_COLA = 32
+
+# Segundos que espera una petición por su dossier antes de devolver 504
+TIMEOUT = 60.0
+
+# Bytes de PDFs que se guardan en memoria (los más recientes)
+CACHE_MEMORIA = 256 * 2**20
+
+# Tamaño máximo del cuerpo de una petición
+MAX_CUERPO = 2**20
+
+# Latencias de render que se guardan para los percentiles de /metrics
+MUESTRAS_LATENCIA = 1000
+
+# Opciones de la query de /dossier y el argumento de build_dossier que activan
+OPCIONES = {"sensibilidad": "sensitivity", "flujo_caja": "cash_flow", "simulaciones": "simulation_draws",
+            "graficos": "charts"}
+
+ESTADOS_HTTP = {
+    200: "OK", 304: "Not Modified", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+    413: "Payload Too Large", 422: "Unprocessable Entity", 500: "Internal Server Error",
+    503: "Service Unavailable", 504: "Gateway Timeout",
+}
+
+
+class ErrorHTTP(Exception):
+    """Error que se devuelve al cliente con su código de estado"""
+
+    def __init__(self, estado, mensaje, cabeceras=None):
+        super().__init__(mensaje)
+        self.estado = estado
+        self.cabeceras = cabeceras or {}
+
+
+def _generar(proyecto, opciones):
+    """Renderiza un dossier en un worker del pool y devuelve los bytes del PDF"""
+    from lumier_pdf import manual
+
+    buffer = io.BytesIO()
+    manual.build_dossier(proyecto, buffer, styles=batch._styles, **opciones)
+    return buffer.getvalue()
+
+
+def _calentar():
+    """Huella del código que renderiza, calculada en el worker (que ya ha importado lumier_pdf.manual)"""
+    from lumier_pdf.cache import huella_codigo
+
+    return huella_codigo("lumier_pdf.manual")
+
+
+class CachePDF:
+    """
+    PDFs por clave: los más recientes en memoria (hasta `maximo` bytes) y, si
+    hay `directorio`, todos en disco.
+    """
+
+    def __init__(self, maximo=CACHE_MEMORIA, directorio=None):
+        self.maximo = maximo
+        self.directorio = directorio
+        self.bytes = 0
+        self._memoria = OrderedDict()
+
+    def _ruta(self, clave):
+        return os.path.join(self.directorio, f"{clave}.pdf")
+
+    def leer(self, clave):
+        """Bytes del PDF, o None"""
+        pdf = self._memoria.get(clave)
+        if pdf is not None:
+            self._memoria.move_to_end(clave)
+            return pdf
+        if self.directorio:
+            try:
+                with open(self._ruta(clave), "rb") as fichero:
+                    pdf = fichero.read()
+            except OSError:
+                return None
+            self._recordar(clave, pdf)
+        return pdf
+
+    def guardar(self, clave, pdf):
+        self._recordar(clave, pdf)
+        if self.directorio:
+            os.makedirs(self.directorio, exist_ok=True)
+            temporal = f"{self._ruta(clave)}.{os.getpid()}.tmp"
+            with open(temporal, "wb") as fichero:
+                fichero.write(pdf)
+            os.replace(temporal, self._ruta(clave))
+
+    def _recordar(self, clave, pdf):
+        if len(pdf) > self.maximo:
+            return
+        anterior = self._memoria.pop(clave, None)
+        self.bytes += len(pdf) - (len(anterior) if anterior else 0)
+        self._memoria[clave] = pdf
+        while self.bytes > self.maximo:
+            _, olvidado = self._memoria.popitem(last=False)
+            self.bytes -= len(olvidado)
+
+    def __len__(self):
+        return len(self._memoria)
+
+
+class ServicioDossiers:
+    """
+    Cola, pool de workers y caché del servicio. Se usa como context manager
+    asíncrono, que arranca y calienta el pool:
+
+        async with ServicioDossiers(workers=4) as servicio:
+            pdf, acierto = await servicio.dossier(proyecto)
+    """
+
+    def __init__(self, workers=None, cola=TAMANO_COLA, timeout=TIMEOUT, cache=None, generar=_generar):
+        self.workers = workers or os.cpu_count() or 1
+        self.cola = cola
+        self.timeout = timeout
+        self.cache = cache if cache is not None else CachePDF()
+        self._generar = generar
+        self._pool = None
+        self._plazas = None
+        self._codigo = None
+        self._en_vuelo = {}
+        self._latencias = deque(maxlen=MUESTRAS_LATENCIA)
+        self.esperando = 0
+        self.en_curso = 0
+        self.contadores = dict.fromkeys(
+            ("peticiones", "aciertos", "compartidas", "generados", "errores", "rechazadas", "timeouts"), 0)
+        self.inicio = time.time()
+
+    async def __aenter__(self):
+        self._pool = ProcessPoolExecutor(self.workers, initializer=batch._init_worker)
+        self._plazas = asyncio.Semaphore(self.workers)
+        # Sin workers libres, cada envío arranca uno: así todos importan
+        # reportlab antes de la primera petición
+        bucle = asyncio.get_running_loop()
+        huellas = await asyncio.gather(*(bucle.run_in_executor(self._pool, _calentar) for _ in range(self.workers)))
+        self._codigo = huellas[0]
+        return self
+
+    async def __aexit__(self, *exc):
+        self._pool.shutdown(wait=True, cancel_futures=True)
+
+    def clave(self, proyecto, opciones):
+        """Huella de las entradas del dossier y del código que lo genera"""
+        entradas = json.dumps([proyecto, opciones], sort_keys=True, default=str)
+        return hashlib.sha256(f"{self._codigo}\0{entradas}".encode()).hexdigest()
+
+    async def dossier(self, proyecto, opciones=None):
+        """(bytes del PDF, True si venía de la caché); lanza ErrorHTTP si no se puede servir"""
+        opciones = opciones or {}
+        self.contadores["peticiones"] += 1
+        clave = self.clave(proyecto, opciones)
+        pdf = self.cache.leer(clave)
+        if pdf is not None:
+            self.contadores["aciertos"] += 1
+            return pdf, True
+
+        tarea = self._en_vuelo.get(clave)
+        if tarea is not None:
+            self.contadores["compartidas"] += 1
+        else:
+            if self.esperando + self.en_curso >= self.workers + self.cola:
+                self.contadores["rechazadas"] += 1
+                raise ErrorHTTP(503, "Cola llena", {"Retry-After": "1"})
+            # Cuenta como esperando desde ya, no desde que la tarea empiece
+            self.esperando += 1
+            tarea = asyncio.ensure_future(self._renderizar(clave, proyecto, opciones))
+            self._en_vuelo[clave] = tarea
+            tarea.add_done_callback(lambda t: self._terminada(clave, t))
+        try:
+            # shield: si esta petición se cansa de esperar, el render sigue
+            return await asyncio.wait_for(asyncio.shield(tarea), self.timeout), False
+        except asyncio.TimeoutError:
+            self.contadores["timeouts"] += 1
+            raise ErrorHTTP(504, f"El dossier no estuvo listo en {formatear_numero(self.timeout, 1)} s") from None
+
+    def _terminada(self, clave, tarea):
+        del self._en_vuelo[clave]
+        # El error ya se ha entregado a quien esperaba; si todos se cansaron, se descarta
+        if not tarea.cancelled():
+            tarea.exception()
+
+    async def _renderizar(self, clave, proyecto, opciones):
+        try:
+            await self._plazas.acquire()
+        finally:
+            self.esperando -= 1
+        self.en_curso += 1
+        inicio = time.perf_counter()
+        try:
+            bucle = asyncio.get_running_loop()
+            pdf = await bucle.run_in_executor(self._pool, self._generar, proyecto, opciones)
+        except Exception as exc:
+            self.contadores["errores"] += 1
+            raise ErrorHTTP(500, f"{type(exc).__name__}: {exc}") from exc
+        finally:
+            self.en_curso -= 1
+            self._plazas.release()
+        self._latencias.append(time.perf_counter() - inicio)
+        self.contadores["generados"] += 1
+        await asyncio.to_thread(self.cache.guardar, clave, pdf)
+        return pdf
+
+    def percentil(self, p):
+        """Latencia de render (segundos) en el percentil p, de 0 a 100"""
+        latencias = sorted(self._latencias)
+        if not latencias:
+            return 0.0
+        return latencias[max(0, -(-p * len(latencias) // 100) - 1)]
+
+    def salud(self):
+        return {"estado": "ok", "workers": self.workers, "en_curso": self.en_curso, "esperando": self.esperando,
+                "cola": self.cola}
+
+    def metricas(self):
+        return {
+            **self.contadores,
+            "en_curso": self.en_curso,
+            "esperando": self.esperando,
+            "cache_pdfs": len(self.cache),
+            "cache_bytes": self.cache.bytes,
+            "latencia_p50": self.percentil(50),
+            "latencia_p95": self.percentil(95),
+            "segundos_activo": time.time() - self.inicio,
+        }
+
+
+def _opciones(query):
+    opciones = {}
+    for nombre, valor in parse_qsl(query):
+        if nombre not in OPCIONES:
+            raise ErrorHTTP(400, f"Opción desconocida: {nombre}")
+        try:
+            opciones[OPCIONES[nombre]] = int(valor)
+        except ValueError:
+            raise ErrorHTTP(400, f"{nombre} debe ser un entero") from None
+    return opciones
+
+
+def _proyecto(cuerpo):
+    try:
+        registro = json.loads(cuerpo)
+    except ValueError as exc:
+        raise ErrorHTTP(400, f"JSON no válido: {exc}") from None
+    if not isinstance(registro, dict):
+        raise ErrorHTTP(400, "Se esperaba un objeto JSON con el proyecto")
+    try:
+        proyecto = normalizar(registro)
+    except (KeyError, TypeError, ValueError) as exc:
+        raise ErrorHTTP(422, f"Proyecto no válido: {type(exc).__name__}: {exc}") from None
+    faltan = [campo for campo in CAMPOS_OBLIGATORIOS if proyecto.get(campo) is None]
+    if faltan:
+        raise ErrorHTTP(422, f"Faltan campos obligatorios: {', '.join(faltan)}")
+    return proyecto
+
+
+async def _leer_peticion(lector):
+    """(método, ruta, cabeceras, cuerpo) de la siguiente petición, o None si el cliente cerró"""
+    linea = await lector.readline()
+    if not linea.strip():
+        return None
+    try:
+        metodo, ruta, _ = linea.decode("latin-1").split()
+    except ValueError:
+        raise ErrorHTTP(400, "Línea de petición no válida") from None
+    cabeceras = {}
+    while (linea := await lector.readline()) not in (b"\r\n", b"\n", b""):
+        nombre, _, valor = linea.decode("latin-1").partition(":")
+        cabeceras[nombre.strip().lower()] = valor.strip()
+    longitud = cabeceras.get("content-length") or "0"
+    if not (longitud.isascii() and longitud.isdigit()):
+        raise ErrorHTTP(400, f"Content-Length no válido: {longitud}")
+    longitud = int(longitud)
+    if longitud > MAX_CUERPO:
+        raise ErrorHTTP(413, f"El cuerpo supera {MAX_CUERPO} bytes")
+    cuerpo = await lector.readexactly(longitud) if longitud else b""
+    return metodo.upper(), ruta, cabeceras, cuerpo
+
+
+def _respuesta(escritor, estado, cuerpo, tipo="application/json", cabeceras=None, cerrar=False):
+    lineas = [f"HTTP/1.1 {estado} {ESTADOS_HTTP[estado]}", f"Content-Type: {tipo}",
+              f"Content-Length: {len(cuerpo)}", f"Connection: {'close' if cerrar else 'keep-alive'}"]
+    lineas += [f"{nombre}: {valor}" for nombre, valor in (cabeceras or {}).items()]
+    escritor.write(("\r\n".join(lineas) + "\r\n\r\n").encode("latin-1") + cuerpo)
+
+
+def _json(datos):
+    return json.dumps(datos, ensure_ascii=False).encode()
+
+
+async def _atender(servicio, metodo, ruta, cabeceras, cuerpo):
+    """(estado, cuerpo, tipo, cabeceras) de una petición"""
+    partes = urlsplit(ruta)
+    if partes.path == "/health":
+        return 200, _json(servicio.salud()), "application/json", {}
+    if partes.path == "/metrics":
+        return 200, _json(servicio.metricas()), "application/json", {}
+    if partes.path != "/dossier":
+        raise ErrorHTTP(404, f"No existe {partes.path}")
+    if metodo != "POST":
+        raise ErrorHTTP(405, "Usa POST /dossier", {"Allow": "POST"})
+
+    opciones = _opciones(partes.query)
+    proyecto = _proyecto(cuerpo)
+    etag = f'"{servicio.clave(proyecto, opciones)}"'
+    if cabeceras.get("if-none-match") == etag and servicio.cache.leer(etag.strip('"')) is not None:
+        servicio.contadores["peticiones"] += 1
+        servicio.contadores["aciertos"] += 1
+        return 304, b"", "application/pdf", {"ETag": etag}
+    pdf, acierto = await servicio.dossier(proyecto, opciones)
+    return 200, pdf, "application/pdf", {"ETag": etag, "X-Cache": "hit" if acierto else "miss"}
+
+
+async def _conexion(servicio, lector, escritor):
+    try:
+        while True:
+            cerrar = True
+            try:
+                peticion = await _leer_peticion(lector)
+                if peticion is None:
+                    break
+                metodo, ruta, cabeceras, cuerpo = peticion
+                cerrar = cabeceras.get("connection", "").lower() == "close"
+                estado, datos, tipo, extra = await _atender(servicio, metodo, ruta, cabeceras, cuerpo)
+            except ErrorHTTP as exc:
+                estado, datos, tipo, extra = exc.estado, _json({"error": str(exc)}), "application/json", exc.cabeceras
+            except (asyncio.IncompleteReadError, ConnectionError):
+                break
+            except Exception as exc:
+                # Un fallo inesperado se responde con 500 y cierra la conexión en lugar de cortarla
+                servicio.contadores["errores"] += 1
+                datos = _json({"error": f"{type(exc).__name__}: {exc}"})
+                estado, tipo, extra, cerrar = 500, "application/json", {}, True
+            _respuesta(escritor, estado, datos, tipo, extra, cerrar)
+            await escritor.drain()
+            if cerrar:
+                break
+    finally:
+        escritor.close()
+
+
+async def servir(host="127.0.0.1", puerto=8000, listo=None, **kwargs):
+    """
+    Arranca el servicio y atiende peticiones hasta que se cancele. Los kwargs
+    van a ServicioDossiers; `listo`, si se da, es un asyncio.Future que recibe
+    (servidor, servicio) al empezar a escuchar.
+    """
+    async with ServicioDossiers(**kwargs) as servicio:
+        servidor = await asyncio.start_server(lambda l, e: _conexion(servicio, l, e), host, puerto)
+        async with servidor:
+            if listo is not None:
+                listo.set_result((servidor, servicio))
+            await servidor.serve_forever()
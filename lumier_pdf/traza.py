@@ -0,0 +1,216 @@
+"""
+Trazas de construcción - Lumier Casas Boutique
+
+Mide en qué se va el tiempo al generar un documento: cada fase (montaje de
+la story, doc.build), cada sección y gráfico, el wrap/split/draw de cada clase
+de flowable, los callbacks de inicio de página (onFirstPage/onLaterPages) y
+el cierre de cada página (showPage). El resultado se guarda como traza JSON
+de Chrome (chrome://tracing o ui.perfetto.dev) y se resume en una tabla.
+
+    with Traza() as traza:
+        build_dossier(proyecto, "dossier.pdf")
+    traza.guardar("dossier.trace.json")
+    print(traza.resumen())
+
+Sin una Traza activa no hay ningún parche instalado: las funciones marcadas
+con @trazar solo comprueban una variable global antes de llamar a la
+original.
+"""
+
+import functools
+import json
+import os
+import threading
+import time
+
+from lumier_pdf.formato import formatear_numero, formatear_porcentaje
+
+# Traza activa (solo puede haber una a la vez)
+_activa = None
+
+# Métodos de los flowables que se miden (Frame llama a wrap y split
+# directamente) y cómo se llaman en la traza
+_METODOS_FLOWABLE = {"wrap": "wrap", "split": "split", "drawOn": "draw"}
+
+# Hilo ficticio de la traza de Chrome en el que se dibujan las páginas
+_TID_PAGINAS = 0
+
+
+def trazar(categoria):
+    """Decorador: con una Traza activa, cada llamada es un evento de `categoria`"""
+    def decorador(funcion):
+        nombre = funcion.__qualname__
+
+        @functools.wraps(funcion)
+        def envuelta(*args, **kwargs):
+            if _activa is None:
+                return funcion(*args, **kwargs)
+            return _activa.medir(categoria, nombre, funcion, *args, **kwargs)
+        return envuelta
+    return decorador
+
+
+def _metodo_flowable(funcion, operacion):
+    @functools.wraps(funcion)
+    def envuelta(self, *args, **kwargs):
+        return _activa.medir("flowable", f"{type(self).__name__}.{operacion}", funcion, self, *args, **kwargs)
+    return envuelta
+
+
+def _metodo_documento(funcion, categoria, nombre):
+    @functools.wraps(funcion)
+    def envuelta(doc, *args, **kwargs):
+        return _activa.medir(categoria, nombre, funcion, doc, *args, **kwargs)
+    return envuelta
+
+
+def _inicio_pagina(funcion):
+    @functools.wraps(funcion)
+    def envuelta(doc):
+        doc._traza_inicio_pagina = time.perf_counter_ns()
+        return _activa.medir("pagina", "inicio de página (onPage)", funcion, doc)
+    return envuelta
+
+
+def _fin_pagina(funcion):
+    @functools.wraps(funcion)
+    def envuelta(doc):
+        pagina = doc.page
+        try:
+            return _activa.medir("pagina", "fin de página (showPage)", funcion, doc)
+        finally:
+            inicio = getattr(doc, "_traza_inicio_pagina", None)
+            if inicio is not None:
+                _activa.pagina(pagina, inicio, time.perf_counter_ns())
+    return envuelta
+
+
+def _subclases(clase):
+    for subclase in clase.__subclasses__():
+        yield subclase
+        yield from _subclases(subclase)
+
+
+class Traza:
+    """Eventos de una construcción; se activa como context manager"""
+
+    def __init__(self):
+        self.eventos = []
+        self.paginas = []
+        self.inicio = None
+        self.fin = None
+        self._pilas = {}
+        self._parches = []
+
+    def medir(self, categoria, nombre, funcion, *args, **kwargs):
+        """Llama a funcion(*args, **kwargs) y registra su duración y su tiempo propio"""
+        pila = self._pilas.setdefault(threading.get_ident(), [])
+        pila.append(0)
+        inicio = time.perf_counter_ns()
+        try:
+            return funcion(*args, **kwargs)
+        finally:
+            duracion = time.perf_counter_ns() - inicio
+            hijos = pila.pop()
+            if pila:
+                pila[-1] += duracion
+            self.eventos.append((categoria, nombre, threading.get_ident(), inicio, duracion, duracion - hijos))
+
+    def pagina(self, numero, inicio, fin):
+        self.paginas.append((numero, inicio, fin - inicio))
+
+    def _parchear(self, clase, atributo, envoltura):
+        original = clase.__dict__[atributo]
+        self._parches.append((clase, atributo, original))
+        setattr(clase, atributo, envoltura(original))
+
+    def __enter__(self):
+        global _activa
+        if _activa is not None:
+            raise RuntimeError("Ya hay una traza activa")
+        from reportlab.platypus.doctemplate import BaseDocTemplate
+        from reportlab.platypus.flowables import Flowable
+
+        for clase in (Flowable, *_subclases(Flowable)):
+            for metodo, operacion in _METODOS_FLOWABLE.items():
+                if metodo in clase.__dict__:
+                    self._parchear(clase, metodo, lambda f, operacion=operacion: _metodo_flowable(f, operacion))
+        self._parchear(BaseDocTemplate, "build", lambda f: _metodo_documento(f, "fase", "doc.build"))
+        # SimpleDocTemplate.handle_pageBegin llama al alias _handle_pageBegin
+        self._parchear(BaseDocTemplate, "handle_pageBegin", _inicio_pagina)
+        self._parchear(BaseDocTemplate, "_handle_pageBegin", _inicio_pagina)
+        self._parchear(BaseDocTemplate, "handle_pageEnd", _fin_pagina)
+
+        _activa = self
+        self.inicio = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc):
+        global _activa
+        self.fin = time.perf_counter_ns()
+        _activa = None
+        for clase, atributo, original in reversed(self._parches):
+            setattr(clase, atributo, original)
+        self._parches = []
+
+    @property
+    def duracion(self):
+        """Duración total de la traza en segundos"""
+        return ((self.fin or time.perf_counter_ns()) - self.inicio) / 1e9
+
+    def chrome(self):
+        """Traza en el formato JSON de Chrome (eventos completos 'X', en microsegundos)"""
+        pid = os.getpid()
+        eventos = [
+            {"name": "process_name", "ph": "M", "pid": pid, "args": {"name": "Lumier PDF"}},
+            {"name": "thread_name", "ph": "M", "pid": pid, "tid": _TID_PAGINAS, "args": {"name": "Páginas"}},
+        ]
+        for categoria, nombre, tid, inicio, duracion, propio in self.eventos:
+            eventos.append({
+                "name": nombre, "cat": categoria, "ph": "X", "pid": pid, "tid": tid,
+                "ts": (inicio - self.inicio) / 1000, "dur": duracion / 1000,
+                "args": {"propio_ms": propio / 1e6},
+            })
+        for numero, inicio, duracion in self.paginas:
+            eventos.append({
+                "name": f"Página {numero}", "cat": "pagina", "ph": "X", "pid": pid, "tid": _TID_PAGINAS,
+                "ts": (inicio - self.inicio) / 1000, "dur": duracion / 1000,
+            })
+        return {"traceEvents": eventos, "displayTimeUnit": "ms"}
+
+    def guardar(self, ruta):
+        """Escribe la traza de Chrome en `ruta`"""
+        with open(ruta, "w", encoding="utf-8") as fichero:
+            json.dump(self.chrome(), fichero, ensure_ascii=False)
+
+    def totales(self):
+        """(categoría, nombre) -> [llamadas, segundos totales, segundos propios]"""
+        totales = {}
+        for categoria, nombre, _, _, duracion, propio in self.eventos:
+            fila = totales.setdefault((categoria, nombre), [0, 0.0, 0.0])
+            fila[0] += 1
+            fila[1] += duracion / 1e9
+            fila[2] += propio / 1e9
+        return totales
+
+    def resumen(self, limite=25):
+        """Tabla de los eventos con más tiempo propio y estadísticas por página"""
+        total = self.duracion
+        lineas = [
+            f"Traza: {formatear_numero(total * 1000, 1)} ms, {len(self.paginas)} páginas",
+            f"  {'categoría':10} {'nombre':40} {'llamadas':>9} {'total (ms)':>11} {'propio (ms)':>12} {'propio':>8}",
+        ]
+        filas = sorted(self.totales().items(), key=lambda kv: -kv[1][2])
+        for (categoria, nombre), (llamadas, segundos, propio) in filas[:limite]:
+            lineas.append(
+                f"  {categoria:10} {nombre[:40]:40} {llamadas:>9} {formatear_numero(segundos * 1000, 2):>11} "
+                f"{formatear_numero(propio * 1000, 2):>12} {formatear_porcentaje(propio / total * 100, 1):>8}"
+            )
+        if self.paginas:
+            duraciones = [d / 1e6 for _, _, d in self.paginas]
+            numero, _, maxima = max(self.paginas, key=lambda p: p[2])
+            lineas.append(
+                f"Páginas: media {formatear_numero(sum(duraciones) / len(duraciones), 2)} ms, "
+                f"máxima {formatear_numero(maxima / 1e6, 2)} ms (página {numero})"
+            )
+        return "\n".join(lineas)
@@ -0,0 +1,298 @@
+"""
+Vista previa - Lumier Casas Boutique
+
+La web enseña la página "EJEMPLO COMPLETO" y la clasificación del proyecto
+mientras se editan los datos, y para eso no hace falta construir el manual
+entero. Una VistaPrevia guarda la plantilla compilada del manual
+(ManualTemplate: estilos, fuentes y flowables estáticos) y maqueta solo las
+secciones pedidas, con la numeración de páginas que tienen en el manual:
+
+    vista = VistaPrevia()
+    pdf = vista.render(proyecto, secciones="ejemplo completo").contenido[0]
+    pngs = vista.render(proyecto, paginas=(11, 12), formato="png").contenido
+    svg = vista.clasificacion(proyecto, formato="svg").contenido[0]
+
+Las secciones se eligen por su índice en ManualTemplate.sections o por un
+texto de su título (sin distinguir mayúsculas ni acentos) y las páginas por
+su número en el manual. De una página pedida se maqueta su sección entera,
+pero las páginas fuera del rango no se escriben. Para numerar hay que saber
+cuántas páginas ocupan las secciones anteriores: las estáticas se maquetan
+una vez por proceso y las que dependen del proyecto, una vez por proyecto. Al
+maquetarlas se guardan también sus encabezados, que son los que necesita la
+página del índice (ver lumier_pdf.indice).
+
+PNG y SVG se obtienen del PDF con pymupdf, que solo se importa al pedirlos
+(reportlab solo sabe dibujar en PNG o SVG objetos Drawing, no páginas).
+"""
+
+import io
+import json
+import time
+import unicodedata
+from collections import OrderedDict
+from dataclasses import dataclass, field, replace
+
+from reportlab.pdfgen.canvas import Canvas
+from reportlab.platypus import Flowable, PageBreak, Spacer
+from reportlab.platypus.doctemplate import ActionFlowable
+
+from lumier_pdf import manual as gm
+from lumier_pdf.calculos import EJEMPLO_COMPLETO, calcular_proyecto
+from lumier_pdf.indice import HuecoIndice
+
+# Formatos de salida y su tipo MIME
+TIPOS = {"pdf": "application/pdf", "png": "image/png", "svg": "image/svg+xml"}
+
+# Escala de los PNG respecto a 72 ppp (1,5 = 108 ppp)
+ESCALA_PNG = 1.5
+
+# Títulos de las secciones que en el esqueleto son funciones con datos del proyecto
+TITULOS_SECCIONES = {
+    "project_section": "EJEMPLO COMPLETO DE CÁLCULO",
+    "cash_flow_section": "FLUJO DE CAJA MENSUAL",
+    "sensitivity_section": "9. ANÁLISIS DE SENSIBILIDAD",
+    "simulation_section": "ANÁLISIS DE ESCENARIOS (MONTE CARLO)",
+}
+
+# Proyectos de los que se recuerdan las páginas y encabezados de sus secciones
+MAX_PROYECTOS = 32
+
+
+@dataclass
+class Vista:
+    """Resultado de una vista previa: un PDF, o una imagen por página"""
+    formato: str
+    paginas: list
+    contenido: list = field(repr=False)
+    segundos: float = 0.0
+
+    @property
+    def tipo(self):
+        return TIPOS[self.formato]
+
+
+def _normalizar(texto):
+    """Texto en minúsculas y sin acentos, para buscar secciones por título"""
+    descompuesto = unicodedata.normalize("NFKD", texto.casefold())
+    return "".join(c for c in descompuesto if not unicodedata.combining(c))
+
+
+class _Numerar(ActionFlowable):
+    """Hace que la página siguiente lleve el número `numero`"""
+
+    def __init__(self, numero):
+        ActionFlowable.__init__(self)
+        self.numero = numero
+
+    def apply(self, doc):
+        # handle_pageBegin suma uno al empezar la página
+        doc.page = self.numero - 1
+
+
+class _CanvasRango(Canvas):
+    """Canvas que solo escribe las páginas (contadas desde 1) de `rango`"""
+
+    rango = None
+
+    def showPage(self):
+        if self._pageNumber in self.rango:
+            Canvas.showPage(self)
+        else:
+            # La página se descarta, pero el documento sigue contando páginas
+            if self._onPage:
+                self._onPage(self._pageNumber)
+            self._startPage()
+
+
+def rasterizar(pdf, formato, escala=ESCALA_PNG):
+    """Una imagen PNG o SVG por página de `pdf` (necesita pymupdf)"""
+    try:
+        import pymupdf
+    except ImportError:
+        raise ImportError("La vista previa en PNG o SVG necesita pymupdf (pip install pymupdf)") from None
+    with pymupdf.open(stream=pdf, filetype="pdf") as documento:
+        if formato == "svg":
+            return [pagina.get_svg_image(text_as_path=False).encode() for pagina in documento]
+        matriz = pymupdf.Matrix(escala, escala)
+        return [pagina.get_pixmap(matrix=matriz).tobytes("png") for pagina in documento]
+
+
+class VistaPrevia:
+    """
+    Plantilla del manual lista para maquetar secciones sueltas. Una instancia
+    sirve para todas las vistas previas del proceso.
+    """
+
+    def __init__(self, styles=None):
+        self.template = gm.ManualTemplate(styles)
+        self.titulos = [self._titulo(seccion) for seccion in self.template.sections]
+        self._paginas_estaticas = {}
+        self._paginas_proyecto = OrderedDict()
+
+    @staticmethod
+    def _titulo(seccion):
+        if not seccion:
+            return "PORTADA"
+        primero = seccion[0]
+        if isinstance(primero, Flowable):
+            return getattr(primero, "text", "")
+        return TITULOS_SECCIONES.get(primero.__name__, primero.__name__)
+
+    def seccion(self, seccion):
+        """Índice de una sección dada por su índice o por un texto de su título"""
+        if isinstance(seccion, int):
+            if not 0 <= seccion < len(self.titulos):
+                raise IndexError(f"El manual tiene {len(self.titulos)} secciones")
+            return seccion
+        buscado = _normalizar(seccion)
+        for indice, titulo in enumerate(self.titulos):
+            if buscado in _normalizar(titulo):
+                return indice
+        raise KeyError(f"Ninguna sección del manual se llama {seccion!r}")
+
+    def _story(self, indices, proyecto, resultado, inicios):
+        story = []
+        for indice in indices:
+            if story:
+                # Entre dos secciones no contiguas la numeración salta como en el manual
+                story.append(_Numerar(inicios[indice]))
+                story.append(PageBreak())
+            # La portada no tiene flowables: la dibuja first_page
+            story.extend(self.template.fill(self.template.sections[indice], proyecto, resultado)
+                         or [Spacer(1, 0)])
+        return story
+
+    @gm.with_symbols
+    def _maquetar(self, salida, indices, proyecto, resultado, inicios=None, rango=None, use_forms=True,
+                  entradas=None):
+        """
+        Maqueta las secciones `indices`; la página i del manual empieza en
+        inicios[i]. `entradas` son los encabezados del manual para el índice.
+        """
+        inicios = inicios or {indices[0]: 1}
+        doc = gm.manual_index(entradas).instalar(gm.new_document(salida, "Manual Técnico de Cálculos"))
+        # handle_documentBegin pone page a 0 y después llama a beforeDocument
+        doc.beforeDocument = lambda: setattr(doc, "page", inicios[indices[0]] - 1)
+        if use_forms:
+            on_first_page, on_later_pages = gm.first_page_form, gm.header_footer_form
+        else:
+            on_first_page, on_later_pages = gm.first_page, gm.header_footer
+        if indices[0] != 0:
+            on_first_page = on_later_pages
+        canvasmaker = Canvas if rango is None else type("CanvasRango", (_CanvasRango,), {"rango": rango})
+        doc.build(self._story(indices, proyecto, resultado, inicios), onFirstPage=on_first_page,
+                  onLaterPages=on_later_pages, canvasmaker=canvasmaker)
+        return doc
+
+    def _maquetada(self, indice, proyecto, resultado):
+        """
+        (páginas, encabezados) de una sección maquetada sola, con las páginas
+        contadas desde 1: las estáticas se recuerdan para todo el proceso
+        """
+        seccion = self.template.sections[indice]
+        if all(isinstance(item, Flowable) for item in seccion):
+            recordadas = self._paginas_estaticas
+            clave = indice
+        else:
+            recordadas = self._paginas_proyecto
+            clave = (indice, json.dumps(proyecto, sort_keys=True, default=str))
+        maquetada = recordadas.get(clave)
+        if maquetada is None:
+            doc = self._maquetar(io.BytesIO(), [indice], proyecto, resultado, use_forms=False)
+            maquetada = (doc.page, doc.indice.entradas)
+            if recordadas is self._paginas_proyecto and len(recordadas) >= MAX_PROYECTOS * len(self.titulos):
+                recordadas.popitem(last=False)
+            recordadas[clave] = maquetada
+        return maquetada
+
+    def paginas_seccion(self, indice, proyecto, resultado):
+        """Páginas que ocupa una sección"""
+        return self._maquetada(indice, proyecto, resultado)[0]
+
+    def encabezados(self, proyecto, resultado):
+        """Encabezados del manual con su página, los que lista el índice"""
+        entradas = []
+        inicio = 1
+        for indice in range(len(self.titulos)):
+            paginas, encabezados = self._maquetada(indice, proyecto, resultado)
+            entradas += [replace(entrada, pagina=inicio + entrada.pagina - 1) for entrada in encabezados]
+            inicio += paginas
+        return entradas
+
+    def construir(self, salida, proyecto=None, secciones=None, paginas=None, use_forms=True):
+        """
+        Maqueta en `salida` las `secciones` (un índice, un título o una lista
+        de ellos) o las secciones de `paginas` (un número o un par desde-hasta
+        del manual) y devuelve el documento, con doc.preview_pages los números
+        de página escritos.
+        """
+        proyecto = proyecto or EJEMPLO_COMPLETO
+        resultado = calcular_proyecto(proyecto)
+        if (secciones is None) == (paginas is None):
+            raise ValueError("Indica secciones o páginas, pero no ambas")
+
+        inicios = [1]
+        if secciones is not None:
+            if isinstance(secciones, (int, str)):
+                secciones = [secciones]
+            indices = sorted({self.seccion(seccion) for seccion in secciones})
+            for indice in range(indices[-1]):
+                inicios.append(inicios[-1] + self.paginas_seccion(indice, proyecto, resultado))
+            rango = None
+        else:
+            desde, hasta = (paginas, paginas) if isinstance(paginas, int) else paginas
+            if not 1 <= desde <= hasta:
+                raise ValueError(f"Rango de páginas no válido: {desde}-{hasta}")
+            indices = []
+            for indice in range(len(self.titulos)):
+                fin = inicios[-1] + self.paginas_seccion(indice, proyecto, resultado)
+                if fin > desde:
+                    indices.append(indice)
+                if fin > hasta:
+                    break
+                inicios.append(fin)
+            else:
+                if not indices:
+                    raise ValueError(f"El manual tiene {inicios[-1] - 1} páginas")
+            rango = range(desde - inicios[indices[0]] + 1, hasta - inicios[indices[0]] + 2)
+
+        entradas = None
+        if any(isinstance(item, HuecoIndice) for indice in indices for item in self.template.sections[indice]):
+            entradas = self.encabezados(proyecto, resultado)
+
+        inicio = inicios[indices[0]]
+        doc = self._maquetar(salida, indices, proyecto, resultado, inicios, rango, use_forms, entradas)
+        fines = [inicios[indice + 1] for indice in indices[:-1]] + [doc.page + 1]
+        doc.preview_pages = [
+            numero for indice, fin in zip(indices, fines) for numero in range(inicios[indice], fin)
+            if rango is None or numero - inicio + 1 in rango
+        ]
+        return doc
+
+    def render(self, proyecto=None, secciones=None, paginas=None, formato="pdf", escala=ESCALA_PNG):
+        """Vista previa en memoria en `formato` (pdf, png o svg)"""
+        if formato not in TIPOS:
+            raise ValueError(f"Formato desconocido: {formato} (usa {', '.join(TIPOS)})")
+        inicio = time.perf_counter()
+        buffer = io.BytesIO()
+        doc = self.construir(buffer, proyecto, secciones, paginas)
+        pdf = buffer.getvalue()
+        contenido = [pdf] if formato == "pdf" else rasterizar(pdf, formato, escala)
+        return Vista(formato, doc.preview_pages, contenido, time.perf_counter() - inicio)
+
+    def clasificacion(self, proyecto=None, formato="pdf", escala=ESCALA_PNG):
+        """MarginIndicator con la clasificación y el margen del proyecto, en una página de su tamaño"""
+        if formato not in TIPOS:
+            raise ValueError(f"Formato desconocido: {formato} (usa {', '.join(TIPOS)})")
+        inicio = time.perf_counter()
+        resultado = calcular_proyecto(proyecto or EJEMPLO_COMPLETO)
+        indicador = gm.MarginIndicator(clasificacion=int(resultado["clasificacion"]), margen=resultado["margen"])
+        ancho, alto = indicador.wrap(0, 0)
+        buffer = io.BytesIO()
+        lienzo = Canvas(buffer, pagesize=(ancho, alto))
+        indicador.drawOn(lienzo, 0, 0)
+        lienzo.showPage()
+        lienzo.save()
+        pdf = buffer.getvalue()
+        contenido = [pdf] if formato == "pdf" else rasterizar(pdf, formato, escala)
+        return Vista(formato, [1], contenido, time.perf_counter() - inicio)